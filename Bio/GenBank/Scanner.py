@@ -28,10 +28,66 @@ ftp://ftp.ncbi.nih.gov/genbank/docs/
 
 import warnings
 import re
+from StringIO import StringIO
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio.Alphabet import generic_protein
 
+
+class _LazySeqRecord(SeqRecord):
+    """SeqRecord which only parses its feature table when needed (PRIVATE).
+
+    This is used by the InsdcScanner parse_records method when called with
+    lazy_features=True. The raw lines of the feature table are kept, and
+    only turned into SeqFeature objects when the features property is first
+    used. This saves a lot of time if you only want the identifiers and
+    sequences, or if you only want the features of a few records.
+
+    Note that any problems in the feature table are only reported when the
+    features are parsed.
+    """
+    #Tuple of the scanner class, feature table lines, sequence type and
+    #expected sequence length (or None if already parsed):
+    _raw_features = None
+
+    def _get_features(self):
+        if self._raw_features is not None:
+            scanner_class, lines, seq_type, expected_size = self._raw_features
+            self._features = _parse_raw_features(scanner_class, lines,
+                                                 seq_type, expected_size)
+            self._raw_features = None
+        return self._features
+
+    def _set_features(self, value):
+        self._raw_features = None
+        self._features = value
+
+    features = property(fget=_get_features, fset=_set_features,
+                        doc="List of SeqFeature objects (parsed on first use)")
+
+
+def _parse_raw_features(scanner_class, lines, seq_type, expected_size):
+    """Turn the raw lines of a feature table into SeqFeature objects (PRIVATE).
+
+    The first line should be the start of the feature table marker, as
+    returned by the InsdcScanner _read_feature_table method. The sequence
+    type and expected length are needed to interpret the locations.
+    """
+    from Bio.GenBank import _FeatureConsumer
+    from Bio.GenBank.utils import FeatureValueCleaner
+    consumer = _FeatureConsumer(use_fuzziness = 1,
+                feature_cleaner = FeatureValueCleaner())
+    consumer._seq_type = seq_type
+    consumer._expected_size = expected_size
+    scanner = scanner_class()
+    #Add a sequence header line to mark the end of the features
+    scanner.set_handle(StringIO("".join(lines[1:]) \
+                                + scanner.SEQUENCE_HEADERS[0] + "\n"))
+    scanner.line = lines[0]
+    scanner._feed_feature_table(consumer, scanner.parse_features(skip=False))
+    return consumer.data.features
+
+
 class InsdcScanner(object):
     """Basic functions for breaking up a GenBank/EMBL file into sub sections.
 
@@ -189,6 +245,40 @@ class InsdcScanner(object):
         self.line = line
         return features
 
+    def _read_feature_table(self):
+        """Return list of strings making up the feature table, or None (PRIVATE).
+
+        This reads the feature table without parsing it, for use with lazy
+        feature parsing. The first string is the start of the feature table
+        marker, and the rest are the lines as read from the handle (with any
+        new line characters). The handle is left in the same place as the
+        parse_features method would leave it.
+
+        Assumes you have already read to the start of the features table.
+        """
+        if self.line.rstrip() not in self.FEATURE_START_MARKERS:
+            if self.debug : print "Didn't find any feature table"
+            return None
+
+        lines = [self.line.rstrip()]
+        while True:
+            line = self.handle.readline()
+            if not line:
+                raise ValueError("Premature end of line during features table")
+            if line[:self.HEADER_WIDTH].rstrip() in self.SEQUENCE_HEADERS:
+                if self.debug : print "Found start of sequence"
+                break
+            lines.append(line)
+            line = line.rstrip()
+            if line == "//":
+                raise ValueError("Premature end of features table, marker '//' found")
+            if line in self.FEATURE_END_MARKERS:
+                if self.debug : print "Found end of features"
+                line = self.handle.readline()
+                break
+        self.line = line
+        return lines
+
     def parse_feature(self, feature_key, lines):
         """Expects a feature as a list of strings, returns a tuple (key, location, qualifiers)
 
@@ -364,7 +454,7 @@ class InsdcScanner(object):
         """
         pass
 
-    def feed(self, handle, consumer, do_features=True):
+    def feed(self, handle, consumer, do_features=True, lazy_features=False):
         """Feed a set of data into the consumer.
 
         This method is intended for use with the "old" code in Bio.GenBank
@@ -374,6 +464,9 @@ class InsdcScanner(object):
         consumer - The consumer that should be informed of events.
         do_features - Boolean, should the features be parsed?
                       Skipping the features can be much faster.
+        lazy_features - Boolean, should the raw feature table be passed to
+                      the consumer (via its raw_feature_table method) to be
+                      parsed later if required?
 
         Return values:
         true  - Passed a record
@@ -396,7 +489,11 @@ class InsdcScanner(object):
         self._feed_header_lines(consumer, self.parse_header())
 
         #Features (common to both EMBL and GenBank):
-        if do_features:
+        if do_features and lazy_features:
+            consumer.start_feature_table()
+            consumer.raw_feature_table(self.__class__,
+                                       self._read_feature_table())
+        elif do_features:
             self._feed_feature_table(consumer, self.parse_features(skip=False))
         else:
             self.parse_features(skip=True) # ignore the data
@@ -414,9 +511,12 @@ class InsdcScanner(object):
         #And we are done
         return True
 
-    def parse(self, handle, do_features=True):
+    def parse(self, handle, do_features=True, lazy_features=False):
         """Returns a SeqRecord (with SeqFeatures if do_features=True)
 
+        If lazy_features=True, the feature table is only parsed into
+        SeqFeature objects when the record's features are first used.
+
         See also the method parse_records() for use on multi-record files.
         """
         from Bio.GenBank import _FeatureConsumer
@@ -424,25 +524,30 @@ class InsdcScanner(object):
 
         consumer = _FeatureConsumer(use_fuzziness = 1, 
                     feature_cleaner = FeatureValueCleaner())
+        if do_features and lazy_features:
+            #Use a SeqRecord subclass which can hold the raw feature table
+            consumer.data = _LazySeqRecord(None, id = None)
+            consumer.data.description = ""
 
-        if self.feed(handle, consumer, do_features):
+        if self.feed(handle, consumer, do_features, lazy_features):
             return consumer.data
         else:
             return None
 
     
-    def parse_records(self, handle, do_features=True):
+    def parse_records(self, handle, do_features=True, lazy_features=False):
         """Returns a SeqRecord object iterator
 
         Each record (from the ID/LOCUS line to the // line) becomes a SeqRecord
 
-        The SeqRecord objects include SeqFeatures if do_features=True
+        The SeqRecord objects include SeqFeatures if do_features=True, which
+        are only parsed when first used if lazy_features=True
         
         This method is intended for use in Bio.SeqIO
         """
         #This is a generator function
         while True:
-            record = self.parse(handle, do_features)
+            record = self.parse(handle, do_features, lazy_features)
             if record is None : break
             assert record.id is not None
             assert record.name != "<unknown name>"
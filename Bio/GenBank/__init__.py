@@ -910,6 +910,16 @@ class _FeatureConsumer(_BaseGenBankConsumer):
             self.data.annotations['references'].append(self._cur_reference)
             self._cur_reference = None
 
+    def raw_feature_table(self, scanner_class, lines):
+        """Keep the unparsed feature table, to be parsed only if needed.
+
+        The record should be a SeqRecord subclass with a _raw_features
+        attribute, see Bio.GenBank.Scanner for details.
+        """
+        if lines:
+            self.data._raw_features = (scanner_class, lines,
+                                       self._seq_type, self._expected_size)
+
     def feature_key(self, content):
         # start a new feature
         self._cur_feature = SeqFeature.SeqFeature()
@@ -15,12 +15,14 @@ __docformat__ ="epytext en" #Don't just use plain text in epydoc API pages!
 
 import string #for maketrans only
 import array
+import bisect
 import sys
 
 from Bio import Alphabet
 from Bio.Alphabet import IUPAC
 from Bio.Data.IUPACData import ambiguous_dna_complement, ambiguous_rna_complement
 from Bio.Data import CodonTable
+from Bio._py3k import _bytes_to_string, _as_bytes
 
 def _maketrans(complement_mapping):
     """Makes a python string translation table (PRIVATE).
@@ -1495,6 +1497,665 @@ class UnknownSeq(Seq):
         else :
             return Seq("", s.alphabet)
 
+class BufferSeq(Seq):
+    """A read-only sequence object which is a view of a shared buffer.
+
+    A normal Seq object holds its own string, and slicing it makes a copy of
+    the selected region. A BufferSeq instead records a buffer (a string, a
+    bytearray, or a memory mapped file) plus the start and end of the region
+    it covers, so slicing it just gives another view of the same buffer.
+    This is useful when taking many windows from a large sequence such as a
+    whole chromosome:
+
+    >>> from Bio.Seq import BufferSeq
+    >>> from Bio.Alphabet import generic_dna
+    >>> chrom = BufferSeq("ACGTNNGATTACAGGCCTTAAGG" * 3, generic_dna)
+    >>> window = chrom[4:16]
+    >>> window
+    BufferSeq('NNGATTACAGGC', DNAAlphabet())
+    >>> window.find("GATTACA")
+    2
+    >>> window.count("G")
+    3
+    >>> print window[2:9]
+    GATTACA
+
+    The sequence is only copied when needed, for example with str(my_seq),
+    when making a MutableSeq with the tomutable method, or when a method such
+    as reverse_complement returns a new (normal) Seq object:
+
+    >>> window.reverse_complement()
+    Seq('GCCTGTAATCNN', DNAAlphabet())
+
+    Note that the find, rfind, count methods and the 'in' keyword work
+    directly on the buffer without copying the sequence. Since a view can
+    keep a very large buffer in memory, use str(my_seq) or Seq(str(my_seq))
+    to keep a small region of it on its own. You should not change the
+    contents of a mutable buffer (e.g. a bytearray) while views of it exist.
+    """
+    def __init__(self, data, alphabet = Alphabet.generic_alphabet,
+                 start=0, end=None):
+        """Create a new BufferSeq object.
+
+        Arguments:
+         - data     - Sequence buffer, required (e.g. string, bytearray or
+                      memory mapped file)
+         - alphabet - Optional argument, an Alphabet object from Bio.Alphabet
+         - start    - Optional offset of the start of the sequence in the
+                      buffer (default zero)
+         - end      - Optional offset of the end of the sequence in the
+                      buffer (default the end of the buffer)
+        """
+        if hasattr(data, "alphabet") or not hasattr(data, "__getitem__"):
+            raise TypeError("The sequence data given to a BufferSeq object "
+                            "should be a string or buffer (not a Seq object "
+                            "etc)")
+        if end is None:
+            end = len(data)
+        if not 0 <= start <= end <= len(data):
+            raise ValueError("Invalid start %i and end %i for buffer of "
+                             "length %i" % (start, end, len(data)))
+        self._buffer = data
+        self._start = start
+        self._end = end
+        self.alphabet = alphabet
+
+    @property
+    def _data(self):
+        #Used by some of the Seq methods, makes a copy of the sequence
+        return str(self)
+
+    def __len__(self):
+        """Returns the length of the sequence, use len(my_seq)."""
+        return self._end - self._start
+
+    def __str__(self):
+        """Returns the full sequence as a python string (a copy)."""
+        data = self._buffer[self._start:self._end]
+        if not isinstance(data, basestring):
+            #e.g. bytearray
+            data = _bytes_to_string(bytes(data))
+        return data
+
+    def __repr__(self):
+        """Returns a (truncated) representation of the sequence for debugging."""
+        if len(self) > 60:
+            #Only copy the letters we show
+            return "%s('%s...%s', %s)" % (self.__class__.__name__,
+                                         str(self[:54]), str(self[-3:]),
+                                         repr(self.alphabet))
+        else:
+            return "%s(%s, %s)" % (self.__class__.__name__,
+                                   repr(str(self)),
+                                   repr(self.alphabet))
+
+    def __getitem__(self, index):
+        """Returns a subsequence of single letter, use my_seq[index].
+
+        Slices with a step of one return another view of the buffer, other
+        slices a new Seq object.
+        """
+        length = self._end - self._start
+        if isinstance(index, int):
+            if index < 0:
+                index += length
+            if not 0 <= index < length:
+                raise IndexError("BufferSeq index out of range")
+            index += self._start
+            return str(BufferSeq(self._buffer, self.alphabet,
+                                 index, index + 1))
+        start, end, step = index.indices(length)
+        if step == 1:
+            end = max(start, end)
+            return BufferSeq(self._buffer, self.alphabet,
+                             self._start + start, self._start + end)
+        #Offload to the base class (copying just the region used)...
+        if step > 0:
+            return Seq(str(self[start:end]), self.alphabet)[::step]
+        return Seq(str(self), self.alphabet)[index]
+
+    def __add__(self, other):
+        #Offload to the base class...
+        return Seq(str(self), self.alphabet) + other
+
+    def __radd__(self, other):
+        #Offload to the base class...
+        return other + Seq(str(self), self.alphabet)
+
+    def _buffer_range(self, start, end):
+        """Convert start and end to buffer offsets, or None if empty (PRIVATE).
+
+        Follows the python string conventions, so a start after the end of
+        the sequence gives None (no matches, even for an empty string).
+        """
+        length = self._end - self._start
+        if start < 0:
+            start = max(0, start + length)
+        elif start > length:
+            return None
+        if end < 0:
+            end = max(0, end + length)
+        elif end > length:
+            end = length
+        return self._start + start, self._start + end
+
+    def _search_str(self, sub):
+        """Get the search string, checking any alphabet (PRIVATE)."""
+        sub_str = self._get_seq_str_and_check_alphabet(sub)
+        if isinstance(self._buffer, basestring):
+            return sub_str
+        return _as_bytes(sub_str)
+
+    def count(self, sub, start=0, end=sys.maxint):
+        """Non-overlapping count method, like that of a python string.
+
+        This behaves like the Seq object method of the same name, but
+        works directly on the buffer without copying the sequence.
+
+        >>> from Bio.Seq import BufferSeq
+        >>> my_seq = BufferSeq("xxxAAAATGAxxx", start=3, end=10)
+        >>> print my_seq
+        AAAATGA
+        >>> print my_seq.count("A")
+        5
+        >>> print my_seq.count("AT", 2, -1)
+        1
+        """
+        sub_str = self._search_str(sub)
+        offsets = self._buffer_range(start, end)
+        if offsets is None:
+            return 0
+        start, end = offsets
+        if not sub_str:
+            #Python counts the empty string at every position
+            return max(0, end - start + 1)
+        try:
+            return self._buffer.count(sub_str, start, end)
+        except AttributeError:
+            #e.g. memory mapped files have find but not count
+            pass
+        count = 0
+        find = self._buffer.find
+        start = find(sub_str, start, end)
+        while start != -1:
+            count += 1
+            start = find(sub_str, start + len(sub_str), end)
+        return count
+
+    def __contains__(self, char):
+        """Implements the 'in' keyword, searching the buffer directly."""
+        return self.find(char) != -1
+
+    def find(self, sub, start=0, end=sys.maxint):
+        """Find method, like that of a python string.
+
+        This behaves like the Seq object method of the same name, but
+        works directly on the buffer without copying the sequence.
+
+        >>> from Bio.Seq import BufferSeq
+        >>> my_rna = BufferSeq("GUCAUGGCCAUUGUAAUGGGCCGCUGAAAGGGUGCCCGAUAGUUG")
+        >>> my_rna[1:].find("AUG")
+        2
+        """
+        sub_str = self._search_str(sub)
+        offsets = self._buffer_range(start, end)
+        if offsets is None:
+            return -1
+        index = self._buffer.find(sub_str, offsets[0], offsets[1])
+        if index == -1:
+            return -1
+        return index - self._start
+
+    def rfind(self, sub, start=0, end=sys.maxint):
+        """Find from right method, like that of a python string.
+
+        This behaves like the Seq object method of the same name, but
+        works directly on the buffer without copying the sequence.
+
+        >>> from Bio.Seq import BufferSeq
+        >>> my_rna = BufferSeq("GUCAUGGCCAUUGUAAUGGGCCGCUGAAAGGGUGCCCGAUAGUUG")
+        >>> my_rna[:30].rfind("AUG")
+        15
+        """
+        sub_str = self._search_str(sub)
+        offsets = self._buffer_range(start, end)
+        if offsets is None:
+            return -1
+        index = self._buffer.rfind(sub_str, offsets[0], offsets[1])
+        if index == -1:
+            return -1
+        return index - self._start
+
+#Two bit codes used by the PackedSeq object, A=0, C=1, G=2, T=3, with the
+#first base of each group of four in the high bits of the byte.
+_packed_letters = "ACGT"
+_packed_words = [a + b + c + d for a in _packed_letters
+                 for b in _packed_letters
+                 for c in _packed_letters
+                 for d in _packed_letters]
+_packed_encode = dict((word, chr(i)) for i, word in enumerate(_packed_words))
+#Keyed on both single byte strings (Python 2) and integers (Python 3 bytes)
+_packed_decode = dict((chr(i), word) for i, word in enumerate(_packed_words))
+_packed_decode.update(enumerate(_packed_words))
+#Replaces anything except ACGT with A (as code zero, see the exceptions)
+_packed_clean_table = "".join([(chr(i) in _packed_letters and chr(i)) or "A" \
+                               for i in range(256)])
+#Complementing the codes is just 3 - code, i.e. inverting all the bits
+_packed_complement_table = _as_bytes("".join([chr(255 - i) \
+                                              for i in range(256)]))
+_packed_reverse_complement_table = _as_bytes("".join(\
+    [_packed_encode[word[::-1].translate(_dna_complement_table)] \
+     for word in _packed_words]))
+#For counting a code, each byte is replaced by the count of that code in it
+_packed_count_tables = dict((letter, _as_bytes("".join(\
+    [chr(word.count(letter)) for word in _packed_words]))) \
+    for letter in _packed_letters)
+#Sequence is packed, and decoded (e.g. when searching), in blocks of about
+#this many bases to limit the temporary memory used
+_packed_block_size = 1 << 20
+
+def _packed_pack(data):
+    """Yields the packed bytes for an ACGT string, a block at a time (PRIVATE).
+
+    The last block is padded with A (code zero) to a multiple of four bases.
+    """
+    import re #Lazy import
+    word_re = re.compile("....")
+    encode = _packed_encode.__getitem__
+    #Each block (except the last) must be a whole number of bytes
+    size = max(4, _packed_block_size - _packed_block_size % 4)
+    for start in xrange(0, len(data), size):
+        block = data[start:start + size]
+        block += "A" * (-len(block) % 4)
+        yield "".join(map(encode, word_re.findall(block)))
+
+def _packed_runs(runs, start, end):
+    """Yields the runs overlapping start to end, clipped to it (PRIVATE).
+
+    The runs are a sorted list of non-overlapping tuples beginning with the
+    start and end of each run. Each clipped run is yielded as a tuple of the
+    start, end and the original run tuple.
+    """
+    #This finds the last run starting at or before the start
+    i = max(0, bisect.bisect_right(runs, (start, sys.maxint)) - 1)
+    while i < len(runs):
+        run = runs[i]
+        if run[0] >= end:
+            break
+        if run[1] > start:
+            yield max(run[0], start), min(run[1], end), run
+        i += 1
+
+class PackedSeq(Seq):
+    """A read-only DNA sequence object using two bits per base.
+
+    A normal Seq object uses one byte per letter (plus the Python object
+    overhead), which is a lot for whole genomes. A PackedSeq holds the bases
+    A, C, G and T as two bit codes, four per byte. Any other letters (such
+    as runs of N, or other ambiguity codes) are recorded separately as runs
+    of the same letter, as are any lower case (e.g. soft masked) regions.
+
+    >>> from Bio.Seq import PackedSeq
+    >>> from Bio.Alphabet import generic_dna
+    >>> my_dna = PackedSeq("GATCNNNNNNacgtRYGATTACA", generic_dna)
+    >>> my_dna
+    PackedSeq('GATCNNNNNNacgtRYGATTACA', DNAAlphabet())
+    >>> len(my_dna)
+    23
+    >>> my_dna[4:16]
+    PackedSeq('NNNNNNacgtRY', DNAAlphabet())
+
+    It supports the same methods as a Seq object, with slicing, complement
+    and reverse_complement giving new PackedSeq objects. These work on the
+    packed bytes (four bases at a time) using the string translate method:
+
+    >>> my_dna.complement()
+    PackedSeq('CTAGNNNNNNtgcaYRCTAATGT', DNAAlphabet())
+    >>> my_dna.reverse_complement()
+    PackedSeq('TGTAATCRYacgtNNNNNNGATC', DNAAlphabet())
+
+    Counting a single letter is done directly on the packed bytes, which
+    makes working out the GC content fast:
+
+    >>> my_dna.count("A")
+    4
+    >>> from Bio.SeqUtils import GC
+    >>> print "%0.1f" % GC(my_dna)
+    26.1
+
+    Other searches (e.g. the find and count methods) decode the sequence in
+    blocks. Methods giving a modified sequence (e.g. upper, transcribe or
+    translate) return a normal Seq object.
+    """
+    def __init__(self, data, alphabet = Alphabet.generic_dna):
+        """Create a new PackedSeq object.
+
+        Arguments:
+         - data     - Sequence, required (string)
+         - alphabet - Optional argument, an Alphabet object from Bio.Alphabet
+                      (a DNA or generic nucleotide alphabet, default generic
+                      DNA)
+        """
+        if not isinstance(data, basestring):
+            raise TypeError("The sequence data given to a PackedSeq object "
+                            "should be a string (not another Seq object etc)")
+        base = Alphabet._get_base_alphabet(alphabet)
+        if isinstance(base, Alphabet.ProteinAlphabet) \
+        or isinstance(base, Alphabet.RNAAlphabet):
+            raise ValueError("A PackedSeq can only hold DNA, not %s" \
+                             % repr(alphabet))
+        import re #Lazy import
+        self.alphabet = alphabet
+        self._length = len(data)
+        self._start = 0
+        #The base used in the packed data for any exceptions
+        self._filler = "A"
+        self._lower = [m.span() for m in re.finditer("[a-z]+", data)]
+        if self._lower:
+            data = data.upper()
+        self._exceptions = [m.span() + (m.group(1),) \
+                            for m in re.finditer(r"([^ACGT])\1*", data)]
+        if self._exceptions:
+            data = data.translate(_packed_clean_table)
+        self._packed = _as_bytes("".join(_packed_pack(data)))
+
+    def _new(self, packed, start, length, exceptions, lower, filler):
+        """Returns a new PackedSeq object from packed data (PRIVATE)."""
+        new = Seq.__new__(PackedSeq)
+        new.alphabet = self.alphabet
+        new._packed = packed
+        new._start = start
+        new._length = length
+        new._exceptions = exceptions
+        new._lower = lower
+        new._filler = filler
+        return new
+
+    @property
+    def _data(self):
+        #Used by some of the Seq methods, decodes the sequence
+        return str(self)
+
+    def _decode(self, start, end):
+        """Returns the bases as a string, ignoring any exceptions (PRIVATE).
+
+        The start and end are offsets in the sequence.
+        """
+        start += self._start
+        end += self._start
+        words = self._packed[start // 4:(end + 3) // 4]
+        decode = _packed_decode.__getitem__
+        step = max(1, _packed_block_size // 4)
+        if len(words) <= step:
+            text = "".join(map(decode, words))
+        else:
+            #Decode a block at a time, to limit the temporary memory used
+            text = "".join(["".join(map(decode, words[i:i + step])) \
+                            for i in xrange(0, len(words), step)])
+        return text[start % 4:start % 4 + end - start]
+
+    def _text(self, start, end):
+        """Returns part of the sequence as a string (PRIVATE)."""
+        text = self._decode(start, end)
+        if self._exceptions:
+            pieces = []
+            prev = 0
+            for s, e, run in _packed_runs(self._exceptions, start, end):
+                pieces.append(text[prev:s - start])
+                pieces.append(run[2] * (e - s))
+                prev = e - start
+            if pieces:
+                pieces.append(text[prev:])
+                text = "".join(pieces)
+        if self._lower:
+            pieces = []
+            prev = 0
+            for s, e, run in _packed_runs(self._lower, start, end):
+                pieces.append(text[prev:s - start])
+                pieces.append(text[s - start:e - start].lower())
+                prev = e - start
+            if pieces:
+                pieces.append(text[prev:])
+                text = "".join(pieces)
+        return text
+
+    def __len__(self):
+        """Returns the length of the sequence, use len(my_seq)."""
+        return self._length
+
+    def __str__(self):
+        """Returns the full sequence as a python string, use str(my_seq)."""
+        return self._text(0, self._length)
+
+    def __repr__(self):
+        """Returns a (truncated) representation of the sequence for debugging."""
+        if self._length > 60:
+            #Only decode the letters we show
+            return "%s('%s...%s', %s)" % (self.__class__.__name__,
+                                         self._text(0, 54),
+                                         self._text(self._length - 3,
+                                                    self._length),
+                                         repr(self.alphabet))
+        else:
+            return "%s(%s, %s)" % (self.__class__.__name__,
+                                   repr(str(self)),
+                                   repr(self.alphabet))
+
+    def __getitem__(self, index):
+        """Returns a subsequence of single letter, use my_seq[index].
+
+        Slices with a step of one return another PackedSeq object, other
+        slices a normal Seq object.
+        """
+        if isinstance(index, int):
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError("PackedSeq index out of range")
+            return self._text(index, index + 1)
+        start, end, step = index.indices(self._length)
+        if step != 1:
+            #Offload to the base class...
+            return Seq(str(self), self.alphabet)[index]
+        end = max(start, end)
+        offset = self._start + start
+        packed = self._packed[offset // 4:(self._start + end + 3) // 4]
+        exceptions = [(s - start, e - start, run[2]) for s, e, run \
+                      in _packed_runs(self._exceptions, start, end)]
+        lower = [(s - start, e - start) for s, e, run \
+                 in _packed_runs(self._lower, start, end)]
+        return self._new(packed, offset % 4, end - start, exceptions, lower,
+                         self._filler)
+
+    def __add__(self, other):
+        #Offload to the base class...
+        return Seq(str(self), self.alphabet) + other
+
+    def __radd__(self, other):
+        #Offload to the base class...
+        return other + Seq(str(self), self.alphabet)
+
+    def _range(self, start, end):
+        """Convert start and end to offsets like a string, or None (PRIVATE).
+
+        Returns None if there can be no matches (even for an empty string).
+        """
+        if start < 0:
+            start = max(0, start + self._length)
+        if end < 0:
+            end = max(0, end + self._length)
+        elif end > self._length:
+            end = self._length
+        if start > end:
+            return None
+        return start, end
+
+    def _count_code(self, letter, start, end):
+        """Counts a base (A, C, G or T) using the packed bytes (PRIVATE).
+
+        Positions with exceptions are counted as the filler base (A, or T
+        once complemented), and lower case regions are not taken into account.
+        """
+        first = -(-(self._start + start) // 4) * 4 - self._start
+        last = (self._start + end) // 4 * 4 - self._start
+        if first >= last:
+            return self._decode(start, end).count(letter)
+        count = self._decode(start, first).count(letter) \
+                + self._decode(last, end).count(letter)
+        words = self._packed[(self._start + first) // 4:
+                             (self._start + last) // 4]
+        words = words.translate(_packed_count_tables[letter])
+        for n in range(1, 5):
+            count += n * words.count(_as_bytes(chr(n)))
+        return count
+
+    def count(self, sub, start=0, end=sys.maxint):
+        """Non-overlapping count method, like that of a python string.
+
+        This behaves like the Seq object method of the same name. Counting a
+        single letter is done directly on the packed data (unless the region
+        has lower case letters), otherwise the sequence is decoded in blocks.
+
+        >>> from Bio.Seq import PackedSeq
+        >>> my_seq = PackedSeq("AAAATGANNNNNNAATG")
+        >>> print my_seq.count("A")
+        7
+        >>> print my_seq.count("N")
+        6
+        >>> print my_seq.count("ATG")
+        2
+        >>> print my_seq.count("AT", 2, -1)
+        2
+        """
+        sub_str = self._get_seq_str_and_check_alphabet(sub)
+        offsets = self._range(start, end)
+        if offsets is None:
+            return 0
+        start, end = offsets
+        if not sub_str:
+            #Python counts the empty string at every position
+            return end - start + 1
+        if len(sub_str) == 1 and \
+        not list(_packed_runs(self._lower, start, end)):
+            #Can use the packed data and exception runs directly
+            count = 0
+            for s, e, run in _packed_runs(self._exceptions, start, end):
+                if sub_str == run[2]:
+                    count += e - s
+                elif sub_str == self._filler:
+                    #Exceptions are held as the filler base in the packed data
+                    count -= e - s
+            if sub_str in _packed_letters:
+                count += self._count_code(sub_str, start, end)
+            return count
+        #Decode the sequence in blocks, which overlap so that all matches
+        #can be found. Only count matches after the end of the last one.
+        size = len(sub_str)
+        count = 0
+        allowed = start
+        for offset in xrange(start, end, _packed_block_size):
+            text = self._text(offset, min(end,
+                                          offset + _packed_block_size + size - 1))
+            index = text.find(sub_str, max(0, allowed - offset))
+            while index != -1:
+                count += 1
+                allowed = offset + index + size
+                index = text.find(sub_str, index + size)
+        return count
+
+    def __contains__(self, char):
+        """Implements the 'in' keyword, like a python string."""
+        return self.find(char) != -1
+
+    def find(self, sub, start=0, end=sys.maxint):
+        """Find method, like that of a python string.
+
+        This behaves like the Seq object method of the same name, but only
+        decodes the sequence in blocks until a match is found.
+
+        >>> from Bio.Seq import PackedSeq
+        >>> my_dna = PackedSeq("GTCATGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG")
+        >>> my_dna.find("ATG")
+        3
+        """
+        sub_str = self._get_seq_str_and_check_alphabet(sub)
+        offsets = self._range(start, end)
+        if offsets is None:
+            return -1
+        start, end = offsets
+        if not sub_str:
+            return start
+        size = len(sub_str)
+        for offset in xrange(start, end, _packed_block_size):
+            text = self._text(offset, min(end,
+                                          offset + _packed_block_size + size - 1))
+            index = text.find(sub_str)
+            if index != -1:
+                return offset + index
+        return -1
+
+    def rfind(self, sub, start=0, end=sys.maxint):
+        """Find from right method, like that of a python string.
+
+        This behaves like the Seq object method of the same name, but only
+        decodes the sequence in blocks (from the end) until a match is found.
+
+        >>> from Bio.Seq import PackedSeq
+        >>> my_dna = PackedSeq("GTCATGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG")
+        >>> my_dna.rfind("ATG")
+        15
+        """
+        sub_str = self._get_seq_str_and_check_alphabet(sub)
+        offsets = self._range(start, end)
+        if offsets is None:
+            return -1
+        start, end = offsets
+        if not sub_str:
+            return end
+        size = len(sub_str)
+        for offset in xrange(end, start, -_packed_block_size):
+            block_start = max(start, offset - _packed_block_size)
+            text = self._text(block_start, min(end, offset + size - 1))
+            index = text.rfind(sub_str)
+            if index != -1:
+                return block_start + index
+        return -1
+
+    def complement(self):
+        """Returns the complement sequence. New PackedSeq object.
+
+        >>> from Bio.Seq import PackedSeq
+        >>> from Bio.Alphabet import IUPAC
+        >>> my_dna = PackedSeq("CCCCCgatA-GD", IUPAC.ambiguous_dna)
+        >>> my_dna.complement()
+        PackedSeq('GGGGGctaT-CH', IUPACAmbiguousDNA())
+        """
+        exceptions = [(s, e, letter.translate(_dna_complement_table)) \
+                      for s, e, letter in self._exceptions]
+        return self._new(self._packed.translate(_packed_complement_table),
+                         self._start, self._length, exceptions,
+                         list(self._lower),
+                         self._filler.translate(_dna_complement_table))
+
+    def reverse_complement(self):
+        """Returns the reverse complement sequence. New PackedSeq object.
+
+        >>> from Bio.Seq import PackedSeq
+        >>> from Bio.Alphabet import IUPAC
+        >>> my_dna = PackedSeq("CCCCCgatA-GNNNNR", IUPAC.ambiguous_dna)
+        >>> my_dna.reverse_complement()
+        PackedSeq('YNNNNC-TatcGGGGG', IUPACAmbiguousDNA())
+        """
+        length = self._length
+        packed = self._packed.translate(_packed_reverse_complement_table)[::-1]
+        start = len(packed) * 4 - self._start - length
+        exceptions = [(length - e, length - s,
+                       letter.translate(_dna_complement_table)) \
+                      for s, e, letter in reversed(self._exceptions)]
+        lower = [(length - e, length - s) for s, e in reversed(self._lower)]
+        return self._new(packed, start, length, exceptions, lower,
+                         self._filler.translate(_dna_complement_table))
+
 class MutableSeq(object):
     """An editable sequence object (with an alphabet).
 
@@ -1906,6 +2567,66 @@ def back_transcribe(rna):
     else:
         return rna.replace('U','T').replace('u','t')
     
+#Markers used in the compiled codon lookups for stop and possible stop codons
+_stop_marker = "\x00"
+_pos_stop_marker = "\x01"
+
+def _codon_lookup(table):
+    """Returns a dictionary mapping codons to amino acids for a table (PRIVATE).
+
+    This starts with the 64 unambiguous codons (as DNA and RNA), with stop
+    codons mapped to a marker character. Any other codons (e.g. ambiguous
+    codons like "TAN") are added when first translated, see _translate_codon.
+    The lookup is cached as a private attribute of the CodonTable object, so
+    it is freed along with the table.
+    """
+    try:
+        #Not using getattr as an AmbiguousCodonTable would give the lookup
+        #of the unambiguous table it wraps
+        return table.__dict__["_compiled_lookup"]
+    except KeyError:
+        pass
+    lookup = {}
+    for a in "TCAG":
+        for b in "TCAG":
+            for c in "TCAG":
+                for codon in [a+b+c, (a+b+c).replace("T", "U")]:
+                    try:
+                        _translate_codon(codon, table, lookup)
+                    except CodonTable.TranslationError:
+                        #e.g. RNA codon for a DNA only table
+                        pass
+    table._compiled_lookup = lookup
+    return lookup
+
+def _translate_codon(codon, table, lookup):
+    """Translates a single (upper case) codon, adding it to the lookup (PRIVATE).
+
+    Stop codons are given as _stop_marker, and possible stop codons (e.g. TAN
+    or NNN) as _pos_stop_marker. Raises a TranslationError for invalid codons.
+    """
+    try:
+        amino_acid = table.forward_table[codon]
+    except (KeyError, CodonTable.TranslationError):
+        #Todo? Treat "---" as a special case (gapped translation)
+        if codon in table.stop_codons:
+            amino_acid = _stop_marker
+        else:
+            if table.nucleotide_alphabet.letters is not None:
+                valid_letters = table.nucleotide_alphabet.letters.upper()
+            else:
+                #Assume the worst case, ambiguous DNA or RNA:
+                valid_letters = IUPAC.ambiguous_dna.letters.upper() + \
+                                IUPAC.ambiguous_rna.letters.upper()
+            if len(codon) == 3 and not codon.strip(valid_letters):
+                #Possible stop codon (e.g. NNN or TAN)
+                amino_acid = _pos_stop_marker
+            else:
+                raise CodonTable.TranslationError(\
+                    "Codon '%s' is invalid" % codon)
+    lookup[codon] = amino_acid
+    return amino_acid
+
 def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
                    cds=False, pos_stop="X"):
     """Helper function to translate a nucleotide string (PRIVATE).
@@ -1955,17 +2676,14 @@ def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
     Traceback (most recent call last):
        ...
     TranslationError: Extra in frame stop codon found.
+
+    The translation uses a precompiled dictionary of codons for the table
+    (see _codon_lookup), and the sequence is split into codons and looked up
+    in one pass, with stop codons marked so that they can be found with the
+    string find method.
     """
     sequence = sequence.upper()
-    amino_acids = []
-    forward_table = table.forward_table
     stop_codons = table.stop_codons
-    if table.nucleotide_alphabet.letters is not None:
-        valid_letters = set(table.nucleotide_alphabet.letters.upper())
-    else:
-        #Assume the worst case, ambiguous DNA or RNA:
-        valid_letters = set(IUPAC.ambiguous_dna.letters.upper() + \
-                            IUPAC.ambiguous_rna.letters.upper())
     if cds:
         if str(sequence[:3]).upper() not in table.start_codons:
             raise CodonTable.TranslationError(\
@@ -1978,27 +2696,33 @@ def _translate_str(sequence, table, stop_symbol="*", to_stop=False,
                 "Final codon '%s' is not a stop codon" % sequence[-3:])
         #Don't translate the stop symbol, and manually translate the M
         sequence = sequence[3:-3]
-        amino_acids = ["M"]
-    n = len(sequence)
-    for i in xrange(0,n-n%3,3):
-        codon = sequence[i:i+3]
-        try:
-            amino_acids.append(forward_table[codon])
-        except (KeyError, CodonTable.TranslationError):
-            #Todo? Treat "---" as a special case (gapped translation)
-            if codon in table.stop_codons:
-                if cds:
-                    raise CodonTable.TranslationError(\
-                        "Extra in frame stop codon found.")
-                if to_stop : break
-                amino_acids.append(stop_symbol)
-            elif valid_letters.issuperset(set(codon)):
-                #Possible stop codon (e.g. NNN or TAN)
-                amino_acids.append(pos_stop)
-            else:
-                raise CodonTable.TranslationError(\
-                    "Codon '%s' is invalid" % codon)
-    return "".join(amino_acids)
+    lookup = _codon_lookup(table)
+    #Slicing out the codons is faster than a regular expression
+    codons = [sequence[i:i+3] for i in xrange(0, len(sequence) - 2, 3)]
+    amino_acids = map(lookup.get, codons)
+    if None in amino_acids:
+        #Codons not seen before with this table (e.g. ambiguous ones), these
+        #are only checked up to the first stop codon if stopping there
+        for i, amino_acid in enumerate(amino_acids):
+            if amino_acid is None:
+                amino_acid = _translate_codon(codons[i], table, lookup)
+                amino_acids[i] = amino_acid
+            if amino_acid == _stop_marker and (to_stop or cds):
+                del amino_acids[i+1:]
+                break
+    protein = "".join(amino_acids)
+    if _stop_marker in protein:
+        if cds:
+            raise CodonTable.TranslationError(\
+                "Extra in frame stop codon found.")
+        if to_stop:
+            protein = protein[:protein.index(_stop_marker)]
+        protein = protein.replace(_stop_marker, stop_symbol)
+    if _pos_stop_marker in protein:
+        protein = protein.replace(_pos_stop_marker, pos_stop)
+    if cds:
+        protein = "M" + protein
+    return protein
 
 def translate(sequence, table="Standard", stop_symbol="*", to_stop=False,
               cds=False):
@@ -2076,16 +2800,88 @@ def translate(sequence, table="Standard", stop_symbol="*", to_stop=False,
         return sequence.toseq().translate(table, stop_symbol, to_stop, cds)
     else:
         #Assume its a string, return a string
-        try:
-            codon_table = CodonTable.ambiguous_generic_by_id[int(table)]
-        except ValueError:
-            codon_table = CodonTable.ambiguous_generic_by_name[table]
-        except (AttributeError, TypeError):
-            if isinstance(table, CodonTable.CodonTable):
-                codon_table = table
-            else:
-                raise ValueError('Bad table argument')
+        codon_table = _get_codon_table(table)
         return _translate_str(sequence, codon_table, stop_symbol, to_stop, cds)
+
+def _get_codon_table(table):
+    """Returns the ambiguous CodonTable for translating strings (PRIVATE).
+
+    The table argument can be a name, an NCBI identifier, or a CodonTable
+    object (which is returned as is).
+    """
+    try:
+        return CodonTable.ambiguous_generic_by_id[int(table)]
+    except ValueError:
+        return CodonTable.ambiguous_generic_by_name[table]
+    except (AttributeError, TypeError):
+        if isinstance(table, CodonTable.CodonTable):
+            return table
+        else:
+            raise ValueError('Bad table argument')
+
+def translate_many(sequences, table="Standard", stop_symbol="*",
+                   to_stop=False, cds=False, six_frames=False):
+    """Translate many nucleotide sequences, returning a list.
+
+    Arguments:
+     - sequences - An iterable of nucleotide sequences (strings, Seq or
+                   MutableSeq objects), for example a list.
+     - table, stop_symbol, to_stop, cds - As for the translate function.
+     - six_frames - Boolean, defaults to False. If True each sequence is
+                   translated in all six reading frames (which can not be
+                   combined with the cds option).
+
+    As with the translate function, strings give strings while Seq and
+    MutableSeq objects give Seq objects. The codon table is looked up once,
+    and each sequence is translated using the compiled codon lookup for
+    the table:
+
+    >>> from Bio.Seq import translate_many
+    >>> translate_many(["ATGGCCATTGTAATG", "GTGGCCTGA", "TTGNNN"])
+    ['MAIVM', 'VA*', 'LX']
+    >>> translate_many(["GTGGCCTAA", "ATTGGCTAG"], table=2, cds=True)
+    ['MA', 'MG']
+
+    With the six_frames option, each translation is a tuple of six strings
+    (or Seq objects) for the three forward frames and then the three reverse
+    frames (taken from the start of the reverse complement):
+
+    >>> for frames in translate_many(["ATGGCCATTGTAATGG"], six_frames=True):
+    ...     for protein in frames:
+    ...         print protein
+    MAIVM
+    WPL*W
+    GHCN
+    PLQWP
+    HYNGH
+    ITMA
+    """
+    if six_frames and cds:
+        raise ValueError("The cds option can't be used with six frames")
+    codon_table = _get_codon_table(table)
+    def translate_one(sequence):
+        if isinstance(sequence, Seq):
+            return sequence.translate(table, stop_symbol, to_stop, cds)
+        return _translate_str(sequence, codon_table, stop_symbol, to_stop,
+                              cds)
+    answer = []
+    for sequence in sequences:
+        if isinstance(sequence, MutableSeq):
+            sequence = sequence.toseq()
+        if six_frames:
+            if isinstance(sequence, Seq):
+                reverse = sequence.reverse_complement()
+            else:
+                reverse = reverse_complement(sequence)
+            answer.append((translate_one(sequence),
+                           translate_one(sequence[1:]),
+                           translate_one(sequence[2:]),
+                           translate_one(reverse),
+                           translate_one(reverse[1:]),
+                           translate_one(reverse[2:])))
+        else:
+            answer.append(translate_one(sequence))
+    return answer
       
 def reverse_complement(sequence):
     """Returns the reverse complement sequence of a nucleotide string.
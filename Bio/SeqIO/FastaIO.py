@@ -16,6 +16,51 @@ from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 
+#Read the file in blocks of about this many characters
+_block_size = 65536
+
+
+#This is a generator function!
+def _fasta_records(handle, block_size):
+    """Generator function to return the raw text of each FASTA record (PRIVATE).
+
+    Rather than reading the file line by line, this reads it in large blocks
+    and splits each block at the record boundaries (a new line starting with
+    ">"). Each record is returned as a string, the title line (without the
+    leading ">") followed by the sequence lines. Any text before the first
+    record (e.g. blank lines, comments) is ignored.
+    """
+    #The last character of the previous block is included in each search
+    #in case a boundary falls between two blocks.
+    prev = "\n"
+    while True:
+        block = handle.read(block_size)
+        if not block:
+            return #Premature end of file, or just empty?
+        start = (prev + block).find("\n>")
+        if start != -1:
+            break
+        prev = block[-1]
+    parts = (prev + block)[start + 2:].split("\n>")
+    #Text of the (possibly incomplete) last record in the blocks so far
+    pieces = []
+    while True:
+        pieces.append(parts[0])
+        if len(parts) > 1:
+            yield "".join(pieces)
+            for text in parts[1:-1]:
+                yield text
+            pieces = [parts[-1]]
+        prev = block[-1]
+        block = handle.read(block_size)
+        if not block:
+            yield "".join(pieces)
+            return #StopIteration
+        parts = (prev + block).split("\n>")
+        parts[0] = parts[0][1:]
+    assert False, "Should not reach this line"
+
+
 #This is a generator function!
 def FastaIterator(handle, alphabet = single_letter_alphabet, title2ids = None):
     """Generator function to iterate over Fasta records (as SeqRecord objects).
@@ -31,49 +76,33 @@ def FastaIterator(handle, alphabet = single_letter_alphabet, title2ids = None):
 
     Note that use of title2ids matches that of Bio.Fasta.SequenceParser
     but the defaults are slightly different.
-    """
-    #Skip any text before the first record (e.g. blank lines, comments)
-    while True:
-        line = handle.readline()
-        if line == "" : return #Premature end of file, or just empty?
-        if line[0] == ">":
-            break
 
-    while True:
-        if line[0]!=">":
-            raise ValueError("Records in Fasta files should start with '>' character")
+    The file is read in large blocks rather than line by line, so the handle
+    will usually have been read past the end of the last record returned.
+    """
+    for text in _fasta_records(handle, _block_size):
+        title, sep, seq = text.partition("\n")
         if title2ids:
-            id, name, descr = title2ids(line[1:].rstrip())
+            id, name, descr = title2ids(title.rstrip())
         else:
-            descr = line[1:].rstrip()
+            descr = title.rstrip()
             try:
                 id = descr.split()[0]
             except IndexError:
-                assert not descr, repr(line)
+                assert not descr, repr(title)
                 #Should we use SeqRecord default for no ID?
                 id = ""
             name = id
 
-        lines = []
-        line = handle.readline()
-        while True:
-            if not line : break
-            if line[0] == ">": break
-            lines.append(line.rstrip())
-            line = handle.readline()
-
-        #Remove trailing whitespace, and any internal spaces
-        #(and any embedded \r which are possible in mangled files
-        #when not opened in universal read lines mode)
-        result = "".join(lines).replace(" ", "").replace("\r", "")
+        #Remove all the white space (new lines, any embedded \r which are
+        #possible in mangled files when not opened in universal read lines
+        #mode, trailing and internal spaces) in one go
+        seq = "".join(seq.split())
 
         #Return the record and then continue...
-        yield SeqRecord(Seq(result, alphabet),
+        yield SeqRecord(Seq(seq, alphabet),
                          id = id, name = name, description = descr)
 
-        if not line : return #StopIteration
-    assert False, "Should not reach this line"
-
 class FastaWriter(SequentialSequenceWriter):
     """Class to write Fasta format files."""
     def __init__(self, handle, wrap=60, record2title=None):
@@ -47,38 +47,50 @@ from Bio._py3k import _is_int_or_long
 # However, all the writing code is in this file.
 
 
-def GenBankIterator(handle):
+def GenBankIterator(handle, lazy_features=False):
     """Breaks up a Genbank file into SeqRecord objects.
 
     Every section from the LOCUS line to the terminating // becomes
     a single SeqRecord with associated annotation and features.
     
     Note that for genomes or chromosomes, there is typically only
-    one record."""
+    one record.
+
+    If lazy_features=True, each record's feature table is only parsed into
+    SeqFeature objects when the record's features are first used."""
     #This calls a generator function:
-    return GenBankScanner(debug=0).parse_records(handle)
+    return GenBankScanner(debug=0).parse_records(handle,
+                                                lazy_features=lazy_features)
 
-def EmblIterator(handle):
+def EmblIterator(handle, lazy_features=False):
     """Breaks up an EMBL file into SeqRecord objects.
 
     Every section from the LOCUS line to the terminating // becomes
     a single SeqRecord with associated annotation and features.
     
     Note that for genomes or chromosomes, there is typically only
-    one record."""
+    one record.
+
+    If lazy_features=True, each record's feature table is only parsed into
+    SeqFeature objects when the record's features are first used."""
     #This calls a generator function:
-    return EmblScanner(debug=0).parse_records(handle)
+    return EmblScanner(debug=0).parse_records(handle,
+                                              lazy_features=lazy_features)
 
-def ImgtIterator(handle):
+def ImgtIterator(handle, lazy_features=False):
     """Breaks up an IMGT file into SeqRecord objects.
 
     Every section from the LOCUS line to the terminating // becomes
     a single SeqRecord with associated annotation and features.
     
     Note that for genomes or chromosomes, there is typically only
-    one record."""
+    one record.
+
+    If lazy_features=True, each record's feature table is only parsed into
+    SeqFeature objects when the record's features are first used."""
     #This calls a generator function:
-    return _ImgtScanner(debug=0).parse_records(handle)
+    return _ImgtScanner(debug=0).parse_records(handle,
+                                               lazy_features=lazy_features)
 
 def GenBankCdsFeatureIterator(handle, alphabet=Alphabet.generic_protein):
     """Breaks up a Genbank file into SeqRecord objects for each CDS feature.
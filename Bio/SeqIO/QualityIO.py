@@ -371,6 +371,7 @@ from Bio.SeqIO.Interfaces import SequentialSequenceWriter
 from math import log
 import warnings
 from Bio import BiopythonWarning, BiopythonParserWarning
+from Bio._py3k import _as_bytes, _as_string
 
 
 # define score offsets. See discussion for differences between Sanger and
@@ -516,16 +517,40 @@ def phred_quality_from_solexa(solexa_quality):
                       % repr(solexa_quality), BiopythonWarning)
     return 10*log(10**(solexa_quality/10.0) + 1, 10)
 
+#Type used for compact quality scores (str on Python 2, bytes on Python 3)
+_bytes_type = type(_as_bytes(""))
+
+def _compact_phred_quality(qualities):
+    """Returns compact PHRED qualities as a byte string, or None (PRIVATE).
+
+    The FASTQ parsers can optionally record the PHRED qualities as a byte
+    string (one byte per score), or as a NumPy uint8 array, rather than as
+    a list of integers. For either of these compact forms, this returns
+    the scores as a byte string. Otherwise it returns None.
+    """
+    if isinstance(qualities, _bytes_type):
+        return qualities
+    if getattr(qualities, "dtype", None) == "uint8":
+        #Assume this is a NumPy array
+        return qualities.tostring()
+    return None
+
 def _get_phred_quality(record):
     """Extract PHRED qualities from a SeqRecord's letter_annotations (PRIVATE).
 
     If there are no PHRED qualities, but there are Solexa qualities, those are
-    used instead after conversion.
+    used instead after conversion. Compact PHRED qualities (a byte string or
+    NumPy array) are returned as a list of integers.
     """
     try:
-        return record.letter_annotations["phred_quality"]
+        qualities = record.letter_annotations["phred_quality"]
     except KeyError:
         pass
+    else:
+        compact = _compact_phred_quality(qualities)
+        if compact is not None:
+            return [ord(q) for q in _as_string(compact)]
+        return qualities
     try:
         return [phred_quality_from_solexa(q) for \
                 q in record.letter_annotations["solexa_quality"]]
@@ -541,6 +566,9 @@ _phred_to_sanger_quality_str = dict((qp, chr(min(126, qp+SANGER_SCORE_OFFSET)))
 _solexa_to_sanger_quality_str = dict( \
     (qs, chr(min(126, int(round(phred_quality_from_solexa(qs)))+SANGER_SCORE_OFFSET))) \
     for qs in range(-5, 93+1))
+#Translation table for compact PHRED qualities (truncating at 93)
+_phred_to_sanger_quality_table = _as_bytes("".join(\
+    chr(min(126, qp+SANGER_SCORE_OFFSET)) for qp in range(0, 256)))
 def _get_sanger_quality_str(record):
     """Returns a Sanger FASTQ encoded quality string (PRIVATE).
 
@@ -610,6 +638,14 @@ def _get_sanger_quality_str(record):
         #Fall back on solexa scores...
         pass
     else:
+        #Compact qualities (a byte string or NumPy array) can be
+        #converted in one go with a translation table:
+        compact = _compact_phred_quality(qualities)
+        if compact is not None:
+            if compact and max(_as_string(compact)) > chr(93):
+                warnings.warn("Data loss - max PHRED quality 93 in Sanger FASTQ",
+                              BiopythonWarning)
+            return _as_string(compact.translate(_phred_to_sanger_quality_table))
         #Try and use the precomputed mapping:
         try:
             return "".join([_phred_to_sanger_quality_str[qp] \
@@ -658,6 +694,9 @@ _phred_to_illumina_quality_str = dict((qp, chr(qp+SOLEXA_SCORE_OFFSET)) \
 _solexa_to_illumina_quality_str = dict( \
     (qs, chr(int(round(phred_quality_from_solexa(qs)))+SOLEXA_SCORE_OFFSET)) \
     for qs in range(-5, 62+1))
+#Translation table for compact PHRED qualities (truncating at 62)
+_phred_to_illumina_quality_table = _as_bytes("".join(\
+    chr(min(126, qp+SOLEXA_SCORE_OFFSET)) for qp in range(0, 256)))
 def _get_illumina_quality_str(record):
     """Returns an Illumina 1.3 to 1.7 FASTQ encoded quality string (PRIVATE).
 
@@ -676,6 +715,14 @@ def _get_illumina_quality_str(record):
         #Fall back on solexa scores...
         pass
     else:
+        #Compact qualities (a byte string or NumPy array) can be
+        #converted in one go with a translation table:
+        compact = _compact_phred_quality(qualities)
+        if compact is not None:
+            if compact and max(_as_string(compact)) > chr(62):
+                warnings.warn("Data loss - max PHRED quality 62 in Illumina FASTQ",
+                              BiopythonWarning)
+            return _as_string(compact.translate(_phred_to_illumina_quality_table))
         #Try and use the precomputed mapping:
         try:
             return "".join([_phred_to_illumina_quality_str[qp] \
@@ -724,6 +771,10 @@ _solexa_to_solexa_quality_str = dict((qs, chr(min(126, qs+SOLEXA_SCORE_OFFSET)))
 _phred_to_solexa_quality_str = dict(\
     (qp, chr(min(126, int(round(solexa_quality_from_phred(qp)))+SOLEXA_SCORE_OFFSET))) \
     for qp in range(0, 62+1))
+#Translation table for compact PHRED qualities (truncating at 62)
+_phred_to_solexa_quality_table = _as_bytes("".join(\
+    chr(min(126, int(round(solexa_quality_from_phred(qp)))+SOLEXA_SCORE_OFFSET)) \
+    for qp in range(0, 256)))
 def _get_solexa_quality_str(record):
     """Returns a Solexa FASTQ encoded quality string (PRIVATE).
 
@@ -764,6 +815,14 @@ def _get_solexa_quality_str(record):
         raise ValueError("No suitable quality scores found in "
                          "letter_annotations of SeqRecord (id=%s)." \
                          % record.id)
+    #Compact qualities (a byte string or NumPy array) can be
+    #converted in one go with a translation table:
+    compact = _compact_phred_quality(qualities)
+    if compact is not None:
+        if compact and max(_as_string(compact)) > chr(62):
+            warnings.warn("Data loss - max Solexa quality 62 in Solexa FASTQ",
+                          BiopythonWarning)
+        return _as_string(compact.translate(_phred_to_solexa_quality_table))
     #Try and use the precomputed mapping:
     try:
         return "".join([_phred_to_solexa_quality_str[qp] \
@@ -941,8 +1000,49 @@ def FastqGeneralIterator(handle):
         if not line : return #StopIteration at end of file
     assert False, "Should not reach this line"
         
+def _compact_quality_decoder(quality_type, offset, max_quality):
+    """Returns a function to decode FASTQ quality strings, or None (PRIVATE).
+
+    For quality_type "list" this returns None, and the FASTQ parsers use
+    their usual list of integers. For "bytes" the function returns a byte
+    string with one byte per PHRED score (done with a translation table),
+    and for "numpy" it returns a NumPy uint8 array (done with a single
+    subtraction). Either way the quality string is checked first.
+    """
+    if quality_type == "list":
+        return None
+    if quality_type not in ["bytes", "numpy"]:
+        raise ValueError("Quality type should be 'list', 'bytes' or 'numpy', "
+                         "not %s" % repr(quality_type))
+    low = chr(offset)
+    high = chr(offset + max_quality)
+    if quality_type == "bytes":
+        table = _as_bytes("".join(chr((letter - offset) % 256) \
+                                  for letter in range(0, 256)))
+        def decode(quality_string):
+            if quality_string and (min(quality_string) < low \
+                                   or max(quality_string) > high):
+                raise ValueError("Invalid character in quality string")
+            return _as_bytes(quality_string).translate(table)
+    else:
+        try:
+            import numpy
+        except ImportError:
+            from Bio import MissingPythonDependencyError
+            raise MissingPythonDependencyError("Please install NumPy if you "
+                                               "want NumPy quality scores.")
+        np_offset = numpy.uint8(offset)
+        def decode(quality_string):
+            if quality_string and (min(quality_string) < low \
+                                   or max(quality_string) > high):
+                raise ValueError("Invalid character in quality string")
+            return numpy.frombuffer(_as_bytes(quality_string),
+                                    numpy.uint8) - np_offset
+    return decode
+
 #This is a generator function!
-def FastqPhredIterator(handle, alphabet = single_letter_alphabet, title2ids = None):
+def FastqPhredIterator(handle, alphabet = single_letter_alphabet, title2ids = None,
+                       quality_type = "list"):
     """Generator function to iterate over FASTQ records (as SeqRecord objects).
 
      - handle - input file
@@ -953,6 +1053,10 @@ def FastqPhredIterator(handle, alphabet = single_letter_alphabet, title2ids = No
                    strings.  If this is not given, then the entire title line
                    will be used as the description, and the first word as the
                    id and name.
+     - quality_type - How to store the PHRED qualities, either "list" for a
+                   list of integers (default), or "bytes" for a byte string
+                   holding one score per byte, or "numpy" for a NumPy uint8
+                   array. The compact forms use far less memory.
 
     Note that use of title2ids matches that of Bio.SeqIO.FastaIO.
 
@@ -1006,8 +1110,34 @@ def FastqPhredIterator(handle, alphabet = single_letter_alphabet, title2ids = No
 
     >>> print record.letter_annotations["phred_quality"]
     [26, 26, 26, 26, 26, 26, 26, 26, 26, 26, 26, 24, 26, 22, 26, 26, 13, 22, 26, 18, 24, 18, 18, 18, 18]
+
+    For large files, a list of integers for every read takes a lot of memory.
+    Instead you can ask for a compact byte string (one byte per score), or a
+    NumPy array of unsigned bytes (if NumPy is installed):
+
+    >>> handle = open("Quality/example.fastq", "rU")
+    >>> for record in FastqPhredIterator(handle, quality_type="bytes"):
+    ...     print record.id, repr(record.letter_annotations["phred_quality"][:5])
+    EAS54_6_R1_2_1_413_324 '\\x1a\\x1a\\x12\\x1a\\x1a'
+    EAS54_6_R1_2_1_540_792 '\\x1a\\x1a\\x1a\\x1a\\x1a'
+    EAS54_6_R1_2_1_443_348 '\\x1a\\x1a\\x1a\\x1a\\x1a'
+    >>> handle.close()
+
+    These compact qualities can be sliced with the record, and the FASTQ and
+    QUAL writers accept them directly:
+
+    >>> print record[:10].format("fastq")
+    @EAS54_6_R1_2_1_443_348
+    GTTGCTTCTG
+    +
+    ;;;;;;;;;;
+    <BLANKLINE>
+
+    Note that unlike a list, adding two NumPy arrays together sums the scores,
+    so adding two SeqRecord objects with NumPy qualities will not work.
     """
     assert SANGER_SCORE_OFFSET == ord("!")
+    decode = _compact_quality_decoder(quality_type, SANGER_SCORE_OFFSET, 93)
     #Originally, I used a list expression for each record:
     #
     # qualities = [ord(letter)-SANGER_SCORE_OFFSET for letter in quality_string]
@@ -1025,9 +1155,12 @@ def FastqPhredIterator(handle, alphabet = single_letter_alphabet, title2ids = No
             name = id
         record = SeqRecord(Seq(seq_string, alphabet),
                            id=id, name=name, description=descr)
-        qualities = [q_mapping[letter] for letter in quality_string]
-        if qualities and (min(qualities) < 0 or max(qualities) > 93):
-            raise ValueError("Invalid character in quality string")
+        if decode:
+            qualities = decode(quality_string)
+        else:
+            qualities = [q_mapping[letter] for letter in quality_string]
+            if qualities and (min(qualities) < 0 or max(qualities) > 93):
+                raise ValueError("Invalid character in quality string")
         #For speed, will now use a dirty trick to speed up assigning the
         #qualities. We do this to bypass the length check imposed by the
         #per-letter-annotations restricted dict (as this has already been
@@ -1198,10 +1331,12 @@ def FastqSolexaIterator(handle, alphabet = single_letter_alphabet, title2ids = N
         yield record
 
 #This is a generator function!
-def FastqIlluminaIterator(handle, alphabet = single_letter_alphabet, title2ids = None):
+def FastqIlluminaIterator(handle, alphabet = single_letter_alphabet, title2ids = None,
+                          quality_type = "list"):
     """Parse Illumina 1.3 to 1.7 FASTQ like files (which differ in the quality mapping).
 
-    The optional arguments are the same as those for the FastqPhredIterator.
+    The optional arguments are the same as those for the FastqPhredIterator,
+    including the quality_type for compact PHRED qualities.
 
     For each sequence in Illumina 1.3+ FASTQ files there is a matching string
     encoding PHRED integer qualities using ASCII values with an offset of 64.
@@ -1227,6 +1362,7 @@ def FastqIlluminaIterator(handle, alphabet = single_letter_alphabet, title2ids =
 
     NOTE - True Sanger style FASTQ files use PHRED scores with an offset of 33.
     """
+    decode = _compact_quality_decoder(quality_type, SOLEXA_SCORE_OFFSET, 62)
     q_mapping = dict()
     for letter in range(0, 255):
         q_mapping[chr(letter)] = letter-SOLEXA_SCORE_OFFSET
@@ -1239,9 +1375,12 @@ def FastqIlluminaIterator(handle, alphabet = single_letter_alphabet, title2ids =
             name = id
         record = SeqRecord(Seq(seq_string, alphabet),
                            id=id, name=name, description=descr)
-        qualities = [q_mapping[letter] for letter in quality_string]
-        if qualities and (min(qualities) < 0 or max(qualities) > 62):
-            raise ValueError("Invalid character in quality string")
+        if decode:
+            qualities = decode(quality_string)
+        else:
+            qualities = [q_mapping[letter] for letter in quality_string]
+            if qualities and (min(qualities) < 0 or max(qualities) > 62):
+                raise ValueError("Invalid character in quality string")
         #Dirty trick to speed up this line:
         #record.letter_annotations["phred_quality"] = qualities
         dict.__setitem__(record._per_letter_annotations,
@@ -1777,7 +1916,338 @@ def PairedFastaQualIterator(fasta_handle, qual_handle, alphabet = single_letter_
         f_rec.letter_annotations["phred_quality"] = q_rec.letter_annotations["phred_quality"]
         yield f_rec
     #Done
-    
+
+def _mate_id(title):
+    """Returns the identifier shared by both reads of a pair (PRIVATE).
+
+    This is the first word of the title, without any /1 or /2 suffix (as
+    used by Illumina before CASAVA 1.8, which instead puts the read number
+    after a space).
+    """
+    words = title.split(None, 1)
+    if not words:
+        return ""
+    if words[0][-2:] in ("/1", "/2"):
+        return words[0][:-2]
+    return words[0]
+
+def _read_ahead(iterator, read_ahead):
+    """Iterates over the items from an iterator run in a background thread (PRIVATE).
+
+    The thread puts chunks of items into a bounded queue, holding at most
+    about read_ahead items. Any exception in the thread is raised again
+    here. If this generator is closed early, the thread stops at its next
+    attempt to add to the queue.
+    """
+    import threading #Lazy import
+    import Queue
+    import sys
+    chunk_size = max(1, min(100, read_ahead // 2))
+    pending = Queue.Queue(max(1, read_ahead // chunk_size))
+    stop = threading.Event()
+
+    def put(value):
+        while not stop.isSet():
+            try:
+                pending.put(value, True, 0.1)
+                return True
+            except Queue.Full:
+                pass
+        return False
+
+    def worker():
+        try:
+            chunk = []
+            for item in iterator:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    if not put((chunk, None)):
+                        return
+                    chunk = []
+            if chunk and not put((chunk, None)):
+                return
+            put((None, None))
+        except Exception:
+            put((None, sys.exc_info()))
+
+    thread = threading.Thread(target=worker)
+    thread.setDaemon(True)
+    thread.start()
+    try:
+        while True:
+            chunk, error = pending.get()
+            if error is not None:
+                raise error[0], error[1], error[2]
+            if chunk is None:
+                break
+            for item in chunk:
+                yield item
+    finally:
+        stop.set()
+        #Give the thread a chance to finish (it checks for the stop signal
+        #every 0.1s while waiting), but don't wait on a blocked read
+        thread.join(1)
+
+def _paired_iterator(iter1, iter2, get_title):
+    """Zips two iterators checking the mate pair identifiers match (PRIVATE)."""
+    #Using zip(...) would create a list loading everything into memory!
+    #It would also not catch any extra records found in only one file.
+    try:
+        while True:
+            try:
+                rec1 = iter1.next()
+            except StopIteration:
+                rec1 = None
+            try:
+                rec2 = iter2.next()
+            except StopIteration:
+                rec2 = None
+            if rec1 is None and rec2 is None:
+                #End of both files
+                break
+            if rec1 is None:
+                raise ValueError("Second FASTQ file has more entries than the first.")
+            if rec2 is None:
+                raise ValueError("First FASTQ file has more entries than the second.")
+            if _mate_id(get_title(rec1)) != _mate_id(get_title(rec2)):
+                raise ValueError("Mate pair identifiers do not match (%s vs %s)." \
+                                 % (get_title(rec1), get_title(rec2)))
+            yield rec1, rec2
+    finally:
+        #Stop any background threads if we finish early (e.g. on an error)
+        for iterator in (iter1, iter2):
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+def PairedFastqGeneralIterator(handle1, handle2, read_ahead=None):
+    """Iterate over paired FASTQ files as tuples of string tuples.
+
+    This is the paired end equivalent of the FastqGeneralIterator function,
+    giving a tuple of the (title, sequence, quality) string tuples for each
+    read pair. See the PairedFastqIterator function for details.
+    """
+    iter1 = FastqGeneralIterator(handle1)
+    iter2 = FastqGeneralIterator(handle2)
+    if read_ahead:
+        iter1 = _read_ahead(iter1, read_ahead)
+        iter2 = _read_ahead(iter2, read_ahead)
+    return _paired_iterator(iter1, iter2, lambda values : values[0])
+
+def PairedFastqIterator(handle1, handle2, format="fastq",
+                        alphabet=single_letter_alphabet, read_ahead=None):
+    """Iterate over paired FASTQ files as tuples of SeqRecord objects.
+
+     - handle1 - input handle for the first reads of each pair (e.g. R1)
+     - handle2 - input handle for the second reads of each pair (e.g. R2)
+     - format  - FASTQ variant, "fastq" (or "fastq-sanger"), "fastq-solexa"
+                 or "fastq-illumina"
+     - alphabet - optional alphabet
+     - read_ahead - optional number of records to read ahead from each file
+                 in a background thread (default None, meaning no threads)
+
+    Paired end reads are usually given as two FASTQ files with the records
+    in the same order. This checks the two reads of each pair have the same
+    identifier (ignoring any /1 and /2 suffix), and gives an error if they do
+    not match or one file has more records than the other:
+
+    >>> from Bio.SeqIO.QualityIO import PairedFastqIterator
+    >>> import gzip
+    >>> pairs = PairedFastqIterator(open("Quality/example.fastq", "rU"),
+    ...                             gzip.open("Quality/example.fastq.gz"))
+    >>> for rec1, rec2 in pairs:
+    ...     print rec1.id, rec2.id, len(rec1), len(rec2)
+    EAS54_6_R1_2_1_413_324 EAS54_6_R1_2_1_413_324 25 25
+    EAS54_6_R1_2_1_540_792 EAS54_6_R1_2_1_540_792 25 25
+    EAS54_6_R1_2_1_443_348 EAS54_6_R1_2_1_443_348 25 25
+
+    If you give a read_ahead value, each file is read and parsed in its own
+    background thread, with a bounded queue of up to about read_ahead records
+    waiting to be used. File reading and zlib decompression release the
+    Python GIL, so this lets the waiting on the two files (e.g. on network
+    storage, or a pipe from an external decompression tool) overlap. However,
+    the parsing itself still holds the GIL, so when the files are local and
+    quick to read the threads can make things slower, which is why this is
+    not done by default.
+    """
+    if format in ["fastq", "fastq-sanger"]:
+        iterator = FastqPhredIterator
+    elif format == "fastq-solexa":
+        iterator = FastqSolexaIterator
+    elif format == "fastq-illumina":
+        iterator = FastqIlluminaIterator
+    else:
+        raise ValueError("Unsupported FASTQ variant %r" % format)
+    iter1 = iterator(handle1, alphabet)
+    iter2 = iterator(handle2, alphabet)
+    if read_ahead:
+        iter1 = _read_ahead(iter1, read_ahead)
+        iter2 = _read_ahead(iter2, read_ahead)
+    return _paired_iterator(iter1, iter2, lambda record : record.id)
+
+def _phred_letters(format):
+    """Returns a dictionary mapping quality letters to PHRED scores (PRIVATE).
+
+    Solexa scores are mapped to the nearest integer PHRED score. Raises a
+    ValueError if the format is not a FASTQ variant.
+    """
+    if format in ["fastq", "fastq-sanger"]:
+        return dict((chr(q + SANGER_SCORE_OFFSET), q) \
+                    for q in range(0, 93 + 1))
+    elif format == "fastq-illumina":
+        return dict((chr(q + SOLEXA_SCORE_OFFSET), q) \
+                    for q in range(0, 62 + 1))
+    elif format == "fastq-solexa":
+        return dict((chr(q + SOLEXA_SCORE_OFFSET),
+                     int(round(phred_quality_from_solexa(q)))) \
+                    for q in range(-5, 62 + 1))
+    else:
+        raise ValueError("Unsupported FASTQ variant %r" % format)
+
+
+class FastqTrimmer(object):
+    """Quality trimming and filtering of FASTQ reads as string tuples.
+
+    This works on the (title, sequence, quality) string tuples from the
+    FastqGeneralIterator function, without creating any SeqRecord objects
+    (slicing a SeqRecord with per-letter-annotation is much slower). The
+    following steps are applied to each read, in this order:
+
+     - adapter - Optional adapter sequence to clip. The read is cut at the
+                 first exact match of the adapter, or if there is none, where
+                 a partial adapter (at least min_adapter_overlap letters
+                 long) runs off the end of the read.
+     - window_quality - Optional minimum average PHRED quality over a sliding
+                 window of window_size bases (default 4). The read is cut at
+                 the start of the first window (from the start of the read)
+                 with a lower average quality.
+     - min_length - Optional minimum length, shorter reads are discarded.
+     - max_expected_errors - Optional maximum number of expected errors
+                 (the sum of the error probabilities from the PHRED scores),
+                 reads with more are discarded.
+
+    The format argument gives the FASTQ variant, which determines how the
+    quality strings are interpreted ("fastq" or "fastq-sanger" by default,
+    "fastq-illumina" or "fastq-solexa", where Solexa scores are mapped to
+    PHRED scores). For example:
+
+    >>> from Bio.SeqIO.QualityIO import FastqGeneralIterator, FastqTrimmer
+    >>> trimmer = FastqTrimmer(window_size=5, window_quality=22, min_length=10)
+    >>> handle = open("Quality/example.fastq", "rU")
+    >>> for title, seq, qual in trimmer(FastqGeneralIterator(handle)):
+    ...     print title, seq, qual
+    EAS54_6_R1_2_1_413_324 CCCTTCTTGTCTTCAGCGTTTCTCC ;;3;;;;;;;;;;;;7;;;;;;;88
+    EAS54_6_R1_2_1_540_792 TTGGCAGGCCAAGGCCG ;;;;;;;;;;;7;;;;;
+    EAS54_6_R1_2_1_443_348 GTTGCTTCTGGCG ;;;;;;;;;;;9;
+    >>> handle.close()
+
+    Calling the trimmer object on an iterator of string tuples gives an
+    iterator of the trimmed reads (skipping any which were discarded), while
+    the trim method works on a single read (returning None if discarded).
+    You can also give a trimmer to the Bio.SeqIO.convert function when
+    converting a FASTQ file into FASTQ, FASTA, QUAL or tab format.
+    """
+    def __init__(self, format="fastq", window_size=4, window_quality=None,
+                 adapter=None, min_adapter_overlap=3, min_length=None,
+                 max_expected_errors=None):
+        phred = _phred_letters(format)
+        if window_size < 1:
+            raise ValueError("Window size should be at least one")
+        if adapter is not None and min_adapter_overlap < 1:
+            raise ValueError("Minimum adapter overlap should be at least one")
+        self.format = format
+        self.window_size = window_size
+        self.window_quality = window_quality
+        self.adapter = adapter
+        self.min_adapter_overlap = min_adapter_overlap
+        self.min_length = min_length
+        self.max_expected_errors = max_expected_errors
+        self._phred = phred
+        self._error = dict((letter, 10 ** (-q / 10.0)) \
+                           for letter, q in phred.iteritems())
+        if window_quality is not None:
+            #Only windows including a base below the threshold (or an
+            #invalid character) can have a low average, so search for these
+            good = [letter for letter, q in phred.iteritems() \
+                    if q >= window_quality]
+            import re #Lazy import
+            if good:
+                self._low = re.compile("[^%s]" % re.escape("".join(good)))
+            else:
+                self._low = re.compile(".")
+
+    def __repr__(self):
+        return "FastqTrimmer(format=%r, window_size=%r, window_quality=%r, " \
+               "adapter=%r, min_adapter_overlap=%r, min_length=%r, " \
+               "max_expected_errors=%r)" \
+               % (self.format, self.window_size, self.window_quality,
+                  self.adapter, self.min_adapter_overlap, self.min_length,
+                  self.max_expected_errors)
+
+    def __call__(self, records):
+        """Iterate over the trimmed (title, sequence, quality) tuples."""
+        trim = self.trim
+        for title, seq, qual in records:
+            result = trim(title, seq, qual)
+            if result is not None:
+                yield result
+
+    def _adapter_cut(self, seq):
+        """Returns the length of the read after adapter clipping (PRIVATE)."""
+        adapter = self.adapter
+        i = seq.find(adapter)
+        if i != -1:
+            return i
+        #Look for a partial adapter at the end of the read
+        for k in range(min(len(adapter) - 1, len(seq)),
+                       self.min_adapter_overlap - 1, -1):
+            if seq.endswith(adapter[:k]):
+                return len(seq) - k
+        return len(seq)
+
+    def _window_cut(self, qual):
+        """Returns the length of the read after window trimming (PRIVATE)."""
+        phred = self._phred
+        length = len(qual)
+        size = min(self.window_size, length)
+        limit = self.window_quality * size
+        search = self._low.search
+        start = 0
+        match = search(qual)
+        while match:
+            i = match.start()
+            #Check the windows including this low quality base
+            for s in range(max(start, i - size + 1), min(i, length - size) + 1):
+                try:
+                    total = sum([phred[letter] for letter in qual[s:s + size]])
+                except KeyError:
+                    raise ValueError("Invalid character in quality string")
+                if total < limit:
+                    return s
+            start = min(i, length - size) + 1
+            match = search(qual, i + 1)
+        return length
+
+    def trim(self, title, seq, qual):
+        """Returns the trimmed (title, sequence, quality) tuple, or None."""
+        length = len(seq)
+        if self.adapter:
+            length = self._adapter_cut(seq)
+        if self.window_quality is not None and length:
+            length = self._window_cut(qual[:length])
+        if length < len(seq):
+            seq = seq[:length]
+            qual = qual[:length]
+        if self.min_length is not None and length < self.min_length:
+            return None
+        if self.max_expected_errors is not None:
+            try:
+                errors = sum([self._error[letter] for letter in qual])
+            except KeyError:
+                raise ValueError("Invalid character in quality string")
+            if errors > self.max_expected_errors:
+                return None
+        return title, seq, qual
+
 
 def _test():
     """Run the Bio.SeqIO module's doctests.
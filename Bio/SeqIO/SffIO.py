@@ -517,54 +517,13 @@ def _sff_read_roche_index(handle):
                          % (handle.tell(), read_index_offset + read_index_size))
 
 
-def _sff_read_seq_record(handle, number_of_flows_per_read, flow_chars,
-                         key_sequence, alphabet, trim=False):
-    """Parse the next read in the file, return data as a SeqRecord (PRIVATE)."""
-    #Now on to the reads...
-    #the read header format (fixed part):
-    #read_header_length     H
-    #name_length            H
-    #seq_len                I
-    #clip_qual_left         H
-    #clip_qual_right        H
-    #clip_adapter_left      H
-    #clip_adapter_right     H
-    #[rest of read header depends on the name length etc]
-    read_header_fmt = '>2HI4H'
-    read_header_size = struct.calcsize(read_header_fmt)
-    read_flow_fmt = ">%iH" % number_of_flows_per_read
-    read_flow_size = struct.calcsize(read_flow_fmt)
+def _sff_clip(clip_qual_left, clip_qual_right, clip_adapter_left,
+              clip_adapter_right, seq_len):
+    """Returns the left and right clipping positions for a read (PRIVATE).
 
-    read_header_length, name_length, seq_len, clip_qual_left, \
-    clip_qual_right, clip_adapter_left, clip_adapter_right \
-        = struct.unpack(read_header_fmt, handle.read(read_header_size))
-    if clip_qual_left:
-        clip_qual_left -= 1 #python counting
-    if clip_adapter_left:
-        clip_adapter_left -= 1 #python counting
-    if read_header_length < 10 or read_header_length % 8 != 0:
-        raise ValueError("Malformed read header, says length is %i" \
-                         % read_header_length)
-    #now the name and any padding (remainder of header)
-    name = _bytes_to_string(handle.read(name_length))
-    padding = read_header_length - read_header_size - name_length
-    if handle.read(padding).count(_null) != padding:
-        raise ValueError("Post name %i byte padding region contained data" \
-                         % padding)
-    #now the flowgram values, flowgram index, bases and qualities
-    #NOTE - assuming flowgram_format==1, which means struct type H
-    flow_values = handle.read(read_flow_size) #unpack later if needed
-    temp_fmt = ">%iB" % seq_len # used for flow index and quals
-    flow_index = handle.read(seq_len) #unpack later if needed
-    seq = _bytes_to_string(handle.read(seq_len)) #TODO - Use bytes in Seq?
-    quals = list(struct.unpack(temp_fmt, handle.read(seq_len)))
-    #now any padding...
-    padding = (read_flow_size + seq_len*3)%8
-    if padding:
-        padding = 8 - padding
-        if handle.read(padding).count(_null) != padding:
-            raise ValueError("Post quality %i byte padding region contained data" \
-                             % padding)
+    Assumes the left clip values have already been converted to Python
+    counting.
+    """
     #Follow Roche and apply most aggressive of qual and adapter clipping.
     #Note Roche seems to ignore adapter clip fields when writing SFF,
     #and uses just the quality clipping values for any clipping.
@@ -580,6 +539,54 @@ def _sff_read_seq_record(handle, number_of_flows_per_read, flow_chars,
         clip_right = clip_adapter_right
     else:
         clip_right = seq_len
+    return clip_left, clip_right
+
+def _sff_numpy():
+    """Returns the NumPy module, or raises MissingPythonDependencyError (PRIVATE)."""
+    try:
+        import numpy #Lazy import
+    except ImportError:
+        from Bio import MissingPythonDependencyError
+        raise MissingPythonDependencyError("Please install NumPy if you "
+                                           "want NumPy flowgrams and qualities.")
+    return numpy
+
+def _sff_build_record(data, offset, name, seq_len, clip_qual_left,
+                      clip_qual_right, clip_adapter_left, clip_adapter_right,
+                      number_of_flows_per_read, flow_chars, key_sequence,
+                      alphabet, trim=False, quality_type="list"):
+    """Decode a read's flowgram, bases and qualities into a SeqRecord (PRIVATE).
+
+    The data can be any buffer (a byte string, or a memory mapped file) with
+    the read's flowgram values starting at the given offset, followed by the
+    flowgram index, bases and qualities. The left clip values should already
+    have been converted to Python counting.
+
+    For quality_type "list" the qualities are a list of integers and the
+    flowgram values and index are tuples, for "bytes" the qualities are a
+    byte string (one byte per PHRED score), and for "numpy" all three are
+    NumPy arrays. These arrays are read only views of the buffer (no copy
+    is made), so for a memory mapped file the data is only decoded when
+    the arrays are used.
+    """
+    read_flow_size = 2 * number_of_flows_per_read
+    index_offset = offset + read_flow_size
+    seq_offset = index_offset + seq_len
+    qual_offset = seq_offset + seq_len
+    seq = _bytes_to_string(data[seq_offset:qual_offset])
+    if quality_type == "list":
+        quals = list(struct.unpack_from(">%iB" % seq_len, data, qual_offset))
+    elif quality_type == "bytes":
+        quals = data[qual_offset:qual_offset + seq_len]
+    elif quality_type == "numpy":
+        numpy = _sff_numpy()
+        quals = numpy.frombuffer(data, numpy.uint8, seq_len, qual_offset)
+    else:
+        raise ValueError("Quality type should be 'list', 'bytes' or 'numpy', "
+                         "not %s" % repr(quality_type))
+    clip_left, clip_right = _sff_clip(clip_qual_left, clip_qual_right,
+                                      clip_adapter_left, clip_adapter_right,
+                                      seq_len)
     #Now build a SeqRecord
     if trim:
         seq = seq[clip_left:clip_right].upper()
@@ -591,8 +598,19 @@ def _sff_read_seq_record(handle, number_of_flows_per_read, flow_chars,
         seq = seq[:clip_left].lower() + \
               seq[clip_left:clip_right].upper() + \
               seq[clip_right:].lower()
-        annotations = {"flow_values":struct.unpack(read_flow_fmt, flow_values),
-                       "flow_index":struct.unpack(temp_fmt, flow_index),
+        if quality_type == "numpy":
+            #Big endian unsigned shorts, decoded by NumPy on access
+            flow_values = numpy.frombuffer(data, ">u2",
+                                           number_of_flows_per_read, offset)
+            flow_index = numpy.frombuffer(data, numpy.uint8, seq_len,
+                                          index_offset)
+        else:
+            flow_values = struct.unpack_from(">%iH" % number_of_flows_per_read,
+                                             data, offset)
+            flow_index = struct.unpack_from(">%iB" % seq_len,
+                                            data, index_offset)
+        annotations = {"flow_values":flow_values,
+                       "flow_index":flow_index,
                        "flow_chars":flow_chars,
                        "flow_key":key_sequence,
                        "clip_qual_left":clip_qual_left,
@@ -608,9 +626,62 @@ def _sff_read_seq_record(handle, number_of_flows_per_read, flow_chars,
     #record.letter_annotations["phred_quality"] = quals
     dict.__setitem__(record._per_letter_annotations,
                      "phred_quality", quals)
-    #Return the record and then continue...
     return record
 
+def _sff_read_seq_record(handle, number_of_flows_per_read, flow_chars,
+                         key_sequence, alphabet, trim=False,
+                         quality_type="list"):
+    """Parse the next read in the file, return data as a SeqRecord (PRIVATE)."""
+    #Now on to the reads...
+    #the read header format (fixed part):
+    #read_header_length     H
+    #name_length            H
+    #seq_len                I
+    #clip_qual_left         H
+    #clip_qual_right        H
+    #clip_adapter_left      H
+    #clip_adapter_right     H
+    #[rest of read header depends on the name length etc]
+    read_header_fmt = '>2HI4H'
+    read_header_size = struct.calcsize(read_header_fmt)
+    read_flow_fmt = ">%iH" % number_of_flows_per_read
+    read_flow_size = struct.calcsize(read_flow_fmt)
+
+    read_header_length, name_length, seq_len, clip_qual_left, \
+    clip_qual_right, clip_adapter_left, clip_adapter_right \
+        = struct.unpack(read_header_fmt, handle.read(read_header_size))
+    if clip_qual_left:
+        clip_qual_left -= 1 #python counting
+    if clip_adapter_left:
+        clip_adapter_left -= 1 #python counting
+    if read_header_length < 10 or read_header_length % 8 != 0:
+        raise ValueError("Malformed read header, says length is %i" \
+                         % read_header_length)
+    #now the name and any padding (remainder of header)
+    name = _bytes_to_string(handle.read(name_length))
+    padding = read_header_length - read_header_size - name_length
+    if handle.read(padding).count(_null) != padding:
+        raise ValueError("Post name %i byte padding region contained data" \
+                         % padding)
+    #now the flowgram values, flowgram index, bases and qualities
+    #NOTE - assuming flowgram_format==1, which means struct type H
+    data = handle.read(read_flow_size + seq_len*3) #decoded below
+    if len(data) != read_flow_size + seq_len*3:
+        raise ValueError("Premature end of file!")
+    #now any padding...
+    padding = (read_flow_size + seq_len*3)%8
+    if padding:
+        padding = 8 - padding
+        if handle.read(padding).count(_null) != padding:
+            raise ValueError("Post quality %i byte padding region contained data" \
+                             % padding)
+    #Return the record and then continue...
+    return _sff_build_record(data, 0, name, seq_len, clip_qual_left,
+                             clip_qual_right, clip_adapter_left,
+                             clip_adapter_right, number_of_flows_per_read,
+                             flow_chars, key_sequence, alphabet, trim,
+                             quality_type)
+
 
 def _sff_read_raw_record(handle, number_of_flows_per_read):
     """Extract the next read in the file as a raw (bytes) string (PRIVATE)."""
@@ -648,6 +719,267 @@ def _sff_read_raw_record(handle, number_of_flows_per_read):
     #Return the raw bytes
     return raw
 
+#This is a generator function!
+def _sff_string_iterator(handle, trim=False, start=None, count=None):
+    """Iterates over SFF reads as (name, sequence, qualities) strings (PRIVATE).
+
+    This is a fast alternative to SffIterator for when SeqRecord objects are
+    not needed (e.g. file format conversion). The qualities are a string of
+    bytes holding the PHRED scores directly, and the flowgram data is skipped.
+    As in SffIterator, untrimmed sequences use lower case for the clipped
+    regions, while trimmed sequences are all upper case.
+
+    If start and count are given, after reading the file header the handle is
+    moved to that offset and count reads are returned (e.g. to process a file
+    in chunks). This requires the handle's seek method.
+    """
+    try:
+        assert 0 == handle.tell()
+    except AttributeError:
+        #Probably a network handle or something like that
+        handle = _AddTellHandle(handle)
+    header_length, index_offset, index_length, number_of_reads, \
+    number_of_flows_per_read, flow_chars, key_sequence \
+        = _sff_file_header(handle)
+    if start is not None:
+        handle.seek(start)
+        number_of_reads = count
+    read_header_fmt = '>2HI4H'
+    read_header_size = struct.calcsize(read_header_fmt)
+    #NOTE - assuming flowgram_format==1, which means struct type H
+    read_flow_size = struct.calcsize(">%iH" % number_of_flows_per_read)
+    for read in xrange(number_of_reads):
+        if index_offset and handle.tell() == index_offset:
+            offset = index_offset + index_length
+            if offset % 8:
+                offset += 8 - (offset % 8)
+            handle.seek(offset)
+            index_offset = 0
+        read_header_length, name_length, seq_len, clip_qual_left, \
+        clip_qual_right, clip_adapter_left, clip_adapter_right \
+            = struct.unpack(read_header_fmt, handle.read(read_header_size))
+        if read_header_length < 10 or read_header_length % 8 != 0:
+            raise ValueError("Malformed read header, says length is %i" \
+                             % read_header_length)
+        name = _bytes_to_string(handle.read(name_length))
+        #Skip the padding, flowgram values and flowgram index
+        handle.read(read_header_length - read_header_size - name_length \
+                    + read_flow_size + seq_len)
+        seq = _bytes_to_string(handle.read(seq_len))
+        quals = _bytes_to_string(handle.read(seq_len))
+        padding = (read_flow_size + seq_len*3)%8
+        if padding:
+            padding = 8 - padding
+            if handle.read(padding).count(_null) != padding:
+                raise ValueError("Post quality %i byte padding region contained data" \
+                                 % padding)
+        if clip_qual_left:
+            clip_qual_left -= 1 #python counting
+        if clip_adapter_left:
+            clip_adapter_left -= 1 #python counting
+        clip_left, clip_right = _sff_clip(clip_qual_left, clip_qual_right,
+                                          clip_adapter_left, clip_adapter_right,
+                                          seq_len)
+        if trim:
+            yield name, seq[clip_left:clip_right].upper(), \
+                  quals[clip_left:clip_right]
+        else:
+            yield name, seq[:clip_left].lower() + \
+                  seq[clip_left:clip_right].upper() + \
+                  seq[clip_right:].lower(), quals
+    if start is None:
+        #As in SffIterator, check there is nothing after the reads
+        if index_offset and handle.tell() == index_offset:
+            offset = index_offset + index_length
+            if offset % 8:
+                offset += 8 - (offset % 8)
+            handle.seek(offset)
+        if handle.read(1):
+            raise ValueError("Additional data at end of SFF file")
+
+
+#This is a generator function!
+def _sff_buffer_reads(data, start, base, number_of_reads,
+                      number_of_flows_per_read, index_offset, index_length):
+    """Walks over the reads held in a buffer, giving their offsets (PRIVATE).
+
+    The data is a buffer (a byte string or memory mapped file) holding the
+    reads from offset start onwards, where base is the file offset of the
+    start of the buffer (zero for a memory map of the whole file). For each
+    read this yields a tuple of the name, sequence length, the four clip
+    values (with the left values in Python counting) and the offset in the
+    buffer of the read's flowgram values (to be decoded by the caller). The
+    header fields are unpacked directly from the buffer without copying.
+    """
+    read_header_fmt = '>2HI4H'
+    read_header_size = struct.calcsize(read_header_fmt)
+    #NOTE - assuming flowgram_format==1, which means struct type H
+    read_flow_size = struct.calcsize(">%iH" % number_of_flows_per_read)
+    data_len = len(data)
+    offset = start
+    for read in xrange(number_of_reads):
+        if index_offset and offset + base == index_offset:
+            skip = index_offset + index_length
+            if skip % 8:
+                skip += 8 - (skip % 8)
+            offset = skip - base
+            index_offset = 0
+        if offset + read_header_size > data_len:
+            raise ValueError("Premature end of file!")
+        read_header_length, name_length, seq_len, clip_qual_left, \
+        clip_qual_right, clip_adapter_left, clip_adapter_right \
+            = struct.unpack_from(read_header_fmt, data, offset)
+        if read_header_length < 10 or read_header_length % 8 != 0:
+            raise ValueError("Malformed read header, says length is %i" \
+                             % read_header_length)
+        name_end = offset + read_header_size + name_length
+        name = _bytes_to_string(data[offset + read_header_size:name_end])
+        flow_offset = offset + read_header_length
+        padding = flow_offset - name_end
+        if data[name_end:flow_offset].count(_null) != padding:
+            raise ValueError("Post name %i byte padding region contained data" \
+                             % padding)
+        end = flow_offset + read_flow_size + seq_len*3
+        padding = (read_flow_size + seq_len*3)%8
+        if padding:
+            padding = 8 - padding
+        if end + padding > data_len:
+            raise ValueError("Premature end of file!")
+        if data[end:end + padding].count(_null) != padding:
+            raise ValueError("Post quality %i byte padding region contained data" \
+                             % padding)
+        if clip_qual_left:
+            clip_qual_left -= 1 #python counting
+        if clip_adapter_left:
+            clip_adapter_left -= 1 #python counting
+        yield name, seq_len, clip_qual_left, clip_qual_right, \
+              clip_adapter_left, clip_adapter_right, flow_offset
+        offset = end + padding
+    #As in SffIterator, check there is nothing after the reads
+    if index_offset and offset + base == index_offset:
+        skip = index_offset + index_length
+        if skip % 8:
+            skip += 8 - (skip % 8)
+        offset = skip - base
+    if offset < data_len:
+        raise ValueError("Additional data at end of SFF file")
+
+
+def _sff_map_file(handle):
+    """Returns a read only memory map of an open SFF file, or None (PRIVATE).
+
+    Returns None if the handle is not for a real file (e.g. StringIO).
+    """
+    try:
+        fileno = handle.fileno()
+    except (AttributeError, IOError, ValueError):
+        #e.g. StringIO, or a network handle
+        return None
+    import os #Lazy import
+    import mmap
+    if not os.fstat(fileno).st_size:
+        raise ValueError("Empty file.")
+    return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+
+#This is a generator function!
+def _sff_mmap_iterator(handle, alphabet, trim, quality_type):
+    """Iterate over SFF reads using a memory mapped file (PRIVATE).
+
+    Rather than reading each part of each read from the handle, the reads
+    are decoded at their offsets in a memory map of the whole file.
+    """
+    data = _sff_map_file(handle)
+    if data is None:
+        raise ValueError("Memory mapping needs a real file handle (with a "
+                         "fileno method)")
+    #The memory map has its own read, seek and tell methods
+    header_length, index_offset, index_length, number_of_reads, \
+    number_of_flows_per_read, flow_chars, key_sequence \
+        = _sff_file_header(data)
+    for name, seq_len, clip_qual_left, clip_qual_right, \
+        clip_adapter_left, clip_adapter_right, offset \
+        in _sff_buffer_reads(data, header_length, 0, number_of_reads,
+                             number_of_flows_per_read, index_offset,
+                             index_length):
+        yield _sff_build_record(data, offset, name, seq_len, clip_qual_left,
+                                clip_qual_right, clip_adapter_left,
+                                clip_adapter_right, number_of_flows_per_read,
+                                flow_chars, key_sequence, alphabet, trim,
+                                quality_type)
+    #Note we don't close the memory map, as any NumPy arrays are views of it.
+    #It will be closed when no longer used.
+
+
+def ReadClipPoints(handle, array_type="array"):
+    """Returns the read names, lengths and clip points for a whole SFF file.
+
+    handle - input file, an SFF file opened in binary mode.
+    array_type - "array" (default) for Python array module arrays of
+                 unsigned integers, or "numpy" for NumPy uint32 arrays.
+
+    This reads just the read headers, without decoding any flowgrams, bases
+    or qualities, and returns a tuple of four items: a list of the read
+    names, and arrays of the untrimmed read lengths and the left and right
+    clip points (in Python counting, so the trimmed reads would be given by
+    slicing each sequence from the left to the right clip point, as with
+    the "sff-trim" format). Where possible the file is memory mapped.
+
+    >>> handle = open("Roche/E3MFGYR02_random_10_reads.sff", "rb")
+    >>> names, lengths, lefts, rights = ReadClipPoints(handle)
+    >>> handle.close()
+    >>> print names[0], lengths[0], lefts[0], rights[0]
+    E3MFGYR02JWQ7T 265 4 264
+    >>> print sum(lengths), sum(rights) - sum(lefts)
+    2674 2417
+
+    This is much faster than parsing the whole file in order to calculate
+    summary statistics of the read lengths before and after trimming.
+    """
+    if array_type not in ["array", "numpy"]:
+        raise ValueError("Array type should be 'array' or 'numpy', not %s" \
+                         % repr(array_type))
+    data = _sff_map_file(handle)
+    mapped = data is not None
+    if not mapped:
+        header_length, index_offset, index_length, number_of_reads, \
+        number_of_flows_per_read, flow_chars, key_sequence \
+            = _sff_file_header(handle)
+        #Just load the whole file into memory
+        data = handle.read()
+        start, base = 0, header_length
+    else:
+        header_length, index_offset, index_length, number_of_reads, \
+        number_of_flows_per_read, flow_chars, key_sequence \
+            = _sff_file_header(data)
+        start, base = header_length, 0
+    from array import array #Lazy import
+    names = []
+    lengths = array("I")
+    lefts = array("I")
+    rights = array("I")
+    for name, seq_len, clip_qual_left, clip_qual_right, \
+        clip_adapter_left, clip_adapter_right, offset \
+        in _sff_buffer_reads(data, start, base, number_of_reads,
+                             number_of_flows_per_read, index_offset,
+                             index_length):
+        clip_left, clip_right = _sff_clip(clip_qual_left, clip_qual_right,
+                                          clip_adapter_left, clip_adapter_right,
+                                          seq_len)
+        names.append(name)
+        lengths.append(seq_len)
+        lefts.append(clip_left)
+        rights.append(clip_right)
+    if mapped:
+        data.close()
+    if array_type == "numpy":
+        numpy = _sff_numpy()
+        lengths = numpy.array(lengths, numpy.uint32)
+        lefts = numpy.array(lefts, numpy.uint32)
+        rights = numpy.array(rights, numpy.uint32)
+    return names, lengths, lefts, rights
+
+
 class _AddTellHandle(object):
     """Wrapper for handles which do not support the tell method (PRIVATE).
 
@@ -677,13 +1009,20 @@ class _AddTellHandle(object):
 
 
 #This is a generator function!
-def SffIterator(handle, alphabet=Alphabet.generic_dna, trim=False):
+def SffIterator(handle, alphabet=Alphabet.generic_dna, trim=False,
+                memory_map=False, quality_type="list"):
     """Iterate over Standard Flowgram Format (SFF) reads (as SeqRecord objects).
 
     handle - input file, an SFF file, e.g. from Roche 454 sequencing.
              This must NOT be opened in universal read lines mode!
     alphabet - optional alphabet, defaults to generic DNA.
     trim - should the sequences be trimmed?
+    memory_map - should the file be memory mapped (rather than read from
+             the handle piece by piece)? This needs a real file handle.
+    quality_type - How to store the PHRED qualities, either "list" for a
+             list of integers (default), "bytes" for a byte string holding
+             one score per byte, or "numpy" for a NumPy uint8 array (in which
+             case the flowgram values and index are also NumPy arrays).
 
     The resulting SeqRecord objects should match those from a paired FASTA
     and QUAL file converted from the SFF file using the Roche 454 tool
@@ -742,6 +1081,19 @@ def SffIterator(handle, alphabet=Alphabet.generic_dna, trim=False):
     E3MFGYR02F7Z7G 130
     >>> handle.close()
 
+    For large files, memory mapping the file is faster. This works best
+    combined with NumPy arrays for the flowgrams and qualities, which are
+    then just views of the memory map decoded on demand. Here we use the
+    compact bytes quality type instead:
+
+    >>> handle = open("Roche/E3MFGYR02_random_10_reads.sff", "rb")
+    >>> record = SffIterator(handle, memory_map=True, quality_type="bytes").next()
+    >>> print record.id, len(record), len(record.annotations["flow_values"])
+    E3MFGYR02JWQ7T 265 400
+    >>> print [ord(q) for q in record.letter_annotations["phred_quality"][:5]]
+    [23, 24, 26, 38, 31]
+    >>> handle.close()
+
     """
     if isinstance(Alphabet._get_base_alphabet(alphabet),
                   Alphabet.ProteinAlphabet):
@@ -749,6 +1101,11 @@ def SffIterator(handle, alphabet=Alphabet.generic_dna, trim=False):
     if isinstance(Alphabet._get_base_alphabet(alphabet),
                   Alphabet.RNAAlphabet):
         raise ValueError("Invalid alphabet, SFF files do not hold RNA.")
+    if memory_map:
+        for record in _sff_mmap_iterator(handle, alphabet, trim,
+                                         quality_type):
+            yield record
+        return
     try:
         assert 0 == handle.tell()
     except AttributeError:
@@ -793,7 +1150,8 @@ def SffIterator(handle, alphabet=Alphabet.generic_dna, trim=False):
                                    flow_chars,
                                    key_sequence,
                                    alphabet,
-                                   trim)
+                                   trim,
+                                   quality_type)
     #The following is not essential, but avoids confusing error messages
     #for the user if they try and re-parse the same handle.
     if index_offset and handle.tell() == index_offset:
@@ -1085,10 +1443,15 @@ class SffWriter(SequenceWriter):
         read_flow_fmt = ">%iH" % self._number_of_flows_per_read
         read_flow_size = struct.calcsize(read_flow_fmt)
         temp_fmt = ">%iB" % seq_len # used for flow index and quals
+        #Compact qualities (bytes or NumPy) can be written directly
+        from Bio.SeqIO.QualityIO import _compact_phred_quality #Lazy import
+        compact = _compact_phred_quality(quals)
+        if compact is None:
+            compact = struct.pack(temp_fmt, *quals)
         data += struct.pack(read_flow_fmt, *flow_values) \
                 + struct.pack(temp_fmt, *flow_index) \
                 + seq \
-                + struct.pack(temp_fmt, *quals)
+                + compact
         #now any final padding...
         padding = (read_flow_size + seq_len*3)%8
         if padding:
@@ -200,6 +200,18 @@ The Bio.SeqIO.convert(...) function allows an easy interface for simple
 file format conversions. Additionally, it may use file format specific
 optimisations so this should be the fastest way too.
 
+The Bio.SeqIO.sort(...) function sorts (and optionally removes duplicates
+from) a sequence file, using temporary files so that it works even when the
+file is much larger than the available memory.
+
+The Bio.SeqIO.stats(...) function calculates summary statistics (number of
+records, total length, N50, G+C content, length and quality distributions)
+for a FASTA, FASTQ or SFF file without creating SeqRecord objects.
+
+The Bio.SeqIO.demultiplex(...) function writes records to many output files
+according to a key (such as a sample barcode), buffering the output and
+limiting the number of files held open at once.
+
 In general however, you can combine the Bio.SeqIO.parse(...) function with
 the Bio.SeqIO.write(...) function for sequence file conversion. Using
 generator expressions or generator functions provides a memory efficient way
@@ -383,6 +395,10 @@ _FormatToWriter = {"fasta" : FastaIO.FastaWriter,
 
 _BinaryFormats = ["sff", "sff-trim", "abi", "abi-trim"]
 
+#Formats whose parsers can keep the raw feature table, only parsing it into
+#SeqFeature objects when the features are first used:
+_LazyFeatureFormats = ["embl", "genbank", "gb", "imgt"]
+
 
 def write(sequences, handle, format):
     """Write complete set of sequences to a file.
@@ -443,7 +459,8 @@ def write(sequences, handle, format):
 
     return count
 
-def parse(handle, format, alphabet=None):
+def parse(handle, format, alphabet=None, processes=None, ordered=True,
+          lazy_features=False):
     r"""Turns a sequence file into an iterator returning SeqRecords.
 
      - handle   - handle to the file, or the filename as a string
@@ -452,6 +469,13 @@ def parse(handle, format, alphabet=None):
      - alphabet - optional Alphabet object, useful when the sequence type
                   cannot be automatically inferred from the file itself
                   (e.g. format="fasta" or "tab")
+     - processes - optional number of worker processes to parse the file
+                  in parallel (see below).
+     - ordered  - when parsing in parallel, should the records be returned
+                  in the order they are in the file (default True).
+     - lazy_features - for GenBank, EMBL and IMGT files, only parse each
+                  record's feature table when its features are first used
+                  (see below).
 
     Typical usage, opening a file to read in, and looping over the record(s):
 
@@ -492,6 +516,44 @@ def parse(handle, format, alphabet=None):
 
     Use the Bio.SeqIO.read(...) function when you expect a single record
     only.
+
+    For large files in simple formats where each record start can be
+    spotted easily (currently "fasta", "tab" and the "fastq" variants), the
+    file can be split into chunks and parsed by several processes at once
+    using the multiprocessing library (Python 2.6+). This needs a filename
+    rather than a handle, and for FASTQ files assumes the common four line
+    layout (no line wrapping):
+
+    >>> from Bio import SeqIO
+    >>> for record in SeqIO.parse("Quality/example.fastq", "fastq",
+    ...                           processes=2):
+    ...     print record.id, record.seq
+    EAS54_6_R1_2_1_413_324 CCCTTCTTGTCTTCAGCGTTTCTCC
+    EAS54_6_R1_2_1_540_792 TTGGCAGGCCAAGGCCGATGGATCA
+    EAS54_6_R1_2_1_443_348 GTTGCTTCTGGCGTGGGTGGGGGGG
+
+    The records are returned in the order they are in the file, unless you
+    set ordered=False in which case they are returned as each chunk of the
+    file has been parsed (which may be a little faster). Note that the
+    records have to be sent between processes, so this is only worthwhile
+    if parsing is your bottleneck.
+
+    For GenBank, EMBL and IMGT files, most of the parsing time goes on the
+    feature table. If you only want the identifiers and sequences (or the
+    features of just a few records), you can ask for each record's feature
+    table to be kept as text and only parsed when its features are used:
+
+    >>> for record in SeqIO.parse("GenBank/cor6_6.gb", "genbank",
+    ...                           lazy_features=True):
+    ...     print record.id, len(record)
+    X55053.1 513
+    X62281.1 880
+    M81224.1 441
+    AJ237582.1 206
+    L31939.1 282
+    AF297471.1 497
+    >>> print len(record.features)
+    4
     """
     #NOTE - The above docstring has some raw \n characters needed
     #for the StringIO example, hense the whole docstring is in raw
@@ -515,11 +577,26 @@ def parse(handle, format, alphabet=None):
                                      isinstance(alphabet, AlphabetEncoder)):
         raise ValueError("Invalid alphabet, %s" % repr(alphabet))
 
+    if lazy_features and format not in _LazyFeatureFormats:
+        raise ValueError("Lazy feature parsing is not supported for "
+                         "format '%s'" % format)
+
+    if processes is not None:
+        from _parallel import _parse_parallel #Lazy import
+        for r in _parse_parallel(handle, format, alphabet, processes, ordered):
+            yield r
+        return
+
     with as_handle(handle, mode) as fp:
         #Map the file format to a sequence iterator:
         if format in _FormatToIterator:
             iterator_generator = _FormatToIterator[format]
-            if alphabet is None:
+            if lazy_features:
+                #These parsers do not take an alphabet argument
+                i = iterator_generator(fp, lazy_features=True)
+                if alphabet is not None:
+                    i = _force_alphabet(i, alphabet)
+            elif alphabet is None:
                 i = iterator_generator(fp)
             else:
                 try:
@@ -669,7 +746,9 @@ def to_dict(sequences, key_function=None):
         d[key] = record
     return d
 
-def index(filename, format, alphabet=None, key_function=None):
+def index(filename, format, alphabet=None, key_function=None, sidecar=None,
+          max_cache=None, max_cache_length=None, lazy_features=False,
+          compact=False, threadsafe=False):
     """Indexes a sequence file and returns a dictionary like object.
 
      - filename - string giving name of file to be indexed
@@ -680,6 +759,18 @@ def index(filename, format, alphabet=None, key_function=None):
      - key_function - Optional callback function which when given a
                   SeqRecord identifier string should return a unique
                   key for the dictionary.
+     - sidecar  - Optional filename for a persistent index of the keys and
+                  offsets (see below).
+     - max_cache - Optional maximum number of parsed SeqRecord objects to
+                  keep in a least recently used cache (see below).
+     - max_cache_length - Optional maximum total sequence length of the
+                  SeqRecord objects kept in the cache.
+     - lazy_features - For GenBank, EMBL and IMGT files, only parse each
+                  record's feature table when its features are first used.
+     - compact  - Boolean, keep the keys and offsets in sorted arrays rather
+                  than a Python dictionary to save memory (see below).
+     - threadsafe - Boolean, allow the dictionary to be used from several
+                  threads, or after forking (see below).
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values:
@@ -713,6 +804,49 @@ def index(filename, format, alphabet=None, key_function=None):
     file formats (e.g. "fasta", "gb", "fastq") and is not suitable for any
     interlaced file format (e.g. alignment formats such as "clustal").
 
+    If the file is compressed using BGZF (blocked gzip, as used in BAM files
+    and by the bgzip tool), it can be indexed directly. Only the compressed
+    block(s) holding the record requested will be decompressed:
+
+    >>> records = SeqIO.index("Quality/example.fastq.bgz", "fastq")
+    >>> len(records)
+    3
+    >>> print records["EAS54_6_R1_2_1_540_792"].seq
+    TTGGCAGGCCAAGGCCGATGGATCA
+    >>> records.close()
+
+    Other gzip compressed files can't be used for random access.
+
+    For FASTA files, you can also fetch just part of a sequence without
+    loading the whole record, which is much faster for large sequences
+    like chromosomes. Like the samtools faidx tool, this uses the length
+    and line layout of each record to jump straight to the region
+    requested (using Python style coordinates):
+
+    >>> records = SeqIO.index("GenBank/NC_005816.fna", "fasta")
+    >>> print records.get_subseq("gi|45478711|ref|NC_005816.1|", 100, 130)
+    GACAGTTATGGAAATTAAAATCCTGCACAA
+    >>> print records.get_subseq("gi|45478711|ref|NC_005816.1|", 100, 130, -1)
+    TTGTGCAGGATTTTAATTTCCATAACTGTC
+    >>> records.close()
+
+    If you want many records, the get_many method looks up all the keys
+    first, then reads the records in the order they are in the file (which
+    is faster than jumping about the file, especially on network storage).
+    It returns (key, SeqRecord) tuples, by default in the order requested:
+
+    >>> records = SeqIO.index("Quality/example.fastq", "fastq")
+    >>> wanted = ["EAS54_6_R1_2_1_540_792", "EAS54_6_R1_2_1_413_324"]
+    >>> for key, record in records.get_many(wanted):
+    ...     print key, len(record)
+    EAS54_6_R1_2_1_540_792 25
+    EAS54_6_R1_2_1_413_324 25
+    >>> records.close()
+
+    There is an equivalent get_raw_many method, and both are also available
+    on the dictionary like objects from index_db (where all the keys are
+    looked up using batched SQL queries).
+
     For small files, it may be more efficient to use an in memory Python
     dictionary, e.g.
 
@@ -762,6 +896,72 @@ def index(filename, format, alphabet=None, key_function=None):
     to be completely parsed while building the index. Right now this is
     usually avoided.
 
+    Normally the file is scanned every time you call the index function. For
+    very large files which are reopened often (e.g. by many short lived
+    processes) you can ask for the keys and offsets to be saved to a sidecar
+    file the first time. Later calls will then memory map this sidecar index
+    rather than scanning the file again, as long as the sequence file's size
+    and modification time have not changed (otherwise it is rebuilt). It is
+    also rebuilt if you use a different key_function, going by the module
+    and name of the function (so take care with lambda functions). Note
+    this requires string keys, and the keys will be in sorted order:
+
+    >>> records = SeqIO.index("Quality/example.fastq", "fastq",
+    ...                       sidecar="Quality/example.fastq.sidecar")
+    >>> len(records)
+    3
+    >>> list(records)
+    ['EAS54_6_R1_2_1_413_324', 'EAS54_6_R1_2_1_443_348', 'EAS54_6_R1_2_1_540_792']
+    >>> print records["EAS54_6_R1_2_1_540_792"].format("fasta")
+    >EAS54_6_R1_2_1_540_792
+    TTGGCAGGCCAAGGCCGATGGATCA
+    <BLANKLINE>
+    >>> records.close()
+    >>> import os
+    >>> os.remove("Quality/example.fastq.sidecar")
+
+    Normally the keys and offsets are held in a Python dictionary, which
+    takes over 100 bytes per record. For files with hundreds of millions of
+    short reads this may not fit in memory, so you can ask for the compact
+    in memory equivalent of a sidecar index instead. This takes about 16
+    bytes per record plus the key itself, but looking up a key is slower.
+    Again this requires string keys, which will be in sorted order:
+
+    >>> records = SeqIO.index("Quality/example.fastq", "fastq", compact=True)
+    >>> list(records)
+    ['EAS54_6_R1_2_1_413_324', 'EAS54_6_R1_2_1_443_348', 'EAS54_6_R1_2_1_540_792']
+    >>> print records["EAS54_6_R1_2_1_540_792"].seq
+    TTGGCAGGCCAAGGCCGATGGATCA
+    >>> records.close()
+
+    Each time you access a record it is normally read from the file and
+    parsed again. If you will be using the same records over and over,
+    you can ask for the most recently used records to be cached, limited
+    by the number of records and/or their total sequence length. Note the
+    same SeqRecord object is then returned each time, so you should not
+    modify it. You can check how well the cache is working:
+
+    >>> records = SeqIO.index("GenBank/NC_005816.gb", "gb", max_cache=10)
+    >>> for i in range(5):
+    ...     print len(records["NC_005816.1"].features)
+    41
+    41
+    41
+    41
+    41
+    >>> hits, misses, count, length = records.cache_info()
+    >>> print hits, misses, count, length
+    4 1 1 9609
+    >>> records.close()
+
+    Normally the dictionary like object reads the file using a single handle
+    (seeking to each record then reading it), so it must not be used from
+    more than one thread at a time, nor by both the parent and child process
+    after a fork (e.g. in multiprocessing workers). With threadsafe=True each
+    thread and process opens the file for itself when first needed (and for
+    index_db, its own SQLite connection, so an index file is required), and
+    the record cache is protected by a lock.
+
     See also: Bio.SeqIO.index_db() and Bio.SeqIO.to_dict()
     """
     #Try and give helpful error messages:
@@ -779,10 +979,14 @@ def index(filename, format, alphabet=None, key_function=None):
 
     #Map the file format to a sequence iterator:
     import _index #Lazy import
-    return _index._IndexedSeqFileDict(filename, format, alphabet, key_function)
+    return _index._IndexedSeqFileDict(filename, format, alphabet, key_function,
+                                      sidecar, max_cache, max_cache_length,
+                                      lazy_features, compact, threadsafe)
 
 def index_db(index_filename, filenames=None, format=None, alphabet=None,
-               key_function=None):
+               key_function=None, processes=None, progress=None,
+               max_cache=None, max_cache_length=None, lazy_features=False,
+               threadsafe=False):
     """Index several sequence files and return a dictionary like object.
 
     The index is stored in an SQLite database rather than in memory (as in the
@@ -800,6 +1004,22 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
      - key_function - Optional callback function which when given a
                   SeqRecord identifier string should return a unique
                   key for the dictionary.
+     - processes - Optional number of worker processes to use to scan the
+                  files in parallel when building a new index (requires
+                  the multiprocessing library, Python 2.6+).
+     - progress - Optional callback function used when building a new
+                  index, called after each file has been loaded with the
+                  number of files done, the total number of files, the
+                  number of records indexed so far, and the build rate
+                  (records per second).
+     - max_cache - Optional maximum number of parsed SeqRecord objects to
+                  keep in a least recently used cache.
+     - max_cache_length - Optional maximum total sequence length of the
+                  SeqRecord objects kept in the cache.
+     - lazy_features - For GenBank, EMBL and IMGT files, only parse each
+                  record's feature table when its features are first used.
+     - threadsafe - Boolean, allow the dictionary to be used from several
+                  threads, or after forking (see Bio.SeqIO.index).
 
     This indexing function will return a dictionary like object, giving the
     SeqRecord objects as values:
@@ -823,6 +1043,24 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
 
     In this example the two files contain 85 and 10 records respectively.
 
+    As with the Bio.SeqIO.index() function, BGZF compressed files can be
+    indexed directly (in which case the offsets stored in the database are
+    BGZF virtual offsets).
+
+    When building a new index, all the offsets are loaded in a single
+    transaction and the database index on the keys is only built once
+    all the files have been scanned. If you are indexing many files, you
+    can ask for them to be scanned in parallel, and follow the progress:
+
+    >>> def report(done, total, count, rate):
+    ...     print "Indexed %i of %i files, %i records" % (done, total, count)
+    >>> records = SeqIO.index_db(idx_name, files, "fasta", generic_protein,
+    ...                          get_gi, processes=2, progress=report)
+    Indexed 1 of 2 files, 85 records
+    Indexed 2 of 2 files, 95 records
+    >>> len(records)
+    95
+
     See also: Bio.SeqIO.index() and Bio.SeqIO.to_dict()
     """
     #Try and give helpful error messages:
@@ -841,14 +1079,23 @@ def index_db(index_filename, filenames=None, format=None, alphabet=None,
     if alphabet is not None and not (isinstance(alphabet, Alphabet) or \
                                      isinstance(alphabet, AlphabetEncoder)):
         raise ValueError("Invalid alphabet, %s" % repr(alphabet))
+    if processes is not None and processes < 1:
+        raise ValueError("Number of processes should be at least one")
 
     #Map the file format to a sequence iterator:
     import _index #Lazy import
     return _index._SQLiteManySeqFilesDict(index_filename, filenames, format,
-                                          alphabet, key_function)
+                                          alphabet, key_function,
+                                          processes=processes,
+                                          progress=progress,
+                                          max_cache=max_cache,
+                                          max_cache_length=max_cache_length,
+                                          lazy_features=lazy_features,
+                                          threadsafe=threadsafe)
 
 
-def convert(in_file, in_format, out_file, out_format, alphabet=None):
+def convert(in_file, in_format, out_file, out_format, alphabet=None,
+            trimmer=None, qual_file=None):
     """Convert between two sequence file formats, return number of records.
 
      - in_file - an input handle or filename
@@ -856,6 +1103,11 @@ def convert(in_file, in_format, out_file, out_format, alphabet=None):
      - out_file - an output handle or filename
      - out_format - output file format, lower case string
      - alphabet - optional alphabet to assume
+     - trimmer - optional Bio.SeqIO.QualityIO.FastqTrimmer object, to trim
+                 and filter FASTQ reads (when converting FASTQ into FASTQ,
+                 FASTA, QUAL or tab format)
+     - qual_file - optional QUAL handle or filename, to be combined with a
+                 FASTA input file (e.g. to make a FASTQ file)
 
     NOTE - If you provide an output filename, it will be opened which will
     overwrite any existing file without warning. This may happen if even
@@ -876,6 +1128,48 @@ def convert(in_file, in_format, out_file, out_format, alphabet=None):
     >EAS54_6_R1_2_1_443_348
     GTTGCTTCTGGCGTGGGTGGGGGGG
     <BLANKLINE>
+
+    FASTQ reads can also be quality trimmed and filtered as part of the
+    conversion (see Bio.SeqIO.QualityIO.FastqTrimmer for details):
+
+    >>> from Bio.SeqIO.QualityIO import FastqTrimmer
+    >>> trimmer = FastqTrimmer(window_size=5, window_quality=22, min_length=15)
+    >>> handle = StringIO("")
+    >>> SeqIO.convert("Quality/example.fastq", "fastq", handle, "fasta",
+    ...               trimmer=trimmer)
+    2
+    >>> print handle.getvalue()
+    >EAS54_6_R1_2_1_413_324
+    CCCTTCTTGTCTTCAGCGTTTCTCC
+    >EAS54_6_R1_2_1_540_792
+    TTGGCAGGCCAAGGCCG
+    <BLANKLINE>
+
+    Matching FASTA and QUAL files can be combined, for example into FASTQ:
+
+    >>> handle = StringIO("")
+    >>> SeqIO.convert("Quality/example.fasta", "fasta", handle, "fastq",
+    ...               qual_file="Quality/example.qual")
+    3
+    >>> print handle.getvalue()
+    @EAS54_6_R1_2_1_413_324
+    CCCTTCTTGTCTTCAGCGTTTCTCC
+    +
+    ;;3;;;;;;;;;;;;7;;;;;;;88
+    @EAS54_6_R1_2_1_540_792
+    TTGGCAGGCCAAGGCCGATGGATCA
+    +
+    ;;;;;;;;;;;7;;;;;-;;;3;83
+    @EAS54_6_R1_2_1_443_348
+    GTTGCTTCTGGCGTGGGTGGGGGGG
+    +
+    ;;;;;;;;;;;9;7;;.7;393333
+    <BLANKLINE>
+
+    Many common conversions use special case code which avoids creating
+    SeqRecord objects (e.g. FASTQ to FASTA, FASTA to tab, SFF to FASTQ, or
+    GenBank, EMBL or SwissProt to tab), and so are much faster than using
+    the Bio.SeqIO.parse(...) and Bio.SeqIO.write(...) functions.
     """
     #Hack for SFF, will need to make this more general in future
     if in_format in _BinaryFormats :
@@ -894,11 +1188,166 @@ def convert(in_file, in_format, out_file, out_format, alphabet=None):
     from _convert import _handle_convert #Lazy import
     with as_handle(in_file, in_mode) as in_handle:
         with as_handle(out_file, out_mode) as out_handle:
-            count = _handle_convert(in_handle, in_format,
-                                    out_handle, out_format,
-                                    alphabet)
+            if qual_file is None:
+                count = _handle_convert(in_handle, in_format,
+                                        out_handle, out_format,
+                                        alphabet, trimmer)
+            else:
+                with as_handle(qual_file, "rU") as qual_handle:
+                    count = _handle_convert(in_handle, in_format,
+                                            out_handle, out_format,
+                                            alphabet, trimmer, qual_handle)
+    return count
+
+def sort(in_file, in_format, out_file, out_format=None, key=None,
+         unique=False, alphabet=None, max_records=100000, tmpdir=None):
+    """Sort the records in a sequence file, return number of records written.
+
+     - in_file - an input handle or filename
+     - in_format - input file format, lower case string
+     - out_file - an output handle or filename
+     - out_format - output file format, lower case string (defaults to
+                  the same as the input format)
+     - key      - optional function which when given a SeqRecord returns
+                  the value to sort on (default is the record id)
+     - unique   - Boolean, only keep the first record for each key value
+                  (i.e. remove duplicates)
+     - alphabet - optional alphabet to assume
+     - max_records - number of records to sort in memory at a time
+     - tmpdir   - optional directory for the temporary files
+
+    This works with files much larger than the available memory. The records
+    are sorted a batch at a time, each batch (run) is saved to a temporary
+    file (using pickle), and then these runs are merged. Sorting is stable,
+    so records with the same key are kept in their original order. For
+    example, to sort by sequence and remove any duplicate sequences:
+
+    >>> from Bio import SeqIO
+    >>> from StringIO import StringIO
+    >>> handle = StringIO("")
+    >>> SeqIO.sort("Fasta/dups.fasta", "fasta", handle, key=lambda r: str(r.seq),
+    ...            unique=True, max_records=2)
+    4
+    >>> print handle.getvalue()
+    >alpha
+    ACGTA
+    >gamma
+    CCGCC
+    >delta
+    CGCGC
+    >beta
+    CGTC
+    <BLANKLINE>
+
+    NOTE - If you provide an output filename, it will be opened which will
+    overwrite any existing file without warning.
+    """
+    if out_format is None:
+        out_format = in_format
+    from _sort import _sorted_records #Lazy import
+    records = _sorted_records(parse(in_file, in_format, alphabet), key,
+                              unique, max_records, tmpdir)
+    try:
+        count = write(records, out_file, out_format)
+    finally:
+        #Make sure the temporary files are removed
+        records.close()
     return count
 
+def stats(handle, format, processes=None):
+    """Calculate summary statistics for a sequence file.
+
+     - handle   - handle to the file, or the filename as a string
+     - format   - lower case string describing the file format, one of
+                  "fasta", "fastq" (or "fastq-sanger"), "fastq-solexa",
+                  "fastq-illumina", "sff" or "sff-trim".
+     - processes - optional number of worker processes to use (which
+                  requires a filename, not a handle)
+
+    This reads the file in a single pass, without creating SeqRecord objects,
+    which is much faster than using Bio.SeqIO.parse(...) and calling the
+    Bio.SeqUtils.GC(...) function etc on each record. The returned object
+    has the following attributes:
+
+     - count, total_length, min_length, max_length, mean_length, n50
+     - gc - the G+C content as a percentage of the total length (counting
+            the ambiguous base S as for Bio.SeqUtils.GC)
+     - lengths - dictionary of sequence length to number of records
+     - qualities - dictionary of PHRED quality score to number of bases
+                   (empty for FASTA files)
+
+    There is also a length_histogram(bin_size) method, and a merge(other)
+    method to combine the statistics from several files. For example:
+
+    >>> from Bio import SeqIO
+    >>> summary = SeqIO.stats("Quality/example.fastq", "fastq")
+    >>> print summary.count, summary.total_length, summary.n50
+    3 75 25
+    >>> print "%0.1f" % summary.gc
+    61.3
+    >>> print summary.qualities[26], summary.qualities[12]
+    56 1
+
+    With the processes argument, FASTA and FASTQ files are split into chunks
+    (as for parallel parsing, see Bio.SeqIO.parse), and SFF files are split
+    into blocks of reads, which are processed by a pool of worker processes.
+    This requires the multiprocessing module (Python 2.6 or later).
+
+    >>> summary = SeqIO.stats("Roche/E3MFGYR02_random_10_reads.sff", "sff-trim",
+    ...                       processes=2)
+    >>> print summary.count, summary.min_length, summary.max_length
+    10 130 295
+    """
+    from _stats import _file_stats #Lazy import
+    return _file_stats(handle, format, processes)
+
+def demultiplex(sequences, key_function, filenames, format, max_open=100,
+                buffer_size=65536, compression=None, threads=0):
+    """Write records to many files according to a key (e.g. barcode).
+
+     - sequences - A list (or iterator) of SeqRecord objects.
+     - key_function - Function which when given a SeqRecord returns the key
+                  for its output file (e.g. the sample barcode), or None to
+                  skip the record.
+     - filenames - Filename template as a string including %s which is
+                  replaced by the key, or a function which when given a key
+                  returns the filename. Several keys can share a file.
+     - format   - lower case string describing the file format to write
+                  (this must be a sequential format like "fasta" or "fastq").
+     - max_open - maximum number of output files to have open at once.
+     - buffer_size - number of characters to hold in memory for each output
+                  file before writing them to disk in one block.
+     - compression - None (default), "gzip" or "bgzf".
+     - threads  - number of background threads for compressing and writing
+                  the output (default zero, meaning no threads). At most
+                  max_open threads are used, as the open files are shared
+                  out between the threads.
+
+    Returns a dictionary of the number of records written for each key.
+
+    This is intended for splitting a multiplexed sequencing run into one
+    FASTQ file per sample, where keeping hundreds of output handles open
+    would be slow and may exceed the operating system's limit. For example,
+    using the barcode at the end of each Illumina read description::
+
+        from Bio import SeqIO
+        records = SeqIO.parse("run.fastq", "fastq")
+        counts = SeqIO.demultiplex(records,
+                                   lambda r : r.description.split(":")[-1],
+                                   "sample_%s.fastq.gz", "fastq",
+                                   compression="gzip", threads=2)
+
+    When more than max_open files are needed, the least recently used file
+    is closed and later re-opened in append mode (for gzip output this gives
+    a multi-member gzip file, which is valid). As with Bio.SeqIO.write(...),
+    any existing files are overwritten without warning.
+    """
+    from _demultiplex import _demultiplex #Lazy import
+    if isinstance(sequences, SeqRecord):
+        sequences = [sequences]
+    return _demultiplex(sequences, key_function, filenames, format, max_open,
+                        buffer_size, compression, threads)
+
 def _test():
     """Run the Bio.SeqIO module's doctests.
 
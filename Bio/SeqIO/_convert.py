@@ -27,6 +27,18 @@ All these file format specific optimisations are handled by this (private) modul
 from Bio import SeqIO
 #NOTE - Lots of lazy imports further on...
 
+def _fastq_records(in_handle, trimmer=None):
+    """FASTQ records as string tuples, optionally trimmed and filtered (PRIVATE).
+
+    The trimmer should be a Bio.SeqIO.QualityIO.FastqTrimmer object (or any
+    function taking and returning an iterator of (title, seq, qual) tuples).
+    """
+    from Bio.SeqIO.QualityIO import FastqGeneralIterator
+    records = FastqGeneralIterator(in_handle)
+    if trimmer is not None:
+        records = trimmer(records)
+    return records
+
 def _genbank_convert_fasta(in_handle, out_handle, alphabet=None):
     """Fast GenBank to FASTA (PRIVATE)."""
     #We don't need to parse the features...
@@ -45,13 +57,228 @@ def _embl_convert_fasta(in_handle, out_handle, alphabet=None):
     return SeqIO.write(records, out_handle, "fasta")
 
 
-def _fastq_generic(in_handle, out_handle, mapping):
+def _genbank_convert_tab(in_handle, out_handle, alphabet=None):
+    """Fast GenBank to simple tabbed conversion (PRIVATE)."""
+    #We don't need to parse the features...
+    from Bio.GenBank.Scanner import GenBankScanner
+    records = GenBankScanner().parse_records(in_handle, do_features=False)
+    #For tab output we can ignore the alphabet too
+    return SeqIO.write(records, out_handle, "tab")
+
+
+def _embl_convert_tab(in_handle, out_handle, alphabet=None):
+    """Fast EMBL to simple tabbed conversion (PRIVATE)."""
+    #We don't need to parse the features...
+    from Bio.GenBank.Scanner import EmblScanner
+    records = EmblScanner().parse_records(in_handle, do_features=False)
+    #For tab output we can ignore the alphabet too
+    return SeqIO.write(records, out_handle, "tab")
+
+
+def _swiss_convert_tab(in_handle, out_handle, alphabet=None):
+    """Fast SwissProt to simple tabbed conversion (PRIVATE).
+
+    Only looks at the ID, AC, sequence and end of record lines, using the
+    first accession as the identifier (as in the SeqIO "swiss" parser),
+    without creating the SwissProt or SeqRecord objects.
+    """
+    count = 0
+    accession = None
+    seq_lines = None
+    for line in in_handle:
+        key = line[:2]
+        if key == "  ":
+            seq_lines.append(line[5:].replace(" ", "").rstrip())
+        elif key == "ID":
+            accession = None
+            seq_lines = []
+        elif key == "AC":
+            if accession is None:
+                accession = line[5:].rstrip().rstrip(";").split("; ")[0]
+        elif key == "//":
+            count += 1
+            out_handle.write("%s\t%s\n" % (accession, "".join(seq_lines)))
+            seq_lines = None
+    if seq_lines is not None:
+        raise ValueError("Unexpected end of stream.")
+    return count
+
+
+def _fasta_convert_tab(in_handle, out_handle, alphabet=None):
+    """Fast FASTA to simple tabbed conversion (PRIVATE).
+
+    Avoids creating SeqRecord and Seq objects in order to speed up this
+    conversion.
+    """
+    from Bio.SeqIO.FastaIO import _fasta_records, _block_size
+    count = 0
+    for text in _fasta_records(in_handle, _block_size):
+        count += 1
+        title, sep, seq = text.partition("\n")
+        try:
+            id = title.split(None, 1)[0]
+        except IndexError:
+            id = ""
+        out_handle.write("%s\t%s\n" % (id, "".join(seq.split())))
+    return count
+
+
+def _tab_convert_fasta(in_handle, out_handle, alphabet=None):
+    """Fast simple tabbed to FASTA conversion (PRIVATE).
+
+    Avoids creating SeqRecord and Seq objects in order to speed up this
+    conversion.
+    """
+    count = 0
+    for line in in_handle:
+        try:
+            title, seq = line.split("\t") #will fail if more than one tab!
+        except ValueError:
+            if line.strip() == "":
+                #It's a blank line, ignore it
+                continue
+            raise ValueError("Each line should have one tab separating the" + \
+                             " title and sequence, this line has %i tabs: %s" \
+                             % (line.count("\t"), repr(line)))
+        count += 1
+        #As in the FASTA writer's clean method
+        title = title.strip().replace("  ", " ")
+        seq = seq.strip()
+        out_handle.write(">%s\n" % title)
+        #Do line wrapping
+        for i in range(0, len(seq), 60):
+            out_handle.write(seq[i:i+60] + "\n")
+    return count
+
+
+def _sff_convert_fasta(in_handle, out_handle, alphabet=None, trim=False):
+    """Fast SFF to FASTA conversion (PRIVATE).
+
+    Avoids creating SeqRecord and Seq objects, or unpacking the flowgram
+    data, in order to speed up this conversion.
+    """
+    from Bio.SeqIO.SffIO import _sff_string_iterator
+    count = 0
+    for name, seq, quals in _sff_string_iterator(in_handle, trim):
+        count += 1
+        out_handle.write(">%s\n" % name)
+        #Do line wrapping
+        for i in range(0, len(seq), 60):
+            out_handle.write(seq[i:i+60] + "\n")
+    return count
+
+
+def _sff_trim_convert_fasta(in_handle, out_handle, alphabet=None):
+    """Fast SFF to FASTA conversion applying the trimming (PRIVATE)."""
+    return _sff_convert_fasta(in_handle, out_handle, alphabet, True)
+
+
+def _sff_convert_fastq_sanger(in_handle, out_handle, alphabet=None, trim=False):
+    """Fast SFF to Sanger FASTQ conversion (PRIVATE).
+
+    Avoids creating SeqRecord and Seq objects, or unpacking the flowgram
+    data, in order to speed up this conversion. The SFF qualities are bytes
+    holding the PHRED scores, so are mapped to the FASTQ encoding using a
+    translation table. Will issue a warning if the scores had to be truncated
+    at 93 (maximum possible in the Sanger FASTQ format).
+    """
+    from Bio.SeqIO.SffIO import _sff_string_iterator
+    trunc_char = chr(1)
+    mapping = "".join([chr(33+q) for q in range(0, 93+1)] \
+                     +[trunc_char for q in range(94, 256)])
+    assert len(mapping)==256
+    count = 0
+    for name, seq, quals in _sff_string_iterator(in_handle, trim):
+        count += 1
+        qual = quals.translate(mapping)
+        if trunc_char in qual:
+            qual = qual.replace(trunc_char, chr(126))
+            import warnings
+            from Bio import BiopythonWarning
+            warnings.warn("Data loss - max PHRED quality 93 in Sanger FASTQ",
+                          BiopythonWarning)
+        out_handle.write("@%s\n%s\n+\n%s\n" % (name, seq, qual))
+    return count
+
+
+def _sff_trim_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
+    """Fast SFF to Sanger FASTQ conversion applying the trimming (PRIVATE)."""
+    return _sff_convert_fastq_sanger(in_handle, out_handle, alphabet, True)
+
+
+def _fasta_qual_convert_fastq_sanger(in_handle, qual_handle, out_handle,
+                                     alphabet=None):
+    """Fast paired FASTA and QUAL to Sanger FASTQ conversion (PRIVATE).
+
+    Both files are split into records using the FASTA parser's raw record
+    splitting, and the quality scores mapped to the FASTQ encoding using a
+    dictionary. This avoids creating SeqRecord and Seq objects, and the
+    list of integer quality scores, in order to speed up this conversion.
+    Any negative scores are treated as zero, and scores over 93 truncated,
+    with a warning (as in the QUAL parser and FASTQ writer).
+    """
+    from Bio.SeqIO.FastaIO import _fasta_records, _block_size
+    mapping = dict((str(q), chr(33+q)) for q in range(0, 93+1))
+    fasta_iter = _fasta_records(in_handle, _block_size)
+    qual_iter = _fasta_records(qual_handle, _block_size)
+    count = 0
+    while True:
+        try:
+            f_text = fasta_iter.next()
+        except StopIteration:
+            f_text = None
+        try:
+            q_text = qual_iter.next()
+        except StopIteration:
+            q_text = None
+        if f_text is None and q_text is None:
+            #End of both files
+            break
+        if f_text is None:
+            raise ValueError("FASTA file has more entries than the QUAL file.")
+        if q_text is None:
+            raise ValueError("QUAL file has more entries than the FASTA file.")
+        title, sep, seq = f_text.partition("\n")
+        q_title, sep, words = q_text.partition("\n")
+        title = title.rstrip()
+        id = title.split(None, 1)[0]
+        q_id = q_title.split(None, 1)[0]
+        if id != q_id:
+            raise ValueError("FASTA and QUAL entries do not match (%s vs %s)." \
+                             % (id, q_id))
+        seq = "".join(seq.split())
+        words = words.split()
+        if len(seq) != len(words):
+            raise ValueError("Sequence length and number of quality scores disagree for %s" \
+                             % id)
+        try:
+            qual = "".join([mapping[word] for word in words])
+        except KeyError:
+            #Unusual values (e.g. negative, over 93, or leading zeros)
+            import warnings
+            from Bio import BiopythonParserWarning, BiopythonWarning
+            scores = [int(word) for word in words]
+            if min(scores) < 0:
+                warnings.warn(("Negative quality score %i found, " + \
+                               "substituting PHRED zero instead.") \
+                               % min(scores), BiopythonParserWarning)
+            if max(scores) > 93:
+                warnings.warn("Data loss - max PHRED quality 93 in Sanger FASTQ",
+                              BiopythonWarning)
+            qual = "".join([chr(33+min(93, max(0, q))) for q in scores])
+        #As in the FASTQ writer's clean method
+        count += 1
+        out_handle.write("@%s\n%s\n+\n%s\n" \
+                         % (title.replace("  ", " "), seq, qual))
+    return count
+
+
+def _fastq_generic(in_handle, out_handle, mapping, trimmer=None):
     """FASTQ helper function where can't have data loss by truncation (PRIVATE)."""
-    from Bio.SeqIO.QualityIO import FastqGeneralIterator
     #For real speed, don't even make SeqRecord and Seq objects!
     count = 0
     null = chr(0)
-    for title, seq, old_qual in FastqGeneralIterator(in_handle):
+    for title, seq, old_qual in _fastq_records(in_handle, trimmer):
         count += 1
         #map the qual...
         qual = old_qual.translate(mapping)
@@ -61,13 +288,13 @@ def _fastq_generic(in_handle, out_handle, mapping):
     return count
 
     
-def _fastq_generic2(in_handle, out_handle, mapping, truncate_char, truncate_msg):
+def _fastq_generic2(in_handle, out_handle, mapping, truncate_char, truncate_msg,
+                    trimmer=None):
     """FASTQ helper function where there could be data loss by truncation (PRIVATE)."""
-    from Bio.SeqIO.QualityIO import FastqGeneralIterator
     #For real speed, don't even make SeqRecord and Seq objects!
     count = 0
     null = chr(0)
-    for title, seq, old_qual in FastqGeneralIterator(in_handle):
+    for title, seq, old_qual in _fastq_records(in_handle, trimmer):
         count += 1
         #map the qual...
         qual = old_qual.translate(mapping)
@@ -81,7 +308,7 @@ def _fastq_generic2(in_handle, out_handle, mapping, truncate_char, truncate_msg)
     return count
 
 
-def _fastq_sanger_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
+def _fastq_sanger_convert_fastq_sanger(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Sanger FASTQ to Sanger FASTQ conversion (PRIVATE).
 
     Useful for removing line wrapping and the redundant second identifier
@@ -95,10 +322,10 @@ def _fastq_sanger_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
                      +[chr(ascii) for ascii in range(33, 127)] \
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_solexa_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
+def _fastq_solexa_convert_fastq_solexa(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Solexa FASTQ to Solexa FASTQ conversion (PRIVATE).
 
     Useful for removing line wrapping and the redundant second identifier
@@ -111,10 +338,10 @@ def _fastq_solexa_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
                      +[chr(ascii) for ascii in range(59, 127)] \
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_illumina_convert_fastq_illumina(in_handle, out_handle, alphabet=None):
+def _fastq_illumina_convert_fastq_illumina(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Illumina 1.3+ FASTQ to Illumina 1.3+ FASTQ conversion (PRIVATE).
 
     Useful for removing line wrapping and the redundant second identifier
@@ -127,10 +354,10 @@ def _fastq_illumina_convert_fastq_illumina(in_handle, out_handle, alphabet=None)
                      +[chr(ascii) for ascii in range(64,127)] \
                      +[chr(0) for ascii in range(127,256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_illumina_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
+def _fastq_illumina_convert_fastq_sanger(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Illumina 1.3+ FASTQ to Sanger FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -141,10 +368,10 @@ def _fastq_illumina_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
                      +[chr(33+q) for q in range(0, 62+1)] \
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_sanger_convert_fastq_illumina(in_handle, out_handle, alphabet=None):
+def _fastq_sanger_convert_fastq_illumina(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Sanger FASTQ to Illumina 1.3+ FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -159,10 +386,11 @@ def _fastq_sanger_convert_fastq_illumina(in_handle, out_handle, alphabet=None):
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
     return _fastq_generic2(in_handle, out_handle, mapping, trunc_char,
-                          "Data loss - max PHRED quality 62 in Illumina 1.3+ FASTQ")
+                          "Data loss - max PHRED quality 62 in Illumina 1.3+ FASTQ",
+                          trimmer)
 
 
-def _fastq_solexa_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
+def _fastq_solexa_convert_fastq_sanger(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Solexa FASTQ to Sanger FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -175,9 +403,9 @@ def _fastq_solexa_convert_fastq_sanger(in_handle, out_handle, alphabet=None):
                        for q in range(-5, 62+1)]\
                       +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
-def _fastq_sanger_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
+def _fastq_sanger_convert_fastq_solexa(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Sanger FASTQ to Solexa FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -194,10 +422,11 @@ def _fastq_sanger_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
     return _fastq_generic2(in_handle, out_handle, mapping, trunc_char,
-                          "Data loss - max Solexa quality 62 in Solexa FASTQ")
+                          "Data loss - max Solexa quality 62 in Solexa FASTQ",
+                          trimmer)
 
 
-def _fastq_solexa_convert_fastq_illumina(in_handle, out_handle, alphabet=None):
+def _fastq_solexa_convert_fastq_illumina(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Solexa FASTQ to Illumina 1.3+ FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -210,10 +439,10 @@ def _fastq_solexa_convert_fastq_illumina(in_handle, out_handle, alphabet=None):
                        for q in range(-5, 62+1)]\
                       +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_illumina_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
+def _fastq_illumina_convert_fastq_solexa(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Illumina 1.3+ FASTQ to Solexa FASTQ conversion (PRIVATE).
 
     Avoids creating SeqRecord and Seq objects in order to speed up this
@@ -227,10 +456,10 @@ def _fastq_illumina_convert_fastq_solexa(in_handle, out_handle, alphabet=None):
                        for q in range(0, 62+1)] \
                      +[chr(0) for ascii in range(127, 256)])
     assert len(mapping)==256
-    return _fastq_generic(in_handle, out_handle, mapping)
+    return _fastq_generic(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_convert_fasta(in_handle, out_handle, alphabet=None):
+def _fastq_convert_fasta(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast FASTQ to FASTA conversion (PRIVATE).
 
     Avoids dealing with the FASTQ quality encoding, and creating SeqRecord and
@@ -239,10 +468,9 @@ def _fastq_convert_fasta(in_handle, out_handle, alphabet=None):
     NOTE - This does NOT check the characters used in the FASTQ quality string
     are valid!
     """
-    from Bio.SeqIO.QualityIO import FastqGeneralIterator
     #For real speed, don't even make SeqRecord and Seq objects!
     count = 0
-    for title, seq, qual in FastqGeneralIterator(in_handle):
+    for title, seq, qual in _fastq_records(in_handle, trimmer):
         count += 1
         out_handle.write(">%s\n" % title)
         #Do line wrapping
@@ -250,7 +478,7 @@ def _fastq_convert_fasta(in_handle, out_handle, alphabet=None):
             out_handle.write(seq[i:i+60] + "\n")
     return count
 
-def _fastq_convert_tab(in_handle, out_handle, alphabet=None):
+def _fastq_convert_tab(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast FASTQ to simple tabbed conversion (PRIVATE).
 
     Avoids dealing with the FASTQ quality encoding, and creating SeqRecord and
@@ -259,24 +487,22 @@ def _fastq_convert_tab(in_handle, out_handle, alphabet=None):
     NOTE - This does NOT check the characters used in the FASTQ quality string
     are valid!
     """
-    from Bio.SeqIO.QualityIO import FastqGeneralIterator
     #For real speed, don't even make SeqRecord and Seq objects!
     count = 0
-    for title, seq, qual in FastqGeneralIterator(in_handle):
+    for title, seq, qual in _fastq_records(in_handle, trimmer):
         count += 1
         out_handle.write("%s\t%s\n" % (title.split(None, 1)[0], seq))
     return count
 
-def _fastq_convert_qual(in_handle, out_handle, mapping):
+def _fastq_convert_qual(in_handle, out_handle, mapping, trimmer=None):
     """FASTQ helper function for QUAL output (PRIVATE).
 
     Mapping should be a dictionary mapping expected ASCII characters from the
     FASTQ quality string to PHRED quality scores (as strings).
     """
-    from Bio.SeqIO.QualityIO import FastqGeneralIterator
     #For real speed, don't even make SeqRecord and Seq objects!
     count = 0
-    for title, seq, qual in FastqGeneralIterator(in_handle):
+    for title, seq, qual in _fastq_records(in_handle, trimmer):
         count += 1
         out_handle.write(">%s\n" % title)
         #map the qual...
@@ -298,67 +524,110 @@ def _fastq_convert_qual(in_handle, out_handle, mapping):
     return count
 
     
-def _fastq_sanger_convert_qual(in_handle, out_handle, alphabet=None):
+def _fastq_sanger_convert_qual(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Sanger FASTQ to QUAL conversion (PRIVATE)."""
     mapping = dict((chr(q+33), str(q)) for q in range(0,93+1))
-    return _fastq_convert_qual(in_handle, out_handle, mapping)
+    return _fastq_convert_qual(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_solexa_convert_qual(in_handle, out_handle, alphabet=None):
+def _fastq_solexa_convert_qual(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Solexa FASTQ to QUAL conversion (PRIVATE)."""
     from Bio.SeqIO.QualityIO import phred_quality_from_solexa
     mapping = dict((chr(q+64), str(int(round(phred_quality_from_solexa(q))))) \
                    for q in range(-5,62+1))
-    return _fastq_convert_qual(in_handle, out_handle, mapping)
+    return _fastq_convert_qual(in_handle, out_handle, mapping, trimmer)
 
 
-def _fastq_illumina_convert_qual(in_handle, out_handle, alphabet=None):
+def _fastq_illumina_convert_qual(in_handle, out_handle, alphabet=None, trimmer=None):
     """Fast Illumina 1.3+ FASTQ to QUAL conversion (PRIVATE)."""
     mapping = dict((chr(q+64), str(q)) for q in range(0,62+1))
-    return _fastq_convert_qual(in_handle, out_handle, mapping)
+    return _fastq_convert_qual(in_handle, out_handle, mapping, trimmer)
 
 
-#TODO? - Handling aliases explicitly would let us shorten this list:
+#Alternative names for the same format, used when looking up a converter
+_format_aliases = {"fastq-sanger" : "fastq",
+                   "gb" : "genbank",
+                   }
+
+#Fast converters, keyed on the (canonical) input and output format names.
+#Each takes the input and output handles, and optional alphabet, and returns
+#the number of records. To add a new conversion just add it here.
 _converter = {
     ("genbank", "fasta") : _genbank_convert_fasta,
-    ("gb", "fasta") : _genbank_convert_fasta,
+    ("genbank", "tab") : _genbank_convert_tab,
     ("embl", "fasta") : _embl_convert_fasta,
+    ("embl", "tab") : _embl_convert_tab,
+    ("swiss", "tab") : _swiss_convert_tab,
+    ("fasta", "tab") : _fasta_convert_tab,
+    ("tab", "fasta") : _tab_convert_fasta,
+    ("sff", "fasta") : _sff_convert_fasta,
+    ("sff", "fastq") : _sff_convert_fastq_sanger,
+    ("sff-trim", "fasta") : _sff_trim_convert_fasta,
+    ("sff-trim", "fastq") : _sff_trim_convert_fastq_sanger,
     ("fastq", "fasta") : _fastq_convert_fasta,
-    ("fastq-sanger", "fasta") : _fastq_convert_fasta,
     ("fastq-solexa", "fasta") : _fastq_convert_fasta,
     ("fastq-illumina", "fasta") : _fastq_convert_fasta,
     ("fastq", "tab") : _fastq_convert_tab,
-    ("fastq-sanger", "tab") : _fastq_convert_tab,
     ("fastq-solexa", "tab") : _fastq_convert_tab,
     ("fastq-illumina", "tab") : _fastq_convert_tab,
     ("fastq", "fastq") : _fastq_sanger_convert_fastq_sanger,
-    ("fastq-sanger", "fastq") : _fastq_sanger_convert_fastq_sanger,
     ("fastq-solexa", "fastq") : _fastq_solexa_convert_fastq_sanger,
     ("fastq-illumina", "fastq") : _fastq_illumina_convert_fastq_sanger,
-    ("fastq", "fastq-sanger") : _fastq_sanger_convert_fastq_sanger,
-    ("fastq-sanger", "fastq-sanger") : _fastq_sanger_convert_fastq_sanger,
-    ("fastq-solexa", "fastq-sanger") : _fastq_solexa_convert_fastq_sanger,
-    ("fastq-illumina", "fastq-sanger") : _fastq_illumina_convert_fastq_sanger,
     ("fastq", "fastq-solexa") : _fastq_sanger_convert_fastq_solexa,
-    ("fastq-sanger", "fastq-solexa") : _fastq_sanger_convert_fastq_solexa,
     ("fastq-solexa", "fastq-solexa") : _fastq_solexa_convert_fastq_solexa,
     ("fastq-illumina", "fastq-solexa") : _fastq_illumina_convert_fastq_solexa,
     ("fastq", "fastq-illumina") : _fastq_sanger_convert_fastq_illumina,
-    ("fastq-sanger", "fastq-illumina") : _fastq_sanger_convert_fastq_illumina,
     ("fastq-solexa", "fastq-illumina") : _fastq_solexa_convert_fastq_illumina,
     ("fastq-illumina", "fastq-illumina") : _fastq_illumina_convert_fastq_illumina,
     ("fastq", "qual") : _fastq_sanger_convert_qual,
-    ("fastq-sanger", "qual") : _fastq_sanger_convert_qual,
     ("fastq-solexa", "qual") : _fastq_solexa_convert_qual,
     ("fastq-illumina", "qual") : _fastq_illumina_convert_qual,
     }
 
-def _handle_convert(in_handle, in_format, out_handle, out_format, alphabet=None):
+#Fast converters for a FASTA file plus a QUAL file, keyed on the (canonical)
+#output format name. Each takes the FASTA, QUAL and output handles, and
+#optional alphabet, and returns the number of records.
+_fasta_qual_converter = {
+    "fastq" : _fasta_qual_convert_fastq_sanger,
+    }
+
+def _get_converter(in_format, out_format):
+    """Returns the fast converter function for a pair of formats, or None (PRIVATE)."""
+    return _converter.get((_format_aliases.get(in_format, in_format),
+                           _format_aliases.get(out_format, out_format)))
+
+def _handle_convert(in_handle, in_format, out_handle, out_format, alphabet=None,
+                    trimmer=None, qual_handle=None):
     """SeqIO conversion function (PRIVATE)."""
-    try:
-        f = _converter[(in_format, out_format)]
-    except KeyError:
-        f = None
+    if qual_handle is not None:
+        if in_format != "fasta":
+            raise ValueError("A QUAL file can only be combined with FASTA "
+                             "input, not %s" % in_format)
+        if trimmer is not None:
+            raise ValueError("Quality trimming is only supported when "
+                             "converting FASTQ to FASTQ, FASTA, QUAL or tab")
+        f = _fasta_qual_converter.get(_format_aliases.get(out_format,
+                                                          out_format))
+        if f:
+            return f(in_handle, qual_handle, out_handle, alphabet)
+        from Bio.SeqIO.QualityIO import PairedFastaQualIterator
+        if alphabet is None:
+            records = PairedFastaQualIterator(in_handle, qual_handle)
+        else:
+            records = PairedFastaQualIterator(in_handle, qual_handle, alphabet)
+        return SeqIO.write(records, out_handle, out_format)
+    f = _get_converter(in_format, out_format)
+    if trimmer is not None:
+        #Only supported via the FASTQ fast paths (no SeqRecord objects)
+        if not f or not in_format.startswith("fastq"):
+            raise ValueError("Quality trimming is only supported when "
+                             "converting FASTQ to FASTQ, FASTA, QUAL or tab")
+        trim_format = getattr(trimmer, "format", in_format)
+        if trim_format.replace("fastq-sanger", "fastq") \
+        != in_format.replace("fastq-sanger", "fastq"):
+            raise ValueError("Trimmer is for %s, not %s" \
+                             % (trim_format, in_format))
+        return f(in_handle, out_handle, alphabet, trimmer)
     if f:
         return f(in_handle, out_handle, alphabet)
     else:
@@ -0,0 +1,251 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Demultiplexing of sequence records into many output files (PRIVATE).
+
+You are not expected to access this module, or any of its code, directly. This
+is all handled internally by the Bio.SeqIO.demultiplex(...) function which is
+the public interface for this functionality.
+
+Each record is formatted into an in memory buffer for its output file (shard)
+using the usual writer class, and the buffered data is only written to disk
+in large blocks. Only a limited number of output files are kept open at once,
+closing the least recently used one when needed (and later re-opening it in
+append mode). Optionally the output can be compressed (gzip or BGZF), and the
+compression and writing done in background threads. Each shard is always
+handled by the same thread, so its blocks are written in order.
+"""
+
+import sys
+
+from Bio._py3k import _as_bytes
+
+
+class _BlockBuffer(object):
+    """Minimal write only handle holding the data in memory (PRIVATE)."""
+    def __init__(self):
+        self._data = []
+        self.size = 0
+
+    def write(self, text):
+        self._data.append(text)
+        self.size += len(text)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Returns the buffered data as a single string, emptying the buffer."""
+        text = "".join(self._data)
+        self._data = []
+        self.size = 0
+        return text
+
+
+def _open_shard(filename, compression, append):
+    """Opens an output file for writing or appending (PRIVATE)."""
+    if append:
+        mode = "ab"
+    else:
+        mode = "wb"
+    if compression is None:
+        return open(filename, mode)
+    elif compression == "gzip":
+        import gzip #Lazy import
+        #Appending to a gzip file adds a new member, which is allowed
+        return gzip.open(filename, mode)
+    elif compression == "bgzf":
+        from Bio import bgzf #Lazy import
+        return bgzf.BgzfWriter(filename, mode)
+    else:
+        raise ValueError("Unknown compression %r" % compression)
+
+
+class _ShardWriter(object):
+    """Writes blocks of data to output files, with a limit on open files (PRIVATE).
+
+    The open handles are held in a dictionary keyed on the filename, along
+    with when each was last used. If too many files are open, the least
+    recently used is closed. The first time a file is opened it is created
+    (replacing any existing file), after that it is opened for appending.
+    """
+    def __init__(self, max_open, compression):
+        self._max_open = max_open
+        self._compression = compression
+        self._handles = {}
+        self._last_used = {}
+        self._created = set()
+        self._clock = 0
+
+    def write(self, filename, data):
+        handle = self._handles.get(filename)
+        if handle is None:
+            if len(self._handles) >= self._max_open:
+                oldest = min(self._last_used, key=self._last_used.get)
+                del self._last_used[oldest]
+                self._handles.pop(oldest).close()
+            handle = _open_shard(filename, self._compression,
+                                 filename in self._created)
+            self._created.add(filename)
+            self._handles[filename] = handle
+        self._clock += 1
+        self._last_used[filename] = self._clock
+        handle.write(_as_bytes(data))
+
+    def close(self):
+        """Closes all the open files."""
+        handles = self._handles.values()
+        self._handles = {}
+        self._last_used = {}
+        for handle in handles:
+            handle.close()
+
+
+class _ThreadedShardWriter(object):
+    """Writes blocks of data to output files using background threads (PRIVATE).
+
+    Each thread has its own queue and its own _ShardWriter (sharing out the
+    limit on open files, so there should be no more threads than files),
+    and each filename is assigned to one thread. Any exception in a thread
+    is raised again on the next call to write or close.
+    """
+    def __init__(self, max_open, compression, threads):
+        import threading #Lazy import
+        import Queue
+        self._queues = []
+        self._threads = []
+        self._errors = []
+        self._routes = {}
+        for i in range(threads):
+            pending = Queue.Queue(4)
+            writer = _ShardWriter(max_open // threads, compression)
+            thread = threading.Thread(target=self._worker,
+                                      args=(pending, writer))
+            thread.setDaemon(True)
+            thread.start()
+            self._queues.append(pending)
+            self._threads.append(thread)
+
+    def _worker(self, pending, writer):
+        failed = False
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            if failed:
+                #Keep taking items so that write does not block
+                continue
+            try:
+                writer.write(*item)
+            except Exception:
+                self._errors.append(sys.exc_info())
+                failed = True
+        try:
+            writer.close()
+        except Exception:
+            self._errors.append(sys.exc_info())
+
+    def _check(self):
+        if self._errors:
+            error = self._errors[0]
+            raise error[0], error[1], error[2]
+
+    def write(self, filename, data):
+        self._check()
+        try:
+            pending = self._routes[filename]
+        except KeyError:
+            pending = self._queues[len(self._routes) % len(self._queues)]
+            self._routes[filename] = pending
+        pending.put((filename, data))
+
+    def close(self):
+        """Waits for the threads to finish writing, and closes all the files."""
+        for pending in self._queues:
+            pending.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._queues = []
+        self._threads = []
+        self._check()
+
+
+def _demultiplex(sequences, key_function, filenames, format, max_open,
+                 buffer_size, compression, threads):
+    """Writes the records to files according to their key (PRIVATE).
+
+    Returns a dictionary of the number of records written for each key.
+    """
+    from Bio.SeqIO import _FormatToWriter, _BinaryFormats
+    from Bio.SeqIO.Interfaces import SequentialSequenceWriter
+    if format in _BinaryFormats \
+    or not issubclass(_FormatToWriter.get(format, object),
+                      SequentialSequenceWriter):
+        raise ValueError("Demultiplexing is not supported for format '%s'" \
+                         % format)
+    if isinstance(filenames, basestring):
+        if "%s" not in filenames:
+            raise ValueError("Filename template should include %s for the key")
+        template = filenames
+        filenames = lambda key : template % key
+    if max_open < 1:
+        raise ValueError("Maximum number of open files should be at least one")
+    if buffer_size < 1:
+        raise ValueError("Buffer size should be at least one")
+    if compression not in [None, "gzip", "bgzf"]:
+        raise ValueError("Compression should be None, 'gzip' or 'bgzf'")
+    if threads < 0:
+        raise ValueError("Number of threads should not be negative")
+    #Each thread needs at least one open file, so can't have more threads
+    #than open files
+    threads = min(threads, max_open)
+    writer_class = _FormatToWriter[format]
+
+    if threads:
+        sink = _ThreadedShardWriter(max_open, compression, threads)
+    else:
+        sink = _ShardWriter(max_open, compression)
+    #Each shard is a list of the filename, buffer and writer object
+    shards = {}
+    key_to_shard = {}
+    counts = {}
+    try:
+        for record in sequences:
+            key = key_function(record)
+            if key is None:
+                continue
+            try:
+                shard = key_to_shard[key]
+            except KeyError:
+                #Several keys may share an output file
+                filename = filenames(key)
+                try:
+                    shard = shards[filename]
+                except KeyError:
+                    buffer = _BlockBuffer()
+                    writer = writer_class(buffer)
+                    writer.write_header()
+                    shard = shards[filename] = [filename, buffer, writer]
+                key_to_shard[key] = shard
+                counts[key] = 0
+            filename, buffer, writer = shard
+            writer.write_record(record)
+            counts[key] += 1
+            if buffer.size >= buffer_size:
+                sink.write(filename, buffer.take())
+        for filename, buffer, writer in shards.itervalues():
+            writer.write_footer()
+            if buffer.size:
+                sink.write(filename, buffer.take())
+    except:
+        #Close the files, but don't let any error from the writer threads
+        #hide the exception which stopped us
+        error = sys.exc_info()
+        try:
+            sink.close()
+        except Exception:
+            pass
+        raise error[0], error[1], error[2]
+    sink.close()
+    return counts
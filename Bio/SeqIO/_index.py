@@ -19,8 +19,9 @@ record may not trigger an exception until it is accessed. This is by design.
 
 This means our dictionary like objects have in memory ALL the keys (all the
 record identifiers), which shouldn't be a problem even with second generation
-sequencing. If this is an issue later on, storing the keys and offsets in a
-temp lookup file might be one idea (e.g. using SQLite or an OBDA style index).
+sequencing. For very large files the keys and offsets can instead be held in
+compact sorted arrays (searched with a binary search), either in memory or
+in a memory mapped sidecar file, or in an SQLite database (see index_db).
 """
 
 import os
@@ -30,6 +31,9 @@ except ImportError:
     from UserDict import DictMixin as _dict_base
 import re
 import itertools
+import time
+import struct
+import mmap
 from StringIO import StringIO
 
 try:
@@ -46,6 +50,9 @@ from Bio._py3k import _bytes_to_string, _as_bytes, _as_string
 
 from Bio import SeqIO
 from Bio import Alphabet
+from Bio import bgzf
+from Bio.Seq import Seq
+from Bio.SeqIO._sort import _merge_sorted
 
 class _IndexedSeqFileDict(_dict_base):
     """Read only dictionary interface to a sequential sequence file.
@@ -69,34 +76,80 @@ class _IndexedSeqFileDict(_dict_base):
     Note that this dictionary is essentially read only. You cannot
     add or change values, pop values, nor clear the dictionary.
     """
-    def __init__(self, filename, format, alphabet, key_function):
+    #Per thread proxies (or SQLite connections), see threadsafe option
+    _threads = None
+
+    def __init__(self, filename, format, alphabet, key_function,
+                 sidecar=None, max_cache=None, max_cache_length=None,
+                 lazy_features=False, compact=False, threadsafe=False):
         #Use key_function=None for default value
         try:
             proxy_class = _FormatToRandomAccess[format]
         except KeyError:
             raise ValueError("Unsupported format '%s'" % format)
-        random_access_proxy = proxy_class(filename, format, alphabet)
+        random_access_proxy = proxy_class(filename, format, alphabet,
+                                          lazy_features)
         self._proxy = random_access_proxy
+        self._filename = filename
         self._key_function = key_function
+        self._cache = _make_record_cache(max_cache, max_cache_length,
+                                         threadsafe)
+        if threadsafe:
+            #Each thread (and process) will open the file for itself
+            self._threads = _PerThread( \
+                lambda : proxy_class(filename, format, alphabet,
+                                     lazy_features),
+                lambda proxy : proxy._handle.close())
+        if sidecar:
+            #Reuse the sidecar index if it is still valid for this file
+            try:
+                offsets = _load_sidecar(sidecar, filename, format,
+                                        key_function)
+            except:
+                self._proxy._handle.close()
+                raise
+            if offsets is not None:
+                self._offsets = offsets
+                return
         if key_function:
             offset_iter = ((key_function(k),o,l) for (k,o,l) in random_access_proxy)
         else:
             offset_iter = random_access_proxy
-        offsets = {}
-        for key, offset, length in offset_iter:
-            #Note - we don't store the length because I want to minimise the
-            #memory requirements. With the SQLite backend the length is kept
-            #and is used to speed up the get_raw method (by about 3 times).
-            if key in offsets:
+        if compact or sidecar:
+            #Sorted arrays use about 16 bytes per key plus the key itself,
+            #rather than over 100 bytes per entry in a Python dictionary
+            try:
+                offsets = _build_sorted_offsets(offset_iter)
+            except:
                 self._proxy._handle.close()
-                raise ValueError("Duplicate key '%s'" % key)
-            else:
-                offsets[key] = offset
+                raise
+        else:
+            offsets = {}
+            for key, offset, length in offset_iter:
+                #Note - we don't store the length because I want to minimise
+                #the memory requirements. With the SQLite backend the length
+                #is kept and is used to speed up the get_raw method (by about
+                #3 times).
+                if key in offsets:
+                    self._proxy._handle.close()
+                    raise ValueError("Duplicate key '%s'" % key)
+                else:
+                    offsets[key] = offset
+        if sidecar:
+            #Save the sidecar index, and use it rather than the dictionary
+            try:
+                _write_sidecar(sidecar, filename, format, key_function,
+                               offsets)
+                offsets = _load_sidecar(sidecar, filename, format,
+                                        key_function)
+            except:
+                self._proxy._handle.close()
+                raise
         self._offsets = offsets
     
     def __repr__(self):
         return "SeqIO.index(%r, %r, alphabet=%r, key_function=%r)" \
-               % (self._proxy._handle.name, self._proxy._format,
+               % (self._filename, self._proxy._format,
                   self._proxy._alphabet, self._key_function)
 
     def __str__(self):
@@ -179,14 +232,21 @@ class _IndexedSeqFileDict(_dict_base):
         
     def __getitem__(self, key):
         """x.__getitem__(y) <==> x[y]"""
+        cache = self._cache
+        if cache is not None:
+            record = cache.get(key)
+            if record is not None:
+                return record
         #Pass the offset to the proxy
-        record = self._proxy.get(self._offsets[key])
+        record = self._get_proxy(0).get(self._offsets[key])
         if self._key_function:
             key2 = self._key_function(record.id)
         else:
             key2 = record.id
         if key != key2:
             raise ValueError("Key did not match (%s vs %s)" % (key, key2))
+        if cache is not None:
+            cache.add(key, record)
         return record
 
     def get(self, k, d=None):
@@ -207,7 +267,142 @@ class _IndexedSeqFileDict(_dict_base):
         NOTE - This functionality is not supported for every file format.
         """
         #Pass the offset to the proxy
-        return self._proxy.get_raw(self._offsets[key])
+        return self._get_proxy(0).get_raw(self._offsets[key])
+
+    def get_many(self, keys, ordered=True):
+        """Iterate over (key, SeqRecord) tuples for many keys.
+
+        All the keys are looked up first (so a KeyError is raised for any
+        missing key before anything is read), then the records are read in
+        the order they appear in the file(s). This is much faster than
+        looking up each key in turn when the file is on a spinning disk or
+        network storage, as the reads are sequential rather than random.
+
+        With ordered=True (default) the records are returned in the order
+        of the keys given (which means they are all held in memory), while
+        with ordered=False they are returned as they are read. Either way,
+        a key given more than once is returned that many times (but the
+        record is only read once).
+        """
+        keys = list(keys)
+        return self._iter_many(keys, self._locate_many(keys), ordered, False)
+
+    def get_raw_many(self, keys, ordered=True):
+        """Iterate over (key, raw string) tuples for many keys.
+
+        This is like the get_many method, but returns the raw record strings
+        (see the get_raw method).
+
+        NOTE - This functionality is not supported for every file format.
+        """
+        keys = list(keys)
+        return self._iter_many(keys, self._locate_many(keys), ordered, True)
+
+    def _locate_many(self, keys):
+        """Returns a dict of key to (file number, offset, length) (PRIVATE).
+
+        Raises a KeyError for any missing key. Here the file number is
+        always zero, and the length is not known (zero).
+        """
+        offsets = self._offsets
+        locations = {}
+        for key in keys:
+            locations[key] = (0, offsets[key], 0)
+        return locations
+
+    def _get_proxy(self, file_number):
+        """Returns the random access proxy for the file number (PRIVATE).
+
+        With the threadsafe option, this is a separate proxy (and file
+        handle) for the current thread and process.
+        """
+        if self._threads is None:
+            return self._proxy
+        return self._threads.get()
+
+    def _iter_many(self, keys, locations, ordered, raw):
+        """Reads the records for get_many and get_raw_many (PRIVATE)."""
+        cache = self._cache
+        if raw:
+            cache = None
+        if not ordered:
+            #Return repeated keys as often as given, like ordered=True
+            repeats = {}
+            for key in keys:
+                repeats[key] = repeats.get(key, 0) + 1
+        results = {}
+        todo = []
+        for key, location in locations.iteritems():
+            if cache is not None:
+                record = cache.get(key)
+                if record is not None:
+                    if ordered:
+                        results[key] = record
+                    else:
+                        for i in xrange(repeats[key]):
+                            yield key, record
+                    continue
+            todo.append((location, key))
+        #Read the records in file and offset order, so the I/O is sequential
+        todo.sort()
+        for (file_number, offset, length), key in todo:
+            proxy = self._get_proxy(file_number)
+            if raw:
+                if length:
+                    #Shortcut if we have the length
+                    handle = proxy._handle
+                    handle.seek(offset)
+                    value = handle.read(length)
+                else:
+                    value = proxy.get_raw(offset)
+            else:
+                value = proxy.get(offset)
+                if self._key_function:
+                    key2 = self._key_function(value.id)
+                else:
+                    key2 = value.id
+                if key != key2:
+                    raise ValueError("Key did not match (%s vs %s)" \
+                                     % (key, key2))
+                if cache is not None:
+                    cache.add(key, value)
+            if ordered:
+                results[key] = value
+            else:
+                for i in xrange(repeats[key]):
+                    yield key, value
+        if ordered:
+            for key in keys:
+                yield key, results[key]
+
+    def get_subseq(self, key, start=0, end=None, strand=1):
+        """Returns part of a record's sequence as a Seq object.
+
+        This uses Python style zero based coordinates, so start and end are
+        as used when slicing the record's sequence (any region past the end
+        of the sequence is ignored). With strand=-1 the reverse complement
+        is returned. If the key is not found, a KeyError exception is raised.
+
+        For FASTA files this is done without parsing the whole record, by
+        seeking straight to the region of the file required.
+
+        NOTE - This functionality is not supported for every file format.
+        """
+        #Pass the offset to the proxy
+        return _make_subseq(self._get_proxy(0), self._offsets[key],
+                            start, end, strand)
+
+    def cache_info(self):
+        """Returns (hits, misses, records, length) for the record cache.
+
+        Here records is the number of SeqRecord objects currently cached,
+        and length is their total sequence length. Returns None if caching
+        was not enabled.
+        """
+        cache = self._cache
+        if cache is None:
+            return None
+        return cache.hits, cache.misses, len(cache), cache.length
 
     def __setitem__(self, key, value):
         """Would allow setting or replacing records, but not implemented."""
@@ -241,6 +436,14 @@ class _IndexedSeqFileDict(_dict_base):
         raise NotImplementedError("An indexed a sequence file doesn't "
                                   "support this.")
 
+    def close(self):
+        """Close the file handle (and any memory mapped sidecar index)."""
+        self._proxy._handle.close()
+        if self._threads is not None:
+            self._threads.close()
+        if isinstance(self._offsets, _SortedOffsets):
+            self._offsets.close()
+
 
 class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     """Read only dictionary interface to many sequential sequence files.
@@ -254,7 +457,9 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
     one of the open handles is closed first.
     """
     def __init__(self, index_filename, filenames, format, alphabet,
-                 key_function, max_open=10):
+                 key_function, max_open=10, processes=None, progress=None,
+                 max_cache=None, max_cache_length=None, lazy_features=False,
+                 threadsafe=False):
         random_access_proxies = {}
         #TODO? - Don't keep filename list in memory (just in DB)?
         #Should save a chunk of memory if dealing with 1000s of files.
@@ -265,6 +470,9 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             from Bio import MissingPythonDependencyError
             raise MissingPythonDependencyError("Requires sqlite3, which is "
                                                "included Python 2.5+")
+        if threadsafe and index_filename == ":memory:":
+            raise ValueError("The threadsafe option needs an index file, "
+                             "since each thread opens its own connection")
         if filenames is not None:
             filenames = list(filenames) #In case it was a generator
         if os.path.isfile(index_filename):
@@ -309,6 +517,10 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             except KeyError:
                 con.close()
                 raise ValueError("Unsupported format '%s'" % self._format)
+            if lazy_features and self._format not in SeqIO._LazyFeatureFormats:
+                con.close()
+                raise ValueError("Lazy feature parsing is not supported for "
+                                 "format '%s'" % self._format)
         else:
             self._filenames = filenames
             self._format = format
@@ -318,6 +530,9 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
                 proxy_class = _FormatToRandomAccess[format]
             except KeyError:
                 raise ValueError("Unsupported format '%s'" % format)
+            if lazy_features and format not in SeqIO._LazyFeatureFormats:
+                raise ValueError("Lazy feature parsing is not supported for "
+                                 "format '%s'" % format)
             #Create the index
             con = _sqlite.connect(index_filename)
             self._con = con
@@ -338,27 +553,71 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
             con.execute("CREATE TABLE file_data (file_number INTEGER, name TEXT);")
             con.execute("CREATE TABLE offset_data (key TEXT, file_number INTEGER, offset INTEGER, length INTEGER);")
             count = 0
-            for i, filename in enumerate(filenames):
-                con.execute("INSERT INTO file_data (file_number, name) VALUES (?,?);",
-                            (i, filename))
-                random_access_proxy = proxy_class(filename, format, alphabet)
-                if key_function:
-                    offset_iter = ((key_function(k),i,o,l) for (k,o,l) in random_access_proxy)
-                else:
-                    offset_iter = ((k,i,o,l) for (k,o,l) in random_access_proxy)
-                while True:
-                    batch = list(itertools.islice(offset_iter, 100))
-                    if not batch: break
-                    #print "Inserting batch of %i offsets, %s ... %s" \
-                    # % (len(batch), batch[0][0], batch[-1][0])
-                    con.executemany("INSERT INTO offset_data (key,file_number,offset,length) VALUES (?,?,?,?);",
-                                    batch)
-                    con.commit()
-                    count += len(batch)
-                if len(random_access_proxies) < max_open:
-                    random_access_proxies[i] = random_access_proxy
-                else:
-                    random_access_proxy._handle.close()
+            start_time = time.time()
+            if processes and processes > 1 and len(filenames) > 1:
+                #Scan the files in parallel, the workers just return the
+                #(id, offset, length) tuples and we do the inserts here.
+                try:
+                    import multiprocessing #Lazy import, Python 2.6+
+                except ImportError:
+                    con.close()
+                    from Bio import MissingPythonDependencyError
+                    raise MissingPythonDependencyError("Parallel indexing "
+                                        "requires multiprocessing, which is "
+                                        "included in Python 2.6+")
+                pool = multiprocessing.Pool(processes)
+                scanned = pool.imap(_scan_offsets,
+                                    [(f, format) for f in filenames])
+            else:
+                pool = None
+            try:
+                for i, filename in enumerate(filenames):
+                    con.execute("INSERT INTO file_data (file_number, name) VALUES (?,?);",
+                                (i, filename))
+                    if pool is None:
+                        random_access_proxy = proxy_class(filename, format,
+                                                          alphabet,
+                                                          lazy_features)
+                        offset_iter = iter(random_access_proxy)
+                    else:
+                        random_access_proxy = None
+                        offset_iter = iter(scanned.next())
+                    if key_function:
+                        offset_iter = ((key_function(k),i,o,l) for (k,o,l) in offset_iter)
+                    else:
+                        offset_iter = ((k,i,o,l) for (k,o,l) in offset_iter)
+                    while True:
+                        batch = list(itertools.islice(offset_iter, 1000))
+                        if not batch: break
+                        #All the inserts are done as one transaction, with
+                        #a single commit once every file has been loaded.
+                        con.executemany("INSERT INTO offset_data (key,file_number,offset,length) VALUES (?,?,?,?);",
+                                        batch)
+                        count += len(batch)
+                    #Note files scanned in parallel are opened on demand
+                    if random_access_proxy is not None:
+                        if len(random_access_proxies) < max_open:
+                            random_access_proxies[i] = random_access_proxy
+                        else:
+                            random_access_proxy._handle.close()
+                    if progress:
+                        elapsed = time.time() - start_time
+                        if elapsed:
+                            rate = count / elapsed
+                        else:
+                            rate = 0.0
+                        progress(i + 1, len(filenames), count, rate)
+            except:
+                if pool is not None:
+                    pool.terminate()
+                while random_access_proxies:
+                    random_access_proxies.popitem()[1]._handle.close()
+                con.close()
+                raise
+            if pool is not None:
+                pool.close()
+                pool.join()
+            con.commit()
             self._length = count
             #print "About to index %i entries" % count
             try:
@@ -379,6 +638,16 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         self._index_filename = index_filename
         self._alphabet = alphabet
         self._key_function = key_function
+        self._cache = _make_record_cache(max_cache, max_cache_length,
+                                         threadsafe)
+        self._lazy_features = lazy_features
+        if threadsafe:
+            #Each thread (and process) gets its own SQLite connection, and
+            #its own pool of open files (as a list [connection, proxies]).
+            self._threads = _PerThread( \
+                lambda : [_sqlite.connect(index_filename,
+                                          check_same_thread=False), {}],
+                _close_connection)
     
     def __repr__(self):
         return "SeqIO.index_db(%r, filenames=%r, format=%r, alphabet=%r, key_function=%r)" \
@@ -386,7 +655,7 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
                   self._alphabet, self._key_function)
 
     def __contains__(self, key):
-        return bool(self._con.execute("SELECT key FROM offset_data WHERE key=?;",
+        return bool(self._get_con().execute("SELECT key FROM offset_data WHERE key=?;",
                                       (key,)).fetchone())
 
     def __len__(self):
@@ -396,7 +665,7 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
 
     def __iter__(self):
         """Iterate over the keys."""
-        for row in self._con.execute("SELECT key FROM offset_data;"):
+        for row in self._get_con().execute("SELECT key FROM offset_data;"):
             yield str(row[0])
 
     if hasattr(dict, "iteritems"):
@@ -405,34 +674,29 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         def keys(self) :
             """Return a list of all the keys (SeqRecord identifiers)."""
             return [str(row[0]) for row in \
-                    self._con.execute("SELECT key FROM offset_data;").fetchall()]
+                    self._get_con().execute("SELECT key FROM offset_data;").fetchall()]
 
     def __getitem__(self, key):
         """x.__getitem__(y) <==> x[y]"""
+        cache = self._cache
+        if cache is not None:
+            record = cache.get(key)
+            if record is not None:
+                return record
         #Pass the offset to the proxy
-        row = self._con.execute("SELECT file_number, offset FROM offset_data WHERE key=?;",
-                                (key,)).fetchone()
+        row = self._get_con().execute("SELECT file_number, offset FROM offset_data WHERE key=?;",
+                                      (key,)).fetchone()
         if not row: raise KeyError
         file_number, offset = row
-        proxies = self._proxies
-        if file_number in proxies:
-            record = proxies[file_number].get(offset)
-        else:
-            if len(proxies) >= self._max_open:
-                #Close an old handle...
-                proxies.popitem()[1]._handle.close()
-            #Open a new handle...
-            proxy = _FormatToRandomAccess[self._format]( \
-                        self._filenames[file_number],
-                        self._format, self._alphabet)
-            record = proxy.get(offset)
-            proxies[file_number] = proxy
+        record = self._get_proxy(file_number).get(offset)
         if self._key_function:
             key2 = self._key_function(record.id)
         else:
             key2 = record.id
         if key != key2:
             raise ValueError("Key did not match (%s vs %s)" % (key, key2))
+        if cache is not None:
+            cache.add(key, record)
         return record
 
     def get(self, k, d=None):
@@ -453,54 +717,591 @@ class _SQLiteManySeqFilesDict(_IndexedSeqFileDict):
         NOTE - This functionality is not supported for every file format.
         """
         #Pass the offset to the proxy
-        row = self._con.execute("SELECT file_number, offset, length FROM offset_data WHERE key=?;",
-                                (key,)).fetchone()
+        row = self._get_con().execute("SELECT file_number, offset, length FROM offset_data WHERE key=?;",
+                                      (key,)).fetchone()
         if not row: raise KeyError
         file_number, offset, length = row
-        proxies = self._proxies
-        if file_number in proxies:
-            if length:
-                #Shortcut if we have the length
-                h = proxies[file_number]._handle
-                h.seek(offset)
-                return h.read(length)
-            else:
-                return proxies[file_number].get_raw(offset)
+        proxy = self._get_proxy(file_number)
+        if length:
+            #Shortcut if we have the length
+            h = proxy._handle
+            h.seek(offset)
+            return h.read(length)
         else:
-            #This code is duplicated from __getitem__ to avoid a function call
-            if len(proxies) >= self._max_open:
-                #Close an old handle...
-                proxies.popitem()[1]._handle.close()
-            #Open a new handle...
-            proxy = _FormatToRandomAccess[self._format]( \
-                        self._filenames[file_number],
-                        self._format, self._alphabet)
-            proxies[file_number] = proxy
-            if length:
-                #Shortcut if we have the length
-                h = proxy._handle
-                h.seek(offset)
-                return h.read(length)
-            else:
-                return proxy.get_raw(offset)
+            return proxy.get_raw(offset)
+
+    def get_subseq(self, key, start=0, end=None, strand=1):
+        """Returns part of a record's sequence as a Seq object.
+
+        This uses Python style zero based coordinates, so start and end are
+        as used when slicing the record's sequence (any region past the end
+        of the sequence is ignored). With strand=-1 the reverse complement
+        is returned. If the key is not found, a KeyError exception is raised.
+
+        For FASTA files this is done without parsing the whole record, by
+        seeking straight to the region of the file required.
+
+        NOTE - This functionality is not supported for every file format.
+        """
+        row = self._get_con().execute("SELECT file_number, offset FROM offset_data WHERE key=?;",
+                                      (key,)).fetchone()
+        if not row: raise KeyError
+        file_number, offset = row
+        return _make_subseq(self._get_proxy(file_number), offset,
+                            start, end, strand)
+
+    def _locate_many(self, keys):
+        """Returns a dict of key to (file number, offset, length) (PRIVATE).
+
+        The keys are looked up in batches with a single SQL query each,
+        rather than one query per key. Raises a KeyError for any missing key.
+        """
+        unique = list(set(keys))
+        con = self._get_con()
+        found = {}
+        #SQLite limits the number of parameters in a query (999 by default)
+        for i in range(0, len(unique), 500):
+            batch = unique[i:i + 500]
+            for key, file_number, offset, length in con.execute( \
+                "SELECT key, file_number, offset, length FROM offset_data "
+                "WHERE key IN (%s);" % ",".join("?" * len(batch)), batch):
+                found[key] = (file_number, offset, length)
+        locations = {}
+        for key in unique:
+            try:
+                locations[key] = found[key]
+            except KeyError:
+                raise KeyError(key)
+        return locations
+
+    def _get_proxy(self, file_number):
+        """Returns the random access proxy for the file number (PRIVATE).
+
+        If the file isn't already open, one of the open handles may be closed
+        first (to respect the max_open limit). With the threadsafe option,
+        each thread (and process) has its own pool of open files.
+        """
+        if self._threads is None:
+            proxies = self._proxies
+        else:
+            proxies = self._threads.get()[1]
+        if file_number in proxies:
+            return proxies[file_number]
+        if len(proxies) >= self._max_open:
+            #Close an old handle...
+            proxies.popitem()[1]._handle.close()
+        #Open a new handle...
+        proxy = _FormatToRandomAccess[self._format]( \
+                    self._filenames[file_number],
+                    self._format, self._alphabet, self._lazy_features)
+        proxies[file_number] = proxy
+        return proxy
+
+    def _get_con(self):
+        """Returns the SQLite connection for this thread and process (PRIVATE)."""
+        if self._threads is None:
+            return self._con
+        return self._threads.get()[0]
 
     def close(self):
         """Close any open file handles."""
         proxies = self._proxies
         while proxies:
             proxies.popitem()[1]._handle.close()
+        if self._threads is not None:
+            self._threads.close()
         
 
+class _RecordCache(object):
+    """Least recently used cache of parsed SeqRecord objects (PRIVATE).
+
+    This can be limited by the number of records, and/or by their total
+    sequence length (as a rough guide to the memory used). The records are
+    held in a dictionary, with a circular doubly linked list giving their
+    order of use (each link is a list of the previous link, the next link,
+    the key, the record and its length), and a count of hits and misses.
+    """
+    def __init__(self, max_records=None, max_length=None):
+        self._max_records = max_records
+        self._max_length = max_length
+        self._links = {}
+        #The root link is the oldest end of the list
+        root = []
+        root[:] = [root, root, None, None, 0]
+        self._root = root
+        self.length = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._links)
+
+    def get(self, key):
+        """Returns the record (marking it as recently used), or None."""
+        try:
+            link = self._links[key]
+        except (KeyError, TypeError):
+            #TypeError if unhashable, which we'll leave the index to report
+            self.misses += 1
+            return None
+        self.hits += 1
+        #Move this link to the newest end of the list
+        link_prev, link_next = link[0], link[1]
+        link_prev[1] = link_next
+        link_next[0] = link_prev
+        root = self._root
+        last = root[0]
+        last[1] = root[0] = link
+        link[0] = last
+        link[1] = root
+        return link[3]
+
+    def add(self, key, record):
+        """Adds a record to the cache, discarding old records if needed."""
+        length = len(record)
+        if (self._max_length is not None and length > self._max_length) \
+        or key in self._links:
+            return
+        root = self._root
+        last = root[0]
+        link = [last, root, key, record, length]
+        last[1] = root[0] = self._links[key] = link
+        self.length += length
+        while (self._max_records is not None \
+               and len(self._links) > self._max_records) \
+        or (self._max_length is not None and self.length > self._max_length):
+            #Discard the least recently used record
+            oldest = root[1]
+            root[1] = oldest[1]
+            oldest[1][0] = root
+            del self._links[oldest[2]]
+            self.length -= oldest[4]
+
+
+class _LockedRecordCache(_RecordCache):
+    """Record cache which can be shared between threads (PRIVATE)."""
+    def __init__(self, max_records=None, max_length=None):
+        import threading #Lazy import
+        _RecordCache.__init__(self, max_records, max_length)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the record (marking it as recently used), or None."""
+        self._lock.acquire()
+        try:
+            return _RecordCache.get(self, key)
+        finally:
+            self._lock.release()
+
+    def add(self, key, record):
+        """Adds a record to the cache, discarding old records if needed."""
+        self._lock.acquire()
+        try:
+            _RecordCache.add(self, key, record)
+        finally:
+            self._lock.release()
+
+
+def _make_record_cache(max_cache, max_cache_length, threadsafe=False):
+    """Returns a _RecordCache object, or None if not wanted (PRIVATE)."""
+    if max_cache is None and max_cache_length is None:
+        return None
+    if max_cache is not None and max_cache < 1:
+        raise ValueError("The record cache size should be at least one")
+    if max_cache_length is not None and max_cache_length < 1:
+        raise ValueError("The record cache length should be at least one")
+    if threadsafe:
+        return _LockedRecordCache(max_cache, max_cache_length)
+    return _RecordCache(max_cache, max_cache_length)
+
+
+class _PerThread(object):
+    """Holds a separate object for each thread and process (PRIVATE).
+
+    This is used for the threadsafe option of the index dictionaries, since
+    a file handle can't be shared between threads (each seeks then reads),
+    and neither file handles nor SQLite connections should be used by both
+    the parent and child after a fork. The objects are made on demand by
+    calling the factory function.
+    """
+    def __init__(self, factory, close):
+        import threading #Lazy import
+        self._threading = threading
+        self._factory = factory
+        self._close = close
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._made = []
+        self._inherited = []
+
+    def get(self):
+        """Returns the object for the current thread and process."""
+        local = self._local
+        pid = os.getpid()
+        if getattr(local, "pid", None) == pid:
+            return local.value
+        if pid != self._pid:
+            #We are in a forked child process. Leave any objects made by the
+            #parent alone (keeping a reference so they are not closed when
+            #garbage collected), and start again with a fresh lock.
+            self._lock = self._threading.Lock()
+            self._inherited.extend(self._made)
+            self._made = []
+            self._pid = pid
+        value = self._factory()
+        local.value = value
+        local.pid = pid
+        self._lock.acquire()
+        try:
+            self._made.append(value)
+        finally:
+            self._lock.release()
+        return value
+
+    def close(self):
+        """Closes all the objects made by this process."""
+        self._lock.acquire()
+        try:
+            made, self._made = self._made, []
+        finally:
+            self._lock.release()
+        #Other threads will need to make a new object if used again
+        self._local = self._threading.local()
+        for value in made:
+            self._close(value)
+
+
+def _close_connection(value):
+    """Closes a per thread [SQLite connection, proxies] list (PRIVATE)."""
+    con, proxies = value
+    while proxies:
+        proxies.popitem()[1]._handle.close()
+    con.close()
+
+
+def _make_subseq(proxy, offset, start, end, strand):
+    """Fetches part of a sequence from the proxy as a Seq object (PRIVATE)."""
+    if start < 0 or (end is not None and end < 0):
+        raise ValueError("Negative coordinates are not supported")
+    if strand not in (1, -1):
+        raise ValueError("Strand should be +1 or -1, not %r" % strand)
+    alphabet = proxy._alphabet
+    if alphabet is None:
+        alphabet = Alphabet.single_letter_alphabet
+    seq = Seq(proxy.get_subseq(offset, start, end), alphabet)
+    if strand == -1:
+        seq = seq.reverse_complement()
+    return seq
+
+
+##############################################################################
+
+#Sidecar index files for Bio.SeqIO.index(...)
+#
+#These hold the keys and offsets for a single sequence file, sorted by key,
+#so they can be memory mapped and searched without loading them into memory.
+#The layout (all integers are little endian) is:
+#
+# - header: magic string, file size, file modification time, record count,
+#   length of the format name, length of the key function name, then the
+#   format name and key function name themselves (the key function name is
+#   empty if none was used)
+# - record offsets: one unsigned 64 bit integer per record
+# - key boundaries: count + 1 unsigned 64 bit integers giving the start and
+#   end of each key within the key data
+# - key data: all the keys concatenated (in sorted order)
+
+_SIDECAR_MAGIC = _as_bytes("BioIdx02")
+_SIDECAR_HEADER = struct.Struct("<8sQdQHH")
+
+
+def _key_function_name(key_function):
+    """Returns the key function's module and name as a string (PRIVATE).
+
+    This is recorded in sidecar index files, so that they are rebuilt if
+    used with a different key function. Returns an empty string for None.
+    """
+    if key_function is None:
+        return ""
+    name = getattr(key_function, "__name__", None)
+    if name is None:
+        #e.g. a callable object
+        name = key_function.__class__.__name__
+    return "%s.%s" % (getattr(key_function, "__module__", None), name)
+
+
+class _SortedOffsets(object):
+    """Read only mapping of keys to file offsets held in sorted arrays (PRIVATE).
+
+    The data can be any buffer supporting slicing (e.g. a string, or an mmap
+    object for a sidecar index file). Lookups use a binary search of the
+    sorted keys, so nothing is loaded into memory up front.
+    """
+    def __init__(self, data, start, count):
+        self._data = data
+        self._count = count
+        self._offsets_start = start
+        self._bounds_start = start + 8 * count
+        self._keys_start = self._bounds_start + 8 * (count + 1)
+
+    def _key(self, i):
+        """Returns the i-th key as a bytes string (PRIVATE)."""
+        start, end = struct.unpack_from("<2Q", self._data,
+                                        self._bounds_start + 8 * i)
+        return self._data[self._keys_start + start:self._keys_start + end]
+
+    def _find(self, key):
+        """Returns the index of the key, or -1 if not present (PRIVATE)."""
+        if not isinstance(key, basestring):
+            return -1
+        key = _as_bytes(key)
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._key(low) == key:
+            return low
+        return -1
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i == -1:
+            raise KeyError(key)
+        return struct.unpack_from("<Q", self._data,
+                                  self._offsets_start + 8 * i)[0]
+
+    def __contains__(self, key):
+        return self._find(key) != -1
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in xrange(self._count):
+            yield _bytes_to_string(self._key(i))
+
+    def keys(self):
+        return list(self)
+
+    def _items(self):
+        """Iterate over the (key, offset) pairs in key order (PRIVATE).
+
+        The keys are returned as bytes strings.
+        """
+        for i in xrange(self._count):
+            offset, = struct.unpack_from("<Q", self._data,
+                                         self._offsets_start + 8 * i)
+            yield self._key(i), offset
+
+    def close(self):
+        if hasattr(self._data, "close"):
+            self._data.close()
+
+
+#Number of keys sorted as Python objects at a time, when building the sorted
+#arrays in memory (larger files are done in sorted runs which are merged)
+_sort_batch_size = 100000
+
+
+def _pack_sorted_offsets(items):
+    """Returns (count, data) for sorted (key, offset) pairs (PRIVATE).
+
+    The keys must be bytes strings. The data string holds the record offsets,
+    key boundaries and key data as described above, and is built up a batch
+    at a time so that the pairs can come from a generator.
+    """
+    offset_chunks = []
+    bound_chunks = [struct.pack("<Q", 0)]
+    key_chunks = []
+    count = 0
+    end = 0
+    items = iter(items)
+    while True:
+        batch = list(itertools.islice(items, 10000))
+        if not batch:
+            break
+        bounds = []
+        for key, offset in batch:
+            end += len(key)
+            bounds.append(end)
+        offset_chunks.append(struct.pack("<%iQ" % len(batch),
+                                         *[offset for key, offset in batch]))
+        bound_chunks.append(struct.pack("<%iQ" % len(bounds), *bounds))
+        key_chunks.append(_as_bytes("").join([key for key, offset in batch]))
+        count += len(batch)
+    return count, _as_bytes("").join(offset_chunks + bound_chunks + key_chunks)
+
+
+def _check_unique(items):
+    """Passes on sorted (key, offset) pairs, checking for duplicates (PRIVATE)."""
+    previous = None
+    for key, offset in items:
+        if key == previous:
+            raise ValueError("Duplicate key '%s'" % _bytes_to_string(key))
+        previous = key
+        yield key, offset
+
+
+def _build_sorted_offsets(offset_iter):
+    """Returns an in memory _SortedOffsets object (PRIVATE).
+
+    Takes an iterator of (key, offset, length) tuples. These are sorted and
+    packed a batch at a time, and if needed these sorted runs are merged, so
+    only one batch is held as Python objects. Keys must be strings, and a
+    ValueError is raised for any duplicates.
+    """
+    offset_iter = iter(offset_iter)
+    runs = []
+    while True:
+        batch = []
+        for key, offset, length in itertools.islice(offset_iter,
+                                                    _sort_batch_size):
+            if not isinstance(key, basestring):
+                raise TypeError("Sorted key storage requires string keys, "
+                                "not %r" % (key,))
+            batch.append((_as_bytes(key), offset))
+        if not batch:
+            break
+        batch.sort()
+        count, data = _pack_sorted_offsets(_check_unique(batch))
+        del batch
+        runs.append(_SortedOffsets(data, 0, count))
+    if not runs:
+        return _SortedOffsets(_as_bytes(""), 0, 0)
+    elif len(runs) == 1:
+        return runs[0]
+    merged = _merge_sorted([run._items() for run in runs])
+    count, data = _pack_sorted_offsets(_check_unique(merged))
+    return _SortedOffsets(data, 0, count)
+
+
+def _load_sidecar(sidecar, filename, format, key_function):
+    """Returns a _SortedOffsets object, or None if missing or stale (PRIVATE).
+
+    The sidecar is only used if it was built for the same format and key
+    function (going by its name), and the sequence file's size and
+    modification time still match.
+    """
+    if not os.path.isfile(sidecar):
+        return None
+    stat = os.stat(filename)
+    handle = open(sidecar, "rb")
+    try:
+        header = handle.read(_SIDECAR_HEADER.size)
+        if header[:6] == _SIDECAR_MAGIC[:6] \
+        and header[:8] != _SIDECAR_MAGIC:
+            #Older version of the sidecar file layout, rebuild it
+            return None
+        if len(header) != _SIDECAR_HEADER.size:
+            return None
+        magic, size, mtime, count, format_len, key_len \
+               = _SIDECAR_HEADER.unpack(header)
+        if magic != _SIDECAR_MAGIC:
+            raise ValueError("Not a Biopython sidecar index file: %s" % sidecar)
+        if size != stat.st_size or mtime != stat.st_mtime \
+        or _bytes_to_string(handle.read(format_len)) != format \
+        or _bytes_to_string(handle.read(key_len)) \
+        != _key_function_name(key_function):
+            return None
+        if count:
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            #Can't memory map an empty region, but nothing to map anyway
+            data = _as_bytes("")
+    finally:
+        handle.close()
+    return _SortedOffsets(data, _SIDECAR_HEADER.size + format_len + key_len,
+                          count)
+
+
+def _write_sidecar(sidecar, filename, format, key_function, offsets):
+    """Writes a sidecar index of an in memory _SortedOffsets object (PRIVATE).
+
+    The file is written under a temporary name and then renamed, so other
+    processes never see a partial index.
+    """
+    stat = os.stat(filename)
+    format = _as_bytes(format)
+    key_name = _as_bytes(_key_function_name(key_function))
+    tmp_name = "%s.%i.tmp" % (sidecar, os.getpid())
+    handle = open(tmp_name, "wb")
+    try:
+        handle.write(_SIDECAR_HEADER.pack(_SIDECAR_MAGIC, stat.st_size,
+                                          stat.st_mtime, len(offsets),
+                                          len(format), len(key_name)))
+        handle.write(format)
+        handle.write(key_name)
+        handle.write(offsets._data)
+        handle.close()
+        try:
+            os.rename(tmp_name, sidecar)
+        except OSError:
+            #Needed on Windows where rename won't replace a file
+            os.remove(sidecar)
+            os.rename(tmp_name, sidecar)
+    except:
+        handle.close()
+        if os.path.isfile(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+def _scan_offsets(args):
+    """Returns list of (id, offset, length) tuples for one file (PRIVATE).
+
+    This is a module level function so that it can be pickled and run in
+    a multiprocessing pool when building an index database in parallel.
+    The key_function (which might be a lambda) is applied by the caller.
+    """
+    filename, format = args
+    random_access_proxy = _FormatToRandomAccess[format](filename, format, None)
+    try:
+        return list(random_access_proxy)
+    finally:
+        random_access_proxy._handle.close()
+
+
 ##############################################################################
 
+def _open_for_random_access(filename):
+    """Open a file in binary mode, spot if it is BGZF format etc (PRIVATE).
+
+    This functionality is used by the Bio.SeqIO index and index_db functions.
+    For BGZF compressed files a BgzfReader is returned, whose seek and tell
+    methods use virtual offsets. Other gzip compressed files can't be used
+    for random access, and give a ValueError.
+    """
+    handle = open(filename, "rb")
+    magic = handle.read(4)
+    handle.seek(0)
+    if magic == bgzf._bgzf_magic:
+        return bgzf.BgzfReader(mode="rb", fileobj=handle)
+    elif magic[:2] == bgzf._bgzf_magic[:2]:
+        handle.close()
+        raise ValueError("Gzipped files must use BGZF (blocked gzip) "
+                         "compression for random access: %s" % filename)
+    return handle
+
+
 class SeqFileRandomAccess(object):
-    def __init__(self, filename, format, alphabet):
-        self._handle = open(filename, "rb")
+    def __init__(self, filename, format, alphabet, lazy_features=False):
+        if lazy_features and format not in SeqIO._LazyFeatureFormats:
+            raise ValueError("Lazy feature parsing is not supported for "
+                             "format '%s'" % format)
+        self._handle = _open_for_random_access(filename)
         self._alphabet = alphabet
         self._format = format
         #Load the parser class/function once an avoid the dict lookup in each
         #__getitem__ call:
         i = SeqIO._FormatToIterator[format]
+        if lazy_features:
+            #Only parse the feature table if and when it is used
+            iterator = i
+            i = lambda handle : iterator(handle, lazy_features=True)
         #The following alphabet code is a bit nasty... duplicates logic in
         #Bio.SeqIO.parse()
         if alphabet is None:
@@ -532,6 +1333,11 @@ class SeqFileRandomAccess(object):
         #Should be done by each sub-class (if possible)
         raise NotImplementedError("Not available for this file format.")
 
+    def get_subseq(self, offset, start, end):
+        """Returns part of the sequence as a string (if implemented)."""
+        #Should be done by each sub-class (if possible)
+        raise NotImplementedError("Not available for this file format.")
+
 
 
 
@@ -546,8 +1352,13 @@ class SeqFileRandomAccess(object):
 
 class SffRandomAccess(SeqFileRandomAccess):
     """Random access to a Standard Flowgram Format (SFF) file."""
-    def __init__(self, filename, format, alphabet):
-        SeqFileRandomAccess.__init__(self, filename, format, alphabet)
+    def __init__(self, filename, format, alphabet, lazy_features=False):
+        SeqFileRandomAccess.__init__(self, filename, format, alphabet,
+                                     lazy_features)
+        if isinstance(self._handle, bgzf.BgzfReader):
+            #The Roche index block uses uncompressed file offsets
+            self._handle.close()
+            raise ValueError("SFF files cannot be indexed if compressed")
         header_length, index_offset, index_length, number_of_reads, \
         self._flows_per_read, self._flow_chars, self._key_sequence \
             = SeqIO.SffIO._sff_file_header(self._handle)
@@ -620,8 +1431,9 @@ class SffTrimedRandomAccess(SffRandomAccess) :
 ###################
 
 class SequentialSeqFileRandomAccess(SeqFileRandomAccess):
-    def __init__(self, filename, format, alphabet):
-        SeqFileRandomAccess.__init__(self, filename, format, alphabet)
+    def __init__(self, filename, format, alphabet, lazy_features=False):
+        SeqFileRandomAccess.__init__(self, filename, format, alphabet,
+                                     lazy_features)
         marker = {"ace" : "CO ",
                   "embl" : "ID ",
                   "fasta" : ">",
@@ -655,13 +1467,18 @@ class SequentialSeqFileRandomAccess(SeqFileRandomAccess):
             #Here we can assume the record.id is the first word after the
             #marker. This is generally fine... but not for GenBank, EMBL, Swiss
             id = line[marker_offset:].strip().split(None, 1)[0]
+            #Note we can't do arithmetic on the offsets (which may be BGZF
+            #virtual offsets), so add up the line lengths instead
+            length = len(line)
             while True:
+                end_offset = handle.tell()
                 line = handle.readline()
                 if marker_re.match(line) or not line:
-                    end_offset = handle.tell() - len(line)
-                    yield _bytes_to_string(id), start_offset, end_offset - start_offset
+                    yield _bytes_to_string(id), start_offset, length
                     start_offset = end_offset
                     break
+                else:
+                    length += len(line)
         assert not line, repr(line)
 
     def get_raw(self, offset):
@@ -680,6 +1497,116 @@ class SequentialSeqFileRandomAccess(SeqFileRandomAccess):
         return _as_bytes("").join(lines)
 
 
+#How many FASTA line layouts each proxy keeps for get_subseq
+_max_layouts = 1000
+
+class FastaRandomAccess(SequentialSeqFileRandomAccess):
+    """Random access to a FASTA file, including fetching sub-sequences.
+
+    Like the samtools faidx tool, this uses the sequence length and the
+    line layout (bases and bytes per line) of each record. Provided all the
+    sequence lines (except the last) are the same length, this lets us seek
+    straight to the bytes holding a region of the sequence. The layout is
+    found the first time a record's sequence is requested, and kept in a
+    small cache of recently used records (rather than noted for every
+    record while indexing, which would cost a lot of memory for files of
+    many short reads).
+    """
+    def __init__(self, filename, format, alphabet, lazy_features=False):
+        SequentialSeqFileRandomAccess.__init__(self, filename, format, alphabet,
+                                               lazy_features)
+        #Using the record offset as the key, and holding an empty tuple
+        #for records whose sequence lines are irregular
+        self._layouts = _RecordCache(_max_layouts)
+
+    def _get_layout(self, offset):
+        """Returns the record's (length, line bases, line bytes) tuple (PRIVATE).
+
+        Returns None if the record's sequence lines are irregular.
+        """
+        layouts = self._layouts
+        layout = layouts.get(offset)
+        if layout is None:
+            layout = self._read_layout(offset)
+            layouts.add(offset, layout)
+        if not layout:
+            return None
+        return layout
+
+    def _read_layout(self, offset):
+        """Reads the record's sequence lines to find their layout (PRIVATE).
+
+        Returns a (length, line bases, line bytes) tuple, or an empty tuple
+        if the sequence lines are irregular.
+        """
+        marker_re = self._marker_re
+        handle = self._handle
+        handle.seek(offset)
+        line = handle.readline()
+        assert marker_re.match(line), line
+        seq_len = seq_bytes = lines = 0
+        line_bases = line_bytes = 0
+        regular = True
+        while True:
+            line = handle.readline()
+            if marker_re.match(line) or not line:
+                break
+            bases = len(line.rstrip())
+            if not lines:
+                line_bases, line_bytes = bases, len(line)
+            elif bases > line_bases or seq_len != lines * line_bases \
+            or seq_bytes != lines * line_bytes:
+                #This line is too long, or an earlier line was short
+                regular = False
+            seq_len += bases
+            seq_bytes += len(line)
+            lines += 1
+        if regular and line_bases:
+            return (seq_len, line_bases, line_bytes)
+        elif lines:
+            return ()
+        else:
+            #Empty sequence
+            return (0, 1, 1)
+
+    def get_subseq(self, offset, start, end):
+        """Returns the sequence from start to end (Python style) as a string.
+
+        Any region past the end of the sequence is ignored (as when slicing
+        a string). If the record does not have a regular line layout, this
+        falls back on parsing the whole record.
+        """
+        layout = self._get_layout(offset)
+        if layout is None:
+            return str(self.get(offset).seq[start:end])
+        seq_len, line_bases, line_bytes = layout
+        if end is None or end > seq_len:
+            end = seq_len
+        if start >= end:
+            return ""
+        #Positions relative to the start of the sequence lines
+        start_pos = (start // line_bases) * line_bytes + start % line_bases
+        end_pos = ((end - 1) // line_bases) * line_bytes \
+                  + (end - 1) % line_bases + 1
+        handle = self._handle
+        handle.seek(offset)
+        handle.readline()
+        if isinstance(handle, bgzf.BgzfReader):
+            #Can't do arithmetic with virtual offsets, have to read through
+            #(in pieces, so a region near the end of a long record doesn't
+            #load everything before it into memory at once)
+            left = start_pos
+            while left > 0:
+                data = handle.read(min(left, 65536))
+                if not data:
+                    break
+                left -= len(data)
+        else:
+            handle.seek(handle.tell() + start_pos)
+        data = handle.read(end_pos - start_pos)
+        return _bytes_to_string(_as_bytes("").join(data.split()))
+
+
 #######################################
 # Fiddly indexers: GenBank, EMBL, ... #
 #######################################
@@ -704,13 +1631,14 @@ class GenBankRandomAccess(SequentialSeqFileRandomAccess):
             #We cannot assume the record.id is the first word after LOCUS,
             #normally the first entry on the VERSION or ACCESSION line is used.
             key = None
+            length = len(line)
             while True:
+                end_offset = handle.tell()
                 line = handle.readline()
                 if marker_re.match(line) or not line:
                     if not key:
                         raise ValueError("Did not find ACCESSION/VERSION lines")
-                    end_offset = handle.tell() - len(line)
-                    yield _bytes_to_string(key), start_offset, end_offset - start_offset
+                    yield _bytes_to_string(key), start_offset, length
                     start_offset = end_offset
                     break
                 elif line.startswith(accession_marker):
@@ -720,6 +1648,7 @@ class GenBankRandomAccess(SequentialSeqFileRandomAccess):
                     if version_id.count(dot_char)==1 and version_id.split(dot_char)[1].isdigit():
                         #This should mimic the GenBank parser...
                         key = version_id
+                length += len(line)
         assert not line, repr(line)
 
 
@@ -755,15 +1684,17 @@ class EmblRandomAccess(SequentialSeqFileRandomAccess):
                 key = line[3:].strip().split(None,1)[0]
             else:
                 raise ValueError('Did not recognise the ID line layout:\n' + line)
+            length = len(line)
             while True:
+                end_offset = handle.tell()
                 line = handle.readline()
                 if marker_re.match(line) or not line:
-                    end_offset = handle.tell() - len(line)
-                    yield _bytes_to_string(key), start_offset, end_offset - start_offset
+                    yield _bytes_to_string(key), start_offset, length
                     start_offset = end_offset
                     break
                 elif line.startswith(sv_marker):
                     key = line.rstrip().split()[1]
+                length += len(line)
         assert not line, repr(line)
 
 
@@ -784,16 +1715,19 @@ class SwissRandomAccess(SequentialSeqFileRandomAccess):
         while marker_re.match(line):
             #We cannot assume the record.id is the first word after ID,
             #normally the following AC line is used.
+            length = len(line)
             line = handle.readline()
+            length += len(line)
             assert line.startswith(_as_bytes("AC "))
             key = line[3:].strip().split(semi_char)[0].strip()
             while True:
+                end_offset = handle.tell()
                 line = handle.readline()
                 if marker_re.match(line) or not line:
-                    end_offset = handle.tell() - len(line)
-                    yield _bytes_to_string(key), start_offset, end_offset - start_offset
+                    yield _bytes_to_string(key), start_offset, length
                     start_offset = end_offset
                     break
+                length += len(line)
         assert not line, repr(line)
 
 
@@ -818,23 +1752,25 @@ class UniprotRandomAccess(SequentialSeqFileRandomAccess):
             #(possibly with leading spaces)
             #but allow it to be later on within the <entry>
             key = None
-            done = False
+            length = len(line)
             while True:
                 line = handle.readline()
                 if key is None and start_acc_marker in line:
                     assert end_acc_marker in line, line
                     key = line[line.find(start_acc_marker)+11:].split(_as_bytes("<"))[0]
+                    length += len(line)
                 elif end_entry_marker in line:
-                    end_offset = handle.tell() - len(line) \
-                               + line.find(end_entry_marker) + 8
+                    length += line.find(end_entry_marker) + 8
                     break
                 elif marker_re.match(line) or not line:
                     #Start of next record or end of file
                     raise ValueError("Didn't find end of record")
+                else:
+                    length += len(line)
             if not key:
-                raise ValueError("Did not find <accession> line in bytes %i to %i" \
-                                 % (start_offset, end_offset))
-            yield _bytes_to_string(key), start_offset, end_offset - start_offset
+                raise ValueError("Did not find <accession> line in %i bytes " \
+                                 "from offset %i" % (length, start_offset))
+            yield _bytes_to_string(key), start_offset, length
             #Find start of next record
             while not marker_re.match(line) and line:
                 start_offset = handle.tell()
@@ -878,8 +1814,9 @@ class UniprotRandomAccess(SequentialSeqFileRandomAccess):
 
 class IntelliGeneticsRandomAccess(SeqFileRandomAccess):
     """Random access to a IntelliGenetics file."""
-    def __init__(self, filename, format, alphabet):
-        SeqFileRandomAccess.__init__(self, filename, format, alphabet)
+    def __init__(self, filename, format, alphabet, lazy_features=False):
+        SeqFileRandomAccess.__init__(self, filename, format, alphabet,
+                                     lazy_features)
         self._marker_re = re.compile(_as_bytes("^;"))
 
     def __iter__(self):
@@ -925,9 +1862,9 @@ class TabRandomAccess(SeqFileRandomAccess):
     def __iter__(self):
         handle = self._handle
         handle.seek(0)
-        start_offset = handle.tell()
         tab_char = _as_bytes("\t")
         while True:
+            start_offset = handle.tell()
             line = handle.readline()
             if not line : break #End of file
             try:
@@ -935,14 +1872,11 @@ class TabRandomAccess(SeqFileRandomAccess):
             except ValueError, err:
                 if not line.strip():
                     #Ignore blank lines
-                    start_offset = handle.tell()
                     continue
                 else:
                     raise err
             else:
-                end_offset = handle.tell()
-                yield _bytes_to_string(key), start_offset, end_offset - start_offset
-                start_offset = end_offset
+                yield _bytes_to_string(key), start_offset, len(line)
 
     def get_raw(self, offset):
         """Like the get method, but returns the record as a raw string."""
@@ -978,10 +1912,14 @@ class FastqRandomAccess(SeqFileRandomAccess):
             #assert line[0]=="@"
             #This record seems OK (so far)
             id = line[1:].rstrip().split(None, 1)[0]
+            #Note we can't do arithmetic on the offsets (which may be BGZF
+            #virtual offsets), so add up the line lengths instead
+            length = len(line)
             #Find the seq line(s)
             seq_len = 0
             while line:
                 line = handle.readline()
+                length += len(line)
                 if line.startswith(plus_char) : break
                 seq_len += len(line.strip())
             if not line:
@@ -992,17 +1930,18 @@ class FastqRandomAccess(SeqFileRandomAccess):
             while line:
                 if seq_len == qual_len:
                     #Should be end of record...
+                    end_offset = handle.tell()
                     line = handle.readline()
                     if line and line[0:1] != at_char:
                         ValueError("Problem with line %s" % repr(line))
                     break
                 else:
                     line = handle.readline()
+                    length += len(line)
                     qual_len += len(line.strip())
             if seq_len != qual_len:
                 raise ValueError("Problem with quality section")
-            end_offset = handle.tell() - len(line)
-            yield _bytes_to_string(id), start_offset, end_offset - start_offset
+            yield _bytes_to_string(id), start_offset, length
             start_offset = end_offset
         #print "EOF"
 
@@ -1051,7 +1990,7 @@ class FastqRandomAccess(SeqFileRandomAccess):
 
 _FormatToRandomAccess = {"ace" : SequentialSeqFileRandomAccess,
                         "embl" : EmblRandomAccess,
-                        "fasta" : SequentialSeqFileRandomAccess,
+                        "fasta" : FastaRandomAccess,
                         "fastq" : FastqRandomAccess, #Class handles all three variants
                         "fastq-sanger" : FastqRandomAccess, #alias of the above
                         "fastq-solexa" : FastqRandomAccess,
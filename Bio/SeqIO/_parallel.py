@@ -0,0 +1,174 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Parallel parsing of large sequence files (PRIVATE).
+
+You are not expected to access this module, or any of its code, directly. This
+is all handled internally by the Bio.SeqIO.parse(...) function when given the
+processes argument.
+
+The basic idea is to split the file into byte ranges of roughly equal size,
+then adjust each range to start at a record boundary. Each worker process
+then reads its chunk of the file and parses it as normal, returning a list
+of SeqRecord objects (which are pickled to get them back to the parent
+process). This only works for file formats where the start of each record
+can be recognised without reading the file from the start.
+"""
+
+import os
+from StringIO import StringIO
+
+from Bio._py3k import _bytes_to_string, _as_bytes
+
+#Aim for chunks of about this many bytes (but at least a few per process)
+_chunk_size = 4 * 1024 * 1024
+
+
+def _fasta_record_start(handle):
+    """Moves handle to the next record start in a FASTA file (PRIVATE).
+
+    Assumes the handle is at the start of a line. Returns the offset of the
+    next line starting with ">", or the end of file.
+    """
+    marker = _as_bytes(">")
+    while True:
+        offset = handle.tell()
+        line = handle.readline()
+        if not line or line[0:1] == marker:
+            return offset
+
+
+def _fastq_record_start(handle):
+    """Moves handle to the next record start in a FASTQ file (PRIVATE).
+
+    Assumes the handle is at the start of a line, and that the file uses
+    the common four line layout (no line wrapping). Since quality lines can
+    start with "@" (or "+"), a record start is taken to be a line starting
+    with "@" where the line after next starts with "+". Returns the end of
+    file if there are no more records.
+    """
+    at_char = _as_bytes("@")
+    plus_char = _as_bytes("+")
+    lines = []
+    offsets = []
+    while True:
+        offsets.append(handle.tell())
+        line = handle.readline()
+        lines.append(line)
+        if not line:
+            #End of file (any "@" lines left must be quality lines)
+            return offsets[-1]
+        if len(lines) == 3:
+            if lines[0][0:1] == at_char and lines[2][0:1] == plus_char:
+                return offsets[0]
+            del lines[0]
+            del offsets[0]
+
+
+def _tab_record_start(handle):
+    """Returns the current offset, each line of a tab file is a record (PRIVATE)."""
+    return handle.tell()
+
+
+_FormatToRecordStart = {"fasta" : _fasta_record_start,
+                        "fastq" : _fastq_record_start,
+                        "fastq-sanger" : _fastq_record_start,
+                        "fastq-solexa" : _fastq_record_start,
+                        "fastq-illumina" : _fastq_record_start,
+                        "tab" : _tab_record_start,
+                        }
+
+
+def _read_chunk(filename, format, start, end):
+    """Returns the data for the records starting in a byte range (PRIVATE).
+
+    The start and end are moved forward to the next record boundary (unless
+    at the start of the file), and the data between them returned as a
+    string. This may be empty if no record starts within the range.
+    """
+    record_start = _FormatToRecordStart[format]
+    handle = open(filename, "rb")
+    try:
+        if start:
+            #Move to the start of the next line, then the next record
+            handle.seek(start - 1)
+            handle.readline()
+            start = record_start(handle)
+        if start < end:
+            handle.seek(end - 1)
+            handle.readline()
+            end = record_start(handle)
+        if start >= end:
+            return ""
+        handle.seek(start)
+        data = handle.read(end - start)
+    finally:
+        handle.close()
+    return _bytes_to_string(data)
+
+
+def _parse_chunk(args):
+    """Parses the records starting in a byte range of a file (PRIVATE).
+
+    This is a module level function so that it can be pickled and run in
+    a multiprocessing pool. Returns a list of SeqRecord objects.
+    """
+    filename, format, alphabet, start, end = args
+    from Bio import SeqIO
+    data = _read_chunk(filename, format, start, end)
+    if not data:
+        return []
+    return list(SeqIO.parse(StringIO(data), format, alphabet))
+
+
+def _chunk_ranges(filename, processes):
+    """Splits a file into byte ranges for the worker processes (PRIVATE).
+
+    Returns a list of (start, end) tuples, with several ranges per process
+    (and for large files, ranges of roughly _chunk_size bytes).
+    """
+    if processes < 1:
+        raise ValueError("Number of processes should be at least one")
+    size = os.path.getsize(filename)
+    chunks = max(processes * 4, size // _chunk_size)
+    step = max(1, size // chunks)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+def _make_pool(processes):
+    """Returns a multiprocessing pool with the given number of processes (PRIVATE)."""
+    try:
+        import multiprocessing #Lazy import, Python 2.6+
+    except ImportError:
+        from Bio import MissingPythonDependencyError
+        raise MissingPythonDependencyError("Parallel parsing requires "
+                                           "multiprocessing, which is "
+                                           "included in Python 2.6+")
+    return multiprocessing.Pool(processes)
+
+
+def _parse_parallel(filename, format, alphabet, processes, ordered):
+    """Parses a file in chunks using a pool of processes (PRIVATE).
+
+    This is a generator function, returning SeqRecord objects either in the
+    order they appear in the file, or as each chunk is ready.
+    """
+    if not isinstance(filename, basestring):
+        raise TypeError("Parallel parsing needs a filename (not a handle)")
+    if format not in _FormatToRecordStart:
+        raise ValueError("Parallel parsing is not supported for format '%s'" \
+                         % format)
+    tasks = [(filename, format, alphabet, start, end) \
+             for (start, end) in _chunk_ranges(filename, processes)]
+    pool = _make_pool(processes)
+    try:
+        if ordered:
+            results = pool.imap(_parse_chunk, tasks)
+        else:
+            results = pool.imap_unordered(_parse_chunk, tasks)
+        for records in results:
+            for record in records:
+                yield record
+    finally:
+        pool.terminate()
@@ -0,0 +1,140 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""External memory sorting of sequence files (PRIVATE).
+
+You are not expected to access this module, or any of its code, directly. This
+is all handled internally by the Bio.SeqIO.sort(...) function which is the
+public interface for this functionality.
+
+The records are read in batches (runs) which are sorted in memory, and then
+pickled to temporary files. These sorted runs are then merged (using a heap)
+to give all the records in order, so only one batch of records plus one
+record from each run need be held in memory at once. If there are a lot of
+runs, they are first merged in groups to limit the number of open files.
+"""
+
+import os
+import heapq
+import tempfile
+import itertools
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+#Maximum number of sorted runs to merge at once (each needs an open file)
+_max_merge = 64
+
+
+def _merge_sorted(runs):
+    """Merges several iterators of sorted values (PRIVATE).
+
+    Like heapq.merge, which is not available on Python 2.5.
+    """
+    heap = []
+    for run in runs:
+        run = iter(run)
+        for value in run:
+            heap.append((value, run))
+            break
+    heapq.heapify(heap)
+    while heap:
+        value, run = heap[0]
+        yield value
+        for value in run:
+            heapq.heapreplace(heap, (value, run))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+def _default_key(record):
+    """Sort by the record identifier (PRIVATE)."""
+    return record.id
+
+
+def _write_run(items, tmpdir):
+    """Pickles sorted (key, number, record) tuples to a temp file (PRIVATE).
+
+    Returns the temporary filename.
+    """
+    fd, filename = tempfile.mkstemp(prefix="biopython_sort_", dir=tmpdir)
+    handle = os.fdopen(fd, "wb")
+    try:
+        pickler = pickle.Pickler(handle, pickle.HIGHEST_PROTOCOL)
+        for item in items:
+            pickler.dump(item)
+            #Don't let the pickler remember every record written
+            pickler.clear_memo()
+    finally:
+        handle.close()
+    return filename
+
+
+def _read_run(filename):
+    """Iterates over the (key, number, record) tuples in a run (PRIVATE)."""
+    handle = open(filename, "rb")
+    try:
+        unpickler = pickle.Unpickler(handle)
+        while True:
+            try:
+                yield unpickler.load()
+            except EOFError:
+                break
+    finally:
+        handle.close()
+
+
+def _sorted_records(records, key, unique, max_records, tmpdir):
+    """Generator function returning the records in sorted order (PRIVATE).
+
+    Any temporary files are removed when the generator finishes (or is
+    closed). Sorting is stable, so records with the same key remain in
+    their original order, and with unique=True only the first is kept.
+    """
+    if key is None:
+        key = _default_key
+    if max_records < 1:
+        raise ValueError("Number of records per run should be at least one")
+    records = iter(records)
+    number = itertools.count()
+    filenames = []
+    try:
+        while True:
+            batch = [(key(r), n, r) for (n, r) in \
+                     itertools.izip(number, itertools.islice(records,
+                                                             max_records))]
+            batch.sort()
+            if len(batch) < max_records:
+                #Reached the end of the records
+                break
+            filenames.append(_write_run(batch, tmpdir))
+        if filenames:
+            if batch:
+                filenames.append(_write_run(batch, tmpdir))
+            del batch
+            #Merge groups of runs until few enough to open them all at once
+            while len(filenames) > _max_merge:
+                group = filenames[:_max_merge]
+                new = _write_run(_merge_sorted([_read_run(f) for f in group]),
+                                 tmpdir)
+                for filename in group:
+                    os.remove(filename)
+                filenames = filenames[_max_merge:] + [new]
+            merged = _merge_sorted([_read_run(f) for f in filenames])
+        else:
+            #Everything fitted in memory, no need for temporary files
+            merged = batch
+        #Sorting is on (key, number), so records are never compared
+        previous = object()
+        for k, n, record in merged:
+            if unique and k == previous:
+                continue
+            previous = k
+            yield record
+    finally:
+        for filename in filenames:
+            if os.path.isfile(filename):
+                os.remove(filename)
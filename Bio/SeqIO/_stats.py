@@ -0,0 +1,294 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Summary statistics for sequence files (PRIVATE).
+
+You are not expected to access this module, or any of its code, directly. This
+is all handled internally by the Bio.SeqIO.stats(...) function which is the
+public interface for this functionality.
+
+The records are read as plain strings without creating SeqRecord objects,
+using the raw record splitting of the FASTA parser, FastqGeneralIterator for
+FASTQ, and for SFF reading just the bases and qualities of each read. The
+lengths are counted exactly (as a dictionary of length to number of records)
+which allows the N50 to be calculated, and partial results from different
+chunks of a file (or from different files) to be merged. The letters and
+quality scores are counted in batches of records using str.count.
+
+When using several processes, FASTA and FASTQ files are split into byte
+ranges as for parallel parsing (see the _parallel module), while SFF files
+are first scanned to find the offsets of every so many reads.
+"""
+
+# For using with statement in Python 2.5 or Jython
+from __future__ import with_statement
+
+from StringIO import StringIO
+
+#Number of records to collect before counting their letters
+_batch_size = 1000
+
+#Maximum number of SFF reads to give each worker process at once
+_sff_chunk_reads = 50000
+
+_gc_letters = ["G", "C", "g", "c", "S", "s"]
+
+
+class _SeqFileStats(object):
+    """Summary statistics for a sequence file, see Bio.SeqIO.stats (PRIVATE).
+
+    The lengths attribute is a dictionary mapping each sequence length to
+    the number of records with that length, and the qualities attribute a
+    dictionary mapping each PHRED quality score to the number of bases with
+    that score (empty if the file format has no qualities). The gc_count is
+    the number of G, C or S bases (upper or lower case), as used in the
+    Bio.SeqUtils.GC(...) function.
+    """
+    def __init__(self):
+        self.lengths = {}
+        self.qualities = {}
+        self.gc_count = 0
+
+    def __repr__(self):
+        return "<%s count=%i total_length=%i>" \
+               % (self.__class__.__name__, self.count, self.total_length)
+
+    @property
+    def count(self):
+        """Number of records."""
+        return sum(self.lengths.itervalues())
+
+    @property
+    def total_length(self):
+        """Total length of all the sequences."""
+        return sum([length * n for length, n in self.lengths.iteritems()])
+
+    @property
+    def min_length(self):
+        """Length of the shortest sequence (or None if no records)."""
+        if not self.lengths:
+            return None
+        return min(self.lengths)
+
+    @property
+    def max_length(self):
+        """Length of the longest sequence (or None if no records)."""
+        if not self.lengths:
+            return None
+        return max(self.lengths)
+
+    @property
+    def mean_length(self):
+        """Mean sequence length (or None if no records)."""
+        if not self.lengths:
+            return None
+        return self.total_length / float(self.count)
+
+    @property
+    def gc(self):
+        """G+C content as a percentage of the total length (zero if empty)."""
+        total = self.total_length
+        if not total:
+            return 0.0
+        return self.gc_count * 100.0 / total
+
+    @property
+    def n50(self):
+        """Length such that sequences this long or longer hold half the bases.
+
+        Returns None if there are no records (or only empty sequences).
+        """
+        half = self.total_length / 2.0
+        running = 0
+        for length in sorted(self.lengths, reverse=True):
+            running += length * self.lengths[length]
+            if running and running >= half:
+                return length
+        return None
+
+    def length_histogram(self, bin_size=1):
+        """Returns a dictionary of the number of records in each length bin.
+
+        The keys are the start of each bin, i.e. with bin_size=100 a key of
+        200 counts the records of length 200 to 299 inclusive. Empty bins
+        are omitted.
+        """
+        if bin_size < 1:
+            raise ValueError("Bin size should be at least one")
+        bins = {}
+        for length, n in self.lengths.iteritems():
+            start = length - length % bin_size
+            bins[start] = bins.get(start, 0) + n
+        return bins
+
+    def merge(self, other):
+        """Adds the counts from another set of statistics to this one."""
+        for length, n in other.lengths.iteritems():
+            self.lengths[length] = self.lengths.get(length, 0) + n
+        for score, n in other.qualities.iteritems():
+            self.qualities[score] = self.qualities.get(score, 0) + n
+        self.gc_count += other.gc_count
+
+    def _add_records(self, records, phred=None):
+        """Counts (sequence, quality) string pairs (PRIVATE).
+
+        The qualities are ignored if no phred dictionary (mapping quality
+        letters to scores) is given.
+        """
+        lengths = self.lengths
+        seqs = []
+        quals = []
+        for seq, qual in records:
+            length = len(seq)
+            lengths[length] = lengths.get(length, 0) + 1
+            seqs.append(seq)
+            quals.append(qual)
+            if len(seqs) >= _batch_size:
+                self._count_letters(seqs, quals, phred)
+                seqs = []
+                quals = []
+        if seqs:
+            self._count_letters(seqs, quals, phred)
+
+    def _count_letters(self, seqs, quals, phred):
+        """Counts the G+C content and quality scores of a batch (PRIVATE)."""
+        text = "".join(seqs)
+        self.gc_count += sum(map(text.count, _gc_letters))
+        if phred is None:
+            return
+        text = "".join(quals)
+        qualities = self.qualities
+        for letter in set(text):
+            try:
+                score = phred[letter]
+            except KeyError:
+                raise ValueError("Invalid character in quality string")
+            qualities[score] = qualities.get(score, 0) + text.count(letter)
+
+
+def _fasta_records(handle):
+    """Iterates over the FASTA sequences as (sequence, None) tuples (PRIVATE)."""
+    from Bio.SeqIO import FastaIO
+    for text in FastaIO._fasta_records(handle, FastaIO._block_size):
+        yield "".join(text.partition("\n")[2].split()), None
+
+
+def _fastq_records(handle):
+    """Iterates over the FASTQ reads as (sequence, quality) tuples (PRIVATE)."""
+    from Bio.SeqIO.QualityIO import FastqGeneralIterator
+    for title, seq, qual in FastqGeneralIterator(handle):
+        yield seq, qual
+
+
+def _sff_records(handle, trim, start=None, count=None):
+    """Iterates over SFF reads as (sequence, quality) string tuples (PRIVATE)."""
+    from Bio.SeqIO.SffIO import _sff_string_iterator
+    for name, seq, qual in _sff_string_iterator(handle, trim, start, count):
+        yield seq, qual
+
+
+def _sff_chunks(filename, processes):
+    """Returns (start offset, number of reads) tuples for an SFF file (PRIVATE)."""
+    from Bio.SeqIO.SffIO import _sff_file_header, _sff_do_slow_index
+    handle = open(filename, "rb")
+    try:
+        number_of_reads = _sff_file_header(handle)[3]
+        step = -(-number_of_reads // (processes * 4))
+        step = max(1, min(step, _sff_chunk_reads))
+        chunks = []
+        for i, (name, offset) in enumerate(_sff_do_slow_index(handle)):
+            if i % step == 0:
+                chunks.append((offset, min(step, number_of_reads - i)))
+    finally:
+        handle.close()
+    return chunks
+
+
+#Text formats, with the function to give the (sequence, quality) tuples
+_FormatToRecords = {"fasta" : _fasta_records,
+                    "fastq" : _fastq_records,
+                    "fastq-sanger" : _fastq_records,
+                    "fastq-solexa" : _fastq_records,
+                    "fastq-illumina" : _fastq_records,
+                    }
+
+#SFF formats, with if the reads should be trimmed
+_SffFormatToTrim = {"sff" : False,
+                    "sff-trim" : True,
+                    }
+
+
+def _phred_letters(format):
+    """Returns the quality letter to PHRED score mapping, or None (PRIVATE)."""
+    if format in _SffFormatToTrim:
+        #SFF files hold the PHRED scores directly as bytes
+        return dict((chr(q), q) for q in range(256))
+    elif format.startswith("fastq"):
+        from Bio.SeqIO.QualityIO import _phred_letters
+        return _phred_letters(format)
+    return None
+
+
+def _handle_stats(handle, format, start=None, count=None):
+    """Calculates the statistics for an open file handle (PRIVATE)."""
+    stats = _SeqFileStats()
+    if format in _SffFormatToTrim:
+        records = _sff_records(handle, _SffFormatToTrim[format], start, count)
+    else:
+        records = _FormatToRecords[format](handle)
+    stats._add_records(records, _phred_letters(format))
+    return stats
+
+
+def _chunk_stats(args):
+    """Calculates the statistics for part of a file (PRIVATE).
+
+    This is a module level function so that it can be pickled and run in
+    a multiprocessing pool. For SFF files the arguments give a start offset
+    and number of reads, otherwise a byte range.
+    """
+    filename, format, start, end = args
+    if format in _SffFormatToTrim:
+        handle = open(filename, "rb")
+        try:
+            return _handle_stats(handle, format, start, end)
+        finally:
+            handle.close()
+    from Bio.SeqIO._parallel import _read_chunk
+    return _handle_stats(StringIO(_read_chunk(filename, format, start, end)),
+                         format)
+
+
+def _file_stats(handle, format, processes=None):
+    """Calculates the statistics for a file, optionally in parallel (PRIVATE)."""
+    if format in _SffFormatToTrim:
+        mode = "rb"
+    elif format in _FormatToRecords:
+        mode = "rU"
+    else:
+        raise ValueError("Statistics are not supported for format '%s'" \
+                         % format)
+    if processes is None:
+        from Bio.File import as_handle
+        with as_handle(handle, mode) as fp:
+            return _handle_stats(fp, format)
+    if not isinstance(handle, basestring):
+        raise TypeError("Parallel statistics needs a filename (not a handle)")
+    from Bio.SeqIO._parallel import _chunk_ranges, _make_pool
+    if format in _SffFormatToTrim:
+        if processes < 1:
+            raise ValueError("Number of processes should be at least one")
+        chunks = _sff_chunks(handle, processes)
+    else:
+        chunks = _chunk_ranges(handle, processes)
+    stats = _SeqFileStats()
+    pool = _make_pool(processes)
+    try:
+        for part in pool.imap_unordered(_chunk_stats,
+                                        [(handle, format, start, end) \
+                                         for (start, end) in chunks]):
+            stats.merge(part)
+    finally:
+        pool.terminate()
+    return stats
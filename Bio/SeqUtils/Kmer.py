@@ -0,0 +1,453 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Count k-mers (words of length k) in nucleotide sequences.
+
+Each k-mer is encoded as an integer, two bits per base (A=0, C=1, G=2, T=3),
+so k can be up to 31. Canonical counting merges each k-mer with its reverse
+complement (keeping the smaller code), which is useful for reads from both
+strands. Any k-mer containing a letter other than A, C, G, T (or U) is
+skipped, and lower case letters are counted as upper case.
+
+For small k the counts are held in a dense array with an entry for every
+possible k-mer, otherwise in a dictionary keyed by the integer codes. For
+example:
+
+>>> from Bio.SeqUtils.Kmer import KmerCounter
+>>> counter = KmerCounter(3)
+>>> counter.add("ACGTACGNNACG")
+>>> counter["ACG"], counter["CGT"], counter["TTT"]
+(3, 1, 0)
+>>> for kmer, count in counter.most_common(2):
+...     print kmer, count
+ACG 3
+CGT 1
+
+With canonical counting, ACG and its reverse complement CGT are merged:
+
+>>> counter = KmerCounter(3, canonical=True)
+>>> counter.add("ACGTACGNNACG")
+>>> counter["ACG"], counter["CGT"], counter.total
+(4, 4, 6)
+
+To count the k-mers in a large FASTA or FASTQ file, use the count_kmers
+function, which can also split the file between several processes (the
+partial counts are combined with the merge method).
+"""
+
+# For using with statement in Python 2.5 or Jython
+from __future__ import with_statement
+
+import re
+import sys
+import array
+import operator
+
+from Bio._py3k import _as_bytes
+from Bio.Seq import reverse_complement
+
+#Largest k using a dense array of counts (4**10 entries), rather than a dict
+_dense_max_k = 10
+
+#Number of sequences to join together (separated by N) before counting
+_batch_size = 1000
+
+try:
+    from string import maketrans
+except ImportError:
+    #Python 3
+    maketrans = str.maketrans
+_digits = maketrans("ACGTU", "01233")
+_rc_digits = maketrans("ACGTU", "32100")
+
+#Cache of the NumPy lookup table from letter to two bit code
+_numpy_lookup = None
+
+
+def _kmer_numpy():
+    """Returns the NumPy module, or raises an error if missing (PRIVATE)."""
+    try:
+        import numpy #Lazy import
+    except ImportError:
+        from Bio import MissingPythonDependencyError
+        raise MissingPythonDependencyError("Please install NumPy if you "
+                                           "want to count k-mers using "
+                                           "NumPy arrays.")
+    return numpy
+
+
+def _numpy_values(text):
+    """Returns a NumPy array of two bit codes for a string, 4 if invalid (PRIVATE)."""
+    global _numpy_lookup
+    numpy = _kmer_numpy()
+    if _numpy_lookup is None:
+        lookup = numpy.zeros(256, numpy.uint8) + 4
+        for letter, value in zip("ACGTUacgtu", [0, 1, 2, 3, 3] * 2):
+            lookup[ord(letter)] = value
+        _numpy_lookup = lookup
+    return _numpy_lookup[numpy.fromstring(_as_bytes(text), numpy.uint8)]
+
+
+class KmerCounter(object):
+    """Counts of the k-mers in a collection of nucleotide sequences.
+
+    Arguments:
+     - k         - Length of the k-mers, from 1 to 31.
+     - canonical - Boolean, default False. If True each k-mer is counted
+                   together with its reverse complement.
+     - use_numpy - Boolean, default False. If True the k-mers are encoded
+                   with NumPy (much faster on long sequences), and for small
+                   k the counts are held in a NumPy array.
+
+    Use the add method for each sequence (or add_records for many sequences
+    or SeqRecord objects, e.g. from Bio.SeqIO.parse), then look up the
+    count of a k-mer like a dictionary. The total attribute is the number
+    of k-mers counted, and len(counter) the number of distinct k-mers seen.
+    """
+    def __init__(self, k, canonical=False, use_numpy=False):
+        if not 1 <= k <= 31:
+            raise ValueError("The k-mer length should be from 1 to 31")
+        self.k = k
+        self.canonical = canonical
+        self.use_numpy = use_numpy
+        self.total = 0
+        if k > _dense_max_k:
+            self._counts = {}
+        elif use_numpy:
+            numpy = _kmer_numpy()
+            self._counts = numpy.zeros(4 ** k, numpy.int64)
+        else:
+            self._counts = array.array("L", [0]) * (4 ** k)
+
+    def __repr__(self):
+        return "<%s k=%i canonical=%r distinct=%i total=%i>" \
+               % (self.__class__.__name__, self.k, self.canonical,
+                  len(self), self.total)
+
+    def __getstate__(self):
+        #Arrays are pickled element by element, which is slow for 4**k
+        #counts (e.g. when returned from a worker process), so use the
+        #raw bytes instead
+        state = self.__dict__.copy()
+        counts = self._counts
+        if isinstance(counts, array.array):
+            state["_counts"] = (counts.itemsize, sys.byteorder,
+                                counts.tostring())
+        return state
+
+    def __setstate__(self, state):
+        counts = state["_counts"]
+        if isinstance(counts, tuple):
+            itemsize, byteorder, data = counts
+            for typecode in "LI":
+                if array.array(typecode).itemsize == itemsize:
+                    break
+            else:
+                raise ValueError("Can't unpickle %i byte k-mer counts"
+                                 % itemsize)
+            counts = array.array(typecode, data)
+            if byteorder != sys.byteorder:
+                counts.byteswap()
+            if typecode != "L":
+                counts = array.array("L", counts)
+            state["_counts"] = counts
+        self.__dict__.update(state)
+
+    def __len__(self):
+        """Number of distinct k-mers seen."""
+        counts = self._counts
+        if isinstance(counts, dict):
+            return len(counts)
+        elif isinstance(counts, array.array):
+            return len(counts) - counts.count(0)
+        else:
+            return int((counts != 0).sum())
+
+    def __getitem__(self, kmer):
+        """Returns the count for a k-mer given as a string (zero if not seen)."""
+        code = self.encode(kmer)
+        if self.canonical:
+            code = min(code, self.encode(reverse_complement(kmer)))
+        counts = self._counts
+        if isinstance(counts, dict):
+            return counts.get(code, 0)
+        return int(counts[code])
+
+    def encode(self, kmer):
+        """Returns the integer code for a k-mer given as a string.
+
+        >>> from Bio.SeqUtils.Kmer import KmerCounter
+        >>> counter = KmerCounter(4)
+        >>> counter.encode("AACT")
+        7
+        >>> counter.decode(7)
+        'AACT'
+        """
+        kmer = str(kmer).upper()
+        if len(kmer) != self.k or kmer.strip("ACGTU"):
+            raise ValueError("Expected a k-mer of %i letters A, C, G, T, "
+                             "not %r" % (self.k, kmer))
+        return int(kmer.translate(_digits), 4)
+
+    def decode(self, code):
+        """Returns the k-mer as a string given its integer code."""
+        letters = []
+        for i in range(self.k):
+            letters.append("ACGT"[code & 3])
+            code >>= 2
+        letters.reverse()
+        return "".join(letters)
+
+    def add(self, sequence):
+        """Counts the k-mers in a sequence (string, Seq or SeqRecord)."""
+        if hasattr(sequence, "seq"):
+            #Assume it is a SeqRecord
+            sequence = sequence.seq
+        if self.use_numpy:
+            self._add_numpy(str(sequence))
+            return
+        k = self.k
+        counts = self._counts
+        dense = not isinstance(counts, dict)
+        if not dense:
+            get = counts.get
+        total = 0
+        #Only look at runs of valid letters at least k long
+        for match in re.finditer("[ACGTU]{%i,}" % k, str(sequence).upper()):
+            run = match.group()
+            digits = run.translate(_digits)
+            n = len(run) - k + 1
+            codes = [int(digits[i:i + k], 4) for i in xrange(n)]
+            if self.canonical:
+                digits = run[::-1].translate(_rc_digits)
+                rc_codes = [int(digits[i:i + k], 4) for i in xrange(n)]
+                rc_codes.reverse()
+                codes = map(min, codes, rc_codes)
+            if dense:
+                for code in codes:
+                    counts[code] += 1
+            else:
+                for code in codes:
+                    counts[code] = get(code, 0) + 1
+            total += n
+        self.total += total
+
+    def _add_numpy(self, text):
+        """Counts the k-mers in a string using NumPy (PRIVATE)."""
+        numpy = _kmer_numpy()
+        k = self.k
+        values = _numpy_values(text)
+        n = len(values) - k + 1
+        if n <= 0:
+            return
+        #A k-mer is valid if there are no invalid letters in its window
+        bad = numpy.concatenate(([0], numpy.cumsum(values == 4)))
+        valid = (bad[k:] - bad[:n]) == 0
+        values = values.astype(numpy.int64)
+        codes = numpy.zeros(n, numpy.int64)
+        for j in range(k):
+            codes = (codes << 2) | values[j:j + n]
+        if self.canonical:
+            rc_codes = numpy.zeros(n, numpy.int64)
+            for j in range(k):
+                rc_codes |= (3 - values[j:j + n]) << (2 * j)
+            codes = numpy.minimum(codes, rc_codes)
+        codes = codes[valid]
+        self.total += len(codes)
+        if not len(codes):
+            return
+        counts = self._counts
+        if not isinstance(counts, dict):
+            found = numpy.bincount(codes)
+            counts[:len(found)] += found
+            return
+        codes.sort()
+        starts = numpy.flatnonzero(numpy.concatenate(([True],
+                                                      codes[1:] != codes[:-1])))
+        numbers = numpy.diff(numpy.concatenate((starts, [len(codes)])))
+        get = counts.get
+        for code, number in zip(codes[starts].tolist(), numbers.tolist()):
+            counts[code] = get(code, 0) + number
+
+    def add_records(self, records):
+        """Counts the k-mers in many sequences (strings, Seq or SeqRecord objects).
+
+        The records can be any iterable, for example from Bio.SeqIO.parse,
+        and are counted in batches (joined with N so that no k-mers span two
+        records), which is faster than calling add for each one.
+        """
+        batch = []
+        for record in records:
+            if hasattr(record, "seq"):
+                record = record.seq
+            batch.append(str(record))
+            if len(batch) >= _batch_size:
+                self.add("N".join(batch))
+                batch = []
+        if batch:
+            self.add("N".join(batch))
+
+    def _code_counts(self):
+        """Iterates over (code, count) for each k-mer seen, in code order (PRIVATE)."""
+        counts = self._counts
+        if isinstance(counts, dict):
+            for code in sorted(counts):
+                yield code, counts[code]
+        elif isinstance(counts, array.array):
+            for code, count in enumerate(counts):
+                if count:
+                    yield code, count
+        else:
+            numpy = _kmer_numpy()
+            for code in numpy.flatnonzero(counts).tolist():
+                yield code, int(counts[code])
+
+    def items(self):
+        """Iterates over (k-mer, count) for each k-mer seen, sorted by k-mer."""
+        for code, count in self._code_counts():
+            yield self.decode(code), count
+
+    def most_common(self, n=None):
+        """Returns a list of the n most common (k-mer, count) tuples.
+
+        Ties are sorted by k-mer, and if n is omitted all the k-mers seen
+        are returned.
+        """
+        answer = sorted(self._code_counts(), key=lambda x: (-x[1], x[0]))
+        if n is not None:
+            answer = answer[:n]
+        return [(self.decode(code), count) for code, count in answer]
+
+    def merge(self, other):
+        """Adds the counts from another KmerCounter to this one.
+
+        Both must use the same k-mer length and canonical setting. This is
+        how the partial counts from different processes are combined.
+        """
+        if self.k != other.k or self.canonical != other.canonical:
+            raise ValueError("Can only merge k-mer counts with the same k "
+                             "and canonical setting")
+        counts = self._counts
+        if not isinstance(counts, (dict, array.array)) \
+        and not isinstance(other._counts, (dict, array.array)):
+            #Both NumPy arrays
+            counts += other._counts
+        elif isinstance(counts, array.array) \
+        and isinstance(other._counts, array.array):
+            #Add the whole arrays, much faster than looping over the codes
+            self._counts = array.array("L", map(operator.add, counts,
+                                                other._counts))
+        elif isinstance(counts, dict):
+            get = counts.get
+            if isinstance(other._counts, dict):
+                #No need to sort the codes
+                pairs = other._counts.iteritems()
+            else:
+                pairs = other._code_counts()
+            for code, count in pairs:
+                counts[code] = get(code, 0) + count
+        else:
+            for code, count in other._code_counts():
+                counts[code] += count
+        self.total += other.total
+
+
+def _count_handle(handle, format, k, canonical, use_numpy):
+    """Counts the k-mers in an open file (PRIVATE)."""
+    from Bio.SeqIO._stats import _FormatToRecords
+    counter = KmerCounter(k, canonical, use_numpy)
+    if format in _FormatToRecords:
+        #Fast string parsing of FASTA and FASTQ
+        records = _FormatToRecords[format](handle)
+        counter.add_records(seq for seq, qual in records)
+    else:
+        from Bio import SeqIO
+        counter.add_records(SeqIO.parse(handle, format))
+    return counter
+
+
+def _count_chunks(args):
+    """Counts the k-mers in the records starting in some byte ranges (PRIVATE).
+
+    This is a module level function so that it can be pickled and run in
+    a multiprocessing pool. Returns a single KmerCounter for all the byte
+    ranges, so that each worker only sends back one set of counts.
+    """
+    filename, format, k, canonical, use_numpy, ranges = args
+    from StringIO import StringIO
+    from Bio.SeqIO._stats import _FormatToRecords
+    from Bio.SeqIO._parallel import _read_chunk
+    counter = KmerCounter(k, canonical, use_numpy)
+    for start, end in ranges:
+        data = _read_chunk(filename, format, start, end)
+        records = _FormatToRecords[format](StringIO(data))
+        counter.add_records(seq for seq, qual in records)
+    return counter
+
+
+def count_kmers(handle, format, k, canonical=False, use_numpy=False,
+                processes=None):
+    """Counts the k-mers in every sequence of a file, returns a KmerCounter.
+
+    Arguments:
+     - handle    - Filename or handle of the sequence file.
+     - format    - File format (as used in Bio.SeqIO).
+     - k, canonical, use_numpy - As for the KmerCounter class.
+     - processes - Optional number of worker processes (which requires a
+                   filename, and a FASTA or FASTQ file). Each counts the
+                   k-mers in its share of the file, then the counts are
+                   merged. For k above 10 the counts are held in a
+                   dictionary, which is costly to send back and merge, so
+                   this only pays off for large files.
+
+    FASTA and FASTQ files are read as plain strings (without creating
+    SeqRecord objects), other formats using Bio.SeqIO.parse(...).
+
+    >>> from Bio.SeqUtils.Kmer import count_kmers
+    >>> counter = count_kmers("Quality/example.fastq", "fastq", 5)
+    >>> print counter.total, len(counter)
+    63 58
+    """
+    from Bio.SeqIO._stats import _FormatToRecords
+    if processes is None:
+        from Bio.File import as_handle
+        with as_handle(handle, "rU") as fp:
+            return _count_handle(fp, format, k, canonical, use_numpy)
+    if not isinstance(handle, basestring):
+        raise TypeError("Parallel k-mer counting needs a filename "
+                        "(not a handle)")
+    if format not in _FormatToRecords:
+        raise ValueError("Parallel k-mer counting is not supported for "
+                         "format '%s'" % format)
+    from Bio.SeqIO._parallel import _chunk_ranges, _make_pool
+    #One task per process, each taking every n-th byte range of the file
+    #(which spreads any slow regions of the file between the workers)
+    ranges = _chunk_ranges(handle, processes)
+    tasks = [(handle, format, k, canonical, use_numpy, ranges[i::processes]) \
+             for i in range(min(processes, len(ranges)))]
+    counter = None
+    pool = _make_pool(processes)
+    try:
+        for part in pool.imap_unordered(_count_chunks, tasks):
+            if counter is None:
+                counter = part
+            else:
+                counter.merge(part)
+    finally:
+        pool.terminate()
+    if counter is None:
+        #Empty file
+        counter = KmerCounter(k, canonical, use_numpy)
+    return counter
+
+
+def _test():
+    """Run the Bio.SeqUtils.Kmer module's doctests (PRIVATE)."""
+    print "Running doctests..."
+    import doctest
+    doctest.testmod()
+    print "Done"
+
+if __name__ == "__main__":
+    _test()
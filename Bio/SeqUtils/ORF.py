@@ -0,0 +1,360 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+"""Find open reading frames (ORFs) in nucleotide sequences.
+
+Unlike Bio.SeqUtils.six_frame_translations(...), which is intended for
+display, the functions here are designed for whole genomes. The sequence is
+scanned in chunks for the start and stop codons of the chosen codon table
+in all six reading frames, and only the ORFs themselves are translated
+(the full translation of each frame is never built).
+
+Each ORF runs from a start codon to the next in frame stop codon (which is
+included in the coordinates), using the first start codon after the previous
+stop codon (i.e. the longest possible ORF). ORFs without a stop codon, where
+they run off the end of the sequence, are not reported. For example:
+
+>>> from Bio.SeqUtils.ORF import find_orfs
+>>> for start, end, strand, protein in find_orfs("CCATGAAATTTGGGTAGCTTAGGCTTTCATGG",
+...                                              min_length=3):
+...     print start, end, strand, protein
+2 17 1 MKFG
+18 30 -1 MKA
+
+The start and end use Python slice coordinates on the forward strand, so for
+ORFs on the reverse strand the start codon is at the end.
+
+The find_orfs_in_file(...) function will scan every sequence in a file,
+reading large FASTA files a few lines at a time (so even a single huge
+chromosome need not be held in memory), and can use several processes.
+"""
+
+# For using with statement in Python 2.5 or Jython
+from __future__ import with_statement
+
+import re
+from StringIO import StringIO
+
+from Bio.Seq import Seq, MutableSeq, reverse_complement
+from Bio.Seq import _get_codon_table, _translate_str
+
+#Number of letters to scan at a time
+_chunk_size = 1024 * 1024
+
+#Flags for the codons of interest (a codon can be more than one of these)
+_FORWARD_STOP = 1
+_FORWARD_START = 2
+_REVERSE_STOP = 4
+_REVERSE_START = 8
+
+
+class _OrfScanner(object):
+    """Finds the ORFs in a sequence given as a series of chunks (PRIVATE).
+
+    Call the feed method with each chunk of the sequence in turn, which
+    returns a list of any ORFs found as (start, end, strand, protein) tuples,
+    and then the finish method. Only the sequence since the last stop codon
+    in each reading frame is kept in memory.
+    """
+    def __init__(self, table="Standard", min_length=100, strand=None):
+        if strand not in [None, +1, -1]:
+            raise ValueError("Strand should be +1, -1 or None (both strands)")
+        if min_length < 0:
+            raise ValueError("Minimum length should not be negative")
+        self.table = _get_codon_table(table)
+        self.min_length = min_length
+        #All the stop codons (even ambiguous ones like TAR) end an ORF, but
+        #only unambiguous start codons can start one.
+        stops = set([c.upper().replace("U", "T") \
+                     for c in self.table.stop_codons])
+        starts = set([c.upper().replace("U", "T") \
+                      for c in self.table.start_codons])
+        starts = [c for c in starts if not c.strip("ACGT")]
+        events = {}
+        if strand != -1:
+            for codon in stops:
+                events[codon] = events.get(codon, 0) | _FORWARD_STOP
+            for codon in starts:
+                events[codon] = events.get(codon, 0) | _FORWARD_START
+        if strand != +1:
+            for codon in stops:
+                codon = reverse_complement(codon)
+                events[codon] = events.get(codon, 0) | _REVERSE_STOP
+            for codon in starts:
+                codon = reverse_complement(codon)
+                events[codon] = events.get(codon, 0) | _REVERSE_START
+        self.events = events
+        #Zero width match, so overlapping codons are all found
+        self.regex = re.compile("(?=(%s))" % "|".join(sorted(events)))
+        #Sequence still needed, starting at this offset in the sequence
+        self.text = ""
+        self.offset = 0
+        #Offset of the next codon to look at
+        self.position = 0
+        #For each frame, the start codon of an open forward strand ORF,
+        #the last reverse strand stop codon, and the last reverse strand
+        #start codon after it (all None if not yet seen)
+        self.forward_start = [None, None, None]
+        self.reverse_stop = [None, None, None]
+        self.reverse_start = [None, None, None]
+
+    def feed(self, chunk):
+        """Scans the next chunk of the sequence, returns a list of ORFs."""
+        text = self.text + str(chunk).upper().replace("U", "T")
+        offset = self.offset
+        events = self.events
+        min_length = 3 * self.min_length
+        forward_start = self.forward_start
+        reverse_stop = self.reverse_stop
+        reverse_start = self.reverse_start
+        answer = []
+        for match in self.regex.finditer(text, self.position - offset):
+            pos = offset + match.start()
+            frame = pos % 3
+            flags = events[match.group(1)]
+            if flags & _FORWARD_STOP:
+                start = forward_start[frame]
+                if start is not None:
+                    forward_start[frame] = None
+                    if pos - start >= min_length:
+                        nuc = text[start - offset:pos + 3 - offset]
+                        answer.append((start, pos + 3, +1,
+                                       _translate_str(nuc, self.table,
+                                                      cds=True)))
+            elif flags & _FORWARD_START and forward_start[frame] is None:
+                forward_start[frame] = pos
+            if flags & _REVERSE_STOP:
+                self._reverse_orf(text, frame, answer)
+                reverse_stop[frame] = pos
+                reverse_start[frame] = None
+            elif flags & _REVERSE_START and reverse_stop[frame] is not None:
+                reverse_start[frame] = pos
+        #The last two letters can't start a codon until we have more
+        self.position = max(self.position, offset + len(text) - 2)
+        keep = min([self.position] \
+                   + [p for p in forward_start if p is not None] \
+                   + [p for p in reverse_stop if p is not None])
+        self.text = text[keep - offset:]
+        self.offset = keep
+        return answer
+
+    def finish(self):
+        """Call at the end of the sequence, returns a list of any final ORFs.
+
+        On the reverse strand an ORF is only known to be complete when the
+        next stop codon (or the end of the sequence) is reached, since a
+        later start codon would give a longer ORF.
+        """
+        answer = []
+        for frame in range(3):
+            self._reverse_orf(self.text, frame, answer)
+        self.reverse_stop = [None, None, None]
+        self.reverse_start = [None, None, None]
+        return answer
+
+    def _reverse_orf(self, text, frame, answer):
+        """Adds any reverse strand ORF for this frame to the list (PRIVATE)."""
+        stop = self.reverse_stop[frame]
+        start = self.reverse_start[frame]
+        if start is not None and start - stop >= 3 * self.min_length:
+            nuc = text[stop - self.offset:start + 3 - self.offset]
+            answer.append((stop, start + 3, -1,
+                           _translate_str(reverse_complement(nuc),
+                                          self.table, cds=True)))
+
+
+def _scan(scanner, chunks):
+    """Feeds the chunks to the scanner, yielding the ORFs found (PRIVATE)."""
+    for chunk in chunks:
+        for orf in scanner.feed(chunk):
+            yield orf
+    for orf in scanner.finish():
+        yield orf
+
+
+def find_orfs(sequence, table="Standard", min_length=100, strand=None):
+    """Iterates over the ORFs in a nucleotide sequence.
+
+    Arguments:
+     - sequence   - A nucleotide sequence as a string, Seq or MutableSeq
+                    object, or any iterable giving the sequence as a series
+                    of string chunks (e.g. lines from a file, without any
+                    white space).
+     - table      - Which codon table to use, as for the translate function
+                    in Bio.Seq (a name, an NCBI identifier, or a CodonTable
+                    object). This gives the start and stop codons, and is
+                    used for the translations. Default is "Standard".
+     - min_length - Minimum ORF length in amino acids (not counting the stop
+                    codon), default 100.
+     - strand     - Use +1 or -1 to look on one strand only, default None
+                    meaning both strands.
+
+    Returns (start, end, strand, protein) tuples, where the start and end
+    are Python style slice coordinates on the forward strand (including the
+    stop codon), and the protein is the translation as a string (starting
+    with M, even for alternative start codons, and without the stop).
+
+    >>> from Bio.SeqUtils.ORF import find_orfs
+    >>> from Bio.Seq import Seq
+    >>> seq = Seq("TTGCATTAGCCATGCCCGGGTAAACTAATCTTCAATCATGTTCC")
+    >>> for orf in find_orfs(seq, min_length=3):
+    ...     print orf
+    (11, 23, 1, 'MPG')
+    (5, 35, -1, 'MKISLPGHG')
+    (24, 39, -1, 'MIED')
+
+    Using the bacterial codon table, TTG and ATT are also start codons:
+
+    >>> for orf in find_orfs(seq, table=11, min_length=2):
+    ...     print orf
+    (0, 9, 1, 'MH')
+    (11, 23, 1, 'MPG')
+    (4, 28, 1, 'MSHARVN')
+    (5, 35, -1, 'MKISLPGHG')
+    (24, 39, -1, 'MIED')
+
+    The ORFs are given as they are found scanning along the sequence, i.e.
+    as each stop codon is reached, which is not in strict order of position.
+    """
+    scanner = _OrfScanner(table, min_length, strand)
+    if isinstance(sequence, (basestring, Seq, MutableSeq)):
+        chunks = [sequence[i:i + _chunk_size] \
+                  for i in xrange(0, len(sequence), _chunk_size)]
+    else:
+        chunks = sequence
+    return _scan(scanner, chunks)
+
+
+def _fasta_orfs(handle, table, min_length, strand):
+    """Iterates over the ORFs in a FASTA file, reading a few lines at a time (PRIVATE).
+
+    Returns (record id, start, end, strand, protein) tuples.
+    """
+    name = None
+    lines = []
+    size = 0
+    for line in handle:
+        if line[0] == ">":
+            if name is not None:
+                for orf in scanner.feed("".join(lines)) + scanner.finish():
+                    yield (name,) + orf
+            title = line[1:].split(None, 1)
+            if title:
+                name = title[0]
+            else:
+                name = ""
+            scanner = _OrfScanner(table, min_length, strand)
+            lines = []
+            size = 0
+        elif name is not None:
+            line = "".join(line.split())
+            lines.append(line)
+            size += len(line)
+            if size >= _chunk_size:
+                for orf in scanner.feed("".join(lines)):
+                    yield (name,) + orf
+                lines = []
+                size = 0
+    if name is not None:
+        for orf in scanner.feed("".join(lines)) + scanner.finish():
+            yield (name,) + orf
+
+
+def _handle_orfs(handle, format, table, min_length, strand):
+    """Iterates over the ORFs in each record of an open file (PRIVATE)."""
+    if format == "fasta":
+        for orf in _fasta_orfs(handle, table, min_length, strand):
+            yield orf
+        return
+    from Bio import SeqIO
+    for record in SeqIO.parse(handle, format):
+        for orf in find_orfs(record.seq, table, min_length, strand):
+            yield (record.id,) + orf
+
+
+def _file_orfs(handle, format, table, min_length, strand):
+    """Iterates over the ORFs in a file, given a filename or handle (PRIVATE)."""
+    from Bio.File import as_handle
+    with as_handle(handle, "rU") as fp:
+        for orf in _handle_orfs(fp, format, table, min_length, strand):
+            yield orf
+
+
+def _chunk_orfs(args):
+    """Finds the ORFs in the records starting in a byte range of a file (PRIVATE).
+
+    This is a module level function so that it can be pickled and run in
+    a multiprocessing pool. Returns a list of ORF tuples.
+    """
+    filename, format, table, min_length, strand, start, end = args
+    from Bio.SeqIO._parallel import _read_chunk
+    data = _read_chunk(filename, format, start, end)
+    if not data:
+        return []
+    return list(_handle_orfs(StringIO(data), format, table, min_length,
+                             strand))
+
+
+def _parallel_orfs(filename, format, table, min_length, strand, processes):
+    """Finds the ORFs in a file using a pool of processes (PRIVATE)."""
+    from Bio.SeqIO._parallel import _chunk_ranges, _make_pool
+    tasks = [(filename, format, table, min_length, strand, start, end) \
+             for (start, end) in _chunk_ranges(filename, processes)]
+    pool = _make_pool(processes)
+    try:
+        for orfs in pool.imap(_chunk_orfs, tasks):
+            for orf in orfs:
+                yield orf
+    finally:
+        pool.terminate()
+
+
+def find_orfs_in_file(handle, format="fasta", table="Standard",
+                      min_length=100, strand=None, processes=None):
+    """Iterates over the ORFs in every sequence in a file.
+
+    Arguments:
+     - handle     - Filename or handle of the sequence file.
+     - format     - File format (as used in Bio.SeqIO), default "fasta".
+     - table, min_length, strand - As for the find_orfs function.
+     - processes  - Optional number of worker processes to scan the file
+                    in parallel (which requires a filename). The file is
+                    split into chunks of whole records, so this helps on
+                    files with many contigs. Supported for FASTA, FASTQ and
+                    tab files.
+
+    Returns (record id, start, end, strand, protein) tuples, in the same
+    order as find_orfs(...) would give for each record in turn. FASTA files
+    are read a few lines at a time, so the whole of each sequence is never
+    held in memory, while other file formats are parsed with Bio.SeqIO.
+
+    To look at selected records of a large FASTA file, you could instead
+    index it with Bio.SeqIO.index(...) and call find_orfs(...) on the
+    sequences of interest.
+    """
+    #Check the arguments now, rather than when the generator is started
+    _OrfScanner(table, min_length, strand)
+    if processes is None:
+        return _file_orfs(handle, format, table, min_length, strand)
+    if not isinstance(handle, basestring):
+        raise TypeError("Parallel ORF finding needs a filename (not a handle)")
+    from Bio.SeqIO._parallel import _FormatToRecordStart
+    if format not in _FormatToRecordStart:
+        raise ValueError("Parallel ORF finding is not supported for "
+                         "format '%s'" % format)
+    if processes < 1:
+        raise ValueError("Number of processes should be at least one")
+    return _parallel_orfs(handle, format, table, min_length, strand,
+                          processes)
+
+
+def _test():
+    """Run the Bio.SeqUtils.ORF module's doctests (PRIVATE)."""
+    print "Running doctests..."
+    import doctest
+    doctest.testmod()
+    print "Done"
+
+if __name__ == "__main__":
+    _test()
@@ -0,0 +1,642 @@
+#!/usr/bin/env python
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+r"""Read and write BGZF compressed files (the GZIP variant used in BAM).
+
+The SAM/BAM file format (Sequence Alignment/Map) comes in a plain text
+format (SAM), and a compressed binary format (BAM). The latter uses a
+modified form of gzip compression called BGZF (Blocked GNU Zip Format),
+which can be applied to any file format to provide compression with
+efficient random access. BGZF is described together with the SAM/BAM
+file format at http://samtools.sourceforge.net/SAM1.pdf
+
+Please read the text below about 'virtual offsets' before using BGZF
+files for random access.
+
+
+Aim of this module
+------------------
+
+The Python gzip library can be used to read BGZF files, since for
+decompression they are just (specialised) multi-member gzip files.
+
+What this module aims to facilitate is random access to BGZF files
+(using the 'virtual offset' idea), and writing BGZF files (which means
+using suitably sized gzip blocks and writing the extra 'BC' field in the
+gzip headers). As in the gzip library, the zlib library is used
+internally.
+
+In addition to being required for random access to and writing of BAM
+files, the BGZF format can also be used on other sequential data (in the
+sense of one record after another), such as most of the sequence data
+formats supported in Bio.SeqIO (like FASTA, FASTQ, GenBank, etc). This
+allows Bio.SeqIO.index() and Bio.SeqIO.index_db() to work directly on
+BGZF compressed files.
+
+
+Technical Introduction to BGZF
+------------------------------
+
+The gzip file format allows multiple compressed blocks, each of which
+could be a stand alone gzip file. As an interesting bonus, this means
+you can use Unix "cat" to combined to gzip files into one by
+concatenating them. Also, each block can have one of several compression
+levels (including uncompressed, which actually takes up a little bit
+more space due to the gzip header).
+
+What the BAM designers realised was that while random access to data
+stored in traditional gzip files was slow, breaking the file into gzip
+blocks would allow fast random access to each block. To access a
+particular piece of the decompressed data, you just need to know which
+block it starts in (the offset of the gzip block start), and how far
+into the (decompressed) contents of the block you need to read.
+
+One problem with this is finding the gzip block sizes efficiently.
+You can do it with a standard gzip file, but it requires every block
+to be decompressed -- and that would be rather slow. Additionally
+typical gzip files may use very large blocks.
+
+All that differs in BGZF is that compressed size of each gzip block
+is limited to 2^16 bytes, and an extra 'BC' field in the gzip header
+records this size. Traditional decompression tools can ignore this,
+and unzip the file just like any other gzip file.
+
+The point of this is you can look at the first BGZF block, find out
+how big it is from this 'BC' header, and thus seek immediately to
+the second block, and so on.
+
+The BAM indexing scheme records read positions using a 64 bit
+'virtual offset', comprising coffset << 16 | uoffset, where coffset
+is the file offset of the BGZF block containing the start of the read
+(unsigned integer using up to 64-16 = 48 bits), and uoffset is the
+offset within the (decompressed) block (unsigned 16 bit integer).
+
+This limits you to BAM files where the last block starts by 2^48
+bytes, or 256 petabytes, and the decompressed size of each block
+is at most 2^16 bytes, or 64kb. Note that this matches the BGZF
+'BC' field size which limits the compressed size of each block to
+2^16 bytes, allowing for BAM files to use BGZF with no gzip
+compression (useful for intermediate files in memory to reduced
+CPU load).
+
+
+Warning about namespaces
+------------------------
+
+It is considered a bad idea to use "from XXX import *" in Python, because
+it pollutes the namespace. This is a real issue with Bio.bgzf (and the
+standard Python library gzip) because they contain a function called open
+i.e. Suppose you do this:
+
+>>> from Bio.bgzf import *
+>>> print open.__module__
+Bio.bgzf
+
+Or,
+
+>>> from gzip import *
+>>> print open.__module__
+gzip
+
+Notice that the open function has been replaced. You can "fix" this if you
+need to by importing the built-in open function:
+
+>>> from __builtin__ import open
+
+However, what we recommend instead is to use the explicit namespace, e.g.
+
+>>> from Bio import bgzf
+>>> print bgzf.open.__module__
+Bio.bgzf
+
+
+Example
+-------
+
+This is an ordinary GenBank file compressed using BGZF, so it can
+be decompressed using bgzip or gzip,
+
+>>> from Bio import bgzf
+>>> handle = bgzf.BgzfReader("GenBank/NC_000932.gb.bgz", "rb")
+>>> print handle.readline().rstrip()
+LOCUS       NC_000932             154478 bp    DNA     circular PLN 15-APR-2009
+>>> handle.close()
+
+We can also access the file using the BGZF virtual offsets, by making
+a note of the offset before reading each line:
+
+>>> handle = bgzf.BgzfReader("GenBank/NC_000932.gb.bgz", "rb")
+>>> offsets = []
+>>> while True:
+...     offsets.append(handle.tell())
+...     line = handle.readline()
+...     if not line:
+...         break
+>>> handle.close()
+
+The virtual offsets for the first few lines are all within the first
+BGZF block (whose start is at file offset zero),
+
+>>> for voffset in offsets[:3]:
+...     print bgzf.split_virtual_offset(voffset)
+(0, 0)
+(0, 80)
+(0, 143)
+
+Further into the file the lines are in later BGZF blocks, and we can
+jump straight back to any of them:
+
+>>> bgzf.split_virtual_offset(offsets[-1])[0] > 0
+True
+>>> handle = bgzf.BgzfReader("GenBank/NC_000932.gb.bgz", "rb")
+>>> handle.seek(offsets[-3])
+>>> print handle.readline().rstrip()
+//
+>>> handle.seek(offsets[1])
+>>> print handle.readline().rstrip()
+DEFINITION  Arabidopsis thaliana chloroplast, complete genome.
+>>> handle.close()
+
+"""
+
+#TODO - Move somewhere else in Bio.* namespace?
+
+import zlib
+import struct
+import __builtin__ #to access the usual open function
+
+from Bio._py3k import _as_bytes
+
+#For Python 2 can just use: _bgzf_magic = '\x1f\x8b\x08\x04'
+#but need to use bytes on Python 3
+_bgzf_magic = _as_bytes("\x1f\x8b\x08\x04")
+_bgzf_header = _as_bytes("\x1f\x8b\x08\x04\x00\x00\x00\x00"
+                         "\x00\xff\x06\x00\x42\x43\x02\x00")
+_bgzf_eof = _as_bytes("\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC" + \
+                      "\x02\x00\x1b\x00\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00")
+_bytes_BC = _as_bytes("BC")
+_empty_bytes_string = _as_bytes("")
+_bytes_newline = _as_bytes("\n")
+
+#Largest amount of data stored in a single block (before compression)
+_max_block_size = 65536
+
+
+def open(filename, mode="rb"):
+    """Open a BGZF file for reading, writing or appending."""
+    if "r" in mode.lower():
+        return BgzfReader(filename, mode)
+    elif "w" in mode.lower() or "a" in mode.lower():
+        return BgzfWriter(filename, mode)
+    else:
+        raise ValueError("Bad mode %r" % mode)
+
+
+def make_virtual_offset(block_start_offset, within_block_offset):
+    """Compute a BGZF virtual offset from block start and within block offsets.
+
+    The BAM indexing scheme records read positions using a 64 bit
+    'virtual offset', comprising in C terms:
+
+    block_start_offset<<16 | within_block_offset
+
+    Here block_start_offset is the file offset of the BGZF block
+    start (unsigned integer using up to 64-16 = 48 bits), and
+    within_block_offset within the (decompressed) block (unsigned
+    16 bit integer).
+
+    >>> make_virtual_offset(0,0)
+    0
+    >>> make_virtual_offset(0,1)
+    1
+    >>> make_virtual_offset(0, 2**16 - 1)
+    65535
+    >>> make_virtual_offset(0, 2**16)
+    Traceback (most recent call last):
+    ...
+    ValueError: Require 0 <= within_block_offset < 2**16, got 65536
+
+    >>> 65536 == make_virtual_offset(1,0)
+    True
+    >>> 65537 == make_virtual_offset(1,1)
+    True
+    >>> 131071 == make_virtual_offset(1, 2**16 - 1)
+    True
+
+    >>> 6553600000 == make_virtual_offset(100000,0)
+    True
+    >>> 6553600001 == make_virtual_offset(100000,1)
+    True
+    >>> 6553600010 == make_virtual_offset(100000,10)
+    True
+
+    >>> make_virtual_offset(2**48,0)
+    Traceback (most recent call last):
+    ...
+    ValueError: Require 0 <= block_start_offset < 2**48, got 281474976710656
+
+    """
+    if within_block_offset < 0 or within_block_offset >= 65536:
+        raise ValueError("Require 0 <= within_block_offset < 2**16, got %i" \
+                         % within_block_offset)
+    if block_start_offset < 0 or block_start_offset >= 281474976710656:
+        raise ValueError("Require 0 <= block_start_offset < 2**48, got %i" \
+                         % block_start_offset)
+    return (block_start_offset<<16) | within_block_offset
+
+
+def split_virtual_offset(virtual_offset):
+    """Divides a 64-bit BGZF virtual offset into block start & within block offsets.
+
+    >>> (100000, 0) == split_virtual_offset(6553600000)
+    True
+    >>> (100000, 10) == split_virtual_offset(6553600010)
+    True
+
+    """
+    start = virtual_offset>>16
+    return start, virtual_offset ^ (start<<16)
+
+
+def _load_bgzf_block(handle):
+    """Load the next BGZF block of compressed data (PRIVATE).
+
+    Returns a tuple giving the size of the block (raw bytes on disk), and
+    the decompressed data. At the end of the file, returns (0, "").
+    """
+    magic = handle.read(4)
+    if not magic:
+        #End of file
+        return 0, _empty_bytes_string
+    if magic != _bgzf_magic:
+        raise ValueError(r"A BGZF (e.g. a BAM file) block should start with "
+                         r"%r, not %r; handle.tell() now says %r"
+                         % (_bgzf_magic, magic, handle.tell()))
+    gzip_mod_time, gzip_extra_flags, gzip_os, extra_len = \
+        struct.unpack("<LBBH", handle.read(8))
+
+    block_size = None
+    x_len = 0
+    while x_len < extra_len:
+        subfield_id = handle.read(2)
+        subfield_len = struct.unpack("<H", handle.read(2))[0] #uint16_t
+        subfield_data = handle.read(subfield_len)
+        x_len += subfield_len + 4
+        if subfield_id == _bytes_BC:
+            assert subfield_len == 2, "Wrong BC payload length"
+            assert block_size is None, "Two BC subfields?"
+            block_size = struct.unpack("<H", subfield_data)[0] + 1 #uint16_t
+    assert x_len == extra_len, (x_len, extra_len)
+    if block_size is None:
+        raise ValueError("Missing BC, this isn't a BGZF file!")
+    #Now comes the compressed data, CRC, and length of uncompressed data.
+    deflate_size = block_size - 1 - extra_len - 19
+    d = zlib.decompressobj(-15) #Negative window size means no headers
+    data = d.decompress(handle.read(deflate_size)) + d.flush()
+    expected_crc = handle.read(4)
+    expected_size = struct.unpack("<I", handle.read(4))[0]
+    if expected_size != len(data):
+        raise RuntimeError("Decompressed to %i, not %i" \
+                           % (len(data), expected_size))
+    #Should cope with a mix of Python platforms...
+    crc = zlib.crc32(data)
+    if crc < 0:
+        crc = struct.pack("<i", crc)
+    else:
+        crc = struct.pack("<I", crc)
+    if expected_crc != crc:
+        raise RuntimeError("CRC is %s, not %s" % (crc, expected_crc))
+    return block_size, data
+
+
+class BgzfReader(object):
+    r"""BGZF reader, acts like a read only handle but seek/tell differ.
+
+    Let's use the BgzfReader to open a BGZF compressed FASTQ file, and
+    read the first record line by line:
+
+    >>> from Bio import bgzf
+    >>> handle = bgzf.BgzfReader("Quality/example.fastq.bgz", "rb")
+    >>> print handle.readline().rstrip()
+    @EAS54_6_R1_2_1_413_324
+    >>> print handle.readline().rstrip()
+    CCCTTCTTGTCTTCAGCGTTTCTCC
+    >>> handle.close()
+
+    The tell and seek methods use the BGZF 'virtual offsets' rather
+    than raw (uncompressed) file offsets. These are 64 bit integers
+    combining the offset of the compressed block in the file with the
+    offset within the decompressed block. This means you can use
+    tell() to record a position, and seek() back to it later, but
+    you cannot do arithmetic with the values.
+
+    Note that only binary mode is supported (i.e. on Python 3 the
+    reader returns bytes strings).
+    """
+
+    def __init__(self, filename=None, mode="rb", fileobj=None, max_cache=100):
+        #TODO - Assuming we can seek, check for 28 bytes EOF empty block
+        #and if missing warn about possible truncation (as in samtools)?
+        if max_cache < 1:
+            raise ValueError("Use max_cache with a minimum of 1")
+        #Must open the BGZF file in binary mode, but we may want to
+        #treat the contents as either text or binary (unicode or
+        #bytes under Python 3)
+        if fileobj:
+            assert filename is None
+            handle = fileobj
+            assert "b" in handle.mode.lower()
+        else:
+            if "w" in mode.lower() \
+            or "a" in mode.lower():
+                raise ValueError("Must use read mode (default), not write or append mode")
+            handle = __builtin__.open(filename, "rb")
+        self._handle = handle
+        self.max_cache = max_cache
+        self._buffers = {}
+        self._block_start_offset = None
+        self._block_raw_length = None
+        self._load_block(handle.tell())
+
+    def _load_block(self, start_offset=None):
+        if start_offset is None:
+            #If the file is being read sequentially, then _handle.tell()
+            #should be pointing at the start of the next block.
+            #However, if seek has been used, we can't assume that.
+            start_offset = self._block_start_offset + self._block_raw_length
+        if start_offset == self._block_start_offset:
+            self._within_block_offset = 0
+            return
+        elif start_offset in self._buffers:
+            #Already in cache
+            self._buffer, self._block_raw_length = self._buffers[start_offset]
+            self._within_block_offset = 0
+            self._block_start_offset = start_offset
+            return
+        #Must hit the disk... first check cache limits,
+        while len(self._buffers) >= self.max_cache:
+            #TODO - Implemente LRU cache removal?
+            self._buffers.popitem()
+        #Now load the block
+        handle = self._handle
+        if start_offset is not None:
+            handle.seek(start_offset)
+        self._block_start_offset = handle.tell()
+        block_size, self._buffer = _load_bgzf_block(handle)
+        self._within_block_offset = 0
+        self._block_raw_length = block_size
+        #Finally save the block in our cache,
+        self._buffers[self._block_start_offset] = self._buffer, block_size
+        if block_size and not self._buffer:
+            #An empty block (e.g. an EOF marker in concatenated files),
+            #there may be more data after it so move on to the next one
+            self._load_block()
+
+    def tell(self):
+        """Returns a 64-bit unsigned BGZF virtual offset."""
+        if 0 < self._within_block_offset == len(self._buffer):
+            #Special case where we're right at the end of a (non empty) block.
+            #For non-maximal blocks could give two possible virtual offsets,
+            #but for a maximal block can't use 65536 as the within block
+            #offset. Therefore for consistency, use the next block and a
+            #within block offset of zero.
+            return (self._block_start_offset + self._block_raw_length) << 16
+        else:
+            #return make_virtual_offset(self._block_start_offset,
+            #                           self._within_block_offset)
+            #TODO - Include bounds checking as in make_virtual_offset?
+            return (self._block_start_offset<<16) | self._within_block_offset
+
+    def seek(self, virtual_offset):
+        """Seek to a 64-bit unsigned BGZF virtual offset."""
+        #Do this inline to avoid a function call,
+        #start_offset, within_block = split_virtual_offset(virtual_offset)
+        start_offset = virtual_offset>>16
+        within_block = virtual_offset ^ (start_offset<<16)
+        if start_offset != self._block_start_offset:
+            #Don't need to load the block if already there
+            #(this avoids a function call since _load_block would do nothing)
+            self._load_block(start_offset)
+            assert start_offset == self._block_start_offset
+        if within_block > len(self._buffer) \
+        and not (within_block == 0 and len(self._buffer)==0):
+            raise ValueError("Within offset %i but block size only %i" \
+                             % (within_block, len(self._buffer)))
+        self._within_block_offset = within_block
+        #assert virtual_offset == self.tell(), \
+        #    "Did seek to %i (%i, %i), but tell says %i (%i, %i)" \
+        #    % (virtual_offset, start_offset, within_block,
+        #       self.tell(), self._block_start_offset, self._within_block_offset)
+
+    def read(self, size=-1):
+        """Read up to size bytes (or to the end of the file if negative)."""
+        data = []
+        while size and self._buffer:
+            available = len(self._buffer) - self._within_block_offset
+            if 0 <= size <= available:
+                #This may leave us right at the end of a block
+                #(lazy loading, don't load the next block unless we have too)
+                data.append(self._buffer[self._within_block_offset:
+                                         self._within_block_offset + size])
+                self._within_block_offset += size
+                break
+            else:
+                data.append(self._buffer[self._within_block_offset:])
+                if size > 0:
+                    size -= available
+                self._load_block() #will reset offsets
+        return _empty_bytes_string.join(data)
+
+    def readline(self):
+        """Read a single line (including the trailing new line if present)."""
+        data = []
+        while self._buffer:
+            i = self._buffer.find(_bytes_newline, self._within_block_offset)
+            if i == -1:
+                #Line continues into the next block
+                data.append(self._buffer[self._within_block_offset:])
+                self._load_block() #will reset offsets
+            else:
+                data.append(self._buffer[self._within_block_offset:i+1])
+                self._within_block_offset = i + 1
+                #may now be at end of block
+                break
+        return _empty_bytes_string.join(data)
+
+    def next(self):
+        line = self.readline()
+        if not line:
+            raise StopIteration
+        return line
+
+    def __iter__(self):
+        return self
+
+    def close(self):
+        self._handle.close()
+        self._buffer = None
+        self._block_start_offset = None
+        self._buffers = None
+
+    def seekable(self):
+        return True
+
+    def isatty(self):
+        return False
+
+    def fileno(self):
+        return self._handle.fileno()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class BgzfWriter(object):
+    """BGZF writer, acts like a write only handle.
+
+    Data is compressed in blocks of at most 64kb, and a final empty
+    block is written as an end of file marker when the handle is closed.
+    As with the BgzfReader, the tell method returns a virtual offset.
+    You can call flush() to force a new block to be started, which can
+    be useful to make a record start at the beginning of a block.
+    """
+
+    def __init__(self, filename=None, mode="w", fileobj=None, compresslevel=6):
+        if fileobj:
+            assert filename is None
+            handle = fileobj
+        else:
+            if "w" not in mode.lower() \
+            and "a" not in mode.lower():
+                raise ValueError("Must use write or append mode, not %r" % mode)
+            if "a" in mode.lower():
+                handle = __builtin__.open(filename, "ab")
+            else:
+                handle = __builtin__.open(filename, "wb")
+        self._handle = handle
+        self._buffer = _empty_bytes_string
+        self.compresslevel = compresslevel
+
+    def _write_block(self, block):
+        #print "Saving %i bytes" % len(block)
+        assert len(block) <= _max_block_size
+        #Giving a negative window bits means no gzip/zlib headers, -15 used in samtools
+        c = zlib.compressobj(self.compresslevel,
+                             zlib.DEFLATED,
+                             -15,
+                             zlib.DEF_MEM_LEVEL,
+                             0)
+        compressed = c.compress(block) + c.flush()
+        del c
+        if len(compressed) > _max_block_size - 26:
+            #This is an inefficient way to deal with uncompressible data,
+            #but it is rare, so just split the block in two
+            half = len(block) // 2
+            self._write_block(block[:half])
+            self._write_block(block[half:])
+            return
+        crc = zlib.crc32(block)
+        #Should cope with a mix of Python platforms...
+        if crc < 0:
+            crc = struct.pack("<i", crc)
+        else:
+            crc = struct.pack("<I", crc)
+        bsize = struct.pack("<H", len(compressed)+25) # includes -1
+        uncompressed_length = struct.pack("<I", len(block))
+        #Fixed 16 bytes,
+        # gzip magic bytes (4) mod time (4),
+        # gzip flag (1), os (1), extra length which is six (2),
+        # sub field which is BC (2), sub field length of two (2),
+        #Variable data,
+        #2 bytes: block length as BC sub field (2)
+        #X bytes: the data
+        #8 bytes: crc (4), uncompressed data length (4)
+        data = _bgzf_header + bsize + compressed + crc + uncompressed_length
+        self._handle.write(data)
+
+    def write(self, data):
+        #TODO - Check bytes vs unicode
+        data = _as_bytes(data)
+        #block_size = 2**16 = 65536
+        data_len = len(data)
+        if len(self._buffer) + data_len < _max_block_size:
+            #print "Cached %r" % data
+            self._buffer += data
+            return
+        else:
+            #print "Got %r, writing out some data..." % data
+            self._buffer += data
+            while len(self._buffer) >= _max_block_size:
+                self._write_block(self._buffer[:_max_block_size])
+                self._buffer = self._buffer[_max_block_size:]
+
+    def flush(self):
+        """Write any buffered data as a (possibly short) BGZF block."""
+        while len(self._buffer) >= _max_block_size:
+            self._write_block(self._buffer[:_max_block_size])
+            self._buffer = self._buffer[_max_block_size:]
+        if self._buffer:
+            self._write_block(self._buffer)
+            self._buffer = _empty_bytes_string
+        self._handle.flush()
+
+    def close(self):
+        """Flush data, write 28 bytes empty BGZF EOF marker, and close the file."""
+        if self._buffer:
+            self.flush()
+        #samtools will look for a magic EOF marker, just a 28 byte empty BGZF block,
+        #and if it is missing warns the BAM file may be truncated. In addition to
+        #samtools writing this block, so too does bgzip - so we should too.
+        self._handle.write(_bgzf_eof)
+        self._handle.flush()
+        self._handle.close()
+
+    def tell(self):
+        """Returns a BGZF 64-bit virtual offset."""
+        return make_virtual_offset(self._handle.tell(), len(self._buffer))
+
+    def seekable(self):
+        #Not seekable, but we do support tell...
+        return False
+
+    def isatty(self):
+        return False
+
+    def fileno(self):
+        return self._handle.fileno()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+def _test():
+    """Run the module's doctests (PRIVATE)."""
+    import doctest
+    import os
+    if os.path.isdir(os.path.join("..", "Tests")):
+        print "Runing doctests..."
+        cur_dir = os.path.abspath(os.curdir)
+        os.chdir(os.path.join("..", "Tests"))
+        doctest.testmod()
+        os.chdir(cur_dir)
+        del cur_dir
+        print "Done"
+    elif os.path.isdir(os.path.join("Tests", "GenBank")):
+        print "Runing doctests..."
+        cur_dir = os.path.abspath(os.curdir)
+        os.chdir(os.path.join("Tests"))
+        doctest.testmod()
+        os.chdir(cur_dir)
+        del cur_dir
+        print "Done"
+
+if __name__ == "__main__":
+    _test()
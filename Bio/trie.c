@@ -744,3 +744,362 @@ Trie* Trie_deserialize(int (*read)(void *wasread, const int length, void *data),
     }
     return trie;
 }
+
+
+/* ACState is a state of the Aho-Corasick automaton, i.e. a node of an
+ * ordinary (one letter per transition) trie of the patterns.  The
+ * transitions are stored in order of the letters.  Fail is the state
+ * for the longest proper suffix of this one which is also a state,
+ * output is the first pattern ending in this state (or -1), and
+ * dict_link the next state along the fail links with an output (or
+ * -1).
+ */
+typedef struct {
+    unsigned char *letters;
+    int *next;
+    int num_transitions;
+    int fail;
+    int output;
+    int dict_link;
+} ACState;
+
+
+/* ACPattern is a string searched for by the automaton.  The key is
+ * the original trie key, which for a reverse complement pattern is
+ * owned by the forward pattern.  Patterns which are the same string
+ * are linked together by same, so they end in the same state.
+ */
+typedef struct {
+    char *pattern;
+    char *key;
+    int length;
+    int strand;
+    int same;
+} ACPattern;
+
+
+struct AhoCorasick {
+    ACState *states;
+    int num_states;
+    int max_states;
+    ACPattern *patterns;
+    int num_patterns;
+    int max_patterns;
+    int root[256];   /* transitions from the root state, or 0 */
+};
+
+
+static char _complement(const char c) {
+    /* IUPAC nucleotide complements, other letters are unchanged. */
+    switch(c) {
+    case 'A': return 'T';  case 'a': return 't';
+    case 'C': return 'G';  case 'c': return 'g';
+    case 'G': return 'C';  case 'g': return 'c';
+    case 'T': return 'A';  case 't': return 'a';
+    case 'U': return 'A';  case 'u': return 'a';
+    case 'R': return 'Y';  case 'r': return 'y';
+    case 'Y': return 'R';  case 'y': return 'r';
+    case 'K': return 'M';  case 'k': return 'm';
+    case 'M': return 'K';  case 'm': return 'k';
+    case 'B': return 'V';  case 'b': return 'v';
+    case 'V': return 'B';  case 'v': return 'b';
+    case 'D': return 'H';  case 'd': return 'h';
+    case 'H': return 'D';  case 'h': return 'd';
+    }
+    return c;
+}
+
+static int _ac_transition(const ACState* state, const unsigned char c) {
+    /* Binary search for the state reached on letter c, or -1. */
+    int first = 0, last = state->num_transitions-1, mid;
+    while(first <= last) {
+	mid = (first+last)/2;
+	if(c < state->letters[mid])
+	    last = mid-1;
+	else if(c > state->letters[mid])
+	    first = mid+1;
+	else
+	    return state->next[mid];
+    }
+    return -1;
+}
+
+static int _ac_new_state(AhoCorasick* automaton) {
+    /* Add a state with no transitions, returns its number or -1. */
+    ACState* state;
+    if(automaton->num_states == automaton->max_states) {
+	int max_states = 2*automaton->max_states + 16;
+	ACState* states = realloc(automaton->states,
+				  sizeof(ACState)*max_states);
+	if(!states)
+	    return -1;
+	automaton->states = states;
+	automaton->max_states = max_states;
+    }
+    state = &automaton->states[automaton->num_states];
+    state->letters = NULL;
+    state->next = NULL;
+    state->num_transitions = 0;
+    state->fail = 0;
+    state->output = -1;
+    state->dict_link = -1;
+    return automaton->num_states++;
+}
+
+static int _ac_add_transition(AhoCorasick* automaton, const int from,
+			      const unsigned char c) {
+    /* Add a transition on letter c to a new state, keeping the letters
+       in order.  Returns the new state, or -1 if out of memory. */
+    ACState* state;
+    unsigned char *letters;
+    int *next;
+    int i, to;
+
+    if((to = _ac_new_state(automaton)) < 0)
+	return -1;
+    state = &automaton->states[from];
+    if(!(letters = malloc(state->num_transitions+1)))
+	return -1;
+    if(!(next = malloc(sizeof(int)*(state->num_transitions+1)))) {
+	free(letters);
+	return -1;
+    }
+    i = 0;
+    while(i < state->num_transitions && state->letters[i] < c)
+	i++;
+    memcpy(letters, state->letters, i);
+    memcpy(next, state->next, sizeof(int)*i);
+    letters[i] = c;
+    next[i] = to;
+    memcpy(&letters[i+1], &state->letters[i], state->num_transitions-i);
+    memcpy(&next[i+1], &state->next[i],
+	   sizeof(int)*(state->num_transitions-i));
+    free(state->letters);
+    free(state->next);
+    state->letters = letters;
+    state->next = next;
+    state->num_transitions += 1;
+    return to;
+}
+
+static int _ac_add_pattern(AhoCorasick* automaton, char *pattern, char *key,
+			   const int strand) {
+    /* Add a pattern to the list, and its states to the trie.  Takes
+       ownership of the pattern string.  Returns 0 if it succeeded. */
+    ACPattern* p;
+    int state = 0, next, i;
+    const int length = strlen(pattern);
+
+    if(automaton->num_patterns == automaton->max_patterns) {
+	int max_patterns = 2*automaton->max_patterns + 16;
+	ACPattern* patterns = realloc(automaton->patterns,
+				      sizeof(ACPattern)*max_patterns);
+	if(!patterns) {
+	    free(pattern);
+	    return 1;
+	}
+	automaton->patterns = patterns;
+	automaton->max_patterns = max_patterns;
+    }
+    p = &automaton->patterns[automaton->num_patterns];
+    p->pattern = pattern;
+    p->key = key;
+    p->length = length;
+    p->strand = strand;
+    p->same = -1;
+    automaton->num_patterns++;
+
+    for(i=0; i<length; i++) {
+	const unsigned char c = (unsigned char)pattern[i];
+	next = _ac_transition(&automaton->states[state], c);
+	if(next < 0 && (next = _ac_add_transition(automaton, state, c)) < 0)
+	    return 1;
+	state = next;
+    }
+    p->same = automaton->states[state].output;
+    automaton->states[state].output = automaton->num_patterns-1;
+    return 0;
+}
+
+typedef struct {
+    AhoCorasick* automaton;
+    int error;
+} _ac_build_data;
+
+static void
+_ac_add_key_helper(const char *key, const void *value, void *data)
+{
+    _ac_build_data* build = (_ac_build_data *)data;
+    char *pattern;
+
+    if(build->error || !key[0])
+	return;
+    if(!(pattern = duplicate(key))) {
+	build->error = 1;
+	return;
+    }
+    if(_ac_add_pattern(build->automaton, pattern, pattern, 1))
+	build->error = 1;
+}
+
+static int _ac_add_reverse_complements(AhoCorasick* automaton) {
+    /* Add the reverse complement of each (forward) pattern. */
+    int i, j;
+    const int num_patterns = automaton->num_patterns;
+    for(i=0; i<num_patterns; i++) {
+	char *key = automaton->patterns[i].key;
+	const int length = automaton->patterns[i].length;
+	char *pattern = malloc(length+1);
+	if(!pattern)
+	    return 1;
+	for(j=0; j<length; j++)
+	    pattern[j] = _complement(key[length-1-j]);
+	pattern[length] = 0;
+	if(_ac_add_pattern(automaton, pattern, key, -1))
+	    return 1;
+    }
+    return 0;
+}
+
+static int _ac_add_fail_links(AhoCorasick* automaton) {
+    /* Work out the fail and dictionary links, in breadth first order
+       (so the fail state is always done first).  Returns 0 if it
+       succeeded. */
+    ACState* states = automaton->states;
+    int *queue;
+    int head = 0, tail = 0, i, c;
+
+    if(!(queue = malloc(sizeof(int)*automaton->num_states)))
+	return 1;
+    for(c=0; c<256; c++)
+	automaton->root[c] = 0;
+    for(i=0; i<states[0].num_transitions; i++) {
+	const int next = states[0].next[i];
+	automaton->root[states[0].letters[i]] = next;
+	queue[tail++] = next;
+    }
+    while(head < tail) {
+	const int from = queue[head++];
+	for(i=0; i<states[from].num_transitions; i++) {
+	    const unsigned char letter = states[from].letters[i];
+	    const int to = states[from].next[i];
+	    int fail = states[from].fail, next;
+	    while(fail && (next = _ac_transition(&states[fail], letter)) < 0)
+		fail = states[fail].fail;
+	    if(!fail)
+		next = automaton->root[letter];
+	    states[to].fail = next;
+	    if(states[next].output >= 0)
+		states[to].dict_link = next;
+	    else
+		states[to].dict_link = states[next].dict_link;
+	    queue[tail++] = to;
+	}
+    }
+    free(queue);
+    return 0;
+}
+
+AhoCorasick* AhoCorasick_new(const Trie* trie, const int reverse_complement) {
+    AhoCorasick* automaton;
+    _ac_build_data build;
+
+    if(!(automaton = malloc(sizeof(struct AhoCorasick))))
+	return NULL;
+    automaton->states = NULL;
+    automaton->num_states = 0;
+    automaton->max_states = 0;
+    automaton->patterns = NULL;
+    automaton->num_patterns = 0;
+    automaton->max_patterns = 0;
+    if(_ac_new_state(automaton) < 0)
+	goto new_memerror;
+
+    build.automaton = automaton;
+    build.error = 0;
+    Trie_iterate(trie, _ac_add_key_helper, (void *)&build);
+    if(build.error)
+	goto new_memerror;
+    if(reverse_complement && _ac_add_reverse_complements(automaton))
+	goto new_memerror;
+    if(_ac_add_fail_links(automaton))
+	goto new_memerror;
+    return automaton;
+
+ new_memerror:
+    AhoCorasick_del(automaton);
+    return NULL;
+}
+
+void AhoCorasick_del(AhoCorasick* automaton) {
+    int i;
+    if(!automaton)
+	return;
+    for(i=0; i<automaton->num_states; i++) {
+	free(automaton->states[i].letters);
+	free(automaton->states[i].next);
+    }
+    for(i=0; i<automaton->num_patterns; i++)
+	free(automaton->patterns[i].pattern);
+    free(automaton->states);
+    free(automaton->patterns);
+    free(automaton);
+}
+
+int AhoCorasick_num_patterns(const AhoCorasick* automaton) {
+    return automaton->num_patterns;
+}
+
+int AhoCorasick_num_states(const AhoCorasick* automaton) {
+    return automaton->num_states;
+}
+
+const char *AhoCorasick_key(const AhoCorasick* automaton, const int pattern) {
+    return automaton->patterns[pattern].key;
+}
+
+int AhoCorasick_strand(const AhoCorasick* automaton, const int pattern) {
+    return automaton->patterns[pattern].strand;
+}
+
+int AhoCorasick_search(const AhoCorasick* automaton, 
+		       const char *text, const long length,
+		       int *state, const long offset,
+		       int (*callback)(const int pattern,
+				       const long start, const long end,
+				       void *data),
+		       void *data) {
+    const ACState* states = automaton->states;
+    const ACPattern* patterns = automaton->patterns;
+    int current = *state, next, found, pattern, retval;
+    long i;
+
+    for(i=0; i<length; i++) {
+	const unsigned char c = (unsigned char)text[i];
+	/* Follow the fail links until there is a transition on c. */
+	while(current && (next = _ac_transition(&states[current], c)) < 0)
+	    current = states[current].fail;
+	if(!current)
+	    next = automaton->root[c];
+	current = next;
+	/* Report the patterns ending here, longest first. */
+	if(states[current].output >= 0)
+	    found = current;
+	else
+	    found = states[current].dict_link;
+	while(found >= 0) {
+	    for(pattern = states[found].output; pattern >= 0;
+		pattern = patterns[pattern].same) {
+		const long end = offset+i+1;
+		if((retval = (*callback)(pattern, end-patterns[pattern].length,
+					 end, data))) {
+		    *state = current;
+		    return retval;
+		}
+	    }
+	    found = states[found].dict_link;
+	}
+    }
+    *state = current;
+    return 0;
+}
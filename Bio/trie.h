@@ -127,3 +127,67 @@ int Trie_serialize(const Trie* trie,
 Trie* Trie_deserialize(int (*read)(void *wasread, const int length, void *data),
 		      void *(*read_value)(void *data),
 		      void *data);
+
+
+
+typedef struct AhoCorasick AhoCorasick; /* forward declaration */
+
+/* AhoCorasick_new
+ * ---------------
+ * Create an Aho-Corasick automaton for finding all the keys in a
+ * trie in a single pass over a string.  If reverse_complement is
+ * true, the reverse complement of each key (treating it as a
+ * nucleotide sequence) is also searched for.  Empty keys are
+ * ignored.  Returns NULL if out of memory.  The automaton does not
+ * refer to the trie or its values, so the trie can be changed or
+ * freed afterwards.  When finished, free it with AhoCorasick_del.
+ */
+AhoCorasick* AhoCorasick_new(const Trie* trie, const int reverse_complement);
+
+
+/* AhoCorasick_del
+ * ---------------
+ * Free an AhoCorasick data structure.
+ */
+void AhoCorasick_del(AhoCorasick* automaton);
+
+
+/* AhoCorasick_num_patterns, AhoCorasick_num_states
+ * ------------------------------------------------
+ * Return the number of patterns searched for (the keys, plus their
+ * reverse complements if requested), and the number of states.
+ */
+int AhoCorasick_num_patterns(const AhoCorasick* automaton);
+int AhoCorasick_num_states(const AhoCorasick* automaton);
+
+
+/* AhoCorasick_key, AhoCorasick_strand
+ * -----------------------------------
+ * Return the trie key for a pattern (for a reverse complement pattern
+ * this is the original key), and the strand (1 for the key itself, or
+ * -1 for its reverse complement).
+ */
+const char *AhoCorasick_key(const AhoCorasick* automaton, const int pattern);
+int AhoCorasick_strand(const AhoCorasick* automaton, const int pattern);
+
+
+/* AhoCorasick_search
+ * ------------------
+ * Find every occurrence of the patterns in a string.  For each match
+ * the callback is called with the pattern number and the start and
+ * end of the match (counting from offset), in order of the end
+ * position (and longest match first).  If the callback returns a
+ * non-zero value the search stops, and that value is returned.
+ * Otherwise this returns 0.
+ *
+ * The state should point to 0 for a new search, and is updated so
+ * that a long string can be searched in chunks (with the offset of
+ * each chunk), finding matches which span the chunks.
+ */
+int AhoCorasick_search(const AhoCorasick* automaton, 
+		       const char *text, const long length,
+		       int *state, const long offset,
+		       int (*callback)(const int pattern,
+				       const long start, const long end,
+				       void *data),
+		       void *data);
@@ -9,6 +9,17 @@ match         Find longest key in a trie matching the beginning of the string.
 match_all     Find all keys in a trie matching the beginning of the string.
 find          Find keys in a trie matching anywhere in a string.
 find_words    Find keys in a trie matching whole words in a string.
+find_all      Find keys in a trie matching anywhere in a string, in one pass.
+
+Classes:
+AhoCorasick   Automaton for finding the keys in a trie in one pass over
+              a string (optionally in chunks, and on both strands).
+
+The find function tries to match the trie at every position in the
+string, so is slow with long strings and many keys.  find_all (and the
+AhoCorasick class) build an Aho-Corasick automaton from the keys, then
+find every match in a single pass, taking time proportional to the
+length of the string plus the number of matches.
 
 """
 import string
@@ -90,3 +101,71 @@ def find_words(string, trie):
             break
         start = m.end()
     return results
+
+def find_all(string, trie, reverse_complement=False):
+    """find_all(string, trie[, reverse_complement]) -> list of tuples (key, start, end, strand)
+
+    Find all the keys in the trie that match anywhere in the string,
+    using an Aho-Corasick automaton.  The matches are in order of their
+    end position (longest first).  The strand is 1, or with the
+    reverse_complement option -1 where the reverse complement of the
+    key (as a nucleotide sequence) matches.  To search many strings for
+    the same keys, create an AhoCorasick object once and use its find
+    method.
+
+    """
+    return AhoCorasick(trie, reverse_complement).find(string)
+
+class AhoCorasick(object):
+    """Aho-Corasick automaton for finding the keys of a trie in strings.
+
+    The automaton is built from the keys in the trie when created (so
+    any later changes to the trie are ignored).  If reverse_complement
+    is true, the reverse complement of each key (as a nucleotide
+    sequence, using the IUPAC ambiguity codes) is also looked for, which
+    is useful when searching a genome for primers or adapters.  Matches
+    are returned as (key, start, end, strand) tuples, where strand is 1
+    for the key itself or -1 for its reverse complement.
+
+    Methods:
+    find        Find all the keys in a string.
+    find_iter   Find all the keys in a string given as a series of chunks.
+
+    """
+    def __init__(self, trie, reverse_complement=False):
+        from Bio import trie as trie_module #Lazy import, needs compiled code
+        self._automaton = trie_module.automaton(trie, bool(reverse_complement))
+        self.reverse_complement = bool(reverse_complement)
+
+    def __len__(self):
+        """Number of patterns searched for (including reverse complements)."""
+        return len(self._automaton)
+
+    def find(self, string):
+        """S.find(string) -> list of tuples (key, start, end, strand)
+
+        Find all the keys matching anywhere in the string, in order of
+        their end position (longest first).
+
+        """
+        return self._automaton.search(string)[0]
+
+    def find_iter(self, chunks):
+        """S.find_iter(chunks) -> iterator of tuples (key, start, end, strand)
+
+        Find all the keys in a long string (such as a chromosome) given
+        as an iterable of chunks, e.g. lines from a file without their
+        line endings.  The start and end are counted from the beginning
+        of the first chunk, and matches spanning two or more chunks are
+        found.  Only the current chunk is held in memory.
+
+        """
+        search = self._automaton.search
+        state = 0
+        offset = 0
+        for chunk in chunks:
+            chunk = str(chunk)
+            matches, state = search(chunk, state, offset)
+            offset += len(chunk)
+            for match in matches:
+                yield match
@@ -9,6 +9,7 @@
 
 
 staticforward PyTypeObject Trie_Type;
+staticforward PyTypeObject Automaton_Type;
 
 typedef struct {
     PyObject_HEAD
@@ -628,9 +629,175 @@ trie_load(PyObject *self, PyObject *args)
     return (PyObject *)trieobj;
 }
 
+typedef struct {
+    PyObject_HEAD
+    AhoCorasick* automaton;
+    PyObject* keys;      /* tuple of the trie key for each pattern */
+} automatonobject;
+
+static PyObject*
+trie_automaton(PyObject* self, PyObject* args)
+{
+    PyObject *py_trie;
+    int reverse_complement = 0;
+    AhoCorasick* automaton;
+    automatonobject* automatonobj;
+    PyObject *py_keys, *py_key;
+    int i, num_patterns;
+
+    if(!PyArg_ParseTuple(args, "O!|i:automaton", &Trie_Type, &py_trie,
+			 &reverse_complement))
+	return NULL;
+    if(!(automaton = AhoCorasick_new(((trieobject *)py_trie)->trie,
+				     reverse_complement)))
+	return PyErr_NoMemory();
+    num_patterns = AhoCorasick_num_patterns(automaton);
+    if(!(py_keys = PyTuple_New(num_patterns))) {
+	AhoCorasick_del(automaton);
+	return NULL;
+    }
+    for(i=0; i<num_patterns; i++) {
+	/* The reverse complement patterns come after all the forward
+	   patterns, in the same order, and share their key objects. */
+	if(AhoCorasick_strand(automaton, i) == -1) {
+	    py_key = PyTuple_GET_ITEM(py_keys, i - num_patterns/2);
+	    Py_INCREF(py_key);
+	}
+	else if(!(py_key = PyString_FromString(AhoCorasick_key(automaton, i)))) {
+	    Py_DECREF(py_keys);
+	    AhoCorasick_del(automaton);
+	    return NULL;
+	}
+	PyTuple_SET_ITEM(py_keys, i, py_key);
+    }
+    if(!(automatonobj = PyObject_New(automatonobject, &Automaton_Type))) {
+	Py_DECREF(py_keys);
+	AhoCorasick_del(automaton);
+	return NULL;
+    }
+    automatonobj->automaton = automaton;
+    automatonobj->keys = py_keys;
+    return (PyObject*)automatonobj;
+}
+
+static void
+automaton_dealloc(PyObject* self)
+{
+    automatonobject *ap = (automatonobject *)self;
+    AhoCorasick_del(ap->automaton);
+    Py_DECREF(ap->keys);
+    PyObject_Del(self);
+}
+
+static Py_ssize_t
+automaton_length(automatonobject *ap)
+{
+    return AhoCorasick_num_patterns(ap->automaton);
+}
+
+typedef struct {
+    automatonobject *automaton;
+    PyObject *py_list;
+} _automaton_search_data;
+
+static int
+_automaton_search_helper(const int pattern, const long start, const long end,
+			 void *data)
+{
+    /* Append a tuple of (key, start, end, strand) to the list. */
+    _automaton_search_data *search = (_automaton_search_data *)data;
+    PyObject *py_key = PyTuple_GET_ITEM(search->automaton->keys, pattern),
+	*py_tuple;
+    int strand = AhoCorasick_strand(search->automaton->automaton, pattern);
+
+    if(!(py_tuple = Py_BuildValue("Olli", py_key, start, end, strand)))
+	return 1;
+    if(PyList_Append(search->py_list, py_tuple)) {
+	Py_DECREF(py_tuple);
+	return 1;
+    }
+    Py_DECREF(py_tuple);
+    return 0;
+}
+
+static char search__doc__[] =
+"A.search(string[, state, offset]) -> (list of (key, start, end, strand), state)\n\
+\n\
+Find every occurrence of the keys in the string in a single pass, in\n\
+order of the end position.  The strand is 1 for the key, or -1 for\n\
+its reverse complement.  To search a long string in chunks, give the\n\
+state returned from the previous chunk, and the offset of this one.";
+
+static PyObject *
+automaton_search(automatonobject *ap, PyObject *args)
+{
+    const char *text;
+    int length;
+    int state = 0;
+    long offset = 0;
+    _automaton_search_data search;
+
+    if(!PyArg_ParseTuple(args, "s#|il:search", &text, &length, &state,
+			 &offset))
+	return NULL;
+    if(state < 0 || state >= AhoCorasick_num_states(ap->automaton)) {
+	PyErr_SetString(PyExc_ValueError, "invalid automaton state");
+	return NULL;
+    }
+    search.automaton = ap;
+    if(!(search.py_list = PyList_New(0)))
+	return NULL;
+    if(AhoCorasick_search(ap->automaton, text, length, &state, offset,
+			  _automaton_search_helper, (void *)&search)) {
+	Py_DECREF(search.py_list);
+	return NULL;
+    }
+    return Py_BuildValue("Ni", search.py_list, state);
+}
+
+static PyMethodDef automatonobj_methods[] = {
+    {"search",  (PyCFunction)automaton_search,  METH_VARARGS,
+     search__doc__},
+    {NULL, NULL}   /* sentinel */
+};
+
+static PyObject *automaton_getattr(PyObject *obj, const char *name)
+{
+    return Py_FindMethod(automatonobj_methods, obj, name);
+}
+
+static PySequenceMethods automaton_as_sequence = {
+/* The first member of PySequenceMethods was redefined in Python 2.5. */
+#if PY_VERSION_HEX < 0x02050000
+    (inquiry)automaton_length,   /*sq_length*/
+#else
+    (lenfunc)automaton_length,   /*sq_length*/
+#endif
+};
+
+static PyTypeObject Automaton_Type = {
+    PyObject_HEAD_INIT(NULL)
+    0,
+    "automaton",
+    sizeof(automatonobject),
+    0,
+    automaton_dealloc,  /*tp_dealloc*/
+    0,                  /*tp_print*/
+    (getattrfunc)automaton_getattr,             /*tp_getattr*/
+    0,                  /*tp_setattr*/
+    0,                  /*tp_compare*/
+    0,                  /*tp_repr*/
+    0,                  /*tp_as_number*/
+    &automaton_as_sequence,  /*tp_as_sequence*/
+    0,                  /*tp_as_mapping*/
+    0,                  /*tp_hash */
+};
+
 static PyMethodDef trie_methods[] = {
     {"trie", trie_trie, METH_VARARGS, 
      "trie() -> new Trie object."},
+    {"automaton", trie_automaton, METH_VARARGS, 
+     "automaton(trie[, reverse_complement]) -> Aho-Corasick automaton object."},
     {"load", trie_load, METH_VARARGS, 
      "load(handle) -> trie object"},
     {"save", trie_save, METH_VARARGS, 
@@ -645,9 +812,10 @@ lookup of a string in a dictionary, where M is the length of the\n\
 string.  It also supports approximate matches.\n\
 \n\
 Functions:\n\
-trie    Create a new trie object.\n\
-save    Save a trie to a handle.\n\
-load    Load a trie from a handle.\n\
+trie       Create a new trie object.\n\
+save       Save a trie to a handle.\n\
+load       Load a trie from a handle.\n\
+automaton  Create an Aho-Corasick automaton to find a trie's keys.\n\
 \n\
 ";
 
@@ -655,6 +823,7 @@ DL_EXPORT(void)
 inittrie(void) 
 {
     Trie_Type.ob_type = &PyType_Type;
+    Automaton_Type.ob_type = &PyType_Type;
 
     (void) Py_InitModule3("trie", trie_methods, trie__doc__);
 }
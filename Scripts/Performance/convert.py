@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""Small script to compare the speed of the Bio.SeqIO.convert fast paths.
+
+Bio.SeqIO.convert(...) has special case code for many pairs of file formats
+which avoids creating SeqRecord objects. This script times each of these
+against the generic approach of Bio.SeqIO.parse(...) with Bio.SeqIO.write(...)
+on example files (made by repeating the records from the unit test files),
+checks the output is the same, and reports the speed up.
+
+Usage: python convert.py [repeats]
+
+This should be run from the Tests directory (to find the example files).
+"""
+import os
+import sys
+import time
+import tempfile
+import warnings
+from StringIO import StringIO
+
+from Bio import SeqIO
+from Bio.SeqIO import QualityIO
+from Bio.SeqIO._convert import _converter
+
+
+def make_example(filename, format, repeats):
+    """Write a temporary file repeating the records of an example file."""
+    if format == "sff-trim":
+        #Need the untrimmed reads (with the flow data) to write an SFF file
+        format = "sff"
+    records = list(SeqIO.parse(filename, format))
+    fd, temp = tempfile.mkstemp()
+    os.close(fd)
+    if format == "sff":
+        #Needs unique read names, and can't just concatenate the files
+        def renamed():
+            for i in xrange(repeats):
+                for record in records:
+                    new = record[:]
+                    new.annotations = record.annotations
+                    new.id = "%s_%i" % (record.id, i)
+                    yield new
+        handle = open(temp, "wb")
+        SeqIO.write(renamed(), handle, "sff")
+    else:
+        data = open(filename, "rU").read()
+        handle = open(temp, "w")
+        for i in xrange(repeats):
+            handle.write(data)
+    handle.close()
+    return temp
+
+
+def time_it(function, repeats=3):
+    """Return the best time, and the output of the function."""
+    best = None
+    for i in range(repeats):
+        start_time = time.time()
+        output = function()
+        elapsed_time = time.time() - start_time
+        if best is None or elapsed_time < best:
+            best = elapsed_time
+    return best, output
+
+
+def compare(in_filename, in_format, out_format, qual_filename=None):
+    if qual_filename:
+        def generic():
+            handle = StringIO()
+            records = QualityIO.PairedFastaQualIterator(open(in_filename),
+                                                        open(qual_filename))
+            SeqIO.write(records, handle, out_format)
+            return handle.getvalue()
+        def fast():
+            handle = StringIO()
+            SeqIO.convert(in_filename, in_format, handle, out_format,
+                          qual_file=qual_filename)
+            return handle.getvalue()
+        name = "fasta+qual"
+    else:
+        def generic():
+            handle = StringIO()
+            SeqIO.write(SeqIO.parse(in_filename, in_format), handle,
+                        out_format)
+            return handle.getvalue()
+        def fast():
+            handle = StringIO()
+            SeqIO.convert(in_filename, in_format, handle, out_format)
+            return handle.getvalue()
+        name = in_format
+    generic_time, generic_output = time_it(generic)
+    fast_time, fast_output = time_it(fast)
+    assert generic_output == fast_output, "%s to %s differs" \
+           % (name, out_format)
+    print "%s to %s: %0.2fs generic, %0.2fs fast, %0.1f times faster" \
+          % (name, out_format, generic_time, fast_time,
+             generic_time / max(fast_time, 1e-6))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        repeats = int(sys.argv[1])
+    else:
+        repeats = 200
+    warnings.simplefilter("ignore")
+    examples = [("Quality/example.fastq", "fastq", 5000),
+                ("Quality/solexa_faked.fastq", "fastq-solexa", 5000),
+                ("Quality/illumina_faked.fastq", "fastq-illumina", 5000),
+                ("GenBank/NC_000932.faa", "fasta", 100),
+                ("GenBank/NC_005816.gb", "genbank", 100),
+                ("EMBL/U87107.embl", "embl", 100),
+                ("SwissProt/multi_ex.txt", "swiss", 100),
+                ("Roche/E3MFGYR02_random_10_reads.sff", "sff", 500),
+                ("Roche/E3MFGYR02_random_10_reads.sff", "sff-trim", 500)]
+    for filename, format, scale in examples:
+        temp = make_example(filename, format, max(1, repeats * scale // 100))
+        try:
+            for (in_format, out_format) in sorted(_converter):
+                if in_format == format:
+                    compare(temp, in_format, out_format)
+            if format == "fasta":
+                #Also try tab to FASTA
+                tab = make_example(filename, format, 1)
+                SeqIO.convert(temp, "fasta", tab, "tab")
+                try:
+                    compare(tab, "tab", "fasta")
+                finally:
+                    os.remove(tab)
+        finally:
+            os.remove(temp)
+    fasta = make_example("Quality/example.fasta", "fasta", repeats * 50)
+    qual = make_example("Quality/example.qual", "qual", repeats * 50)
+    try:
+        compare(fasta, "fasta", "fastq", qual)
+    finally:
+        os.remove(fasta)
+        os.remove(qual)
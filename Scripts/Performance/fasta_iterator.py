@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""Small script to compare the speed of the FASTA parser with a line based one.
+
+Bio.SeqIO.FastaIO.FastaIterator reads the file in large blocks and looks
+for the record boundaries within each block. This script times it against
+the original line by line implementation (included below for reference),
+on a short read style file and on a file of long wrapped sequences, and
+reports the number of records parsed per second.
+
+Usage: python fasta_iterator.py [filename ...]
+
+If no filenames are given, temporary example files are generated.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+
+from Bio.Alphabet import single_letter_alphabet
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+from Bio.SeqIO.FastaIO import FastaIterator
+
+
+def LineFastaIterator(handle, alphabet = single_letter_alphabet):
+    """The original line based FASTA parser (for comparison)."""
+    while True:
+        line = handle.readline()
+        if line == "" : return
+        if line[0] == ">":
+            break
+    while True:
+        descr = line[1:].rstrip()
+        try:
+            id = descr.split()[0]
+        except IndexError:
+            id = ""
+        lines = []
+        line = handle.readline()
+        while True:
+            if not line : break
+            if line[0] == ">": break
+            lines.append(line.rstrip())
+            line = handle.readline()
+        result = "".join(lines).replace(" ", "").replace("\r", "")
+        yield SeqRecord(Seq(result, alphabet),
+                        id = id, name = id, description = descr)
+        if not line : return
+
+
+def make_example(handle, count, min_len, max_len, wrap=None):
+    """Write random DNA records to a handle."""
+    rnd = random.Random(count)
+    for i in xrange(count):
+        length = rnd.randint(min_len, max_len)
+        seq = "".join(rnd.choice("ACGT") for j in xrange(length))
+        handle.write(">read%i example sequence\n" % i)
+        if wrap:
+            for j in xrange(0, length, wrap):
+                handle.write(seq[j:j + wrap] + "\n")
+        else:
+            handle.write(seq + "\n")
+
+
+def time_parser(parser, filename, repeats=3):
+    """Return the best time and record count for parsing the file."""
+    best = None
+    for i in range(repeats):
+        handle = open(filename)
+        start_time = time.time()
+        count = 0
+        for record in parser(handle):
+            count += 1
+        elapsed_time = time.time() - start_time
+        handle.close()
+        if best is None or elapsed_time < best:
+            best = elapsed_time
+    return best, count
+
+
+def compare(filename):
+    print filename
+    for name, parser in [("Line based", LineFastaIterator),
+                         ("FastaIterator", FastaIterator)]:
+        elapsed_time, count = time_parser(parser, filename)
+        print "\t%s: %i records in %0.2f seconds, %0.0f records per second" \
+              % (name, count, elapsed_time, count / max(elapsed_time, 1e-6))
+
+
+if __name__ == "__main__":
+    if sys.argv[1:]:
+        for filename in sys.argv[1:]:
+            compare(filename)
+        sys.exit(0)
+    examples = [("Short reads (36 to 100bp, unwrapped)", 200000, 36, 100, None),
+                ("Long sequences (10 to 50kbp, wrapped at 60)", 200,
+                 10000, 50000, 60)]
+    for title, count, min_len, max_len, wrap in examples:
+        fd, filename = tempfile.mkstemp(suffix=".fasta")
+        handle = os.fdopen(fd, "w")
+        make_example(handle, count, min_len, max_len, wrap)
+        handle.close()
+        try:
+            print title
+            compare(filename)
+        finally:
+            os.remove(filename)
@@ -76,6 +76,7 @@ DOCTEST_MODULES = [
                    "Bio.AlignIO.StockholmIO",
                    "Bio.Alphabet",
                    "Bio.Application",
+                   "Bio.bgzf",
                    "Bio.Blast.Applications",
                    "Bio.Emboss.Applications",
                    "Bio.GenBank",
@@ -92,7 +93,9 @@ DOCTEST_MODULES = [
                    "Bio.SeqFeature",
                    "Bio.SeqRecord",
                    "Bio.SeqUtils",
+                   "Bio.SeqUtils.Kmer",
                    "Bio.SeqUtils.MeltingTemp",
+                   "Bio.SeqUtils.ORF",
                    "Bio.Sequencing.Applications._Novoalign",
                    "Bio.Wise",
                    "Bio.Wise.psw",
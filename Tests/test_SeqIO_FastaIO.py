@@ -8,6 +8,7 @@ import unittest
 from StringIO import StringIO
 
 from Bio import SeqIO
+from Bio.SeqIO import FastaIO
 from Bio.SeqIO.FastaIO import FastaIterator
 from Bio.Alphabet import generic_protein, generic_nucleotide, generic_dna
 
@@ -111,6 +112,47 @@ class TitleFunctions(unittest.TestCase):
         self.assertEqual("", record.description)
 
 
+class BlockReads(unittest.TestCase):
+    """Check record boundaries falling at or near the end of a block."""
+    def setUp(self):
+        self.block_size = FastaIO._block_size
+
+    def tearDown(self):
+        FastaIO._block_size = self.block_size
+
+    def check_blocks(self, text, expected):
+        for block_size in [1, 2, 3, 5, 7, 16, 1000]:
+            FastaIO._block_size = block_size
+            records = list(FastaIterator(StringIO(text)))
+            self.assertEqual(expected,
+                             [(r.description, str(r.seq)) for r in records])
+
+    def test_files(self):
+        """Test small block sizes give the same records."""
+        for filename in ["Fasta/f002", "Fasta/fa01", "Quality/example.fasta",
+                         "GenBank/NC_005816.ffn"]:
+            handle = open(filename)
+            text = handle.read()
+            handle.close()
+            expected = [(r.description, str(r.seq)) for r \
+                        in SeqIO.parse(StringIO(text), "fasta")]
+            self.check_blocks(text, expected)
+
+    def test_edge_cases(self):
+        """Test comments, blank titles, and messy white space."""
+        self.check_blocks("", [])
+        self.check_blocks("Just a comment\n", [])
+        self.check_blocks(">", [("", "")])
+        self.check_blocks("\n\n>\n\n>\nAAA", [("", ""), ("", "AAA")])
+        self.check_blocks(">a\n>b\n", [("a", ""), ("b", "")])
+        self.check_blocks("Comment with > in it\n>x y\nA C\t\nG\r\n>z\n",
+                          [("x y", "ACG"), ("z", "")])
+        self.check_blocks(">a\r\nAC\r\nGT\r\n>b\r\nGG\r\n",
+                          [("a", "ACGT"), ("b", "GG")])
+        self.check_blocks(">a\nAC>GT\n>b c>d\n>\n",
+                          [("a", "AC>GT"), ("b c>d", ""), ("", "")])
+
+
 single_nucleic_files = ['Fasta/lupine.nu', 'Fasta/elderberry.nu',
                         'Fasta/phlox.nu', 'Fasta/centaurea.nu',
                         'Fasta/wisteria.nu', 'Fasta/sweetpea.nu',
@@ -712,6 +712,259 @@ class MappingTests(unittest.TestCase):
                          expected_phred)
 
 
+class CompactQualityTests(unittest.TestCase):
+    """Check the FASTQ parsers' bytes and NumPy quality types."""
+    def check(self, filename, format, quality_type, iterator):
+        records = list(SeqIO.parse(filename, format))
+        handle = open(filename, "rU")
+        compact = list(iterator(handle, quality_type=quality_type))
+        handle.close()
+        self.assertEqual(len(records), len(compact))
+        #Want to ignore the data loss warnings
+        warnings.simplefilter('ignore', BiopythonWarning)
+        try:
+            for old, new in zip(records, compact):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(str(old.seq), str(new.seq))
+                self.assertEqual(old.letter_annotations["phred_quality"],
+                                 QualityIO._get_phred_quality(new))
+                for out_format in ["fastq", "fastq-illumina", "fastq-solexa",
+                                   "qual"]:
+                    self.assertEqual(old.format(out_format),
+                                     new.format(out_format))
+                    self.assertEqual(old[5:20].format(out_format),
+                                     new[5:20].format(out_format))
+        finally:
+            warnings.filters.pop()
+
+    def check_all(self, quality_type):
+        for filename in ["Quality/example.fastq", "Quality/tricky.fastq",
+                         "Quality/sanger_93.fastq",
+                         "Quality/sanger_faked.fastq"]:
+            self.check(filename, "fastq", quality_type,
+                       QualityIO.FastqPhredIterator)
+        self.check("Quality/illumina_faked.fastq", "fastq-illumina",
+                   quality_type, QualityIO.FastqIlluminaIterator)
+
+    def test_bytes(self):
+        """Parse and write FASTQ with qualities as bytes"""
+        self.check_all("bytes")
+        record = QualityIO.FastqPhredIterator(StringIO("@Test\nACGT\n+\n!5I~\n"),
+                                              quality_type="bytes").next()
+        self.assertEqual(record.letter_annotations["phred_quality"],
+                         "\x00\x14\x28\x5d")
+
+    def test_numpy(self):
+        """Parse and write FASTQ with qualities as a NumPy array"""
+        try:
+            import numpy
+        except ImportError:
+            #Skip this test
+            return
+        self.check_all("numpy")
+        record = QualityIO.FastqPhredIterator(StringIO("@Test\nACGT\n+\n!5I~\n"),
+                                              quality_type="numpy").next()
+        qualities = record.letter_annotations["phred_quality"]
+        self.assertEqual(qualities.dtype, numpy.uint8)
+        self.assertEqual(list(qualities), [0, 20, 40, 93])
+
+    def test_errors(self):
+        """Bad qualities or quality type"""
+        for quality_type in ["bytes", "list"]:
+            handle = StringIO("@Test\nACGT\n+\n!5I \n")
+            self.assertRaises(ValueError, list,
+                              QualityIO.FastqPhredIterator(handle,
+                                  quality_type=quality_type))
+            handle = StringIO("@Test\nACGT\n+\n@@@?\n")
+            self.assertRaises(ValueError, list,
+                              QualityIO.FastqIlluminaIterator(handle,
+                                  quality_type=quality_type))
+        handle = StringIO("@Test\nACGT\n+\n!!!!\n")
+        self.assertRaises(ValueError, list,
+                          QualityIO.FastqPhredIterator(handle,
+                                                       quality_type="string"))
+
+
+class PairedFastqTests(unittest.TestCase):
+    """Check the paired FASTQ iterators."""
+
+    def check_pairs(self, filename, format="fastq"):
+        records = list(SeqIO.parse(filename, format))
+        for read_ahead in [None, 1, 2, 1000]:
+            pairs = list(QualityIO.PairedFastqIterator(open(filename, "rU"),
+                                                       open(filename, "rU"),
+                                                       format,
+                                                       read_ahead=read_ahead))
+            self.assertEqual(len(records), len(pairs))
+            for record, (rec1, rec2) in zip(records, pairs):
+                self.assertEqual(record.id, rec1.id)
+                self.assertEqual(record.id, rec2.id)
+                self.assertEqual(str(record.seq), str(rec2.seq))
+                self.assertEqual(record.letter_annotations,
+                                 rec2.letter_annotations)
+            pairs = list(QualityIO.PairedFastqGeneralIterator( \
+                            open(filename, "rU"), open(filename, "rU"),
+                            read_ahead=read_ahead))
+            self.assertEqual(len(records), len(pairs))
+            for record, (values1, values2) in zip(records, pairs):
+                self.assertEqual(values1, values2)
+                self.assertEqual(str(record.seq), values1[1])
+
+    def test_pairs(self):
+        """Paired FASTQ iteration"""
+        self.check_pairs("Quality/example.fastq")
+        self.check_pairs("Quality/tricky.fastq")
+        self.check_pairs("Quality/solexa_faked.fastq", "fastq-solexa")
+        self.check_pairs("Quality/illumina_faked.fastq", "fastq-illumina")
+
+    def test_mate_suffix(self):
+        """Paired FASTQ with /1 and /2 suffixes"""
+        handle1 = StringIO("@read/1\nACGT\n+\nIIII\n@next/1\nAC\n+\nII\n")
+        handle2 = StringIO("@read/2\nTTTT\n+\nIIII\n@next/2\nGG\n+\nII\n")
+        pairs = list(QualityIO.PairedFastqIterator(handle1, handle2))
+        self.assertEqual([("read/1", "read/2"), ("next/1", "next/2")],
+                         [(r1.id, r2.id) for r1, r2 in pairs])
+
+    def test_mismatch(self):
+        """Paired FASTQ with mismatched identifiers or record counts"""
+        for read_ahead in [None, 1000]:
+            handle1 = StringIO("@read/1\nACGT\n+\nIIII\n")
+            handle2 = StringIO("@other/2\nTTTT\n+\nIIII\n")
+            pairs = QualityIO.PairedFastqIterator(handle1, handle2,
+                                                  read_ahead=read_ahead)
+            self.assertRaises(ValueError, list, pairs)
+            handle1 = StringIO("@read/1\nACGT\n+\nIIII\n")
+            pairs = QualityIO.PairedFastqGeneralIterator(handle1, StringIO(""),
+                                                         read_ahead=read_ahead)
+            self.assertRaises(ValueError, list, pairs)
+
+    def test_parse_error(self):
+        """Paired FASTQ passes on errors from the background thread"""
+        filename = "Quality/error_trunc_in_seq.fastq"
+        for read_ahead in [None, 1000]:
+            pairs = QualityIO.PairedFastqIterator(open(filename, "rU"),
+                                                  open(filename, "rU"),
+                                                  read_ahead=read_ahead)
+            self.assertRaises(ValueError, list, pairs)
+        self.assertRaises(ValueError, QualityIO.PairedFastqIterator,
+                          StringIO(""), StringIO(""), "fasta")
+
+    def test_stop_early(self):
+        """Paired FASTQ iteration stopped early"""
+        filename = "Quality/tricky.fastq"
+        pairs = QualityIO.PairedFastqIterator(open(filename, "rU"),
+                                              open(filename, "rU"),
+                                              read_ahead=2)
+        rec1, rec2 = pairs.next()
+        self.assertEqual(rec1.id, rec2.id)
+        pairs.close()
+
+
+class FastqTrimmerTests(unittest.TestCase):
+    """Check the FASTQ trimming and filtering."""
+
+    def simple_trim(self, record, window_size, window_quality,
+                    min_length, max_expected_errors):
+        """Slow but simple reference implementation using SeqRecords."""
+        #Solexa scores are mapped to the nearest integer PHRED score
+        scores = [int(round(q)) for q in QualityIO._get_phred_quality(record)]
+        size = min(window_size, len(scores))
+        if window_quality is not None:
+            for start in range(0, len(scores) - size + 1):
+                if sum(scores[start:start + size]) < window_quality * size:
+                    record = record[:start]
+                    break
+        if min_length is not None and len(record) < min_length:
+            return None
+        scores = scores[:len(record)]
+        if max_expected_errors is not None \
+        and sum(10 ** (-q / 10.0) for q in scores) > max_expected_errors:
+            return None
+        return record
+
+    def check_trim(self, filename, format, **kwargs):
+        records = list(SeqIO.parse(filename, format))
+        trimmer = QualityIO.FastqTrimmer(format, **kwargs)
+        trimmed = list(trimmer(QualityIO.FastqGeneralIterator(open(filename))))
+        expected = [self.simple_trim(r, trimmer.window_size,
+                                     trimmer.window_quality,
+                                     trimmer.min_length,
+                                     trimmer.max_expected_errors) \
+                    for r in records]
+        expected = [r for r in expected if r is not None]
+        self.assertEqual(len(expected), len(trimmed))
+        for record, (title, seq, qual) in zip(expected, trimmed):
+            self.assertEqual(record.description, title)
+            self.assertEqual(str(record.seq), seq)
+            self.assertEqual(record.format(format).split("\n")[3], qual)
+        #Now via Bio.SeqIO.convert using the fast paths
+        handle = StringIO()
+        count = SeqIO.convert(filename, format, handle, "fasta",
+                              trimmer=trimmer)
+        self.assertEqual(len(expected), count)
+        handle.seek(0)
+        self.assertEqual([str(r.seq) for r in expected],
+                         [str(r.seq) for r in SeqIO.parse(handle, "fasta")])
+
+    def test_window(self):
+        """Sliding window quality trimming"""
+        for window_size in [1, 4, 10]:
+            for window_quality in [10, 20, 30]:
+                self.check_trim("Quality/example.fastq", "fastq",
+                                window_size=window_size,
+                                window_quality=window_quality)
+                self.check_trim("Quality/sanger_faked.fastq", "fastq",
+                                window_size=window_size,
+                                window_quality=window_quality,
+                                min_length=5)
+                self.check_trim("Quality/illumina_faked.fastq",
+                                "fastq-illumina",
+                                window_size=window_size,
+                                window_quality=window_quality)
+                self.check_trim("Quality/solexa_faked.fastq", "fastq-solexa",
+                                window_size=window_size,
+                                window_quality=window_quality)
+
+    def test_filters(self):
+        """Minimum length and maximum expected errors"""
+        self.check_trim("Quality/tricky.fastq", "fastq", min_length=30)
+        self.check_trim("Quality/tricky.fastq", "fastq",
+                        max_expected_errors=0.5)
+        self.check_trim("Quality/tricky.fastq", "fastq",
+                        window_quality=20, min_length=10,
+                        max_expected_errors=1.0)
+
+    def test_adapter(self):
+        """Adapter clipping"""
+        trimmer = QualityIO.FastqTrimmer(adapter="AGATCGG",
+                                         min_adapter_overlap=3)
+        self.assertEqual(("r", "ACGT", "IIII"),
+                         trimmer.trim("r", "ACGTAGATCGGAAGA", "I" * 15))
+        self.assertEqual(("r", "ACGTAC", "IIIIII"),
+                         trimmer.trim("r", "ACGTACAGAT", "I" * 10))
+        self.assertEqual(("r", "ACGTACG", "IIIIIII"),
+                         trimmer.trim("r", "ACGTACGAGA", "I" * 10))
+        #Overlap with the adapter too short to clip
+        self.assertEqual(("r", "ACGTACGTAG", "IIIIIIIIII"),
+                         trimmer.trim("r", "ACGTACGTAG", "I" * 10))
+        self.assertEqual(("r", "", ""),
+                         trimmer.trim("r", "AGATCGGTTT", "I" * 10))
+        trimmer = QualityIO.FastqTrimmer(adapter="AGATCGG", min_length=1)
+        self.assertEqual(None, trimmer.trim("r", "AGATCGGTTT", "I" * 10))
+
+    def test_errors(self):
+        """Invalid trimming arguments or quality strings"""
+        self.assertRaises(ValueError, QualityIO.FastqTrimmer, "fasta")
+        self.assertRaises(ValueError, QualityIO.FastqTrimmer, window_size=0)
+        trimmer = QualityIO.FastqTrimmer(window_quality=20)
+        self.assertRaises(ValueError, trimmer.trim, "r", "ACGT", "II\x00I")
+        trimmer = QualityIO.FastqTrimmer("fastq-illumina", window_quality=20)
+        self.assertRaises(ValueError, SeqIO.convert, "Quality/example.fastq",
+                          "fastq", StringIO(), "fasta", trimmer=trimmer)
+        self.assertRaises(ValueError, SeqIO.convert, "Quality/example.fastq",
+                          "fastq", StringIO(), "genbank", trimmer=trimmer)
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)
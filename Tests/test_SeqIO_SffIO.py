@@ -0,0 +1,181 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for memory mapped SFF parsing and SFF clip points."""
+
+import os
+import tempfile
+import unittest
+
+from StringIO import StringIO
+try:
+    #This is in Python 2.6+, but we need it on Python 3
+    from io import BytesIO
+except ImportError:
+    BytesIO = StringIO
+
+from Bio import SeqIO
+from Bio.SeqIO import SffIO
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SFF_FILES = ["Roche/E3MFGYR02_random_10_reads.sff",
+             "Roche/E3MFGYR02_alt_index_at_start.sff",
+             "Roche/E3MFGYR02_alt_index_in_middle.sff",
+             "Roche/E3MFGYR02_alt_index_at_end.sff",
+             "Roche/E3MFGYR02_index_at_start.sff",
+             "Roche/E3MFGYR02_index_in_middle.sff",
+             "Roche/E3MFGYR02_no_manifest.sff",
+             "Roche/greek.sff",
+             "Roche/paired.sff"]
+
+
+class MemoryMapTests(unittest.TestCase):
+    """Compare memory mapped SFF parsing to the normal parser."""
+    def check(self, filename, trim, memory_map, quality_type):
+        if trim:
+            old_records = list(SeqIO.parse(filename, "sff-trim"))
+        else:
+            old_records = list(SeqIO.parse(filename, "sff"))
+        handle = open(filename, "rb")
+        new_records = list(SffIO.SffIterator(handle, trim=trim,
+                                             memory_map=memory_map,
+                                             quality_type=quality_type))
+        handle.close()
+        self.assertEqual(len(old_records), len(new_records))
+        for old, new in zip(old_records, new_records):
+            self.assertEqual(old.id, new.id)
+            self.assertEqual(str(old.seq), str(new.seq))
+            quals = new.letter_annotations["phred_quality"]
+            if quality_type == "bytes":
+                quals = [ord(q) for q in quals]
+            self.assertEqual(old.letter_annotations["phred_quality"],
+                             list(quals))
+            self.assertEqual(sorted(old.annotations), sorted(new.annotations))
+            for key, value in old.annotations.iteritems():
+                if key in ["flow_values", "flow_index"]:
+                    self.assertEqual(list(value), list(new.annotations[key]))
+                else:
+                    self.assertEqual(value, new.annotations[key])
+
+    def check_all(self, memory_map, quality_type):
+        for filename in SFF_FILES:
+            for trim in [False, True]:
+                self.check(filename, trim, memory_map, quality_type)
+
+    def test_mmap(self):
+        """Memory mapped SFF parsing"""
+        self.check_all(True, "list")
+
+    def test_bytes(self):
+        """SFF parsing with qualities as bytes"""
+        self.check_all(False, "bytes")
+        self.check_all(True, "bytes")
+
+    def test_numpy(self):
+        """SFF parsing with NumPy flowgrams and qualities"""
+        if numpy is None:
+            #Skip this test
+            return
+        self.check_all(False, "numpy")
+        self.check_all(True, "numpy")
+        handle = open(SFF_FILES[0], "rb")
+        record = SffIO.SffIterator(handle, memory_map=True,
+                                   quality_type="numpy").next()
+        handle.close()
+        self.assertEqual(record.letter_annotations["phred_quality"].dtype,
+                         numpy.uint8)
+        self.assertEqual(record.annotations["flow_values"].dtype,
+                         numpy.dtype(">u2"))
+
+    def test_write_compact(self):
+        """Write SFF with compact qualities"""
+        for filename in SFF_FILES:
+            handle = open(filename, "rb")
+            records = list(SffIO.SffIterator(handle, memory_map=True,
+                                             quality_type="bytes"))
+            handle.close()
+            data = BytesIO()
+            SeqIO.write(records, data, "sff")
+            data.seek(0)
+            for old, new in zip(SeqIO.parse(filename, "sff"),
+                                SeqIO.parse(data, "sff")):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(old.letter_annotations,
+                                 new.letter_annotations)
+
+    def test_errors(self):
+        """Memory mapped SFF parsing of bad files and arguments"""
+        data = open(SFF_FILES[0], "rb").read()
+        self.assertRaises(ValueError, list,
+                          SffIO.SffIterator(BytesIO(data), memory_map=True))
+        handle = open(SFF_FILES[0], "rb")
+        self.assertRaises(ValueError, list,
+                          SffIO.SffIterator(handle, quality_type="string"))
+        handle.close()
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            #Empty, truncated, and with extra data at the end
+            for bad in ["", data[:len(data) // 2], data + "\0" * 8]:
+                handle = open(filename, "wb")
+                handle.write(bad)
+                handle.close()
+                for memory_map in [False, True]:
+                    handle = open(filename, "rb")
+                    self.assertRaises(ValueError, list,
+                                      SffIO.SffIterator(handle,
+                                                        memory_map=memory_map))
+                    handle.close()
+                handle = open(filename, "rb")
+                self.assertRaises(ValueError, SffIO.ReadClipPoints, handle)
+                handle.close()
+        finally:
+            os.remove(filename)
+
+
+class ClipPointTests(unittest.TestCase):
+    """Check the bulk read lengths and clip points."""
+    def check(self, filename, array_type):
+        records = list(SeqIO.parse(filename, "sff"))
+        trimmed = list(SeqIO.parse(filename, "sff-trim"))
+        for handle in [open(filename, "rb"),
+                       BytesIO(open(filename, "rb").read())]:
+            names, lengths, lefts, rights = SffIO.ReadClipPoints(handle,
+                                                                 array_type)
+            handle.close()
+            self.assertEqual([r.id for r in records], names)
+            self.assertEqual([len(r) for r in records], list(lengths))
+            for record, trim, left, right in zip(records, trimmed,
+                                                 lefts, rights):
+                self.assertEqual(str(record.seq[left:right]).upper(),
+                                 str(trim.seq))
+
+    def test_array(self):
+        """Read lengths and clip points as arrays"""
+        for filename in SFF_FILES:
+            self.check(filename, "array")
+
+    def test_numpy(self):
+        """Read lengths and clip points as NumPy arrays"""
+        if numpy is None:
+            #Skip this test
+            return
+        for filename in SFF_FILES:
+            self.check(filename, "numpy")
+
+    def test_errors(self):
+        """Read clip points with bad arguments"""
+        handle = open(SFF_FILES[0], "rb")
+        self.assertRaises(ValueError, SffIO.ReadClipPoints, handle, "list")
+        handle.close()
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
@@ -10,7 +10,7 @@ import warnings
 from Bio.Seq import UnknownSeq
 from Bio import SeqIO
 from Bio.SeqIO import QualityIO
-from Bio.SeqIO._convert import _converter as converter_dict
+from Bio.SeqIO._convert import _converter as converter_dict, _format_aliases
 from StringIO import StringIO
 from Bio.Alphabet import generic_protein, generic_nucleotide, generic_dna
 
@@ -147,6 +147,21 @@ def compare_record(old, new, truncate=None):
             raise ValueError("Mismatch in solexa_quality vs phred_quality")
     return True
 
+def converter_pairs(format):
+    """Returns the (input, output) format pairs with fast converters.
+
+    This includes any aliases of the output formats.
+    """
+    pairs = []
+    for (in_format, out_format) in converter_dict:
+        if _format_aliases.get(format, format) != in_format:
+            continue
+        pairs.append((format, out_format))
+        for alias, name in _format_aliases.items():
+            if name == out_format:
+                pairs.append((format, alias))
+    return pairs
+
 def compare_records(old_list, new_list, truncate_qual=None):
     """Check two lists of SeqRecords agree, raises a ValueError if mismatch."""
     if len(old_list) != len(new_list):
@@ -175,10 +190,17 @@ tests = [
     ("EMBL/TRBG361.embl", "embl", None),
     ("GenBank/NC_005816.gb", "gb", None),
     ("GenBank/cor6_6.gb", "genbank", None),
+    ("Fasta/f002", "fasta", None),
+    ("GenBank/NC_000932.faa", "fasta", generic_protein),
+    ("SwissProt/sp001", "swiss", None),
+    ("SwissProt/multi_ex.txt", "swiss", None),
+    ("Roche/E3MFGYR02_random_10_reads.sff", "sff", None),
+    ("Roche/E3MFGYR02_random_10_reads.sff", "sff-trim", None),
+    ("Roche/E3MFGYR02_index_in_middle.sff", "sff", None),
+    ("Roche/greek.sff", "sff-trim", None),
     ]
 for filename, format, alphabet in tests:
-    for (in_format, out_format) in converter_dict:
-        if in_format != format : continue
+    for (in_format, out_format) in converter_pairs(format):
         def funct(fn,fmt1, fmt2, alpha):
             f = lambda x : x.simple_check(fn, fmt1, fmt2, alpha)
             f.__doc__ = "Convert %s from %s to %s" % (fn, fmt1, fmt2)
@@ -214,8 +236,7 @@ tests = [
     ("Quality/error_double_qual.fastq", "fastq", generic_dna),
     ]
 for filename, format, alphabet in tests:
-    for (in_format, out_format) in converter_dict:
-        if in_format != format : continue
+    for (in_format, out_format) in converter_pairs(format):
         if in_format in ["fastq", "fastq-sanger", "fastq-solexa", "fastq-illumina"] \
         and out_format in ["fasta", "tab"] and filename.startswith("Quality/error_qual_"):
             #TODO? These conversions don't check for bad characters in the quality,
@@ -231,6 +252,76 @@ for filename, format, alphabet in tests:
     del funct
 
 
+class SpecialConvertTests(unittest.TestCase):
+    """Conversions which need more than one input file, or a handle."""
+    def test_tab_to_fasta(self):
+        """Convert tab to FASTA"""
+        for filename in ["Fasta/f002", "GenBank/NC_000932.faa"]:
+            tab = StringIO()
+            SeqIO.convert(filename, "fasta", tab, "tab")
+            tab = tab.getvalue()
+            #Add some blank lines and spaces, which should be ignored
+            tab = tab.replace("\n", " \n\n", 1)
+            records = list(SeqIO.parse(StringIO(tab), "tab"))
+            expected = StringIO()
+            SeqIO.write(records, expected, "fasta")
+            handle = StringIO()
+            self.assertEqual(len(records),
+                             SeqIO.convert(StringIO(tab), "tab", handle, "fasta"))
+            self.assertEqual(expected.getvalue(), handle.getvalue())
+        self.assertRaises(ValueError, SeqIO.convert, StringIO("A\tB\tC\n"),
+                          "tab", StringIO(), "fasta")
+
+    def check_fasta_qual(self, fasta, qual, out_format):
+        records = list(QualityIO.PairedFastaQualIterator(open(fasta),
+                                                         open(qual)))
+        expected = StringIO()
+        warnings.simplefilter('ignore', UserWarning)
+        try:
+            SeqIO.write(records, expected, out_format)
+            handle = StringIO()
+            self.assertEqual(len(records),
+                             SeqIO.convert(fasta, "fasta", handle, out_format,
+                                           qual_file=qual))
+        finally:
+            warnings.filters.pop()
+        self.assertEqual(expected.getvalue(), handle.getvalue())
+
+    def test_fasta_qual(self):
+        """Convert FASTA plus QUAL to FASTQ etc"""
+        for out_format in ["fastq", "fastq-sanger", "fastq-illumina", "qual"]:
+            self.check_fasta_qual("Quality/example.fasta",
+                                  "Quality/example.qual", out_format)
+        #Now with some unusual quality scores, including truncation
+        fasta = ">a x\nACGT\n>b\nAC\nGT\n"
+        qual = ">a x\n040 -1 93 120\n>b\n0\n1 2\n30\n"
+        records = list(QualityIO.PairedFastaQualIterator(StringIO(fasta),
+                                                         StringIO(qual)))
+        expected = StringIO()
+        handle = StringIO()
+        warnings.simplefilter('ignore')
+        try:
+            SeqIO.write(records, expected, "fastq")
+            SeqIO.convert(StringIO(fasta), "fasta", handle, "fastq",
+                          qual_file=StringIO(qual))
+        finally:
+            warnings.filters.pop()
+        self.assertEqual(expected.getvalue(), handle.getvalue())
+
+    def test_fasta_qual_errors(self):
+        """Convert FASTA plus QUAL with mismatched records"""
+        for fasta, qual in [(">a\nAC\n", ">b\n1 2\n"),
+                            (">a\nAC\n", ">a\n1 2 3\n"),
+                            (">a\nAC\n>b\nA\n", ">a\n1 2\n"),
+                            (">a\nAC\n", ">a\n1 2\n>b\n1\n")]:
+            self.assertRaises(ValueError, SeqIO.convert, StringIO(fasta),
+                              "fasta", StringIO(), "fastq",
+                              qual_file=StringIO(qual))
+        self.assertRaises(ValueError, SeqIO.convert, "Quality/example.fastq",
+                          "fastq", StringIO(), "fastq",
+                          qual_file="Quality/example.qual")
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)
@@ -0,0 +1,149 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for Bio.SeqIO.demultiplex(...)."""
+
+import os
+import gzip
+import shutil
+import tempfile
+import unittest
+
+from Bio import SeqIO
+from Bio import bgzf
+
+
+class DemultiplexTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def read_back(self, filename, format, compression):
+        if compression == "gzip":
+            handle = gzip.open(filename)
+        elif compression == "bgzf":
+            handle = bgzf.BgzfReader(filename)
+        else:
+            handle = open(filename)
+        records = list(SeqIO.parse(handle, format))
+        handle.close()
+        return records
+
+    def check_demultiplex(self, filename, format, key_function,
+                          compression=None):
+        records = list(SeqIO.parse(filename, format))
+        expected = {}
+        for record in records:
+            key = key_function(record)
+            if key is not None:
+                expected.setdefault(key, []).append(record)
+        template = os.path.join(self.tmpdir, "%s." + format)
+        for max_open in [1, 2, 100]:
+            for buffer_size in [1, 1000, 65536]:
+                for threads in [0, 2]:
+                    for name in os.listdir(self.tmpdir):
+                        os.remove(os.path.join(self.tmpdir, name))
+                    counts = SeqIO.demultiplex(iter(records), key_function,
+                                               template, format,
+                                               max_open=max_open,
+                                               buffer_size=buffer_size,
+                                               compression=compression,
+                                               threads=threads)
+                    self.assertEqual(sorted(expected), sorted(counts))
+                    self.assertEqual(len(expected),
+                                     len(os.listdir(self.tmpdir)))
+                    for key, wanted in expected.iteritems():
+                        self.assertEqual(len(wanted), counts[key])
+                        new = self.read_back(template % key, format,
+                                             compression)
+                        self.assertEqual([r.id for r in wanted],
+                                         [r.id for r in new])
+                        self.assertEqual([str(r.seq) for r in wanted],
+                                         [str(r.seq) for r in new])
+                        self.assertEqual([r.letter_annotations for r in wanted],
+                                         [r.letter_annotations for r in new])
+
+    def test_fasta(self):
+        """Demultiplex FASTA file by first letter of the sequence"""
+        self.check_demultiplex("GenBank/NC_000932.faa", "fasta",
+                               lambda r : str(r.seq)[1])
+
+    def test_fastq(self):
+        """Demultiplex FASTQ file skipping some records"""
+        key = lambda r : str(r.seq)[0] in "AC" and str(r.seq)[:2] or None
+        self.check_demultiplex("Quality/tricky.fastq", "fastq", key)
+        self.check_demultiplex("Quality/example.fastq", "fastq", key)
+
+    def test_gzip(self):
+        """Demultiplex with gzip compression"""
+        self.check_demultiplex("GenBank/NC_000932.faa", "fasta",
+                               lambda r : str(r.seq)[1], "gzip")
+        self.check_demultiplex("Quality/tricky.fastq", "fastq",
+                               lambda r : str(r.seq)[0], "gzip")
+
+    def test_bgzf(self):
+        """Demultiplex with BGZF compression"""
+        self.check_demultiplex("GenBank/NC_000932.faa", "fasta",
+                               lambda r : str(r.seq)[1], "bgzf")
+
+    def test_shared_file(self):
+        """Demultiplex with several keys sharing an output file"""
+        records = list(SeqIO.parse("Quality/tricky.fastq", "fastq"))
+        filename = os.path.join(self.tmpdir, "shared.fastq")
+        counts = SeqIO.demultiplex(records, lambda r : str(r.seq)[0],
+                                   lambda key : filename, "fastq",
+                                   max_open=1, buffer_size=1)
+        self.assertEqual(len(records), sum(counts.values()))
+        self.assertEqual([r.id for r in records],
+                         [r.id for r in SeqIO.parse(filename, "fastq")])
+
+    def test_errors(self):
+        """Demultiplex with invalid arguments"""
+        records = list(SeqIO.parse("Quality/example.fastq", "fastq"))
+        template = os.path.join(self.tmpdir, "%s.fastq")
+        key = lambda r : r.id
+        for format in ["sff", "clustal", "stockholm", "nexus", "not-a-format"]:
+            self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                              template, format)
+        self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                          os.path.join(self.tmpdir, "all.fastq"), "fastq")
+        self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                          template, "fastq", max_open=0)
+        self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                          template, "fastq", buffer_size=0)
+        self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                          template, "fastq", compression="bzip2")
+        self.assertRaises(ValueError, SeqIO.demultiplex, records, key,
+                          template, "fastq", threads=-1)
+        self.assertEqual([], os.listdir(self.tmpdir))
+
+    def test_write_error(self):
+        """Demultiplex with an output directory which does not exist"""
+        records = list(SeqIO.parse("Quality/example.fastq", "fastq"))
+        template = os.path.join(self.tmpdir, "missing", "%s.fastq")
+        for threads in [0, 2]:
+            self.assertRaises(IOError, SeqIO.demultiplex, records,
+                              lambda r : r.id, template, "fastq",
+                              buffer_size=1, threads=threads)
+
+    def test_key_function_error(self):
+        """Demultiplex reports the key function error, not a write error"""
+        records = list(SeqIO.parse("Quality/example.fastq", "fastq"))
+        template = os.path.join(self.tmpdir, "missing", "%s.fastq")
+        def key(record):
+            if record.id != records[0].id:
+                raise KeyError("Bad record")
+            return record.id
+        #The first record is written (which fails in the background),
+        #then the key function fails on the second
+        self.assertRaises(KeyError, SeqIO.demultiplex, records,
+                          key, template, "fastq", buffer_size=1, threads=2)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
@@ -1157,6 +1157,57 @@ class TestWriteRead(unittest.TestCase):
         write_read(os.path.join("EMBL", "U87107.embl"), "embl")
 
 
+class LazyFeatures(unittest.TestCase):
+    """Parsing GenBank, EMBL and IMGT files with lazy_features=True."""
+    def check(self, filename, format):
+        records = list(SeqIO.parse(filename, format))
+        lazy = list(SeqIO.parse(filename, format, lazy_features=True))
+        self.assertEqual(len(records), len(lazy))
+        for old, new in zip(records, lazy):
+            self.assertEqual(old.id, new.id)
+            self.assertEqual(str(old.seq), str(new.seq))
+            #Feature table not parsed yet
+            self.assertTrue(old.features == [] \
+                            or new._raw_features is not None)
+            self.assertTrue(compare_record(old, new))
+            self.assertTrue(new._raw_features is None)
+            try:
+                expected = old.format(format)
+            except ValueError:
+                #e.g. No alphabet so can't be written out
+                continue
+            self.assertEqual(expected, new.format(format))
+
+    def test_genbank(self):
+        """Lazy feature parsing of GenBank files"""
+        for filename in ["cor6_6.gb", "NC_005816.gb", "NC_000932.gb",
+                         "one_of.gb", "protein_refseq.gb", "arab1.gb"]:
+            self.check(os.path.join("GenBank", filename), "gb")
+
+    def test_embl(self):
+        """Lazy feature parsing of EMBL and IMGT files"""
+        for filename in ["AE017046.embl", "DD231055_edited.embl",
+                         "SC10H5.embl", "location_wrap.embl"]:
+            self.check(os.path.join("EMBL", filename), "embl")
+        self.check(os.path.join("EMBL", "A04195.imgt"), "imgt")
+
+    def test_set_features(self):
+        """Replacing the features before they are parsed"""
+        record = SeqIO.read(os.path.join("GenBank", "NC_005816.gb"), "gb")
+        lazy = iter(SeqIO.parse(os.path.join("GenBank", "NC_005816.gb"), "gb",
+                                lazy_features=True)).next()
+        self.assertEqual(len(lazy[1000:2000].features),
+                         len(record[1000:2000].features))
+        lazy.features = record.features[:2]
+        self.assertEqual(len(lazy.features), 2)
+
+    def test_bad_format(self):
+        """Lazy feature parsing of unsupported formats"""
+        self.assertRaises(ValueError, list,
+                          SeqIO.parse("Fasta/f002", "fasta",
+                                      lazy_features=True))
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)
@@ -13,6 +13,8 @@ except ImportError:
     sqlite3 = None
 
 import os
+import sys
+import gzip
 import unittest
 from StringIO import StringIO
 try:
@@ -34,17 +36,45 @@ def add_prefix(key):
     """Dummy key_function for testing index code."""
     return "id_" + key
 
+def gzip_open(filename, format):
+    #At time of writing, under Python 3.2.2 seems gzip.open(filename, mode)
+    #insists on giving byte strings (i.e. binary mode)
+    #See http://bugs.python.org/issue13989
+    if sys.version_info[0] < 3 or format in SeqIO._BinaryFormats:
+        return gzip.open(filename)
+    handle = gzip.open(filename)
+    data = handle.read() #bytes!
+    handle.close()
+    return StringIO(_bytes_to_string(data))
+
+def parse_ids(filename, format, alphabet):
+    """Record identifiers in the file, which may be BGZF compressed."""
+    if filename.endswith(".bgz"):
+        handle = gzip_open(filename, format)
+        id_list = [rec.id for rec in SeqIO.parse(handle, format, alphabet)]
+        handle.close()
+    else:
+        id_list = [rec.id for rec in SeqIO.parse(filename, format, alphabet)]
+    return id_list
+
 class IndexDictTests(unittest.TestCase):
     """Cunning unit test where methods are added at run time."""
     def simple_check(self, filename, format, alphabet):
         """Check indexing (without a key function)."""
-        id_list = [rec.id for rec in SeqIO.parse(filename, format, alphabet)]
+        id_list = parse_ids(filename, format, alphabet)
 
         rec_dict = SeqIO.index(filename, format, alphabet)
         self.check_dict_methods(rec_dict, id_list, id_list)
         rec_dict._proxy._handle.close() #TODO - Better solution
         del rec_dict
 
+        #With the keys and offsets held in sorted arrays,
+        rec_dict = SeqIO.index(filename, format, alphabet, compact=True)
+        self.check_dict_methods(rec_dict, id_list, id_list)
+        self.assertEqual(sorted(id_list), list(rec_dict))
+        rec_dict.close()
+        del rec_dict
+
         if not sqlite3:
             return
 
@@ -89,7 +119,7 @@ class IndexDictTests(unittest.TestCase):
     
     def key_check(self, filename, format, alphabet):
         """Check indexing with a key function."""
-        id_list = [rec.id for rec in SeqIO.parse(filename, format, alphabet)]
+        id_list = parse_ids(filename, format, alphabet)
 
         key_list = [add_prefix(id) for id in id_list]
         rec_dict = SeqIO.index(filename, format, alphabet, add_prefix)
@@ -140,6 +170,42 @@ class IndexDictTests(unittest.TestCase):
         os.remove(index_tmp)
         #Done
     
+    def sidecar_check(self, filename, format, alphabet):
+        """Check indexing with a sidecar index file."""
+        id_list = parse_ids(filename, format, alphabet)
+        sidecar = filename + ".sidecar"
+        if os.path.isfile(sidecar):
+            os.remove(sidecar)
+
+        #Create it,
+        rec_dict = SeqIO.index(filename, format, alphabet, sidecar=sidecar)
+        self.assertTrue(os.path.isfile(sidecar))
+        self.check_dict_methods(rec_dict, id_list, id_list)
+        self.assertEqual(sorted(id_list), list(rec_dict))
+        rec_dict.close()
+        del rec_dict
+
+        #Now reload it,
+        rec_dict = SeqIO.index(filename, format, alphabet, sidecar=sidecar)
+        self.check_dict_methods(rec_dict, id_list, id_list)
+        rec_dict.close()
+        del rec_dict
+
+        #And with a key function (which should trigger a rebuild),
+        key_list = [add_prefix(id) for id in id_list]
+        rec_dict = SeqIO.index(filename, format, alphabet, add_prefix,
+                               sidecar=sidecar)
+        self.check_dict_methods(rec_dict, key_list, id_list)
+        rec_dict.close()
+        del rec_dict
+
+        #And back to no key function (another rebuild)
+        rec_dict = SeqIO.index(filename, format, alphabet, sidecar=sidecar)
+        self.check_dict_methods(rec_dict, id_list, id_list)
+        rec_dict.close()
+        del rec_dict
+        os.remove(sidecar)
+
     def check_dict_methods(self, rec_dict, keys, ids):
         self.assertEqual(set(keys), set(rec_dict.keys()))
         #This is redundant, I just want to make sure len works:
@@ -189,12 +255,14 @@ class IndexDictTests(unittest.TestCase):
         self.assertRaises(NotImplementedError, rec_dict.fromkeys, [])
 
     def get_raw_check(self, filename, format, alphabet):
-        handle = open(filename, "rb")
+        if filename.endswith(".bgz"):
+            handle = gzip.open(filename, "rb")
+        else:
+            handle = open(filename, "rb")
         raw_file = handle.read()
         handle.close()
         #Also checking the key_function here
-        id_list = [rec.id.lower() for rec in \
-                   SeqIO.parse(filename, format, alphabet)]
+        id_list = [id.lower() for id in parse_ids(filename, format, alphabet)]
         rec_dict = SeqIO.index(filename, format, alphabet,
                                key_function = lambda x : x.lower())
         self.assertEqual(set(id_list), set(rec_dict.keys()))
@@ -245,15 +313,413 @@ class IndexDictTests(unittest.TestCase):
             else:
                 rec2 = SeqIO.read(handle, format, alphabet)
             self.assertEqual(True, compare_record(rec1, rec2))
+        self.get_many_check(rec_dict, id_list)
         rec_dict._proxy._handle.close() #TODO - Better solution
         del rec_dict
 
+        if not sqlite3:
+            return
+
+        #Now again with index_db, which uses the record lengths
+        rec_dict = SeqIO.index_db(":memory:", filename, format, alphabet,
+                                  key_function = lambda x : x.lower())
+        for key in id_list:
+            raw = rec_dict.get_raw(key)
+            self.assertTrue(raw.strip())
+            self.assertTrue(raw in raw_file)
+        self.get_many_check(rec_dict, id_list)
+        rec_dict.close()
+        del rec_dict
+
+    def get_many_check(self, rec_dict, keys):
+        """Compare get_many and get_raw_many against single lookups."""
+        keys = keys[::-1]
+        self.assertEqual([(key, rec_dict.get_raw(key)) for key in keys],
+                         list(rec_dict.get_raw_many(keys)))
+        self.assertEqual(sorted(keys),
+                         sorted(k for k, r in rec_dict.get_raw_many(keys, False)))
+        for key, record in rec_dict.get_many(keys + keys[:1]):
+            self.assertEqual(key, record.id.lower())
+        self.assertEqual(keys, [k for k, r in rec_dict.get_many(keys)])
+        self.assertEqual(sorted(keys),
+                         sorted(k for k, r in rec_dict.get_many(keys, False)))
+        self.assertRaises(KeyError, rec_dict.get_many, keys + [chr(0)])
+        #Repeated keys are returned as often as given, in either order
+        twice = keys + keys[:2]
+        for ordered in [True, False]:
+            self.assertEqual(sorted(twice), sorted(k for k, r \
+                             in rec_dict.get_many(twice, ordered)))
+            self.assertEqual(sorted(twice), sorted(k for k, r \
+                             in rec_dict.get_raw_many(twice, ordered)))
+
+    def subseq_check(self, rec_dict, records):
+        """Compare get_subseq against slicing the parsed sequences."""
+        for record in records:
+            seq = str(record.seq)
+            length = len(seq)
+            windows = [(0, None), (0, 1), (0, length), (length, None),
+                       (length - 1, length + 10), (length + 5, length + 10),
+                       (length // 3, 2 * length // 3), (5, 3)]
+            for step in [59, 60, 61, 69, 70, 71, 139, 140, 141]:
+                for start in range(0, length, step):
+                    windows.append((start, start + step))
+                    windows.append((start + 1, start + 2 * step - 1))
+            for start, end in windows:
+                if start < 0:
+                    continue
+                self.assertEqual(seq[start:end],
+                                 str(rec_dict.get_subseq(record.id, start, end)))
+            self.assertEqual(str(record.seq[5:100].reverse_complement()),
+                             str(rec_dict.get_subseq(record.id, 5, 100, -1)))
+        self.assertRaises(KeyError, rec_dict.get_subseq, chr(0), 0, 10)
+        self.assertRaises(ValueError, rec_dict.get_subseq,
+                          records[0].id, -5, 10)
+        self.assertRaises(ValueError, rec_dict.get_subseq,
+                          records[0].id, 0, 10, 0)
+
+    def test_get_subseq(self):
+        """Fetch sub-sequences from indexed FASTA files"""
+        for filename in ["GenBank/NC_005816.fna", "GenBank/NC_005816.ffn",
+                         "GenBank/NC_000932.faa", "GenBank/NC_000932.faa.bgz",
+                         "Fasta/f002", "Fasta/fa01", "Fasta/f001"]:
+            if filename.endswith(".bgz"):
+                handle = gzip_open(filename, "fasta")
+                records = list(SeqIO.parse(handle, "fasta"))
+                handle.close()
+            else:
+                records = list(SeqIO.parse(filename, "fasta"))
+            rec_dict = SeqIO.index(filename, "fasta")
+            self.subseq_check(rec_dict, records)
+            rec_dict.close()
+            #Also when reusing a saved index,
+            sidecar = filename + ".sidecar"
+            rec_dict = SeqIO.index(filename, "fasta", sidecar=sidecar)
+            rec_dict.close()
+            rec_dict = SeqIO.index(filename, "fasta", sidecar=sidecar)
+            self.subseq_check(rec_dict, records)
+            rec_dict.close()
+            os.remove(sidecar)
+            if sqlite3:
+                rec_dict = SeqIO.index_db(":memory:", [filename], "fasta")
+                self.subseq_check(rec_dict, records)
+                rec_dict.close()
+
+    def test_get_subseq_irregular(self):
+        """Fetch sub-sequences from FASTA records with irregular lines"""
+        filename = "Fasta/f001.irregular.fasta"
+        handle = open(filename, "w")
+        handle.write(">short\nAC\n>ragged\nACGTA\nCG\nTACGT\nA\n"
+                     ">long_last\nACG\nTACGT\n>blank\n\nACGT\n\n"
+                     ">empty\n>crlf\r\nACGTA\r\nCGTAC\r\nGT\r\n")
+        handle.close()
+        records = list(SeqIO.parse(filename, "fasta"))
+        rec_dict = SeqIO.index(filename, "fasta")
+        self.subseq_check(rec_dict, records)
+        rec_dict.close()
+        os.remove(filename)
+
+    def test_get_subseq_unsupported(self):
+        """Fetching sub-sequences is not supported for all formats"""
+        rec_dict = SeqIO.index("Quality/example.fastq", "fastq")
+        self.assertRaises(NotImplementedError, rec_dict.get_subseq,
+                          "EAS54_6_R1_2_1_540_792", 0, 10)
+        rec_dict.close()
+
+    def cache_check(self, rec_dict):
+        """Check the LRU record cache, expects max_cache=3."""
+        keys = list(rec_dict)
+        self.assertEqual((0, 0, 0, 0), rec_dict.cache_info())
+        first = rec_dict[keys[0]]
+        self.assertTrue(first is rec_dict[keys[0]])
+        self.assertEqual((1, 1, 1, len(first)), rec_dict.cache_info())
+        rec_dict[keys[1]]
+        rec_dict[keys[2]]
+        #Use the first record again, so the second is the oldest
+        self.assertTrue(first is rec_dict[keys[0]])
+        rec_dict[keys[3]]
+        self.assertEqual((2, 4, 3), rec_dict.cache_info()[:3])
+        self.assertTrue(first is rec_dict[keys[0]])
+        rec_dict[keys[2]]
+        self.assertEqual((4, 4, 3), rec_dict.cache_info()[:3])
+        rec_dict[keys[1]]
+        self.assertEqual((4, 5, 3), rec_dict.cache_info()[:3])
+        self.assertEqual(sum(len(rec_dict[k]) for k in keys[0:3:2] + keys[1:2]),
+                         rec_dict.cache_info()[3])
+        self.assertRaises(KeyError, rec_dict.__getitem__, chr(0))
+
+    def test_record_cache(self):
+        """LRU cache of records from Bio.SeqIO.index()"""
+        rec_dict = SeqIO.index("GenBank/NC_000932.faa", "fasta", max_cache=3)
+        self.cache_check(rec_dict)
+        rec_dict.close()
+        rec_dict = SeqIO.index("GenBank/NC_000932.faa", "fasta")
+        self.assertEqual(None, rec_dict.cache_info())
+        self.assertFalse(rec_dict[list(rec_dict)[0]] \
+                         is rec_dict[list(rec_dict)[0]])
+        rec_dict.close()
+        self.assertRaises(ValueError, SeqIO.index, "GenBank/NC_000932.faa",
+                          "fasta", max_cache=0)
+
+    if sqlite3:
+        def test_record_cache_index_db(self):
+            """LRU cache of records from Bio.SeqIO.index_db()"""
+            rec_dict = SeqIO.index_db(":memory:", ["GenBank/NC_000932.faa"],
+                                      "fasta", max_cache=3)
+            self.cache_check(rec_dict)
+            rec_dict.close()
+
+    def test_record_cache_length(self):
+        """LRU cache of records limited by sequence length"""
+        records = SeqIO.parse("GenBank/NC_000932.faa", "fasta")
+        lengths = dict((rec.id, len(rec)) for rec in records)
+        rec_dict = SeqIO.index("GenBank/NC_000932.faa", "fasta",
+                               max_cache_length=1000)
+        for key in rec_dict:
+            rec_dict[key]
+            hits, misses, count, length = rec_dict.cache_info()
+            self.assertTrue(length <= 1000)
+            if lengths[key] <= 1000:
+                self.assertTrue(rec_dict[key] is rec_dict[key])
+            else:
+                #Too big to cache
+                self.assertFalse(rec_dict[key] is rec_dict[key])
+        rec_dict.close()
+
+    def threads_check(self, rec_dict, expected):
+        """Fetch records from several threads at once."""
+        import threading
+        errors = []
+        def worker():
+            try:
+                for i in range(20):
+                    for key, seq in expected:
+                        self.assertEqual(seq, str(rec_dict[key].seq))
+                        self.assertTrue(rec_dict.get_raw(key))
+            except Exception, err:
+                errors.append(err)
+        threads = [threading.Thread(target=worker) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+
+    def fork_check(self, rec_dict, expected):
+        """Fetch records in the parent and a forked child process."""
+        if not hasattr(os, "fork"):
+            return
+        key, seq = expected[0]
+        self.assertEqual(seq, str(rec_dict[key].seq))
+        pid = os.fork()
+        if pid == 0:
+            #Child process, must not return to the test framework
+            status = 1
+            try:
+                for key, seq in expected:
+                    if seq != str(rec_dict[key].seq):
+                        break
+                else:
+                    status = 0
+            finally:
+                os._exit(status)
+        for key, seq in expected[::-1]:
+            self.assertEqual(seq, str(rec_dict[key].seq))
+        self.assertEqual(0, os.waitpid(pid, 0)[1])
+
+    def test_threadsafe(self):
+        """Thread and fork safe Bio.SeqIO.index() and index_db()"""
+        filename = "GenBank/NC_000932.faa"
+        expected = [(r.id, str(r.seq)) for r in SeqIO.parse(filename, "fasta")]
+        rec_dict = SeqIO.index(filename, "fasta", threadsafe=True,
+                               max_cache=5)
+        self.threads_check(rec_dict, expected)
+        self.fork_check(rec_dict, expected)
+        rec_dict.close()
+        if not sqlite3:
+            return
+        self.assertRaises(ValueError, SeqIO.index_db, ":memory:", filename,
+                          "fasta", threadsafe=True)
+        index_tmp = "GenBank/NC_000932.faa.threads.idx"
+        if os.path.isfile(index_tmp):
+            os.remove(index_tmp)
+        try:
+            rec_dict = SeqIO.index_db(index_tmp, filename, "fasta",
+                                      threadsafe=True)
+            self.threads_check(rec_dict, expected)
+            self.fork_check(rec_dict, expected)
+            rec_dict.close()
+        finally:
+            os.remove(index_tmp)
+
+    def lazy_check(self, rec_dict, filename, format):
+        for record in SeqIO.parse(filename, format):
+            lazy = rec_dict[record.id]
+            self.assertEqual(str(record.seq), str(lazy.seq))
+            self.assertEqual(len(record.features), len(lazy.features))
+            for old, new in zip(record.features, lazy.features):
+                self.assertEqual(old.type, new.type)
+                self.assertEqual(str(old.location), str(new.location))
+                self.assertEqual(old.qualifiers, new.qualifiers)
+
+    def test_lazy_features(self):
+        """Lazy feature parsing with Bio.SeqIO.index()"""
+        for filename, format in [("GenBank/cor6_6.gb", "gb"),
+                                 ("GenBank/NC_000932.gb.bgz", "gb"),
+                                 ("EMBL/epo_prt_selection.embl", "embl")]:
+            rec_dict = SeqIO.index(filename, format, lazy_features=True)
+            if filename.endswith(".bgz"):
+                self.lazy_check(rec_dict, filename[:-4], format)
+            else:
+                self.lazy_check(rec_dict, filename, format)
+            rec_dict.close()
+            if sqlite3:
+                rec_dict = SeqIO.index_db(":memory:", [filename], format,
+                                          lazy_features=True)
+                if filename.endswith(".bgz"):
+                    self.lazy_check(rec_dict, filename[:-4], format)
+                else:
+                    self.lazy_check(rec_dict, filename, format)
+                rec_dict.close()
+        self.assertRaises(ValueError, SeqIO.index, "GenBank/NC_000932.faa",
+                          "fasta", lazy_features=True)
+        if sqlite3:
+            self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
+                              ["GenBank/NC_000932.faa"], "fasta",
+                              lazy_features=True)
+
+    def test_gzip_not_bgzf(self):
+        """Plain gzip files can't be indexed (BGZF is required)"""
+        self.assertRaises(ValueError, SeqIO.index,
+                          "Quality/example.fastq.gz", "fastq")
+        if sqlite3:
+            self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
+                              ["Quality/example.fastq.gz"], "fastq")
+
     if sqlite3:
         def test_duplicates_index_db(self):
             """Index file with duplicate identifers with Bio.SeqIO.index_db()"""
             self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
                               ["Fasta/dups.fasta"], "fasta")
 
+    if sqlite3:
+        def test_parallel_index_db(self):
+            """Build Bio.SeqIO.index_db() with files scanned in parallel"""
+            files = ["GenBank/NC_000932.faa", "GenBank/NC_005816.faa"]
+            reports = []
+            def progress(done, total, count, rate):
+                reports.append((done, total, count))
+                self.assertTrue(rate >= 0)
+            serial = SeqIO.index_db(":memory:", files, "fasta",
+                                    generic_protein, add_prefix)
+            parallel = SeqIO.index_db(":memory:", files, "fasta",
+                                      generic_protein, add_prefix,
+                                      processes=2, progress=progress)
+            self.assertEqual(reports, [(1, 2, 85), (2, 2, 95)])
+            self.assertEqual(len(serial), len(parallel))
+            self.assertEqual(set(serial.keys()), set(parallel.keys()))
+            for key in serial:
+                self.assertEqual(serial.get_raw(key), parallel.get_raw(key))
+                self.assertEqual(serial[key].id, parallel[key].id)
+            serial.close()
+            parallel.close()
+
+        def test_parallel_duplicates_index_db(self):
+            """Parallel Bio.SeqIO.index_db() with duplicate identifers"""
+            self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
+                              ["Fasta/dups.fasta", "Fasta/f001"], "fasta",
+                              processes=2)
+            self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
+                              ["Fasta/f001", "Fasta/f001"], "fasta",
+                              processes=2)
+
+        def test_bad_processes_index_db(self):
+            """Bio.SeqIO.index_db() with an invalid number of processes"""
+            self.assertRaises(ValueError, SeqIO.index_db, ":memory:",
+                              ["Fasta/f001"], "fasta", processes=0)
+
+    def test_sidecar_stale(self):
+        """Rebuild a sidecar index when the sequence file changes"""
+        filename = "Fasta/f001.sidecar.fasta"
+        sidecar = filename + ".sidecar"
+        handle = open(filename, "w")
+        handle.write(">alpha\nACGT\n>beta\nGGGG\n")
+        handle.close()
+        rec_dict = SeqIO.index(filename, "fasta", sidecar=sidecar)
+        self.assertEqual(["alpha", "beta"], list(rec_dict))
+        rec_dict.close()
+        #Change the file (and its size) so the sidecar is out of date,
+        handle = open(filename, "a")
+        handle.write(">gamma\nTTTT\n")
+        handle.close()
+        rec_dict = SeqIO.index(filename, "fasta", sidecar=sidecar)
+        self.assertEqual(["alpha", "beta", "gamma"], list(rec_dict))
+        self.assertEqual("TTTT", str(rec_dict["gamma"].seq))
+        rec_dict.close()
+        #Using a different format should also trigger a rebuild
+        rec_dict = SeqIO.index(filename, "pir", sidecar=sidecar)
+        self.assertEqual(0, len(rec_dict))
+        rec_dict.close()
+        os.remove(sidecar)
+        os.remove(filename)
+
+    def test_sidecar_key_function(self):
+        """Rebuild a sidecar index when the key function changes"""
+        filename = "Quality/example.fastq"
+        sidecar = filename + ".sidecar"
+        rec_dict = SeqIO.index(filename, "fastq", sidecar=sidecar)
+        self.assertTrue("EAS54_6_R1_2_1_540_792" in rec_dict)
+        rec_dict.close()
+        rec_dict = SeqIO.index(filename, "fastq", sidecar=sidecar,
+                               key_function=lambda k: k.lower())
+        self.assertTrue("eas54_6_r1_2_1_540_792" in rec_dict)
+        self.assertFalse("EAS54_6_R1_2_1_540_792" in rec_dict)
+        rec_dict.close()
+        os.remove(sidecar)
+
+    def test_sidecar_invalid(self):
+        """Refuse to use or replace a file which is not a sidecar index"""
+        sidecar = "Quality/example.fastq.sidecar"
+        handle = open(sidecar, "w")
+        handle.write("This is not a sidecar index file, really.\n")
+        handle.close()
+        self.assertRaises(ValueError, SeqIO.index, "Quality/example.fastq",
+                          "fastq", sidecar=sidecar)
+        os.remove(sidecar)
+
+    def test_sidecar_non_string_keys(self):
+        """Sidecar index files require string keys"""
+        sidecar = "Quality/example.fastq.sidecar"
+        self.assertRaises(TypeError, SeqIO.index, "Quality/example.fastq",
+                          "fastq", key_function=lambda x : tuple(x.split("_")),
+                          sidecar=sidecar)
+        self.assertFalse(os.path.isfile(sidecar))
+
+    def test_compact_merge(self):
+        """Compact index built from several sorted runs"""
+        from Bio.SeqIO import _index
+        id_list = parse_ids("Fasta/f002", "fasta", None)
+        old_size = _index._sort_batch_size
+        try:
+            _index._sort_batch_size = 2
+            rec_dict = SeqIO.index("Fasta/f002", "fasta", compact=True)
+            self.assertEqual(sorted(id_list), list(rec_dict))
+            for id in id_list:
+                self.assertEqual(id, rec_dict[id].id)
+            self.assertFalse("missing" in rec_dict)
+            self.assertFalse(None in rec_dict)
+            self.assertRaises(KeyError, rec_dict.__getitem__, "missing")
+            rec_dict.close()
+            self.assertRaises(ValueError, SeqIO.index, "Fasta/dups.fasta",
+                              "fasta", compact=True)
+        finally:
+            _index._sort_batch_size = old_size
+
+    def test_compact_non_string_keys(self):
+        """Compact index requires string keys"""
+        self.assertRaises(TypeError, SeqIO.index, "Quality/example.fastq",
+                          "fastq", key_function=lambda x : tuple(x.split("_")),
+                          compact=True)
+
     def test_duplicates_index(self):
         """Index file with duplicate identifers with Bio.SeqIO.index()"""
         self.assertRaises(ValueError, SeqIO.index, "Fasta/dups.fasta", "fasta")
@@ -271,6 +737,7 @@ tests = [
     ("Ace/seq.cap.ace", "ace", generic_dna),
     ("Quality/wrapping_original_sanger.fastq", "fastq", None),
     ("Quality/example.fastq", "fastq", None),
+    ("Quality/example.fastq.bgz", "fastq", None),
     ("Quality/example.fastq", "fastq-sanger", generic_dna),
     ("Quality/tricky.fastq", "fastq", generic_nucleotide),
     ("Quality/sanger_faked.fastq", "fastq-sanger", generic_dna),
@@ -282,12 +749,15 @@ tests = [
     ("EMBL/A04195.imgt", "embl", None), #Not a proper EMBL file, an IMGT file
     ("EMBL/A04195.imgt", "imgt", None),
     ("GenBank/NC_000932.faa", "fasta", generic_protein),
+    ("GenBank/NC_000932.faa.bgz", "fasta", generic_protein),
     ("GenBank/NC_005816.faa", "fasta", generic_protein),
     ("GenBank/NC_005816.tsv", "tab", generic_protein),
+    ("GenBank/NC_005816.tsv.bgz", "tab", generic_protein),
     ("GenBank/NC_005816.ffn", "fasta", generic_dna),
     ("GenBank/NC_005816.fna", "fasta", generic_dna),
     ("GenBank/NC_005816.gb", "gb", None),
     ("GenBank/cor6_6.gb", "genbank", None),
+    ("GenBank/NC_000932.gb.bgz", "gb", None),
     ("IntelliGenetics/vpu_nucaligned.txt", "ig", generic_nucleotide),
     ("IntelliGenetics/TAT_mase_nuc.txt", "ig", None),
     ("IntelliGenetics/VIF_mase-pro.txt", "ig", generic_protein),
@@ -302,7 +772,9 @@ tests = [
     ("SwissProt/sp010", "swiss", None),
     ("SwissProt/sp016", "swiss", None),
     ("SwissProt/multi_ex.txt", "swiss", None),
+    ("SwissProt/multi_ex.txt.bgz", "swiss", None),
     ("SwissProt/multi_ex.xml", "uniprot-xml", None),
+    ("SwissProt/multi_ex.xml.bgz", "uniprot-xml", None),
     ("SwissProt/multi_ex.fasta", "fasta", None),
     ("Roche/E3MFGYR02_random_10_reads.sff", "sff", generic_dna),
     ("Roche/E3MFGYR02_random_10_reads.sff", "sff-trim", generic_dna),
@@ -338,6 +810,15 @@ for filename, format, alphabet in tests:
             funct(filename, format, alphabet))
     del funct
 
+    def funct(fn,fmt,alpha):
+        f = lambda x : x.sidecar_check(fn, fmt, alpha)
+        f.__doc__ = "Index %s file %s with sidecar index" % (fmt, fn)
+        return f
+    setattr(IndexDictTests, "test_%s_%s_sidecar" \
+            % (filename.replace("/","_").replace(".","_"), format),
+            funct(filename, format, alphabet))
+    del funct
+
     def funct(fn,fmt,alpha):
         f = lambda x : x.get_raw_check(fn, fmt, alpha)
         f.__doc__ = "Index %s file %s get_raw" % (fmt, fn)
@@ -0,0 +1,94 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for parallel parsing with Bio.SeqIO.parse(...)."""
+
+import os
+import random
+import unittest
+
+try:
+    import multiprocessing
+except ImportError:
+    from Bio import MissingPythonDependencyError
+    raise MissingPythonDependencyError("Parallel parsing requires "
+                                       "multiprocessing (Python 2.6+)")
+
+from Bio import SeqIO
+from Bio.Alphabet import generic_dna, generic_protein
+
+
+class ParallelParseTests(unittest.TestCase):
+    def check_parallel(self, filename, format, alphabet=None):
+        serial = list(SeqIO.parse(filename, format, alphabet))
+        for processes in [1, 2, 3]:
+            records = list(SeqIO.parse(filename, format, alphabet,
+                                       processes=processes))
+            self.assertEqual(len(serial), len(records))
+            for old, new in zip(serial, records):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(old.description, new.description)
+                self.assertEqual(str(old.seq), str(new.seq))
+                self.assertEqual(repr(old.seq.alphabet),
+                                 repr(new.seq.alphabet))
+                self.assertEqual(old.letter_annotations,
+                                 new.letter_annotations)
+        records = list(SeqIO.parse(filename, format, alphabet,
+                                   processes=2, ordered=False))
+        self.assertEqual(sorted(r.id for r in serial),
+                         sorted(r.id for r in records))
+
+    def test_fasta(self):
+        """Parallel parsing of FASTA files"""
+        self.check_parallel("GenBank/NC_005816.ffn", "fasta", generic_dna)
+        self.check_parallel("GenBank/NC_000932.faa", "fasta", generic_protein)
+        self.check_parallel("Fasta/f002", "fasta")
+        self.check_parallel("Fasta/f001", "fasta")
+
+    def test_fastq(self):
+        """Parallel parsing of FASTQ files"""
+        self.check_parallel("Quality/example.fastq", "fastq")
+        self.check_parallel("Quality/tricky.fastq", "fastq")
+        self.check_parallel("Quality/longreads_as_sanger.fastq", "fastq")
+        self.check_parallel("Quality/solexa_example.fastq", "fastq-solexa")
+        self.check_parallel("Quality/illumina_full_range_as_illumina.fastq",
+                            "fastq-illumina")
+
+    def test_tab(self):
+        """Parallel parsing of tab files"""
+        self.check_parallel("GenBank/NC_005816.tsv", "tab", generic_protein)
+
+    def test_fastq_tricky_qualities(self):
+        """Parallel parsing of FASTQ with quality lines starting @ or +"""
+        filename = "Quality/temp_parallel.fastq"
+        handle = open(filename, "w")
+        rnd = random.Random(42)
+        for i in range(500):
+            length = rnd.randint(1, 40)
+            seq = "".join(rnd.choice("ACGT") for j in range(length))
+            qual = "".join(rnd.choice("@+@+I") for j in range(length))
+            handle.write("@read%i\n%s\n+\n%s\n" % (i, seq, qual))
+        handle.close()
+        try:
+            self.check_parallel(filename, "fastq")
+        finally:
+            os.remove(filename)
+
+    def test_errors(self):
+        """Parallel parsing error conditions"""
+        handle = open("Fasta/f002")
+        self.assertRaises(TypeError, list,
+                          SeqIO.parse(handle, "fasta", processes=2))
+        handle.close()
+        self.assertRaises(ValueError, list,
+                          SeqIO.parse("GenBank/NC_005816.gb", "gb",
+                                      processes=2))
+        self.assertRaises(ValueError, list,
+                          SeqIO.parse("Fasta/f002", "fasta", processes=0))
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
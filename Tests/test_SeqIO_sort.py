@@ -0,0 +1,97 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for external memory sorting with Bio.SeqIO.sort(...)."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Bio import SeqIO
+from Bio.SeqIO import _sort
+
+
+class SortTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def check_sort(self, filename, format, key=None, unique=False):
+        records = list(SeqIO.parse(filename, format))
+        if key is None:
+            get_key = lambda r : r.id
+        else:
+            get_key = key
+        #Python's sort is stable, as is ours
+        expected = sorted(records, key=get_key)
+        if unique:
+            wanted = []
+            for record in expected:
+                if not wanted or get_key(wanted[-1]) != get_key(record):
+                    wanted.append(record)
+            expected = wanted
+        for max_records in [1, 2, 3, 100000]:
+            handle = StringIO()
+            count = SeqIO.sort(filename, format, handle, key=key,
+                               unique=unique, max_records=max_records,
+                               tmpdir=self.tmpdir)
+            self.assertEqual(len(expected), count)
+            handle.seek(0)
+            sorted_records = list(SeqIO.parse(handle, format))
+            self.assertEqual(len(expected), len(sorted_records))
+            for old, new in zip(expected, sorted_records):
+                self.assertEqual(old.id, new.id)
+                self.assertEqual(old.description, new.description)
+                self.assertEqual(str(old.seq), str(new.seq))
+                self.assertEqual(old.letter_annotations,
+                                 new.letter_annotations)
+            #Temporary files should have been removed
+            self.assertEqual([], os.listdir(self.tmpdir))
+
+    def test_fasta_id(self):
+        """Sort FASTA file by id"""
+        self.check_sort("Fasta/dups.fasta", "fasta")
+        self.check_sort("GenBank/NC_000932.faa", "fasta")
+
+    def test_fasta_unique(self):
+        """Sort FASTA file by id removing duplicates"""
+        self.check_sort("Fasta/dups.fasta", "fasta", unique=True)
+
+    def test_fastq_sequence(self):
+        """Sort FASTQ file by sequence"""
+        key = lambda r : str(r.seq)
+        self.check_sort("Quality/example.fastq", "fastq", key)
+        self.check_sort("Quality/tricky.fastq", "fastq", key)
+        self.check_sort("Quality/tricky.fastq", "fastq", key, unique=True)
+
+    def test_many_runs(self):
+        """Sort with more runs than can be merged at once"""
+        old_max = _sort._max_merge
+        try:
+            _sort._max_merge = 3
+            self.check_sort("GenBank/NC_000932.faa", "fasta",
+                            lambda r : len(r), unique=True)
+        finally:
+            _sort._max_merge = old_max
+
+    def test_empty(self):
+        """Sort an empty file"""
+        handle = StringIO()
+        self.assertEqual(0, SeqIO.sort(StringIO(""), "fasta", handle))
+        self.assertEqual("", handle.getvalue())
+
+    def test_bad_max_records(self):
+        """Sort with invalid max_records"""
+        self.assertRaises(ValueError, SeqIO.sort, "Fasta/dups.fasta",
+                          "fasta", StringIO(), max_records=0)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
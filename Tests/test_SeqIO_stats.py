@@ -0,0 +1,126 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for sequence file statistics with Bio.SeqIO.stats(...)."""
+
+import unittest
+from StringIO import StringIO
+
+from Bio import SeqIO
+from Bio.SeqIO import QualityIO
+from Bio.SeqUtils import GC
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+
+class StatsTests(unittest.TestCase):
+    def check_stats(self, filename, format):
+        records = list(SeqIO.parse(filename, format))
+        lengths = {}
+        qualities = {}
+        for record in records:
+            lengths[len(record)] = lengths.get(len(record), 0) + 1
+            if format != "fasta":
+                #Solexa scores are mapped to the nearest integer PHRED score
+                for q in QualityIO._get_phred_quality(record):
+                    q = int(round(q))
+                    qualities[q] = qualities.get(q, 0) + 1
+        all_seq = "".join([str(r.seq) for r in records])
+        if multiprocessing is None:
+            options = [None]
+        else:
+            options = [None, 1, 3]
+        for processes in options:
+            stats = SeqIO.stats(filename, format, processes=processes)
+            self.assertEqual(len(records), stats.count)
+            self.assertEqual(len(all_seq), stats.total_length)
+            self.assertEqual(lengths, stats.lengths)
+            self.assertEqual(qualities, stats.qualities)
+            self.assertAlmostEqual(GC(all_seq), stats.gc)
+            if records:
+                self.assertEqual(min(lengths), stats.min_length)
+                self.assertEqual(max(lengths), stats.max_length)
+                #Simple N50 calculation for comparison
+                running = 0
+                for length in sorted([len(r) for r in records], reverse=True):
+                    running += length
+                    if running * 2 >= len(all_seq):
+                        break
+                self.assertEqual(length, stats.n50)
+
+    def test_fasta(self):
+        """Statistics for FASTA files"""
+        self.check_stats("Fasta/dups.fasta", "fasta")
+        self.check_stats("GenBank/NC_000932.faa", "fasta")
+        self.check_stats("GenBank/NC_005816.ffn", "fasta")
+
+    def test_fastq(self):
+        """Statistics for FASTQ files"""
+        self.check_stats("Quality/example.fastq", "fastq")
+        self.check_stats("Quality/tricky.fastq", "fastq")
+        self.check_stats("Quality/sanger_faked.fastq", "fastq-sanger")
+        self.check_stats("Quality/solexa_faked.fastq", "fastq-solexa")
+        self.check_stats("Quality/illumina_faked.fastq", "fastq-illumina")
+
+    def test_sff(self):
+        """Statistics for SFF files"""
+        for filename in ["Roche/E3MFGYR02_random_10_reads.sff",
+                         "Roche/E3MFGYR02_index_at_start.sff",
+                         "Roche/E3MFGYR02_index_in_middle.sff",
+                         "Roche/greek.sff",
+                         "Roche/paired.sff"]:
+            self.check_stats(filename, "sff")
+            self.check_stats(filename, "sff-trim")
+
+    def test_handle(self):
+        """Statistics from a handle"""
+        stats = SeqIO.stats(open("Quality/example.fastq"), "fastq")
+        self.assertEqual(3, stats.count)
+        stats = SeqIO.stats(StringIO(""), "fasta")
+        self.assertEqual(0, stats.count)
+        self.assertEqual(0, stats.total_length)
+        self.assertEqual(None, stats.n50)
+        self.assertEqual(None, stats.min_length)
+        self.assertEqual(0.0, stats.gc)
+
+    def test_merge(self):
+        """Merging and binning statistics"""
+        stats = SeqIO.stats("GenBank/NC_000932.faa", "fasta")
+        other = SeqIO.stats("Fasta/dups.fasta", "fasta")
+        count = stats.count + other.count
+        total = stats.total_length + other.total_length
+        stats.merge(other)
+        self.assertEqual(count, stats.count)
+        self.assertEqual(total, stats.total_length)
+        bins = stats.length_histogram(100)
+        self.assertEqual(count, sum(bins.values()))
+        for start in bins:
+            self.assertEqual(0, start % 100)
+            self.assertEqual(sum([n for length, n in stats.lengths.items() \
+                                  if start <= length < start + 100]),
+                             bins[start])
+        self.assertEqual(stats.lengths, stats.length_histogram())
+        self.assertRaises(ValueError, stats.length_histogram, 0)
+
+    def test_errors(self):
+        """Statistics error conditions"""
+        self.assertRaises(ValueError, SeqIO.stats, "GenBank/NC_005816.gb",
+                          "genbank")
+        self.assertRaises(ValueError, SeqIO.stats,
+                          "Quality/error_qual_null.fastq", "fastq")
+        self.assertRaises(TypeError, SeqIO.stats,
+                          open("Quality/example.fastq"), "fastq", processes=2)
+        self.assertRaises(ValueError, SeqIO.stats, "Quality/example.fastq",
+                          "fastq", processes=0)
+        self.assertRaises(ValueError, SeqIO.stats, "Roche/greek.sff",
+                          "sff", processes=0)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,160 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for k-mer counting in Bio.SeqUtils.Kmer."""
+
+import array
+import pickle
+import random
+import unittest
+from StringIO import StringIO
+
+from Bio import SeqIO
+from Bio.Seq import Seq, reverse_complement
+from Bio.SeqRecord import SeqRecord
+from Bio.SeqUtils import Kmer
+from Bio.SeqUtils.Kmer import KmerCounter, count_kmers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+
+def simple_counts(sequences, k, canonical):
+    """Count k-mers as substrings in a dictionary, for comparison."""
+    counts = {}
+    for seq in sequences:
+        seq = str(seq).upper().replace("U", "T")
+        for i in range(len(seq) - k + 1):
+            kmer = seq[i:i + k]
+            if kmer.strip("ACGT"):
+                continue
+            if canonical:
+                kmer = min(kmer, reverse_complement(kmer))
+            counts[kmer] = counts.get(kmer, 0) + 1
+    return counts
+
+
+class KmerTests(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(42)
+        self.sequences = ["".join([rand.choice("ACGTACGTACGTacgtNU") \
+                                   for j in range(rand.randint(0, 300))]) \
+                          for i in range(30)]
+
+    def check(self, counter, expected):
+        self.assertEqual(sorted(expected.items()), list(counter.items()))
+        self.assertEqual(len(expected), len(counter))
+        self.assertEqual(sum(expected.values()), counter.total)
+        for kmer, count in expected.items()[:20]:
+            self.assertEqual(count, counter[kmer])
+            if counter.canonical:
+                self.assertEqual(count, counter[reverse_complement(kmer)])
+
+    def check_all(self, use_numpy):
+        for k in [1, 2, 5, 10, 11, 21, 31]:
+            for canonical in [False, True]:
+                expected = simple_counts(self.sequences, k, canonical)
+                counter = KmerCounter(k, canonical, use_numpy)
+                for seq in self.sequences:
+                    counter.add(seq)
+                self.check(counter, expected)
+                counter = KmerCounter(k, canonical, use_numpy)
+                counter.add_records(SeqRecord(Seq(seq)) \
+                                    for seq in self.sequences)
+                self.check(counter, expected)
+
+    def test_counts(self):
+        """Count k-mers for various k"""
+        self.check_all(False)
+
+    def test_numpy(self):
+        """Count k-mers using NumPy"""
+        if numpy is None:
+            #Skip this test
+            return
+        self.check_all(True)
+
+    def test_encoding(self):
+        """Encoding and decoding k-mers"""
+        counter = KmerCounter(31)
+        self.assertEqual(0, counter.encode("A" * 31))
+        self.assertEqual(4 ** 31 - 1, counter.encode("T" * 31))
+        for kmer in ["ACGT" * 7 + "ACG", "ttgca" * 6 + "g"]:
+            self.assertEqual(kmer.upper(), counter.decode(counter.encode(kmer)))
+        self.assertRaises(ValueError, counter.encode, "ACGT")
+        self.assertRaises(ValueError, counter.encode, "N" * 31)
+        self.assertRaises(ValueError, counter.__getitem__, "0" * 31)
+
+    def test_merge(self):
+        """Merging and pickling k-mer counts"""
+        for k in [3, 15]:
+            expected = simple_counts(self.sequences, k, True)
+            counter = KmerCounter(k, True)
+            counter.add_records(self.sequences[:10])
+            other = KmerCounter(k, True)
+            other.add_records(self.sequences[10:])
+            counter.merge(pickle.loads(pickle.dumps(other)))
+            self.check(counter, expected)
+            self.assertRaises(ValueError, counter.merge, KmerCounter(k))
+            self.assertRaises(ValueError, counter.merge,
+                              KmerCounter(k + 1, True))
+        #Dense counts pickled on a machine with the other byte order
+        counter = KmerCounter(3)
+        counter.add("ACGTACGTTT")
+        state = counter.__getstate__()
+        itemsize, byteorder, data = state["_counts"]
+        swapped = array.array("L", data)
+        swapped.byteswap()
+        if byteorder == "little":
+            byteorder = "big"
+        else:
+            byteorder = "little"
+        state["_counts"] = (itemsize, byteorder, swapped.tostring())
+        other = KmerCounter.__new__(KmerCounter)
+        other.__setstate__(state)
+        self.assertEqual(list(counter.items()), list(other.items()))
+        counter = KmerCounter(2)
+        counter.add("AAAACCCGGT")
+        self.assertEqual([("AA", 3), ("CC", 2), ("AC", 1)],
+                         counter.most_common(3))
+        self.assertEqual(6, len(counter.most_common()))
+
+    def test_files(self):
+        """Count k-mers in sequence files"""
+        for filename, format in [("Quality/example.fastq", "fastq"),
+                                 ("Quality/tricky.fastq", "fastq"),
+                                 ("GenBank/NC_005816.fna", "fasta"),
+                                 ("GenBank/NC_005816.gb", "genbank")]:
+            sequences = [r.seq for r in SeqIO.parse(filename, format)]
+            expected = simple_counts(sequences, 7, True)
+            self.check(count_kmers(filename, format, 7, True), expected)
+            handle = open(filename)
+            self.check(count_kmers(handle, format, 7, True), expected)
+            handle.close()
+            if multiprocessing is not None and format != "genbank":
+                for processes in [1, 3]:
+                    self.check(count_kmers(filename, format, 7, True,
+                                           processes=processes), expected)
+
+    def test_errors(self):
+        """K-mer counting with bad arguments"""
+        self.assertRaises(ValueError, KmerCounter, 0)
+        self.assertRaises(ValueError, KmerCounter, 32)
+        self.assertRaises(TypeError, count_kmers,
+                          StringIO(">x\nACGT\n"), "fasta", 3, processes=2)
+        self.assertRaises(ValueError, count_kmers,
+                          "GenBank/NC_005816.gb", "genbank", 3, processes=2)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
@@ -0,0 +1,170 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Unit tests for the ORF finder in Bio.SeqUtils.ORF."""
+
+import os
+import random
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from Bio import SeqIO
+from Bio.Seq import Seq, MutableSeq, reverse_complement, translate
+from Bio.Alphabet import generic_dna
+from Bio.Data.CodonTable import ambiguous_generic_by_id
+from Bio.SeqUtils import ORF
+from Bio.SeqUtils.ORF import find_orfs, find_orfs_in_file
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+
+def simple_orfs(sequence, table, min_length):
+    """Simple codon by codon ORF finder for comparison."""
+    codon_table = ambiguous_generic_by_id[table]
+    sequence = sequence.upper()
+    length = len(sequence)
+    answer = []
+    for strand, nuc in [(+1, sequence), (-1, reverse_complement(sequence))]:
+        for frame in range(3):
+            start = None
+            for i in range(frame, length - 2, 3):
+                codon = nuc[i:i + 3]
+                if codon in codon_table.stop_codons:
+                    if start is not None and (i - start) // 3 >= min_length:
+                        protein = translate(nuc[start:i + 3], table, cds=True)
+                        if strand == +1:
+                            answer.append((start, i + 3, strand, protein))
+                        else:
+                            answer.append((length - i - 3, length - start,
+                                           strand, protein))
+                    start = None
+                elif start is None and codon in codon_table.start_codons \
+                and not codon.strip("ACGT"):
+                    start = i
+    return sorted(answer)
+
+
+class FindOrfTests(unittest.TestCase):
+    def setUp(self):
+        self.old_chunk_size = ORF._chunk_size
+
+    def tearDown(self):
+        ORF._chunk_size = self.old_chunk_size
+
+    def test_random(self):
+        """Find ORFs in random sequences, with various chunk sizes"""
+        rand = random.Random(123)
+        for i in range(20):
+            seq = "".join([rand.choice("ACGTACGTACGTacgtNR") \
+                           for j in range(rand.randint(0, 2000))])
+            for table in [1, 2, 11]:
+                for min_length in [0, 5, 20]:
+                    expected = simple_orfs(seq, table, min_length)
+                    for chunk_size in [1, 7, 100, 1000000]:
+                        ORF._chunk_size = chunk_size
+                        self.assertEqual(expected,
+                                         sorted(find_orfs(seq, table,
+                                                          min_length)))
+                    #Iterable of chunks
+                    chunks = [seq[j:j + 61] for j in range(0, len(seq), 61)]
+                    self.assertEqual(expected,
+                                     sorted(find_orfs(iter(chunks), table,
+                                                      min_length)))
+                    #Each strand on its own
+                    self.assertEqual([orf for orf in expected if orf[2] == 1],
+                                     sorted(find_orfs(seq, table, min_length,
+                                                      strand=+1)))
+                    self.assertEqual([orf for orf in expected if orf[2] == -1],
+                                     sorted(find_orfs(seq, table, min_length,
+                                                      strand=-1)))
+
+    def test_seq_objects(self):
+        """Find ORFs in Seq and MutableSeq objects and RNA"""
+        seq = "GGATGAAACCCTTTGGGTAGCTTAGGCTTTCATGGATG"
+        expected = list(find_orfs(seq, min_length=2))
+        self.assertEqual([(2, 20, 1, "MKPFG"), (21, 33, -1, "MKA")], expected)
+        self.assertEqual(expected, list(find_orfs(Seq(seq, generic_dna),
+                                                  min_length=2)))
+        self.assertEqual(expected, list(find_orfs(MutableSeq(seq),
+                                                  min_length=2)))
+        self.assertEqual(expected, list(find_orfs(seq.replace("T", "U"),
+                                                  min_length=2)))
+        self.assertEqual(expected, list(find_orfs(seq.lower(),
+                                                  min_length=2)))
+        self.assertEqual([], list(find_orfs("", min_length=0)))
+
+    def test_file(self):
+        """Find ORFs in every record of a file"""
+        expected = []
+        for record in SeqIO.parse("GenBank/NC_005816.fna", "fasta"):
+            for orf in simple_orfs(str(record.seq), 11, 30):
+                expected.append((record.id,) + orf)
+        self.assertTrue(expected)
+        for chunk_size in [50, 1000000]:
+            ORF._chunk_size = chunk_size
+            orfs = list(find_orfs_in_file("GenBank/NC_005816.fna", "fasta",
+                                          11, 30))
+            self.assertEqual(expected, sorted(orfs))
+        handle = open("GenBank/NC_005816.gb")
+        orfs = list(find_orfs_in_file(handle, "genbank", 11, 30))
+        handle.close()
+        #The GenBank file uses the accession as the record id
+        self.assertEqual([orf[1:] for orf in expected],
+                         sorted([orf[1:] for orf in orfs]))
+        self.assertEqual(set(["NC_005816.1"]), set([orf[0] for orf in orfs]))
+
+    def test_many_contigs(self):
+        """Find ORFs in a FASTA file with many contigs"""
+        rand = random.Random(456)
+        data = []
+        expected = []
+        for i in range(50):
+            seq = "".join([rand.choice("ACGT") \
+                           for j in range(rand.randint(0, 500))])
+            data.append(">contig%i description\n" % i)
+            for j in range(0, len(seq), 60):
+                data.append(seq[j:j + 60] + "\n")
+            expected.extend([("contig%i" % i,) + orf \
+                             for orf in simple_orfs(seq, 1, 10)])
+        fd, filename = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            handle = open(filename, "w")
+            handle.write("".join(data))
+            handle.close()
+            expected.sort()
+            self.assertEqual(expected, sorted(find_orfs_in_file(filename,
+                                              min_length=10)))
+            self.assertEqual(expected,
+                             sorted(find_orfs_in_file(StringIO("".join(data)),
+                                                      min_length=10)))
+            if multiprocessing is not None:
+                for processes in [1, 3]:
+                    orfs = list(find_orfs_in_file(filename, min_length=10,
+                                                  processes=processes))
+                    self.assertEqual(expected, sorted(orfs))
+        finally:
+            os.remove(filename)
+
+    def test_errors(self):
+        """Find ORFs with bad arguments"""
+        self.assertRaises(ValueError, find_orfs, "ATG", strand=0)
+        self.assertRaises(ValueError, find_orfs, "ATG", min_length=-1)
+        self.assertRaises(KeyError, find_orfs, "ATG", "Bad table")
+        self.assertRaises(TypeError, find_orfs_in_file,
+                          StringIO(">x\nATG\n"), processes=2)
+        self.assertRaises(ValueError, find_orfs_in_file,
+                          "GenBank/NC_005816.gb", "genbank", processes=2)
+        self.assertRaises(ValueError, find_orfs_in_file,
+                          "GenBank/NC_005816.fna", processes=0)
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
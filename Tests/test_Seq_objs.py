@@ -16,8 +16,11 @@ from Bio.Alphabet import generic_protein, generic_nucleotide, \
 from Bio.Alphabet.IUPAC import protein, extended_protein
 from Bio.Alphabet.IUPAC import unambiguous_dna, ambiguous_dna, ambiguous_rna
 from Bio.Data.IUPACData import ambiguous_dna_values, ambiguous_rna_values
-from Bio.Seq import Seq, UnknownSeq, MutableSeq, translate
+from Bio.Seq import Seq, UnknownSeq, MutableSeq, BufferSeq, PackedSeq
+from Bio.Seq import translate, translate_many, reverse_complement
+from Bio import Seq as SeqModule
 from Bio.Data.CodonTable import TranslationError, CodonTable
+from Bio.Data.CodonTable import ambiguous_generic_by_id
 
 #This is just the standard table with less stop codons
 #(replaced with coding for O as an artifical example)
@@ -86,6 +89,13 @@ class StringMethodTests(unittest.TestCase):
         UnknownSeq(10, generic_protein, "X"),
         UnknownSeq(10, character="X"),
         UnknownSeq(10),
+        BufferSeq("ACGTGGGGT", generic_dna),
+        BufferSeq("xxACGUGGGGUxx", generic_rna, 2, 11),
+        BufferSeq("GGGG", generic_protein, 1, 3),
+        BufferSeq("xA", generic_nucleotide, 1),
+        PackedSeq("ACGTGGGGT", generic_dna),
+        PackedSeq("GG", generic_nucleotide),
+        PackedSeq("NNgg"),
         ]
     for seq in _examples[:]:
         if isinstance(seq, Seq):
@@ -527,6 +537,258 @@ class StringMethodTests(unittest.TestCase):
 
     #TODO - Addition...
 
+
+class TranslationTests(unittest.TestCase):
+    """Check the codon lookup translation and translate_many."""
+    def reference(self, sequence, table, to_stop=False):
+        """Simple codon by codon translation for comparison."""
+        codon_table = ambiguous_generic_by_id[table]
+        sequence = sequence.upper()
+        protein = []
+        for i in range(0, len(sequence) - 2, 3):
+            codon = sequence[i:i+3]
+            if codon in codon_table.stop_codons:
+                if to_stop:
+                    break
+                protein.append("*")
+                continue
+            try:
+                protein.append(codon_table.forward_table[codon])
+            except (KeyError, TranslationError):
+                protein.append("X")
+        return "".join(protein)
+
+    def test_random(self):
+        """Translate random sequences with each codon table"""
+        import random
+        rand = random.Random(2012)
+        sequences = ["".join([rand.choice("ACGTacgtNRY") \
+                              for j in range(rand.randint(0, 200))]) \
+                     for i in range(100)]
+        sequences.append("".join([rand.choice("ACGU") for j in range(100)]))
+        for table in ambiguous_generic_by_id:
+            for to_stop in [False, True]:
+                expected = [self.reference(seq, table, to_stop) \
+                            for seq in sequences]
+                self.assertEqual(expected, [translate(seq, table,
+                                                      to_stop=to_stop) \
+                                            for seq in sequences])
+                self.assertEqual(expected, translate_many(sequences, table,
+                                                          to_stop=to_stop))
+
+    def test_many(self):
+        """Translate many sequences, and in six frames"""
+        sequences = ["ATGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG",
+                     Seq("ATGGCCATTGTAATGGGCCGCTGAAAGGGTGCCCGATAG",
+                         generic_dna),
+                     MutableSeq("AUGGCCAUUGUAAUGGGCCGCUGA", generic_rna),
+                     "", "AC", "TTGNNNTAN"]
+        for seq in sequences:
+            self.assertEqual([str(translate(seq, stop_symbol="@"))],
+                             [str(p) for p in translate_many([seq],
+                                                             stop_symbol="@")])
+            frames = translate_many([seq], 11, six_frames=True)[0]
+            self.assertEqual(6, len(frames))
+            if isinstance(seq, MutableSeq):
+                seq = seq.toseq()
+            rc = reverse_complement(seq)
+            for i in range(3):
+                self.assertEqual(str(translate(seq[i:], 11)), str(frames[i]))
+                self.assertEqual(str(translate(rc[i:], 11)),
+                                 str(frames[i + 3]))
+            if isinstance(seq, Seq):
+                for frame in frames:
+                    self.assertTrue(isinstance(frame, Seq))
+        self.assertEqual(["M", "MG"],
+                         translate_many(["ATGTAA", "ATGGGCTAG"], cds=True))
+
+    def test_errors(self):
+        """Translate many with bad arguments or codons"""
+        self.assertRaises(KeyError, translate_many, ["ATG"], "Bad table")
+        self.assertRaises(ValueError, translate_many, ["ATGTAA"], cds=True,
+                          six_frames=True)
+        self.assertRaises(TranslationError, translate_many, ["ATGTA?"])
+        self.assertRaises(TranslationError, translate_many,
+                          ["ATGTAGCCCTAA"], cds=True)
+        #Invalid codons after the first stop are ignored with to_stop
+        self.assertEqual(["M"], translate_many(["ATGTAGTA?"], to_stop=True))
+
+    def test_table_freed(self):
+        """Translating with a codon table does not keep it alive"""
+        import gc
+        import weakref
+        from Bio.Data.CodonTable import NCBICodonTableDNA, \
+                                        standard_dna_table
+        table = NCBICodonTableDNA(99, ["Test"],
+                                  dict(standard_dna_table.forward_table),
+                                  ["ATG"], ["TAA", "TAG"])
+        self.assertEqual("MW*", translate("ATGTGGTAA", table))
+        self.assertEqual(["MW*"], translate_many(["ATGTGGTAG"], table))
+        ref = weakref.ref(table)
+        del table
+        gc.collect()
+        self.assertTrue(ref() is None)
+
+
+class BufferSeqTests(unittest.TestCase):
+    """Check BufferSeq views match slicing a string."""
+    def setUp(self):
+        self.text = "".join(["ACGTNNGATTACAgattacaGGCCTTAAGG"[(i * 7) % 30] \
+                             for i in range(1000)])
+
+    def check_views(self, seq, text):
+        self.assertEqual(len(text), len(seq))
+        self.assertEqual(text, str(seq))
+        for start, end in [(0, None), (5, 17), (100, 900), (-50, -10),
+                           (900, 100), (999, 2000)]:
+            view = seq[start:end]
+            self.assertTrue(isinstance(view, BufferSeq))
+            self.assertTrue(view._buffer is seq._buffer)
+            self.assertEqual(text[start:end], str(view))
+            self.assertEqual(text[start:end][3:-3], str(view[3:-3]))
+            for step in [2, 3, -1, -4]:
+                self.assertEqual(text[start:end][::step], str(view[::step]))
+            for sub in ["A", "GATTACA", "TTT", ""]:
+                self.assertEqual(text[start:end].count(sub), view.count(sub))
+                self.assertEqual(text[start:end].find(sub), view.find(sub))
+                self.assertEqual(text[start:end].rfind(sub), view.rfind(sub))
+                self.assertEqual(sub in text[start:end], sub in view)
+                self.assertEqual(text[start:end].count(sub, 5, -5),
+                                 view.count(sub, 5, -5))
+                self.assertEqual(text[start:end].find(sub, 2000),
+                                 view.find(sub, 2000))
+            self.assertEqual(str(Seq(text[start:end]).reverse_complement()),
+                             str(view.reverse_complement()))
+            if len(view):
+                self.assertEqual(text[start:end][-1], view[-1])
+
+    def test_string(self):
+        """BufferSeq using a string"""
+        self.check_views(BufferSeq(self.text, generic_dna), self.text)
+
+    def test_bytearray(self):
+        """BufferSeq using a bytearray"""
+        self.check_views(BufferSeq(bytearray(self.text), generic_dna),
+                         self.text)
+
+    def test_mmap(self):
+        """BufferSeq using a memory mapped file"""
+        import os
+        import mmap
+        import tempfile
+        handle = tempfile.TemporaryFile()
+        try:
+            handle.write(">Example\n" + self.text)
+            handle.flush()
+            data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self.check_views(BufferSeq(data, generic_dna, 9), self.text)
+            data.close()
+        finally:
+            handle.close()
+
+    def test_errors(self):
+        """BufferSeq with bad arguments"""
+        self.assertRaises(TypeError, BufferSeq, Seq("ACGT"))
+        self.assertRaises(TypeError, BufferSeq, 1066)
+        self.assertRaises(ValueError, BufferSeq, "ACGT", generic_dna, 3, 2)
+        self.assertRaises(ValueError, BufferSeq, "ACGT", generic_dna, 0, 5)
+        self.assertRaises(IndexError, BufferSeq("ACGT", generic_dna, 1, 3)
+                          .__getitem__, 2)
+        self.assertRaises(ValueError, BufferSeq("ACGT").__getitem__,
+                          slice(None, None, 0))
+
+
+class PackedSeqTests(unittest.TestCase):
+    """Check PackedSeq objects match a string."""
+    def setUp(self):
+        import random
+        rand = random.Random(1066)
+        pieces = []
+        for i in range(300):
+            choice = rand.random()
+            if choice < 0.1:
+                pieces.append("N" * rand.randint(1, 20))
+            elif choice < 0.2:
+                pieces.append(rand.choice("RYSWKMBDHVN-"))
+            elif choice < 0.3:
+                pieces.append("".join([rand.choice("acgtn") \
+                                       for j in range(rand.randint(1, 20))]))
+            else:
+                pieces.append("".join([rand.choice("ACGT") \
+                                       for j in range(rand.randint(1, 30))]))
+        self.text = "".join(pieces)
+        #Use small blocks to test the searches spanning blocks
+        self.old_block_size = SeqModule._packed_block_size
+        SeqModule._packed_block_size = 37
+
+    def tearDown(self):
+        SeqModule._packed_block_size = self.old_block_size
+
+    def check(self, seq, text):
+        self.assertEqual(len(text), len(seq))
+        self.assertEqual(text, str(seq))
+        for sub in ["A", "C", "G", "T", "N", "a", "g", "-", "R", "AC",
+                    "GATTACA", "NN", "nn", "TTT", "Aa", ""]:
+            self.assertEqual(text.count(sub), seq.count(sub), sub)
+            self.assertEqual(text.find(sub), seq.find(sub), sub)
+            self.assertEqual(text.rfind(sub), seq.rfind(sub), sub)
+            self.assertEqual(sub in text, sub in seq)
+            for start, end in [(5, -5), (-100, -3), (7, 3), (2000, 3000),
+                               (13, 1000), (0, 1)]:
+                self.assertEqual(text.count(sub, start, end),
+                                 seq.count(sub, start, end))
+                self.assertEqual(text.find(sub, start, end),
+                                 seq.find(sub, start, end))
+                self.assertEqual(text.rfind(sub, start, end),
+                                 seq.rfind(sub, start, end))
+
+    def test_packed(self):
+        """PackedSeq methods match a string"""
+        seq = PackedSeq(self.text, generic_dna)
+        self.check(seq, self.text)
+        self.check(seq.complement(), str(Seq(self.text).complement()))
+        self.check(seq.reverse_complement(),
+                   str(Seq(self.text).reverse_complement()))
+
+    def test_slices(self):
+        """PackedSeq slices match a string"""
+        seq = PackedSeq(self.text, generic_dna)
+        for start, end in [(0, 10), (1, 1000), (2, -7), (3, -1), (-500, None),
+                           (700, 600)]:
+            view = seq[start:end]
+            self.assertTrue(isinstance(view, PackedSeq))
+            self.check(view, self.text[start:end])
+            self.check(view.reverse_complement()[5:-2],
+                       str(Seq(self.text[start:end]).reverse_complement())[5:-2])
+            self.check(view.complement()[1:],
+                       str(Seq(self.text[start:end]).complement())[1:])
+            for step in [2, 3, -1, -4]:
+                self.assertEqual(self.text[start:end][::step],
+                                 str(view[::step]))
+            for i in [0, 1, 2, 3, 4, 5, -1, -4, -5]:
+                if abs(i) < len(view):
+                    self.assertEqual(self.text[start:end][i], view[i])
+
+    def test_simple(self):
+        """PackedSeq of short and simple sequences"""
+        for text in ["", "A", "ACGT", "ACGTA", "NNNN", "acgt", "aNNc",
+                     "TTTTTTTTT", "ACGTACGTACGTN"]:
+            seq = PackedSeq(text)
+            self.assertEqual(text, str(seq))
+            self.assertEqual(repr(Seq(text, generic_dna)).replace("Seq", ""),
+                             repr(seq).replace("PackedSeq", ""))
+            self.check(seq, text)
+
+    def test_errors(self):
+        """PackedSeq with bad arguments"""
+        self.assertRaises(TypeError, PackedSeq, Seq("ACGT"))
+        self.assertRaises(ValueError, PackedSeq, "ACGU", generic_rna)
+        self.assertRaises(ValueError, PackedSeq, "MKLV", generic_protein)
+        self.assertRaises(IndexError, PackedSeq("ACGT").__getitem__, 4)
+        self.assertRaises(IndexError, PackedSeq("ACGT").__getitem__, -5)
+        self.assertRaises(TypeError, PackedSeq("ACGT").count,
+                          Seq("A", generic_protein))
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)
@@ -0,0 +1,140 @@
+# Copyright 2012 by the Biopython contributors.  All rights reserved.
+# This code is part of the Biopython distribution and governed by its
+# license.  Please see the LICENSE file that should have been included
+# as part of this package.
+
+"""Test code for working with BGZF files (used in BAM files).
+
+See also the doctests in bgzf.py which are called via run_tests.py
+"""
+
+import unittest
+import gzip
+import os
+from random import shuffle
+
+from Bio._py3k import _as_bytes
+_empty_bytes_string = _as_bytes("")
+
+from Bio import bgzf
+
+
+class BgzfTests(unittest.TestCase):
+    def setUp(self):
+        self.temp_file = "temp.bgzf"
+        if os.path.isfile(self.temp_file):
+            os.remove(self.temp_file)
+
+    def tearDown(self):
+        if os.path.isfile(self.temp_file):
+            os.remove(self.temp_file)
+
+    def rewrite(self, compressed_input_file, output_file):
+        h = gzip.open(compressed_input_file, "rb")
+        data = h.read()
+        h.close()
+
+        h = bgzf.BgzfWriter(output_file, "wb")
+        h.write(data)
+        h.close() #Gives empty BGZF block as BAM EOF marker
+
+        h = gzip.open(output_file)
+        new_data = h.read()
+        h.close()
+
+        #Check the decompressed files agree
+        self.assertTrue(new_data, "Empty BGZF file?")
+        self.assertEqual(len(data), len(new_data))
+        self.assertEqual(data, new_data)
+
+    def check_random(self, filename):
+        """Check BGZF random access by reading blocks in forward & reverse order"""
+        h = gzip.open(filename, "rb")
+        old = h.read()
+        h.close()
+
+        #Record the virtual offset of each line
+        h = bgzf.BgzfReader(filename, "rb")
+        offsets = []
+        lines = []
+        while True:
+            offsets.append(h.tell())
+            line = h.readline()
+            if not line:
+                break
+            lines.append(line)
+        h.close()
+        self.assertEqual(_empty_bytes_string.join(lines), old)
+
+        #Now read the lines back in a random order
+        h = bgzf.BgzfReader(filename, "rb")
+        order = range(len(lines))
+        shuffle(order)
+        for i in order:
+            h.seek(offsets[i])
+            self.assertEqual(h.tell(), offsets[i])
+            self.assertEqual(h.readline(), lines[i])
+        #And read from each offset to the end of the file
+        for i in [0, len(lines) // 2, len(lines) - 1]:
+            h.seek(offsets[i])
+            self.assertEqual(h.read(), _empty_bytes_string.join(lines[i:]))
+        h.close()
+
+    def test_random_genbank(self):
+        """Check random access to GenBank/NC_000932.gb.bgz"""
+        self.check_random("GenBank/NC_000932.gb.bgz")
+
+    def test_random_uniprot(self):
+        """Check random access to SwissProt/multi_ex.xml.bgz"""
+        self.check_random("SwissProt/multi_ex.xml.bgz")
+
+    def test_random_fastq(self):
+        """Check random access to Quality/example.fastq.bgz"""
+        self.check_random("Quality/example.fastq.bgz")
+
+    def test_write_genbank(self):
+        """Write a multi-block BGZF file and check it reads back"""
+        self.rewrite("GenBank/NC_000932.gb.bgz", self.temp_file)
+        self.check_random(self.temp_file)
+
+    def test_read_across_blocks(self):
+        """Read fixed size chunks spanning many small BGZF blocks"""
+        data = _as_bytes("".join("%05i\n" % i for i in range(5000)))
+        h = bgzf.BgzfWriter(self.temp_file, "wb")
+        #Force lots of small blocks,
+        for i in range(0, len(data), 1000):
+            h.write(data[i:i+1000])
+            h.flush()
+        h.close()
+        h = bgzf.BgzfReader(self.temp_file, "rb")
+        chunks = []
+        while True:
+            chunk = h.read(777)
+            if not chunk:
+                break
+            self.assertTrue(len(chunk) == 777 or not h.read(1))
+            chunks.append(chunk)
+        h.close()
+        self.assertEqual(_empty_bytes_string.join(chunks), data)
+
+    def test_uncompressible(self):
+        """Write and read back data which doesn't compress"""
+        import random
+        data = _as_bytes("".join(chr(random.randint(0, 255)) \
+                                 for i in range(150000)))
+        h = bgzf.BgzfWriter(self.temp_file, "wb")
+        h.write(data)
+        h.close()
+        h = bgzf.BgzfReader(self.temp_file, "rb")
+        self.assertEqual(h.read(), data)
+        h.close()
+
+    def test_not_bgzf(self):
+        """Reading a plain gzip file should fail"""
+        self.assertRaises(ValueError, bgzf.BgzfReader,
+                          "Quality/example.fastq.gz")
+
+
+if __name__ == "__main__":
+    runner = unittest.TextTestRunner(verbosity = 2)
+    unittest.main(testRunner=runner)
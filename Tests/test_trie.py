@@ -145,6 +145,95 @@ class TestTrieFind(unittest.TestCase):
         self.assertEqual(k, [("hello", 0, 5), ("world", 6, 11)])
 
 
+class TestAhoCorasick(unittest.TestCase):
+
+    def simple_find(self, string, keys, reverse_complement=False):
+        from Bio.Seq import reverse_complement as rc
+        results = []
+        for key in keys:
+            patterns = [(key, 1)]
+            if reverse_complement:
+                patterns.append((rc(key), -1))
+            for pattern, strand in patterns:
+                for start in range(len(string) - len(pattern) + 1):
+                    if string[start:start+len(pattern)] == pattern:
+                        results.append((key, start, start+len(pattern),
+                                        strand))
+        results.sort()
+        return results
+
+    def test_find_all(self):
+        from Bio import triefind
+        trieobj = trie.trie()
+        for key in ["he", "hello", "hej", "foo", "wor", "world", "o"]:
+            trieobj[key] = len(key)
+        k = triefind.find_all("hello world!", trieobj)
+        self.assertEqual(k, [("he", 0, 2, 1), ("hello", 0, 5, 1),
+                             ("o", 4, 5, 1), ("o", 7, 8, 1),
+                             ("wor", 6, 9, 1), ("world", 6, 11, 1)])
+        k = [(key, start, end) for (key, start, end, strand) in k]
+        k.sort()
+        old = triefind.find("hello world!", trieobj)
+        old.sort()
+        self.assertEqual(k, old)
+        self.assertEqual(triefind.find_all("", trieobj), [])
+        self.assertEqual(triefind.find_all("hello", trie.trie()), [])
+
+    def test_random(self):
+        import random
+        from Bio import triefind
+        rand = random.Random(7)
+        for i in range(20):
+            string = "".join([rand.choice("ACGT") for j in range(500)])
+            keys = set()
+            for j in range(rand.randint(1, 50)):
+                start = rand.randint(0, 480)
+                keys.add(string[start:start+rand.randint(1, 12)])
+                keys.add("".join([rand.choice("ACGTN")
+                                  for j in range(rand.randint(1, 6))]))
+            trieobj = trie.trie()
+            for key in keys:
+                trieobj[key] = 1
+            for reverse_complement in [False, True]:
+                expected = self.simple_find(string, keys, reverse_complement)
+                automaton = triefind.AhoCorasick(trieobj, reverse_complement)
+                k = automaton.find(string)
+                self.assertEqual(sorted(k), expected)
+                #Ordered by end, longest first
+                self.assertEqual(k, sorted(k, key=lambda x: (x[2], x[1])))
+                for size in [1, 7, 100]:
+                    chunks = [string[j:j+size]
+                              for j in range(0, len(string), size)]
+                    k = list(automaton.find_iter(chunks))
+                    self.assertEqual(sorted(k), expected)
+
+    def test_reverse_complement(self):
+        from Bio import triefind
+        trieobj = trie.trie()
+        trieobj["GATC"] = "palindrome"
+        trieobj["AACG"] = 1
+        trieobj["CGTT"] = 2
+        trieobj["ryn"] = 3
+        automaton = triefind.AhoCorasick(trieobj, reverse_complement=True)
+        self.assertEqual(len(automaton), 8)
+        k = automaton.find("TTGATCAACGTTnry")
+        k.sort()
+        self.assertEqual(k, [("AACG", 6, 10, 1), ("AACG", 8, 12, -1),
+                             ("CGTT", 6, 10, -1), ("CGTT", 8, 12, 1),
+                             ("GATC", 2, 6, -1), ("GATC", 2, 6, 1),
+                             ("ryn", 12, 15, -1)])
+        #Later changes to the trie are ignored
+        trieobj["TTG"] = 4
+        self.assertEqual(len(automaton), 8)
+
+    def test_errors(self):
+        from Bio import triefind
+        self.assertRaises(TypeError, triefind.AhoCorasick, {"A": 1})
+        automaton = trie.automaton(trie.trie())
+        self.assertRaises(ValueError, automaton.search, "ACGT", -1)
+        self.assertRaises(ValueError, automaton.search, "ACGT", 1)
+
+
 if __name__ == "__main__":
     runner = unittest.TextTestRunner(verbosity = 2)
     unittest.main(testRunner=runner)